@@ -1,29 +1,59 @@
+# Primero: el reloj del arranque parte aquí (TIEMPOS_ARRANQUE=0 no imprime el detalle)
+from tiempos_arranque import marcar_fase, mostrar_resumen_arranque, instalar_primera_respuesta
+
 import pandas as pd
 import numpy as np
+marcar_fase('import pandas/numpy')
 from datetime import datetime, timedelta
 import dash
-from dash import html, dcc, dash_table, callback, Input, Output, State, ALL, MATCH
+from dash import html, dcc, dash_table, callback, clientside_callback, ClientsideFunction, Input, Output, State, ALL, MATCH, Patch
 import dash_bootstrap_components as dbc
-from openpyxl import load_workbook
+marcar_fase('import dash')
 import os
+import sys
+import importlib.util
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+marcar_fase('import plotly')
 import uuid
+import zlib
 from pathlib import Path
 
 from precalculos_optimizado import (
     obtener_rentabilidades_acumuladas_precalculadas,
     obtener_rentabilidades_anualizadas_precalculadas,
     obtener_rentabilidades_por_año_precalculadas,
-    verificar_precalculos_vigentes
+    precalculos_validados
 )
-
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+from cache_servidor import calcular_una_vez, obtener_cache, guardar_cache, descartar_cache, version_datos
+from metricas_callbacks import instalar_metricas, registrar_evento
+from perfilado import instalar_perfilado
+from registro_fondos import crear_registro_fondos
+from buscador_fondos import crear_indice_fondos, opciones_busqueda
+from memoria_procesos import compactar_precios
+
+# Compresión gzip de las respuestas (el hover de las figuras es muy repetitivo).
+# Dash importa flask_compress por su cuenta; aquí solo se verifica que exista.
+COMPRESION_DISPONIBLE = importlib.util.find_spec('flask_compress') is not None
+if not COMPRESION_DISPONIBLE:
+    print("⚠️ flask-compress no instalado: respuestas sin comprimir")
+marcar_fase('import módulos del panel')
+
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], compress=COMPRESION_DISPONIBLE)
 
 server = app.server
+
+# Latencia, CPU y tamaño de cada callback en /metrics (METRICAS_CALLBACKS=0 lo desactiva)
+instalar_metricas(app)
+
+# cProfile de callbacks a pedido (cabecera X-Perfilar) o por muestreo; PERFILADO=1 lo activa
+instalar_perfilado(app)
+
+instalar_primera_respuesta(app)
+marcar_fase('app Dash')
+
 import informe_module
 import anexo_mensual_module 
+marcar_fase('import informe/anexo')
 
 # =============================================================================
 # FUNCIONES DE CARGA Y PROCESAMIENTO DE DATOS
@@ -402,6 +432,10 @@ def cargar_datos_optimizado():
             pesos_df.rename(columns={'Date': 'Dates'}, inplace=True)
             dolares_df.rename(columns={'Date': 'Dates'}, inplace=True)
         
+        # Un bloque float64 por moneda: con preload_app los workers comparten la matriz
+        pesos_df = compactar_precios(pesos_df)
+        dolares_df = compactar_precios(dolares_df)
+        
         fondos_unicos, fondos_a_series, fondo_serie_a_codigo = crear_mapeos_desde_columnas(pesos_df, dolares_df)
         return pesos_df, dolares_df, fondos_unicos, fondos_a_series, fondo_serie_a_codigo, []
         
@@ -409,8 +443,41 @@ def cargar_datos_optimizado():
         print(f"Error cargando datos: {e}")
         return None, None, [], {}, {}, []
     
+# =============================================================================
+# TEXTOS DE FECHA PRECALCULADOS
+# =============================================================================
+
+def construir_tabla_fechas(df):
+    """
+    Textos de fecha para todo el eje 'Dates' de un DataFrame, indexados por
+    posición de fila: 'dd-mm-aaaa' (categorías del eje x; sin '/', que el
+    JSON de plotly escapa como \\u002f)
+    """
+    if df is None or 'Dates' not in df.columns:
+        return None
+    
+    return {
+        'fechas': df['Dates'].to_numpy(),
+        'eje': pd.to_datetime(df['Dates']).dt.strftime('%d-%m-%Y').to_numpy(dtype=object),
+    }
+
+
 # Cargar datos al iniciar
 pesos_df, dolares_df, fondos_unicos, fondos_a_series, fondo_serie_a_codigo, codigos = cargar_datos_optimizado()
+marcar_fase('lectura de datos')
+
+# Categorías, fondos SURA y códigos por moneda para informe y anexo (una vez por carga)
+registro_fondos = crear_registro_fondos(fondos_unicos, fondos_a_series, fondo_serie_a_codigo)
+
+# Índice de búsqueda para los dropdowns de fondos (las opciones se sirven por búsqueda)
+indice_fondos = crear_indice_fondos(fondos_unicos)
+
+# Textos de fecha de cada moneda (una vez por carga de datos)
+tablas_fechas = {
+    'CLP': construir_tabla_fechas(pesos_df),
+    'USD': construir_tabla_fechas(dolares_df),
+}
+marcar_fase('registro, índice y fechas')
 
 # =============================================================================
 # DEFINIR FONDOS ÍNDICES FIJOS - CORREGIDO
@@ -423,55 +490,6 @@ FONDOS_INDICES = [
     ("Fondo Mutuo SURA Multiactivo Agresivo", "F")
 ]
 
-# =============================================================================
-# FONDOS SURA PARA PDFs - LISTA CONFIGURABLE
-# =============================================================================
-
-FONDOS_SURA_PDF = [
-    "Fondo Mutuo SURA Estrategia Conservadora",
-    "Fondo Mutuo SURA Multiactivo Agresivo", 
-    "Fondo Mutuo SURA Multiactivo Moderado",
-    "Fondo Mutuo SURA Renta Bonos Chile",
-    "Fondo Mutuo SURA Renta Corporativa Largo Plazo",
-    "Fondo Mutuo SURA Renta Corto Plazo Chile",
-    "Fondo Mutuo SURA Renta Deposito Chile",
-    "Fondo Mutuo SURA Renta Internacional",
-    "Fondo Mutuo SURA Renta Local UF",
-    "Fondo Mutuo SURA Seleccion Acciones Chile",
-    "Fondo Mutuo SURA Seleccion Acciones Emergentes",
-    "Fondo Mutuo SURA Seleccion Acciones Latam",
-    "Fondo Mutuo SURA Seleccion Acciones USA",
-    "Fondo Mutuo SURA Seleccion Global",
-    "Fondo Mutuo SURA Renta Corto Plazo UF Chile",
-    "Fondo Mutuo SURA Money Market Dólar",
-    "Fondo Mutuo SURA Cartera Patrimonial Conservadora",
-    "Renta Local",
-    "Gestion Activa", 
-    "Global Desarrollado",
-    "Global Emergente",
-    "Chile Equities"
-]
-
-def filtrar_solo_fondos_sura(fondos_unicos, fondos_a_series, fondo_serie_a_codigo):
-    """
-    Filtra solo los fondos SURA para usar en PDFs
-    """
-    fondos_sura_filtrados = {}
-    fondo_serie_codigo_sura = {}
-    
-    for fondo in FONDOS_SURA_PDF:
-        if fondo in fondos_a_series:
-            fondos_sura_filtrados[fondo] = fondos_a_series[fondo]
-            
-            # Copiar los códigos correspondientes
-            for moneda in ['CLP', 'USD']:
-                if moneda in fondos_a_series[fondo]:
-                    for serie in fondos_a_series[fondo][moneda]:
-                        if (fondo, serie, moneda) in fondo_serie_a_codigo:
-                            fondo_serie_codigo_sura[(fondo, serie, moneda)] = fondo_serie_a_codigo[(fondo, serie, moneda)]
-    
-    return list(fondos_sura_filtrados.keys()), fondos_sura_filtrados, fondo_serie_codigo_sura
-
 def obtener_codigos_indices(moneda='CLP'):
     """
     Obtiene los códigos correspondientes a los fondos índices
@@ -600,14 +618,15 @@ def calcular_rentabilidades(df, codigos_seleccionados, nombres_mostrar):
     # Detectar moneda basada en el DataFrame
     moneda = 'CLP' if df is pesos_df else 'USD'
     
-    # Intentar usar pre-cálculos primero
-    if verificar_precalculos_vigentes():
+    # Intentar usar pre-cálculos primero (solo si pasaron la verificación de paridad)
+    if precalculos_validados('acumuladas'):
         try:
             print("⚡ Usando pre-cálculos para rentabilidades acumuladas...")
             resultado = obtener_rentabilidades_acumuladas_precalculadas(
                 moneda, codigos_seleccionados, nombres_mostrar
             )
             if resultado is not None and not resultado.empty:
+                registrar_evento('precalculo:acumuladas')
                 return resultado
             else:
                 print("⚠️ Pre-cálculos vacíos, usando cálculo en tiempo real...")
@@ -616,6 +635,7 @@ def calcular_rentabilidades(df, codigos_seleccionados, nombres_mostrar):
     
     # FALLBACK: Cálculo original en tiempo real
     print("🔄 Calculando rentabilidades en tiempo real...")
+    registrar_evento('tiempo_real:acumuladas')
     resultados = []
     fecha_actual = df['Dates'].max()
     
@@ -748,14 +768,15 @@ def calcular_rentabilidades_anualizadas(df, codigos_seleccionados, nombres_mostr
     # Detectar moneda basada en el DataFrame
     moneda = 'CLP' if df is pesos_df else 'USD'
     
-    # Intentar usar pre-cálculos primero
-    if verificar_precalculos_vigentes():
+    # Intentar usar pre-cálculos primero (solo si pasaron la verificación de paridad)
+    if precalculos_validados('anualizadas'):
         try:
             print("⚡ Usando pre-cálculos para rentabilidades anualizadas...")
             resultado = obtener_rentabilidades_anualizadas_precalculadas(
                 moneda, codigos_seleccionados, nombres_mostrar
             )
             if resultado is not None and not resultado.empty:
+                registrar_evento('precalculo:anualizadas')
                 return resultado
             else:
                 print("⚠️ Pre-cálculos vacíos, usando cálculo en tiempo real...")
@@ -764,6 +785,7 @@ def calcular_rentabilidades_anualizadas(df, codigos_seleccionados, nombres_mostr
     
     # FALLBACK: Cálculo original en tiempo real
     print("🔄 Calculando rentabilidades anualizadas en tiempo real...")
+    registrar_evento('tiempo_real:anualizadas')
     resultados = []
     fecha_actual = df['Dates'].max()
     
@@ -871,14 +893,15 @@ def calcular_rentabilidades_por_año(df, codigos_seleccionados, nombres_mostrar)
     # Detectar moneda basada en el DataFrame
     moneda = 'CLP' if df is pesos_df else 'USD'
     
-    # Intentar usar pre-cálculos primero
-    if verificar_precalculos_vigentes():
+    # Intentar usar pre-cálculos primero (solo si pasaron la verificación de paridad)
+    if precalculos_validados('por_año'):
         try:
             print("⚡ Usando pre-cálculos para rentabilidades por año...")
             resultado = obtener_rentabilidades_por_año_precalculadas(
                 moneda, codigos_seleccionados, nombres_mostrar
             )
             if resultado is not None and not resultado.empty:
+                registrar_evento('precalculo:por_año')
                 return resultado
             else:
                 print("⚠️ Pre-cálculos vacíos, usando cálculo en tiempo real...")
@@ -887,6 +910,7 @@ def calcular_rentabilidades_por_año(df, codigos_seleccionados, nombres_mostrar)
     
     # FALLBACK: Cálculo original en tiempo real
     print("🔄 Calculando rentabilidades por año en tiempo real...")
+    registrar_evento('tiempo_real:por_año')
     resultados = []
     años = sorted(df['Dates'].dt.year.unique())
     
@@ -1194,7 +1218,184 @@ def buscar_fecha_exacta_en_datos(df, fecha_objetivo, codigo=None):
         return fecha_objetivo
     
 
-def crear_grafico_retornos(df_retornos, codigos_seleccionados, nombres_mostrar):
+# =============================================================================
+# CODIFICACIÓN COMPACTA DE FIGURAS
+# =============================================================================
+
+# Los retornos se muestran con 2 decimales en el hover y 1 en el eje, así que
+# enviar más precisión solo agranda el JSON.
+DECIMALES_GRAFICO = 2
+
+# Las fechas viajan una sola vez, como categorías del eje x, y cada traza
+# solo lleva sus y (x0/dx las ubica en esas categorías). Con el hover
+# 'x unified' el JSON crece con fechas + fondos x fechas.
+#
+# Presupuesto de tamaño (KB) para ese JSON. Medido con plotly.io.to_json:
+# 1 fondo con ~2.600 fechas ~55 KB y 8 fondos con ~2.000 fechas ~125 KB; con
+# 1 MB caben ~20 fondos con 20 años de historia diaria. Solo si se supera se
+# reducen las fechas (último recurso) y el gráfico lo indica.
+PRESUPUESTO_FIGURA_KB = int(os.environ.get('PRESUPUESTO_FIGURA_KB', 1024))
+
+# Bytes aproximados, calibrados sobre figuras reales; solo sirven para
+# reducir antes de construir la figura (el tamaño final se mide)
+BYTES_FECHA_EJE = 14            # categoría '"03-01-2025", ' (una vez por fila)
+BYTES_PUNTO_TRAZA = 7           # y redondeado ('12.34, ')
+
+
+def estimar_tamano_figura_kb(num_filas, num_trazas):
+    """
+    Estima el tamaño del JSON de una figura de retornos sin serializarla
+    """
+    return num_filas * (BYTES_FECHA_EJE + num_trazas * BYTES_PUNTO_TRAZA) / 1024
+
+
+def medir_tamano_figura_kb(figura):
+    """
+    Tamaño real del JSON de la figura, con el mismo serializador que usa Dash
+    """
+    import plotly.io as pio
+    return len(pio.to_json(figura, validate=False)) / 1024
+
+
+def reducir_filas(df_retornos, num_filas_objetivo):
+    """
+    Deja a lo más num_filas_objetivo filas repartidas de forma pareja,
+    incluyendo siempre la primera y la última fecha de la ventana
+    """
+    num_filas = len(df_retornos)
+    num_filas_objetivo = max(2, num_filas_objetivo)
+    if num_filas <= num_filas_objetivo:
+        return df_retornos
+    
+    posiciones = np.unique(np.linspace(0, num_filas - 1, num_filas_objetivo).round().astype(int))
+    return df_retornos.iloc[posiciones]
+
+
+def reducir_filas_segun_presupuesto(df_retornos, num_trazas, presupuesto_kb=None):
+    """
+    Reduce las filas para que la figura estimada quepa en el presupuesto.
+    Es idempotente: el tamaño estimado es lineal en las filas, así que el
+    resultado ya cabe y una segunda llamada no cambia nada.
+    """
+    presupuesto_kb = presupuesto_kb or PRESUPUESTO_FIGURA_KB
+    num_filas = len(df_retornos)
+    
+    if num_filas < 3 or num_trazas == 0:
+        return df_retornos
+    
+    tamano_kb = estimar_tamano_figura_kb(num_filas, num_trazas)
+    if tamano_kb <= presupuesto_kb:
+        return df_retornos
+    
+    return reducir_filas(df_retornos, int(num_filas * presupuesto_kb / tamano_kb))
+
+
+def construir_figura_en_presupuesto(df_retornos, codigos, nombres, moneda):
+    """
+    Construye el gráfico de retornos sin superar PRESUPUESTO_FIGURA_KB. Lo
+    normal es que quepa completo; si no, como último recurso reduce según la
+    estimación antes de construir, mide el JSON real y, si aún se pasa,
+    reduce en proporción a lo medido y vuelve a construir. Una figura
+    reducida muestra un aviso con las fechas que se dejaron.
+    
+    Returns:
+        (figura, df_retornos con las filas realmente enviadas)
+    """
+    num_trazas = sum(1 for codigo in codigos if codigo in df_retornos.columns)
+    num_filas_originales = len(df_retornos)
+    
+    df_retornos = reducir_filas_segun_presupuesto(df_retornos, num_trazas)
+    figura = crear_grafico_retornos(df_retornos, codigos, nombres, moneda)
+    tamano_kb = medir_tamano_figura_kb(figura)
+    
+    for _ in range(3):
+        if tamano_kb <= PRESUPUESTO_FIGURA_KB or len(df_retornos) <= 2:
+            break
+        df_retornos = reducir_filas(
+            df_retornos, int(len(df_retornos) * PRESUPUESTO_FIGURA_KB / tamano_kb)
+        )
+        figura = crear_grafico_retornos(df_retornos, codigos, nombres, moneda)
+        tamano_kb = medir_tamano_figura_kb(figura)
+    
+    if len(df_retornos) < num_filas_originales:
+        print(f"📉 Figura de {num_trazas} fondos reducida a {len(df_retornos)} de "
+              f"{num_filas_originales} fechas: {tamano_kb:.0f} KB (presupuesto {PRESUPUESTO_FIGURA_KB} KB)")
+        figura.add_annotation(
+            text=(f"Se muestran {len(df_retornos)} de {num_filas_originales} fechas. "
+                  f"Acorta el período o quita fondos para verlas todas."),
+            xref='paper', yref='paper', x=0, y=1.02,
+            xanchor='left', yanchor='bottom', showarrow=False,
+            font={'family': 'SuraSans-Regular', 'size': 11, 'color': '#5A646E'}
+        )
+    
+    return figura, df_retornos
+
+
+def obtener_fechas_eje(df_retornos, moneda=None):
+    """
+    Devuelve las fechas 'dd-mm-aaaa' del eje x para las filas de df_retornos.
+    Si las filas vienen de los datos cargados de la moneda (su índice es la
+    posición en ese DataFrame) se toman de la tabla precalculada; si no, se
+    formatean en el momento.
+    """
+    tabla = tablas_fechas.get(moneda) if moneda else None
+    
+    if tabla is not None and len(df_retornos) > 0:
+        posiciones = df_retornos.index.to_numpy()
+        if (posiciones.dtype.kind == 'i'
+                and posiciones.min() >= 0 and posiciones.max() < len(tabla['fechas'])
+                and tabla['fechas'][posiciones[0]] == df_retornos['Dates'].iloc[0]
+                and tabla['fechas'][posiciones[-1]] == df_retornos['Dates'].iloc[-1]):
+            return tabla['eje'][posiciones].tolist()
+    
+    return pd.to_datetime(df_retornos['Dates']).dt.strftime('%d-%m-%Y').tolist()
+
+
+PALETA_PRIMARIA = ['#24272A', '#0B2DCE', '#5A646E', '#98A4AE', '#FFE946']
+PALETA_SECUNDARIA = [
+    '#727272', '#52C599', '#CC9967', '#9B5634', '#D4BE7F', 
+    '#3C86B4', '#A0A0A0', '#7FD4B3', '#D5AB80', '#C9805C', 
+    '#9E3541', '#A8CDE2', '#C8C8C8', '#A3E1C2', '#E0C1A2', 
+    '#D49A7D', '#DE9CA6', '#CBB363'
+]
+
+
+def asignar_colores_fondos(codigos):
+    """
+    Color de cada fondo según su código y no según su posición: cada código
+    tiene un color preferido de la paleta primaria y, si otro fondo de la
+    selección ya lo usa, toma el siguiente libre (primaria y luego
+    secundaria). Agregar o quitar un fondo casi nunca cambia el color de
+    los demás, así un Patch no tiene que reenviarlos.
+    """
+    paleta = PALETA_PRIMARIA + PALETA_SECUNDARIA
+    usados = set()
+    colores = []
+    
+    for codigo in codigos:
+        preferido = zlib.crc32(str(codigo).encode('utf-8')) % len(PALETA_PRIMARIA)
+        orden = (list(range(preferido, len(PALETA_PRIMARIA))) + list(range(preferido))
+                 + list(range(len(PALETA_PRIMARIA), len(paleta))))
+        indice = next((i for i in orden if i not in usados), len(colores) % len(paleta))
+        usados.add(indice)
+        colores.append(paleta[indice])
+    
+    return colores
+
+
+def nombre_corto_fondo(nombre_mostrar):
+    """
+    Nombre para leyenda y hover: sin el prefijo SURA y con la serie entre
+    paréntesis ('Renta Local (B)')
+    """
+    nombre_corto = nombre_mostrar.replace("FONDO MUTUO SURA ", "").replace("SURA ", "")
+    if " - " in nombre_corto:
+        partes = nombre_corto.split(" - ")
+        return f"{partes[0]} ({partes[1]})"
+    return nombre_corto
+
+
+def crear_grafico_retornos(df_retornos, codigos_seleccionados, nombres_mostrar, moneda=None):
     if df_retornos.empty:
         return go.Figure().add_annotation(
             text="No hay datos para el período seleccionado",
@@ -1209,129 +1410,32 @@ def crear_grafico_retornos(df_retornos, codigos_seleccionados, nombres_mostrar):
         )
     
     try:
-        # Función auxiliar para formatear fechas en español
-        def formatear_fecha_espanol(fecha):
-            try:
-                dias_es = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
-                meses_es = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
-                           'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
-                
-                dia_semana = dias_es[fecha.weekday()]
-                dia = fecha.day
-                mes = meses_es[fecha.month - 1]
-                año = fecha.year
-                
-                return f"{dia_semana} {dia} de {mes} {año}"
-            except:
-                return str(fecha)
-        
         fig = go.Figure()
         
-        paleta_primaria = ['#24272A', '#0B2DCE', '#5A646E', '#98A4AE', '#FFE946']
-        paleta_secundaria = [
-            '#727272', '#52C599', '#CC9967', '#9B5634', '#D4BE7F', 
-            '#3C86B4', '#A0A0A0', '#7FD4B3', '#D5AB80', '#C9805C', 
-            '#9E3541', '#A8CDE2', '#C8C8C8', '#A3E1C2', '#E0C1A2', 
-            '#D49A7D', '#DE9CA6', '#CBB363'
-        ]
-        
-        num_fondos = len(codigos_seleccionados)
-        colores_a_usar = paleta_primaria if num_fondos <= 5 else paleta_secundaria
-        
-        # Preparar datos con validación
+        # Preparar datos con validación (fechas desde la tabla precalculada)
         try:
-            fechas_formateadas = [formatear_fecha_espanol(fecha.date()) for fecha in df_retornos['Dates']]
-        except:
-            fechas_formateadas = [str(fecha) for fecha in df_retornos['Dates']]
+            fechas_eje_x = obtener_fechas_eje(df_retornos, moneda)
+        except Exception:
+            fechas_eje_x = [str(fecha) for fecha in df_retornos['Dates']]
         
-        # Crear hover texts personalizados con manejo de errores
-        hover_texts_por_traza = []
-        
-        for i, (codigo, nombre_mostrar) in enumerate(zip(codigos_seleccionados, nombres_mostrar)):
-            hover_texts = []
-            
-            if codigo not in df_retornos.columns:
-                hover_texts_por_traza.append([])
-                continue
-            
-            for j in range(len(df_retornos)):
-                try:
-                    # Para cada punto, obtener todos los valores de fondos en esa fecha
-                    valores_fecha = []
-                    
-                    for k, otro_codigo in enumerate(codigos_seleccionados):
-                        if otro_codigo in df_retornos.columns and j < len(df_retornos[otro_codigo]):
-                            try:
-                                valor_otro = df_retornos[otro_codigo].iloc[j]
-                                if pd.notna(valor_otro):
-                                    # Preparar nombre más corto
-                                    nombre_otro = nombres_mostrar[k].replace("FONDO MUTUO SURA ", "").replace("SURA ", "")
-                                    if " - " in nombre_otro:
-                                        partes = nombre_otro.split(" - ")
-                                        nombre_final = f"{partes[0]} ({partes[1]})" if len(partes) > 1 else nombre_otro
-                                    else:
-                                        nombre_final = nombre_otro
-                                    
-                                    # Obtener color para este fondo
-                                    color_fondo = colores_a_usar[k % len(colores_a_usar)]
-                                    
-                                    valores_fecha.append((nombre_final, float(valor_otro), color_fondo))
-                            except (IndexError, TypeError, ValueError):
-                                continue
-                    
-                    # ORDENAR POR VALOR DESCENDENTE (mayor rendimiento primero)
-                    valores_fecha.sort(key=lambda x: x[1], reverse=True)
-                    
-                    # Crear texto del hover con fecha y todos los fondos ordenados
-                    try:
-                        fecha_str = fechas_formateadas[j] if j < len(fechas_formateadas) else str(df_retornos['Dates'].iloc[j])
-                    except:
-                        fecha_str = f"Fecha {j}"
-                    
-                    hover_text = f"<b>{fecha_str}</b><br><br>"
-                    for nombre_fondo, valor_fondo, color_fondo in valores_fecha:
-                        # Crear indicador de color con círculo colorado
-                        hover_text += f"<span style='color:{color_fondo}'>●</span> <b>{nombre_fondo}:</b> {valor_fondo:.2f}%<br>"
-                    
-                    hover_texts.append(hover_text)
-                    
-                except Exception as e:
-                    # En caso de error, crear un hover básico
-                    hover_texts.append(f"<b>Error en datos</b><br>Punto {j}")
-            
-            hover_texts_por_traza.append(hover_texts)
+        fondos_con_datos = [(codigo, nombre) for codigo, nombre in zip(codigos_seleccionados, nombres_mostrar)
+                            if codigo in df_retornos.columns]
+        colores = asignar_colores_fondos([codigo for codigo, _ in fondos_con_datos])
         
-        # Crear las trazas con validación
-        for i, (codigo, nombre_mostrar) in enumerate(zip(codigos_seleccionados, nombres_mostrar)):
-            if codigo not in df_retornos.columns:
-                continue
-                
+        # El hover 'x unified' muestra la fecha una vez y una línea por fondo
+        # (nombre, color y valor), así cada traza solo lleva x/y y una plantilla
+        for (codigo, nombre_mostrar), color_linea in zip(fondos_con_datos, colores):
             try:
-                color_linea = colores_a_usar[i % len(colores_a_usar)]
-                
-                # Preparar nombre más corto para la leyenda
-                nombre_corto = nombre_mostrar.replace("FONDO MUTUO SURA ", "").replace("SURA ", "")
-                if " - " in nombre_corto:
-                    partes = nombre_corto.split(" - ")
-                    nombre_final = f"{partes[0]} ({partes[1]})" if len(partes) > 1 else nombre_corto
-                else:
-                    nombre_final = nombre_corto
-                
-                # Asegurar que tenemos hover texts para esta traza
-                hover_texts_traza = hover_texts_por_traza[i] if i < len(hover_texts_por_traza) else []
-                
-                # Si no hay suficientes hover texts, rellenar con textos básicos
-                while len(hover_texts_traza) < len(df_retornos):
-                    hover_texts_traza.append(f"<b>{nombre_final}</b><br>Datos no disponibles")
-                
+                # x0 es la primera categoría: con x0=0 plotly agregaría '0'
+                # como categoría nueva y correría todos los puntos
                 fig.add_trace(go.Scatter(
-                    x=df_retornos['Dates'],
-                    y=df_retornos[codigo],
+                    x0=fechas_eje_x[0],
+                    dx=1,
+                    y=df_retornos[codigo].round(DECIMALES_GRAFICO),
                     mode='lines',
-                    name=nombre_final,
+                    name=nombre_corto_fondo(nombre_mostrar),
                     line=dict(color=color_linea, width=2),
-                    hovertemplate='%{text}<extra></extra>',
-                    text=hover_texts_traza,
+                    hovertemplate='%{y:.2f}%',
                     showlegend=True
                 ))
                 
@@ -1352,7 +1456,7 @@ def crear_grafico_retornos(df_retornos, codigos_seleccionados, nombres_mostrar):
             yaxis_title='Retorno Acumulado (%)',
             font={'family': 'SuraSans-Regular', 'color': '#24272A'},
             
-            hovermode='closest',
+            hovermode='x unified',
             
             hoverlabel=dict(
                 bgcolor="rgba(255, 255, 255, 0.98)",
@@ -1373,7 +1477,10 @@ def crear_grafico_retornos(df_retornos, codigos_seleccionados, nombres_mostrar):
                 spikemode="across",
                 spikethickness=1,
                 spikedash="dot",
-                tickformat='%d/%m/%Y'
+                type='category',
+                categoryorder='array',
+                categoryarray=fechas_eje_x,
+                nticks=8
             ),
             yaxis=dict(
                 tickformat='.1f',
@@ -1432,6 +1539,106 @@ def crear_grafico_retornos(df_retornos, codigos_seleccionados, nombres_mostrar):
         )
         return error_fig
     
+# =============================================================================
+# SERVICIO DE GRÁFICOS DE RETORNOS (compartido por las tres pestañas)
+# =============================================================================
+
+# Las pestañas acumulada, anualizada y por año dibujan el mismo gráfico de
+# retornos acumulados; este caché evita recalcular la misma selección y
+# ventana cuando se repite en otra pestaña o en otra sesión. Vive en la caché
+# 'figuras_retornos' de cache_servidor (LRU con lock, MAX_FIGURAS_CACHE).
+
+
+def crear_figura_mensaje(texto):
+    """
+    Figura vacía con un mensaje centrado (estado sin datos o sin selección)
+    """
+    fig_vacio = go.Figure()
+    fig_vacio.add_annotation(
+        text=texto,
+        x=0.5, 
+        y=0.5, 
+        showarrow=False,
+        font={'family': 'SuraSans-Regular', 'size': 16, 'color': '#666666'},
+        xanchor='center',  
+        yanchor='middle',
+        xref='paper',
+        yref='paper',
+    )
+    fig_vacio.update_layout(
+        plot_bgcolor='#f8f9fa',
+        paper_bgcolor='#f8f9fa',
+        xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
+        yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
+        margin=dict(t=20, b=20, l=20, r=20),
+        height=500
+    )
+    return fig_vacio
+
+
+def obtener_grafico_retornos(moneda, selecciones_data, fecha_inicio, fecha_fin):
+    """
+    Punto único para construir el gráfico de retornos acumulados de una
+    selección. Cachea el resultado por (moneda, códigos, ventana, versión
+    de datos).
+    
+    Returns:
+        dict con 'figura', 'df_retornos' (None si es un mensaje) y 'codigos'
+        (los códigos que efectivamente tienen traza, en orden)
+    """
+    if pesos_df is None:
+        fig_vacio = go.Figure()
+        fig_vacio.add_annotation(
+            text="No se pudieron cargar los datos",
+            x=0.5, y=0.5, showarrow=False
+        )
+        return {'figura': fig_vacio, 'df_retornos': None, 'codigos': []}
+    
+    if not selecciones_data:
+        return {
+            'figura': crear_figura_mensaje("Usa el botón 'Agregar Fondo Personalizado' para ver fondos en el gráfico"),
+            'df_retornos': None,
+            'codigos': []
+        }
+    
+    codigos_personalizados, nombres_personalizados = procesar_selecciones_multiples(selecciones_data, moneda)
+    
+    if not codigos_personalizados:
+        return {
+            'figura': crear_figura_mensaje("No se encontraron datos para las selecciones personalizadas"),
+            'df_retornos': None,
+            'codigos': []
+        }
+    
+    clave = (moneda, tuple(codigos_personalizados), tuple(nombres_personalizados),
+             str(fecha_inicio), str(fecha_fin), PRESUPUESTO_FIGURA_KB,
+             version_datos(pesos_df, dolares_df))
+    
+    resultado = obtener_cache('figuras_retornos', clave)
+    if resultado is not None:
+        return resultado
+    
+    df_actual = pesos_df if moneda == 'CLP' else dolares_df
+    
+    df_retornos = calcular_retornos_acumulados_con_limite(
+        df_actual, codigos_personalizados, 
+        fecha_inicio, fecha_fin
+    )
+    
+    # Quien use el resultado ve las filas realmente enviadas
+    figura, df_retornos = construir_figura_en_presupuesto(
+        df_retornos, codigos_personalizados, nombres_personalizados, moneda
+    )
+    
+    resultado = {
+        'figura': figura,
+        'df_retornos': df_retornos,
+        'codigos': [codigo for codigo in codigos_personalizados if codigo in df_retornos.columns]
+    }
+    
+    return guardar_cache('figuras_retornos', clave, resultado)
+
+
 # =============================================================================
 # FUNCIONES PARA CREAR COMPONENTES DINÁMICOS
 # =============================================================================
@@ -1447,9 +1654,9 @@ def crear_selector_fondo(id_selector):
                     html.Label("Fondo:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
                     dcc.Dropdown(
                         id={'type': 'fondo-dropdown', 'index': id_selector},
-                        options=[{'label': fondo, 'value': fondo} for fondo in fondos_unicos],
+                        options=[],
                         value=None,
-                        placeholder="Selecciona un fondo...",
+                        placeholder="Escribe para buscar un fondo...",
                         style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
                     )
                 ], width=5),
@@ -1481,6 +1688,48 @@ def crear_selector_fondo(id_selector):
         ])
     ], style={'marginBottom': '10px'})
 
+
+def patch_selectores(boton_agregar, crear_selector):
+    """
+    Cambio sobre los children de un contenedor de selectores como Patch:
+    agrega una tarjeta al final o elimina la del botón ❌ presionado, sin
+    recibir ni reenviar las demás tarjetas. La posición de la tarjeta es la
+    de su botón entre los botones ❌ (mismo orden que en el contenedor).
+    """
+    ctx = dash.callback_context
+    if not ctx.triggered or not ctx.triggered[0]['value']:
+        # Sin clic real (p. ej. el botón ❌ de una tarjeta recién montada)
+        return dash.no_update
+
+    cambios = Patch()
+    if ctx.triggered_id == boton_agregar:
+        cambios.append(crear_selector(str(uuid.uuid4())))
+        return cambios
+
+    botones = [entrada['id']['index'] for entrada in ctx.inputs_list[1]]
+    if ctx.triggered_id['index'] not in botones:
+        return dash.no_update
+    del cambios[botones.index(ctx.triggered_id['index'])]
+    return cambios
+
+
+def buscar_opciones_fondo(texto_busqueda, valor_actual):
+    """
+    Opciones de un dropdown de fondo según lo escrito (como máximo
+    LIMITE_OPCIONES_FONDOS), servidas desde indice_fondos
+    """
+    return opciones_busqueda(indice_fondos, texto_busqueda, valor_actual)
+
+
+# Un callback por pestaña (acumulada, anualizada, por año), todos con la misma búsqueda
+for tipo_dropdown in ('fondo-dropdown', 'fondo-dropdown-anualizada', 'fondo-dropdown-por-ano'):
+    callback(
+        Output({'type': tipo_dropdown, 'index': MATCH}, 'options'),
+        Input({'type': tipo_dropdown, 'index': MATCH}, 'search_value'),
+        State({'type': tipo_dropdown, 'index': MATCH}, 'value'),
+        prevent_initial_call=True
+    )(buscar_opciones_fondo)
+
 # =============================================================================
 # COMPONENTES UI
 # =============================================================================
@@ -1667,6 +1916,49 @@ tabs = dbc.Tabs([
            label_style={'fontFamily': 'SuraSans-Regular', 'fontWeight': 'bold'}),
 ], id="tabs", active_tab="acumulada", style={'marginTop': '20px'})
 
+# Botones de período: (clave, texto, ancho)
+PERIODOS_GRAFICO = [
+    ('1m', '1M', '45px'), ('3m', '3M', '45px'), ('6m', '6M', '45px'), ('ytd', 'YTD', '50px'),
+    ('1y', '1Y', '45px'), ('3y', '3Y', '45px'), ('5y', '5Y', '45px'), ('max', 'Max', '50px'),
+]
+
+
+def crear_controles_fechas(tab):
+    """
+    Selectores Desde/Hasta y botones de período del gráfico de una sección.
+    Los ids llevan la pestaña, así un solo juego de callbacks (MATCH) atiende
+    las tres secciones
+    """
+    return html.Div([
+        # Store para período activo (independiente por sección)
+        dcc.Store(id={'type': 'periodo-activo', 'tab': tab}, data='1y'),
+        html.Label("Desde:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px', 'marginBottom': '5px'}),
+        dcc.DatePickerSingle(
+            id={'type': 'fecha-inicio', 'tab': tab},
+            date=datetime.now() - timedelta(days=365),
+            display_format='DD/MM/YYYY',
+            style={'width': '100%', 'marginBottom': '10px'}
+        ),
+        html.Label("Hasta:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px', 'marginBottom': '5px'}),
+        dcc.DatePickerSingle(
+            id={'type': 'fecha-fin', 'tab': tab},
+            date=datetime.now(),
+            display_format='DD/MM/YYYY',
+            style={'width': '100%', 'marginBottom': '15px'}
+        ),
+        html.Div([
+            dbc.Button(texto, id={'type': 'btn-periodo', 'tab': tab, 'periodo': periodo},
+                       size="sm", outline=True, color="light",
+                       style={'margin': '2px', 'width': ancho, 'border': '1px solid black', 'color': 'black'})
+            for periodo, texto, ancho in PERIODOS_GRAFICO
+        ], style={
+            'borderRadius': '5px',
+            'display': 'flex',
+            'flexWrap': 'wrap'
+        })
+    ])
+
+
 # CONTROLES CON NUEVA ESTRUCTURA - DOS SECCIONES INDEPENDIENTES
 controles_acumulada = html.Div([
     # 1) Fila para el selector de moneda (arriba de todo)
@@ -1674,7 +1966,7 @@ controles_acumulada = html.Div([
         dbc.Col([
             html.Label("Moneda:", style={'fontFamily': 'SuraSans-SemiBold'}),
             dcc.Dropdown(
-                id='moneda-selector-acumulada',
+                id={'type': 'moneda-selector', 'tab': 'acumulada'},
                 options=[
                     {'label': 'Pesos Chilenos (CLP)', 'value': 'CLP'},
                     {'label': 'Dólares (USD)', 'value': 'USD'}
@@ -1752,7 +2044,10 @@ controles_acumulada = html.Div([
         html.Div(id='selectores-container', children=[]),
         
         # Store para mantener el estado de las selecciones
-        dcc.Store(id='selecciones-store', data=[]),
+        dcc.Store(id={'type': 'selecciones-store', 'tab': 'acumulada'}, data=[]),
+        
+        # Token del conjunto de trazas que tiene el navegador (para Patch)
+        dcc.Store(id='grafico-trazas-token', data=None),
         
         html.Hr(style={'marginTop': '20px', 'marginBottom': '20px'}),
         
@@ -1779,40 +2074,9 @@ controles_acumulada = html.Div([
             ], width=12, style={'textAlign': 'right'})
         ]),
         
-        dcc.Store(id="periodo-activo", data="btn-1y"),
-        
         dbc.Row([
             dbc.Col([
-                html.Div([
-                    html.Label("Desde:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px', 'marginBottom': '5px'}),
-                    dcc.DatePickerSingle(
-                        id='fecha-inicio-grafico',
-                        date=datetime.now() - timedelta(days=365),
-                        display_format='DD/MM/YYYY',
-                        style={'width': '100%', 'marginBottom': '10px'}
-                    ),
-                    html.Label("Hasta:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px', 'marginBottom': '5px'}),
-                    dcc.DatePickerSingle(
-                        id='fecha-fin-grafico',
-                        date=datetime.now(),
-                        display_format='DD/MM/YYYY',
-                        style={'width': '100%', 'marginBottom': '15px'}
-                    ),
-                    html.Div([
-                        dbc.Button("1M", id="btn-1m", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                        dbc.Button("3M", id="btn-3m", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                        dbc.Button("6M", id="btn-6m", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                        dbc.Button("YTD", id="btn-ytd", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '50px', 'border': '1px solid black', 'color': 'black'}),
-                        dbc.Button("1Y", id="btn-1y", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                        dbc.Button("3Y", id="btn-3y", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                        dbc.Button("5Y", id="btn-5y", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                        dbc.Button("Max", id="btn-max", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '50px', 'border': '1px solid black', 'color': 'black'}),
-                    ], style={
-                        'borderRadius': '5px',
-                        'display': 'flex',
-                        'flexWrap': 'wrap'
-                    })
-                ])
+                crear_controles_fechas('acumulada')
             ], width=3),
             
             dbc.Col([
@@ -1857,7 +2121,7 @@ controles_anualizada = html.Div([
         dbc.Col([
             html.Label("Moneda:", style={'fontFamily': 'SuraSans-SemiBold'}),
             dcc.Dropdown(
-                id='moneda-selector-anualizada',
+                id={'type': 'moneda-selector', 'tab': 'anualizada'},
                 options=[
                     {'label': 'Pesos Chilenos (CLP)', 'value': 'CLP'},
                     {'label': 'Dólares (USD)', 'value': 'USD'}
@@ -1897,7 +2161,7 @@ controles_anualizada = html.Div([
     html.Div(id='selectores-container-anualizada', children=[]),
     
     # NUEVA SECCIÓN: Store para mantener el estado de las selecciones ANUALIZADA
-    dcc.Store(id='selecciones-store-anualizada', data=[]),
+    dcc.Store(id={'type': 'selecciones-store', 'tab': 'anualizada'}, data=[]),
     
     html.Hr(style={'marginTop': '20px', 'marginBottom': '20px'}),
     
@@ -1925,41 +2189,9 @@ controles_anualizada = html.Div([
         ], width=12, style={'textAlign': 'right'})
     ]),
     
-    # Store para período activo (independiente)
-    dcc.Store(id="periodo-activo-anualizada", data="btn-1y-anualizada"),
-    
     dbc.Row([
         dbc.Col([
-            html.Div([
-                html.Label("Desde:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px', 'marginBottom': '5px'}),
-                dcc.DatePickerSingle(
-                    id='fecha-inicio-grafico-anualizada',
-                    date=datetime.now() - timedelta(days=365),
-                    display_format='DD/MM/YYYY',
-                    style={'width': '100%', 'marginBottom': '10px'}
-                ),
-                html.Label("Hasta:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px', 'marginBottom': '5px'}),
-                dcc.DatePickerSingle(
-                    id='fecha-fin-grafico-anualizada',
-                    date=datetime.now(),
-                    display_format='DD/MM/YYYY',
-                    style={'width': '100%', 'marginBottom': '15px'}
-                ),
-                html.Div([
-                    dbc.Button("1M", id="btn-1m-anualizada", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("3M", id="btn-3m-anualizada", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("6M", id="btn-6m-anualizada", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("YTD", id="btn-ytd-anualizada", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '50px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("1Y", id="btn-1y-anualizada", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("3Y", id="btn-3y-anualizada", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("5Y", id="btn-5y-anualizada", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("Max", id="btn-max-anualizada", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '50px', 'border': '1px solid black', 'color': 'black'}),
-                ], style={
-                    'borderRadius': '5px',
-                    'display': 'flex',
-                    'flexWrap': 'wrap'
-                })
-            ])
+            crear_controles_fechas('anualizada')
         ], width=3),
         
         dbc.Col([
@@ -2005,7 +2237,7 @@ controles_por_año = html.Div([
         dbc.Col([
             html.Label("Moneda:", style={'fontFamily': 'SuraSans-SemiBold'}),
             dcc.Dropdown(
-                id='moneda-selector-por-año',
+                id={'type': 'moneda-selector', 'tab': 'por_ano'},
                 options=[
                     {'label': 'Pesos Chilenos (CLP)', 'value': 'CLP'},
                     {'label': 'Dólares (USD)', 'value': 'USD'}
@@ -2044,7 +2276,7 @@ controles_por_año = html.Div([
     html.Div(id='selectores-container-por-ano', children=[]),
     
     # NUEVA SECCIÓN: Store para mantener el estado de las selecciones POR AÑO
-    dcc.Store(id='selecciones-store-por-ano', data=[]),
+    dcc.Store(id={'type': 'selecciones-store', 'tab': 'por_ano'}, data=[]),
     
     html.Hr(style={'marginTop': '20px', 'marginBottom': '20px'}),
     
@@ -2070,41 +2302,10 @@ controles_por_año = html.Div([
             })
         ], width=12, style={'textAlign': 'right'})
     ]),
-    # Store para período activo (independiente)
-    dcc.Store(id="periodo-activo-por-ano", data="btn-1y-por-ano"),
     
     dbc.Row([
         dbc.Col([
-            html.Div([
-                html.Label("Desde:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px', 'marginBottom': '5px'}),
-                dcc.DatePickerSingle(
-                    id='fecha-inicio-grafico-por-ano',
-                    date=datetime.now() - timedelta(days=365),
-                    display_format='DD/MM/YYYY',
-                    style={'width': '100%', 'marginBottom': '10px'}
-                ),
-                html.Label("Hasta:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px', 'marginBottom': '5px'}),
-                dcc.DatePickerSingle(
-                    id='fecha-fin-grafico-por-ano',
-                    date=datetime.now(),
-                    display_format='DD/MM/YYYY',
-                    style={'width': '100%', 'marginBottom': '15px'}
-                ),
-                html.Div([
-                    dbc.Button("1M", id="btn-1m-por-ano", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("3M", id="btn-3m-por-ano", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("6M", id="btn-6m-por-ano", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("YTD", id="btn-ytd-por-ano", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '50px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("1Y", id="btn-1y-por-ano", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("3Y", id="btn-3y-por-ano", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("5Y", id="btn-5y-por-ano", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '45px', 'border': '1px solid black', 'color': 'black'}),
-                    dbc.Button("Max", id="btn-max-por-ano", size="sm", outline=True, color="light", style={'margin': '2px', 'width': '50px', 'border': '1px solid black', 'color': 'black'}),
-                ], style={
-                    'borderRadius': '5px',
-                    'display': 'flex',
-                    'flexWrap': 'wrap'
-                })
-            ])
+            crear_controles_fechas('por_ano')
         ], width=3),
         
         dbc.Col([
@@ -2174,9 +2375,9 @@ def crear_selector_fondo_por_ano(id_selector):
                     html.Label("Fondo:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
                     dcc.Dropdown(
                         id={'type': 'fondo-dropdown-por-ano', 'index': id_selector},
-                        options=[{'label': fondo, 'value': fondo} for fondo in fondos_unicos],
+                        options=[],
                         value=None,
-                        placeholder="Selecciona un fondo...",
+                        placeholder="Escribe para buscar un fondo...",
                         style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
                     )
                 ], width=5),
@@ -2207,134 +2408,21 @@ def crear_selector_fondo_por_ano(id_selector):
             ])
         ])
     ], style={'marginBottom': '10px'})
-def crear_selector_fondo_con_valores_por_ano(id_selector, fondo_valor=None, series_valor=None):
-    """
-    Crea un componente selector de fondo + series con valores pre-establecidos para POR AÑO
-    """
-    if fondo_valor and fondo_valor in fondos_a_series:
-        series_opciones = [{'label': serie, 'value': serie} for serie in fondos_a_series[fondo_valor]]
-        series_disabled = False
-        series_placeholder = f"Selecciona series para {fondo_valor[:30]}..."
-        if series_valor is None:
-            series_valor = []
-        elif not isinstance(series_valor, list):
-            series_valor = [series_valor] if series_valor else []
-    else:
-        series_opciones = []
-        series_disabled = True
-        series_placeholder = "Primero selecciona un fondo"
-        series_valor = []
-    
-    return dbc.Card([
-        dbc.CardBody([
-            dbc.Row([
-                dbc.Col([
-                    html.Label("Fondo:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
-                    dcc.Dropdown(
-                        id={'type': 'fondo-dropdown-por-ano', 'index': id_selector},
-                        options=[{'label': fondo, 'value': fondo} for fondo in fondos_unicos],
-                        value=fondo_valor,
-                        placeholder="Selecciona un fondo...",
-                        style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
-                    )
-                ], width=5),
-                
-                dbc.Col([
-                    html.Label("Series:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
-                    dcc.Dropdown(
-                        id={'type': 'series-dropdown-por-ano', 'index': id_selector},
-                        options=series_opciones,
-                        value=series_valor,
-                        multi=True,
-                        placeholder=series_placeholder,
-                        disabled=series_disabled,
-                        style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
-                    )
-                ], width=6),
-                
-                dbc.Col([
-                    html.Br(),
-                    dbc.Button(
-                        "❌", 
-                        id={'type': 'eliminar-selector-por-ano', 'index': id_selector},
-                        color="danger", 
-                        size="sm",
-                        style={'marginTop': '5px'}
-                    )
-                ], width=1)
-            ])
-        ])
-    ], style={'marginBottom': '10px'})
 
-    
-# Función 1: extraer_id_del_child_por_ano
-def extraer_id_del_child_por_ano(child):
-    """
-    Extrae el ID de un componente hijo para POR AÑO
-    """
-    try:
-        if isinstance(child, dict) and 'props' in child:
-            card_body = child['props']['children']
-            if isinstance(card_body, dict) and 'props' in card_body:
-                row = card_body['props']['children']
-                if isinstance(row, dict) and 'props' in row:
-                    cols = row['props']['children']
-                    if isinstance(cols, list) and len(cols) > 0:
-                        first_col = cols[0]
-                        if isinstance(first_col, dict) and 'props' in first_col:
-                            col_children = first_col['props']['children']
-                            if isinstance(col_children, list) and len(col_children) > 1:
-                                fondo_dropdown = col_children[1]
-                                if isinstance(fondo_dropdown, dict) and 'props' in fondo_dropdown:
-                                    dropdown_id = fondo_dropdown['props'].get('id')
-                                    if isinstance(dropdown_id, dict) and 'index' in dropdown_id:
-                                        return dropdown_id['index']
-        
-        return buscar_id_recursivo_por_ano(child)
-        
-    except (KeyError, IndexError, TypeError, AttributeError):
-        return None
 
-# Función 2: buscar_id_recursivo_por_ano  
-def buscar_id_recursivo_por_ano(componente, profundidad=0):
-    """
-    Busca recursivamente un ID de tipo 'fondo-dropdown-por-ano'
-    """
-    if profundidad > 10:
-        return None
-        
-    try:
-        if isinstance(componente, dict):
-            if 'props' in componente:
-                props = componente['props']
-                if 'id' in props:
-                    component_id = props['id']
-                    if isinstance(component_id, dict) and component_id.get('type') == 'fondo-dropdown-por-ano':
-                        return component_id.get('index')
-                
-                if 'children' in props:
-                    children = props['children']
-                    if isinstance(children, list):
-                        for child in children:
-                            resultado = buscar_id_recursivo_por_ano(child, profundidad + 1)
-                            if resultado:
-                                return resultado
-                    elif children:
-                        resultado = buscar_id_recursivo_por_ano(children, profundidad + 1)
-                        if resultado:
-                            return resultado
-        
-        elif isinstance(componente, list):
-            for item in componente:
-                resultado = buscar_id_recursivo_por_ano(item, profundidad + 1)
-                if resultado:
-                    return resultado
-                    
-    except (KeyError, TypeError, AttributeError):
-        pass
-    
-    return None
-    
+# Contenido de cada pestaña. Se monta la primera vez que se abre la pestaña
+# y después queda en la página (solo se oculta), para no perder las
+# selecciones, fechas y tarjetas de cada sección al cambiar de pestaña.
+# Como siempre, solo se ve la acumulada: la barra 'tabs' no se muestra, así
+# que anualizada y por año no se montan (ni disparan callbacks) en la carga
+controles_anualizada.style = {'display': 'block'}
+controles_por_año.style = {'display': 'block'}
+
+CONTENIDO_TABS = {
+    'acumulada': controles_acumulada,
+    'anualizada': controles_anualizada,
+    'por_ano': controles_por_año,
+}
 
 # Stores para manejar estados independientes de las dos secciones
 store_indices = dcc.Store(id='indices-tipo-activo', data='acumulada')
@@ -2357,17 +2445,55 @@ app.layout = html.Div([
     anexo_mensual_module.crear_modal_anexo_mensual(),
     bottom_navbar,
     dbc.Container([
+        # Oculta, como siempre; es la que monta cada sección al abrirla
+        html.Div(tabs, style={'display': 'none'}),
+        # Las pestañas no abiertas aún no se montan (ver mostrar_contenido_tab):
+        # no disparan sus callbacks iniciales hasta que se abren
+        dcc.Store(id='tabs-montadas', data=['acumulada']),
         html.Div([
-            controles_acumulada,
-            controles_anualizada,
-            controles_por_año
+            html.Div(CONTENIDO_TABS['acumulada'], id='contenido-acumulada'),
+            html.Div(id='contenido-anualizada', style={'display': 'none'}),
+            html.Div(id='contenido-por_ano', style={'display': 'none'}),
         ], style={'padding': '30px'})
     ], fluid=True)
 ], style={'margin': '0', 'padding': '0'})
+
+# Todas las pestañas, para validar los callbacks de componentes aún no montados
+app.validation_layout = html.Div([app.layout] + [
+    contenido for tab_id, contenido in CONTENIDO_TABS.items() if tab_id != 'acumulada'
+])
+marcar_fase('componentes y layout')
 # =============================================================================
 # CALLBACKS
 # =============================================================================
 
+@callback(
+    [Output(f'contenido-{tab_id}', 'children') for tab_id in CONTENIDO_TABS] +
+    [Output(f'contenido-{tab_id}', 'style') for tab_id in CONTENIDO_TABS] +
+    [Output('tabs-montadas', 'data')],
+    Input('tabs', 'active_tab'),
+    State('tabs-montadas', 'data'),
+    prevent_initial_call=True
+)
+def mostrar_contenido_tab(active_tab, tabs_montadas):
+    """
+    Monta la pestaña la primera vez que se abre (sus callbacks iniciales se
+    disparan entonces) y después solo alterna cuál se muestra: las secciones
+    ya montadas conservan su estado
+    """
+    if active_tab not in CONTENIDO_TABS:
+        active_tab = 'acumulada'
+    tabs_montadas = tabs_montadas or ['acumulada']
+
+    contenidos = [
+        CONTENIDO_TABS[tab_id] if tab_id == active_tab and tab_id not in tabs_montadas else dash.no_update
+        for tab_id in CONTENIDO_TABS
+    ]
+    estilos = [{'display': 'block' if tab_id == active_tab else 'none'} for tab_id in CONTENIDO_TABS]
+    if active_tab in tabs_montadas:
+        return contenidos + estilos + [dash.no_update]
+    return contenidos + estilos + [tabs_montadas + [active_tab]]
+
 
 
 #Sección Anualizada:
@@ -2376,65 +2502,10 @@ app.layout = html.Div([
     Output('selectores-container-anualizada', 'children'),
     [Input('btn-agregar-fondo-anualizada', 'n_clicks'),
      Input({'type': 'eliminar-selector-anualizada', 'index': ALL}, 'n_clicks')],
-    [State('selectores-container-anualizada', 'children'),
-     State({'type': 'fondo-dropdown-anualizada', 'index': ALL}, 'value'),
-     State({'type': 'series-dropdown-anualizada', 'index': ALL}, 'value')],
     prevent_initial_call=True
 )
-def actualizar_selectores_anualizada(n_clicks_agregar, n_clicks_eliminar, children_actuales, fondos_valores, series_valores):
-    ctx = dash.callback_context
-    
-    if not ctx.triggered:
-        return children_actuales or []
-    
-    trigger = ctx.triggered[0]
-    
-    # Si se presionó agregar fondo
-    if trigger['prop_id'] == 'btn-agregar-fondo-anualizada.n_clicks' and n_clicks_agregar:
-        children_actuales = children_actuales or []
-        nuevo_id = str(uuid.uuid4())
-        nuevo_selector = crear_selector_fondo_anualizada(nuevo_id)
-        return children_actuales + [nuevo_selector]
-    
-    # Si se presionó eliminar algún selector
-    elif 'eliminar-selector-anualizada' in trigger['prop_id']:
-        if not children_actuales:
-            return []
-            
-        # Extraer el ID del selector a eliminar
-        import json
-        prop_id_dict = json.loads(trigger['prop_id'].replace('.n_clicks', ''))
-        id_a_eliminar = prop_id_dict['index']
-        
-        # Crear mapeo de IDs actuales con sus valores
-        valores_por_id = {}
-        for i, child in enumerate(children_actuales):
-            child_id = extraer_id_del_child_anualizada(child)
-            if child_id and i < len(fondos_valores or []) and i < len(series_valores or []):
-                valores_por_id[child_id] = {
-                    'fondo': fondos_valores[i],
-                    'series': series_valores[i] or []
-                }
-        
-        # Filtrar solo los elementos que NO sean el ID a eliminar
-        children_preservados = []
-        for child in children_actuales:
-            child_id = extraer_id_del_child_anualizada(child)
-            if child_id and child_id != id_a_eliminar:
-                # Preservar este child con sus valores
-                if child_id in valores_por_id:
-                    child_preservado = crear_selector_fondo_con_valores_anualizada(
-                        child_id,
-                        valores_por_id[child_id]['fondo'],
-                        valores_por_id[child_id]['series']
-                    )
-                    children_preservados.append(child_preservado)
-                else:
-                    children_preservados.append(child)
-        
-        return children_preservados
-    
-    return children_actuales or []
+def actualizar_selectores_anualizada(n_clicks_agregar, n_clicks_eliminar):
+    return patch_selectores('btn-agregar-fondo-anualizada', crear_selector_fondo_anualizada)
 
 # Callback para actualizar series según fondo seleccionado - ANUALIZADA
 @callback(
@@ -2463,35 +2534,22 @@ def actualizar_series_dinamico_anualizada(fondo_seleccionado, valor_series_actua
 
 # Callback para actualizar el store con las selecciones - ANUALIZADA
 @callback(
-    Output('selecciones-store-anualizada', 'data'),
+    Output({'type': 'selecciones-store', 'tab': 'anualizada'}, 'data'),
     [Input({'type': 'fondo-dropdown-anualizada', 'index': ALL}, 'value'),
-     Input({'type': 'series-dropdown-anualizada', 'index': ALL}, 'value')],
-    [State('selectores-container-anualizada', 'children')]
+     Input({'type': 'series-dropdown-anualizada', 'index': ALL}, 'value')]
 )
-def actualizar_selecciones_store_anualizada(fondos_valores, series_valores, children):
-    if not children or not fondos_valores or not series_valores:
-        return []
-    
-    selecciones = []
-    
-    for i, child in enumerate(children):
-        if i < len(fondos_valores) and i < len(series_valores):
-            fondo = fondos_valores[i]
-            series = series_valores[i]
-            
-            if fondo and series:
-                selecciones.append({
-                    'fondo': fondo,
-                    'series': series
-                })
-    
-    return selecciones
+def actualizar_selecciones_store_anualizada(fondos_valores, series_valores):
+    return [
+        {'fondo': fondo, 'series': series}
+        for fondo, series in zip(fondos_valores or [], series_valores or [])
+        if fondo and series
+    ]
 
 # Callback para tabla de rentabilidades personalizadas - ANUALIZADA
 @callback(
    Output('tabla-rentabilidades-anualizada', 'children'),
-   [Input('moneda-selector-anualizada', 'value'),
-    Input('selecciones-store-anualizada', 'data')]
+   [Input({'type': 'moneda-selector', 'tab': 'anualizada'}, 'value'),
+    Input({'type': 'selecciones-store', 'tab': 'anualizada'}, 'data')]
 )
 def actualizar_tabla_rentabilidades_anualizada(moneda, selecciones_data):
     if not selecciones_data:
@@ -2558,24 +2616,21 @@ def actualizar_tabla_rentabilidades_anualizada(moneda, selecciones_data):
     ])
 #----------------------------------------------------------------------------------------------------------
 
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='alternar_modal'),
     Output("info-modal", "is_open"),
     [Input("info-button", "n_clicks"), 
      Input("close-modal", "n_clicks")],
     [State("info-modal", "is_open")]
 )
-def toggle_modal(n1, n2, is_open):
-    if n1 or n2:
-        return not is_open
-    return is_open
- 
 
 # =============================================================================
 # CALLBACKS PARA LAS DOS SECCIONES INDEPENDIENTES
 # =============================================================================
 
 # Callback para manejar botones de ÍNDICES (Sección 1)
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='botones_tipo'),
     [Output('indices-tipo-activo', 'data'),
      Output('btn-indices-acumulada', 'color'),
      Output('btn-indices-acumulada', 'outline'),
@@ -2588,25 +2643,10 @@ def toggle_modal(n1, n2, is_open):
      Input('btn-indices-por-ano', 'n_clicks')],
     prevent_initial_call=True
 )
-def actualizar_botones_indices(btn_acum, btn_anual, btn_ano):
-    ctx = dash.callback_context
-    
-    if not ctx.triggered:
-        return 'acumulada', 'dark', False, 'light', True, 'light', True
-    
-    button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-    
-    if button_id == 'btn-indices-acumulada':
-        return 'acumulada', 'dark', False, 'secondary', True, 'secondary', True
-    elif button_id == 'btn-indices-anualizada':
-        return 'anualizada', 'secondary', True, 'dark', False, 'secondary', True
-    elif button_id == 'btn-indices-por-ano':
-        return 'por_ano', 'secondary', True, 'secondary', True, 'dark', False
-
-    return 'acumulada', 'dark', False, 'secondary', True, 'secondary', True
 
 # Callback para manejar botones de PERSONALIZADOS (Sección 2)
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='botones_tipo'),
     [Output('personalizados-tipo-activo', 'data'),
      Output('btn-personalizados-acumulada', 'color'),
      Output('btn-personalizados-acumulada', 'outline'),
@@ -2619,30 +2659,33 @@ def actualizar_botones_indices(btn_acum, btn_anual, btn_ano):
      Input('btn-personalizados-por-ano', 'n_clicks')],
     prevent_initial_call=True
 )
-def actualizar_botones_personalizados(btn_acum, btn_anual, btn_ano):
-    ctx = dash.callback_context
-    
-    if not ctx.triggered:
-        return 'acumulada', 'dark', False, 'light', True, 'light', True
-    
-    button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-    
-    if button_id == 'btn-personalizados-acumulada':
-        return 'acumulada', 'dark', False, 'secondary', True, 'secondary', True
-    elif button_id == 'btn-personalizados-anualizada':
-        return 'anualizada', 'secondary', True, 'dark', False, 'secondary', True
-    elif button_id == 'btn-personalizados-por-ano':
-        return 'por_ano', 'secondary', True, 'secondary', True, 'dark', False
-
-    return 'acumulada', 'dark', False, 'secondary', True, 'secondary', True
 
 # Callback para tabla de ÍNDICES (independiente)
 @callback(
     Output('tabla-indices-dinamica', 'children'),
-    [Input('moneda-selector-acumulada', 'value'),
+    [Input({'type': 'moneda-selector', 'tab': 'acumulada'}, 'value'),
      Input('indices-tipo-activo', 'data')]
 )
 def actualizar_tabla_indices_dinamica(moneda, tipo_activo):
+    return tabla_indices_compartida(
+        'tabla_indices', (moneda, tipo_activo), lambda: construir_tabla_indices(moneda, tipo_activo)
+    )
+
+def tabla_indices_compartida(nombre, parametros, construir):
+    """
+    Las tablas de índices son iguales para todos los usuarios: al cargar la
+    página muchos las piden a la vez y se calculan una sola vez. Quedan en la
+    caché del servidor, así que volver a abrir una pestaña no las recalcula.
+    """
+    hoy = datetime.now().strftime('%Y-%m-%d')
+    clave = (nombre,) + tuple(parametros) + (version_datos(pesos_df, dolares_df), hoy)
+    
+    resultado = obtener_cache('tablas_indices', clave)
+    if resultado is None:
+        resultado = guardar_cache('tablas_indices', clave, calcular_una_vez(nombre, clave, construir))
+    return resultado
+
+def construir_tabla_indices(moneda, tipo_activo):
     if pesos_df is None:
         return html.P("No se pudieron cargar los datos", 
                      style={'fontFamily': 'SuraSans-Regular', 'color': 'red', 'textAlign': 'center'})
@@ -2715,9 +2758,9 @@ def actualizar_tabla_indices_dinamica(moneda, tipo_activo):
 # Callback para tabla de PERSONALIZADOS (independiente)
 @callback(
     Output('tabla-personalizados-dinamica', 'children'),
-    [Input('moneda-selector-acumulada', 'value'),
+    [Input({'type': 'moneda-selector', 'tab': 'acumulada'}, 'value'),
      Input('personalizados-tipo-activo', 'data'),
-     Input('selecciones-store', 'data')]
+     Input({'type': 'selecciones-store', 'tab': 'acumulada'}, 'data')]
 )
 def actualizar_tabla_personalizados_dinamica(moneda, tipo_activo, selecciones_data):
     if not selecciones_data:
@@ -2821,198 +2864,10 @@ def actualizar_tabla_personalizados_dinamica(moneda, tipo_activo, selecciones_da
     Output('selectores-container', 'children'),
     [Input('btn-agregar-fondo', 'n_clicks'),
      Input({'type': 'eliminar-selector', 'index': ALL}, 'n_clicks')],
-    [State('selectores-container', 'children'),
-     State({'type': 'fondo-dropdown', 'index': ALL}, 'value'),
-     State({'type': 'series-dropdown', 'index': ALL}, 'value')],
     prevent_initial_call=True
 )
-def actualizar_selectores_corregido(n_clicks_agregar, n_clicks_eliminar, children_actuales, fondos_valores, series_valores):
-    ctx = dash.callback_context
-    
-    if not ctx.triggered:
-        return children_actuales or []
-    
-    trigger = ctx.triggered[0]
-    
-    # Si se presionó agregar fondo
-    if trigger['prop_id'] == 'btn-agregar-fondo.n_clicks' and n_clicks_agregar:
-        children_actuales = children_actuales or []
-        nuevo_id = str(uuid.uuid4())
-        nuevo_selector = crear_selector_fondo(nuevo_id)
-        return children_actuales + [nuevo_selector]
-    
-    # Si se presionó eliminar algún selector
-    elif 'eliminar-selector' in trigger['prop_id']:
-        if not children_actuales:
-            return []
-            
-        # Extraer el ID del selector a eliminar
-        import json
-        prop_id_dict = json.loads(trigger['prop_id'].replace('.n_clicks', ''))
-        id_a_eliminar = prop_id_dict['index']
-        
-        # Crear mapeo de IDs actuales con sus valores
-        valores_por_id = {}
-        for i, child in enumerate(children_actuales):
-            child_id = extraer_id_del_child_mejorado(child)
-            if child_id and i < len(fondos_valores or []) and i < len(series_valores or []):
-                valores_por_id[child_id] = {
-                    'fondo': fondos_valores[i],
-                    'series': series_valores[i] or []
-                }
-        
-        # Filtrar solo los elementos que NO sean el ID a eliminar
-        children_preservados = []
-        for child in children_actuales:
-            child_id = extraer_id_del_child_mejorado(child)
-            if child_id and child_id != id_a_eliminar:
-                # Preservar este child con sus valores
-                if child_id in valores_por_id:
-                    child_preservado = crear_selector_fondo_con_valores(
-                        child_id,
-                        valores_por_id[child_id]['fondo'],
-                        valores_por_id[child_id]['series']
-                    )
-                    children_preservados.append(child_preservado)
-                else:
-                    children_preservados.append(child)
-        
-        return children_preservados
-    
-    return children_actuales or []
-
-# Función auxiliar para crear selector con valores pre-establecidos - MEJORADA
-def crear_selector_fondo_con_valores(id_selector, fondo_valor=None, series_valor=None):
-    """
-    Crea un componente selector de fondo + series con valores pre-establecidos
-    """
-    # Opciones de series basadas en el fondo seleccionado
-    if fondo_valor and fondo_valor in fondos_a_series:
-        series_opciones = [{'label': serie, 'value': serie} for serie in fondos_a_series[fondo_valor]]
-        series_disabled = False
-        series_placeholder = f"Selecciona series para {fondo_valor[:30]}..."
-        # Asegurar que series_valor sea una lista
-        if series_valor is None:
-            series_valor = []
-        elif not isinstance(series_valor, list):
-            series_valor = [series_valor] if series_valor else []
-    else:
-        series_opciones = []
-        series_disabled = True
-        series_placeholder = "Primero selecciona un fondo"
-        series_valor = []
-    
-    return dbc.Card([
-        dbc.CardBody([
-            dbc.Row([
-                dbc.Col([
-                    html.Label("Fondo:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
-                    dcc.Dropdown(
-                        id={'type': 'fondo-dropdown', 'index': id_selector},
-                        options=[{'label': fondo, 'value': fondo} for fondo in fondos_unicos],
-                        value=fondo_valor,  # Valor pre-establecido
-                        placeholder="Selecciona un fondo...",
-                        style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
-                    )
-                ], width=5),
-                
-                dbc.Col([
-                    html.Label("Series:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
-                    dcc.Dropdown(
-                        id={'type': 'series-dropdown', 'index': id_selector},
-                        options=series_opciones,  # Opciones pre-establecidas
-                        value=series_valor,  # Valor pre-establecido
-                        multi=True,
-                        placeholder=series_placeholder,
-                        disabled=series_disabled,
-                        style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
-                    )
-                ], width=6),
-                
-                dbc.Col([
-                    html.Br(),
-                    dbc.Button(
-                        "❌", 
-                        id={'type': 'eliminar-selector', 'index': id_selector},
-                        color="danger", 
-                        size="sm",
-                        style={'marginTop': '5px'}
-                    )
-                ], width=1)
-            ])
-        ])
-    ], style={'marginBottom': '10px'})
-
-#Funcion Auxiliar
-def extraer_id_del_child_mejorado(child):
-    """
-    Extrae el ID de un componente hijo de manera más robusta
-    """
-    try:
-        # El child es un dbc.Card
-        if isinstance(child, dict) and 'props' in child:
-            # Navegar: Card -> CardBody -> Row -> Col[0] -> [dropdown de fondo]
-            card_body = child['props']['children']
-            if isinstance(card_body, dict) and 'props' in card_body:
-                row = card_body['props']['children']
-                if isinstance(row, dict) and 'props' in row:
-                    cols = row['props']['children']
-                    if isinstance(cols, list) and len(cols) > 0:
-                        first_col = cols[0]  # Primera columna (Fondo)
-                        if isinstance(first_col, dict) and 'props' in first_col:
-                            col_children = first_col['props']['children']
-                            if isinstance(col_children, list) and len(col_children) > 1:
-                                fondo_dropdown = col_children[1]  # El dropdown de fondo
-                                if isinstance(fondo_dropdown, dict) and 'props' in fondo_dropdown:
-                                    dropdown_id = fondo_dropdown['props'].get('id')
-                                    if isinstance(dropdown_id, dict) and 'index' in dropdown_id:
-                                        return dropdown_id['index']
-        
-        # Método alternativo: buscar recursivamente
-        return buscar_id_recursivo(child)
-        
-    except (KeyError, IndexError, TypeError, AttributeError):
-        return None
-def buscar_id_recursivo(componente, profundidad=0):
-    """
-    Busca recursivamente un ID de tipo 'fondo-dropdown' en la estructura del componente
-    """
-    if profundidad > 10:  # Evitar recursión infinita
-        return None
-        
-    try:
-        if isinstance(componente, dict):
-            # Verificar si este componente tiene el ID que buscamos
-            if 'props' in componente:
-                props = componente['props']
-                if 'id' in props:
-                    component_id = props['id']
-                    if isinstance(component_id, dict) and component_id.get('type') == 'fondo-dropdown':
-                        return component_id.get('index')
-                
-                # Buscar en children
-                if 'children' in props:
-                    children = props['children']
-                    if isinstance(children, list):
-                        for child in children:
-                            resultado = buscar_id_recursivo(child, profundidad + 1)
-                            if resultado:
-                                return resultado
-                    elif children:
-                        resultado = buscar_id_recursivo(children, profundidad + 1)
-                        if resultado:
-                            return resultado
-        
-        elif isinstance(componente, list):
-            for item in componente:
-                resultado = buscar_id_recursivo(item, profundidad + 1)
-                if resultado:
-                    return resultado
-                    
-    except (KeyError, TypeError, AttributeError):
-        pass
-    
-    return None
+def actualizar_selectores_corregido(n_clicks_agregar, n_clicks_eliminar):
+    return patch_selectores('btn-agregar-fondo', crear_selector_fondo)
 
 #Gráfico:
 def crear_grafico_retornos_anualizados(df_retornos, codigos_seleccionados, nombres_mostrar):
@@ -3050,517 +2905,23 @@ def crear_grafico_retornos_anualizados(df_retornos, codigos_seleccionados, nombr
         )
         return fig_vacio
     
-    try:
-        # Función auxiliar para formatear fechas en español
-        def formatear_fecha_espanol(fecha):
-            try:
-                dias_es = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
-                meses_es = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
-                           'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
-                
-                dia_semana = dias_es[fecha.weekday()]
-                dia = fecha.day
-                mes = meses_es[fecha.month - 1]
-                año = fecha.year
-                
-                return f"{dia_semana} {dia} de {mes} {año}"
-            except:
-                return str(fecha)
-        
-        fig = go.Figure()
-        
-        paleta_primaria = ['#24272A', '#0B2DCE', '#5A646E', '#98A4AE', '#FFE946']
-        paleta_secundaria = [
-            '#727272', '#52C599', '#CC9967', '#9B5634', '#D4BE7F', 
-            '#3C86B4', '#A0A0A0', '#7FD4B3', '#D5AB80', '#C9805C', 
-            '#9E3541', '#A8CDE2', '#C8C8C8', '#A3E1C2', '#E0C1A2', 
-            '#D49A7D', '#DE9CA6', '#CBB363'
-        ]
-        
-        num_fondos = len(codigos_seleccionados)
-        colores_a_usar = paleta_primaria if num_fondos <= 5 else paleta_secundaria
-        
-        # Preparar datos con validación
-        try:
-            fechas_formateadas = [formatear_fecha_espanol(fecha.date()) for fecha in df_retornos['Dates']]
-        except:
-            fechas_formateadas = [str(fecha) for fecha in df_retornos['Dates']]
-        
-        # Crear hover texts personalizados con manejo de errores
-        hover_texts_por_traza = []
-        
-        for i, (codigo, nombre_mostrar) in enumerate(zip(codigos_seleccionados, nombres_mostrar)):
-            hover_texts = []
-            
-            if codigo not in df_retornos.columns:
-                hover_texts_por_traza.append([])
-                continue
-            
-            for j in range(len(df_retornos)):
-                try:
-                    # Para cada punto, obtener todos los valores de fondos en esa fecha
-                    valores_fecha = []
-                    
-                    for k, otro_codigo in enumerate(codigos_seleccionados):
-                        if otro_codigo in df_retornos.columns and j < len(df_retornos[otro_codigo]):
-                            try:
-                                valor_otro = df_retornos[otro_codigo].iloc[j]
-                                if pd.notna(valor_otro):
-                                    # Preparar nombre más corto
-                                    nombre_otro = nombres_mostrar[k].replace("FONDO MUTUO SURA ", "").replace("SURA ", "")
-                                    if " - " in nombre_otro:
-                                        partes = nombre_otro.split(" - ")
-                                        nombre_final = f"{partes[0]} ({partes[1]})" if len(partes) > 1 else nombre_otro
-                                    else:
-                                        nombre_final = nombre_otro
-                                    
-                                    # Obtener color para este fondo
-                                    color_fondo = colores_a_usar[k % len(colores_a_usar)]
-                                    
-                                    valores_fecha.append((nombre_final, float(valor_otro), color_fondo))
-                            except (IndexError, TypeError, ValueError):
-                                continue
-                    
-                    # ORDENAR POR VALOR DESCENDENTE (mayor rendimiento primero)
-                    valores_fecha.sort(key=lambda x: x[1], reverse=True)
-                    
-                    # Crear texto del hover con fecha y todos los fondos ordenados
-                    try:
-                        fecha_str = fechas_formateadas[j] if j < len(fechas_formateadas) else str(df_retornos['Dates'].iloc[j])
-                    except:
-                        fecha_str = f"Fecha {j}"
-                    
-                    hover_text = f"<b>{fecha_str}</b><br><br>"
-                    for nombre_fondo, valor_fondo, color_fondo in valores_fecha:
-                        # Crear indicador de color con círculo colorado
-                        hover_text += f"<span style='color:{color_fondo}'>●</span> <b>{nombre_fondo}:</b> {valor_fondo:.2f}%<br>"
-                    
-                    hover_texts.append(hover_text)
-                    
-                except Exception as e:
-                    # En caso de error, crear un hover básico
-                    hover_texts.append(f"<b>Error en datos</b><br>Punto {j}")
-            
-            hover_texts_por_traza.append(hover_texts)
-        
-        # Crear las trazas con validación
-        for i, (codigo, nombre_mostrar) in enumerate(zip(codigos_seleccionados, nombres_mostrar)):
-            if codigo not in df_retornos.columns:
-                continue
-                
-            try:
-                color_linea = colores_a_usar[i % len(colores_a_usar)]
-                
-                # Preparar nombre más corto para la leyenda
-                nombre_corto = nombre_mostrar.replace("FONDO MUTUO SURA ", "").replace("SURA ", "")
-                if " - " in nombre_corto:
-                    partes = nombre_corto.split(" - ")
-                    nombre_final = f"{partes[0]} ({partes[1]})" if len(partes) > 1 else nombre_corto
-                else:
-                    nombre_final = nombre_corto
-                
-                # Asegurar que tenemos hover texts para esta traza
-                hover_texts_traza = hover_texts_por_traza[i] if i < len(hover_texts_por_traza) else []
-                
-                # Si no hay suficientes hover texts, rellenar con textos básicos
-                while len(hover_texts_traza) < len(df_retornos):
-                    hover_texts_traza.append(f"<b>{nombre_final}</b><br>Datos no disponibles")
-                
-                fig.add_trace(go.Scatter(
-                    x=df_retornos['Dates'],
-                    y=df_retornos[codigo],
-                    mode='lines',
-                    name=nombre_final,
-                    line=dict(color=color_linea, width=2),
-                    hovertemplate='%{text}<extra></extra>',
-                    text=hover_texts_traza,
-                    showlegend=True
-                ))
-                
-            except Exception as e:
-                # Si hay error en esta traza, continuar con la siguiente
-                print(f"Error creando traza para {codigo}: {e}")
-                continue
-        
-    # Configurar layout - SOLO CAMBIAR EL TÍTULO
-        fig.update_layout(
-            title={
-                'text': 'Retornos Acumulados',  # ← MISMO TÍTULO que el otro gráfico
-                'x': 0.5,
-                'y': 0.95,
-                'font': {'family': 'SuraSans-SemiBold', 'size': 18, 'color': '#24272A'}
-            },
-            xaxis_title='Fecha',
-            yaxis_title='Retorno Acumulado (%)',  # ← MISMO TÍTULO DEL EJE Y
-            font={'family': 'SuraSans-Regular', 'color': '#24272A'},
-            
-            hovermode='closest',
-            
-            hoverlabel=dict(
-                bgcolor="rgba(255, 255, 255, 0.98)",
-                bordercolor="rgba(0, 0, 0, 0.15)",
-                font=dict(
-                    family='SuraSans-Regular',
-                    size=12,
-                    color="#25405C"
-                ),
-                align="left",
-                namelength=-1),
-
-            xaxis=dict(
-                showgrid=False,
-                showspikes=True,
-                spikecolor="rgba(36, 39, 42, 0.3)",
-                spikesnap="cursor",
-                spikemode="across",
-                spikethickness=1,
-                spikedash="dot",
-                tickformat='%d/%m/%Y'
-            ),
-            yaxis=dict(
-                tickformat='.1f',
-                ticksuffix='%',
-                showgrid=True,
-                gridcolor='rgba(128,128,128,0.2)',
-            ),
-
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.15,
-                xanchor="center",
-                x=0.5,
-                font={'family': 'SuraSans-Regular', 'size': 10}
-            ),
-            height=500,
-            margin=dict(t=60, b=50, l=50, r=50),
-            template='plotly_white',
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            
-            # AGREGAR LOGO EN LA ESQUINA INFERIOR DERECHA
-            images=[
-                dict(
-                    source="/assets/investments_logo.png",
-                    xref="paper", 
-                    yref="paper",
-                    x=0.99,
-                    y=-0.27,
-                    sizex=0.28,
-                    sizey=0.22,
-                    xanchor="right",
-                    yanchor="bottom",
-                    opacity=1,
-                    layer="above"
-                )
-            ]
-        )
-        
-        return fig
-        
-    except Exception as e:
-        # Si hay cualquier error, devolver un gráfico con mensaje de error
-        print(f"Error en crear_grafico_retornos_anualizados: {e}")
-        error_fig = go.Figure()
-        error_fig.add_annotation(
-            text=f"Error al crear el gráfico: {str(e)}",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=14, color="red")
-        )
-        error_fig.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            height=500
-        )
-        return error_fig
+    return crear_grafico_retornos(df_retornos, codigos_seleccionados, nombres_mostrar)
 
 #Call Back gráfico Anualizado. 
 
-# Callback para inicializar fechas por defecto - ANUALIZADA
+# Callback para actualizar gráfico - ANUALIZADA
 @callback(
-    [Output('fecha-inicio-grafico-anualizada', 'date'),
-     Output('fecha-fin-grafico-anualizada', 'date')],
-    [Input('tabs-anualizada', 'active_tab')]
+    Output('grafico-retornos-anualizados', 'figure'),
+    [Input({'type': 'moneda-selector', 'tab': 'anualizada'}, 'value'),
+     Input({'type': 'selecciones-store', 'tab': 'anualizada'}, 'data'),
+     Input({'type': 'fecha-inicio', 'tab': 'anualizada'}, 'date'),
+     Input({'type': 'fecha-fin', 'tab': 'anualizada'}, 'date')]
 )
-def inicializar_fechas_grafico_anualizada(active_tab):
-    if pesos_df is not None:
-        fecha_fin = pesos_df['Dates'].max()
-        fecha_inicio = fecha_fin - timedelta(days=365)
-        return fecha_inicio, fecha_fin
-    else:
-        fecha_fin = datetime.now()
-        fecha_inicio = fecha_fin - timedelta(days=365)
-        return fecha_inicio, fecha_fin
+def actualizar_grafico_retornos_anualizados(moneda, selecciones_data, fecha_inicio, fecha_fin):
+    return obtener_grafico_retornos(moneda, selecciones_data, fecha_inicio, fecha_fin)['figura']
 
-# Callback para botones de período - ANUALIZADA
-@callback(
-    [Output('fecha-inicio-grafico-anualizada', 'date', allow_duplicate=True),
-     Output('fecha-fin-grafico-anualizada', 'date', allow_duplicate=True),
-     Output('fecha-inicio-grafico-anualizada', 'min_date_allowed'),
-     Output('btn-1m-anualizada', 'disabled'),
-     Output('btn-3m-anualizada', 'disabled'),
-     Output('btn-6m-anualizada', 'disabled'),
-     Output('btn-ytd-anualizada', 'disabled'),
-     Output('btn-1y-anualizada', 'disabled'),
-     Output('btn-3y-anualizada', 'disabled'),
-     Output('btn-5y-anualizada', 'disabled'),
-     Output('btn-max-anualizada', 'disabled')],
-    [Input('btn-1m-anualizada', 'n_clicks'),
-     Input('btn-3m-anualizada', 'n_clicks'),
-     Input('btn-6m-anualizada', 'n_clicks'),
-     Input('btn-ytd-anualizada', 'n_clicks'),
-     Input('btn-1y-anualizada', 'n_clicks'),
-     Input('btn-3y-anualizada', 'n_clicks'),
-     Input('btn-5y-anualizada', 'n_clicks'),
-     Input('btn-max-anualizada', 'n_clicks'),
-     Input('selecciones-store-anualizada', 'data'),
-     Input('moneda-selector-anualizada', 'value')],
-    prevent_initial_call=True
-)
-def actualizar_fechas_grafico_anualizada(btn1m, btn3m, btn6m, btnytd, btn1y, btn3y, btn5y, btnmax, selecciones_data, moneda):
-    ctx = dash.callback_context
-    
-    if pesos_df is None:
-        return dash.no_update, dash.no_update, None, False, False, False, False, False, False, False, False
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
-    fecha_fin = df_actual['Dates'].max()
-    
-    # Obtener códigos seleccionados
-    codigos_seleccionados = []
-    if selecciones_data:
-        codigos_seleccionados, _ = procesar_selecciones_multiples(selecciones_data)
-    
-    # Obtener fecha límite (fondo más nuevo)
-    fecha_limite_inicio = obtener_fecha_inicio_mas_reciente(df_actual, codigos_seleccionados)
-    
-    # Calcular años disponibles para deshabilitar botones
-    anos_disponibles = 0
-    if fecha_limite_inicio:
-        anos_disponibles = calcular_anos_disponibles(fecha_limite_inicio, fecha_fin)
-    
-    # Determinar qué botones deshabilitar
-    btn_1m_disabled = False
-    btn_3m_disabled = False
-    btn_6m_disabled = False
-    btn_ytd_disabled = False
-    btn_1y_disabled = anos_disponibles < 1
-    btn_3y_disabled = anos_disponibles < 3
-    btn_5y_disabled = anos_disponibles < 5
-    btn_max_disabled = not fecha_limite_inicio
-    
-    # Si se presionó un botón, calcular nueva fecha de inicio
-    if ctx.triggered:
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        
-        if button_id in ['btn-1m-anualizada', 'btn-3m-anualizada', 'btn-6m-anualizada', 'btn-ytd-anualizada', 'btn-1y-anualizada', 'btn-3y-anualizada', 'btn-5y-anualizada', 'btn-max-anualizada']:
-            periodo = button_id.replace('btn-', '').replace('-anualizada', '')
-            fecha_inicio = ajustar_fecha_segun_periodo_y_limite(fecha_fin, periodo, fecha_limite_inicio)
-            
-            return (fecha_inicio, fecha_fin, fecha_limite_inicio,
-                   btn_1m_disabled, btn_3m_disabled, btn_6m_disabled, btn_ytd_disabled,
-                   btn_1y_disabled, btn_3y_disabled, btn_5y_disabled, btn_max_disabled)
-    
-    # Si solo cambiaron las selecciones, ajustar fecha de inicio a los datos disponibles
-    if fecha_limite_inicio:
-        fecha_inicio_actual = max(fecha_limite_inicio, fecha_fin - timedelta(days=365))
-    else:
-        fecha_inicio_actual = fecha_fin - timedelta(days=365)
-    
-    return (fecha_inicio_actual, fecha_fin, fecha_limite_inicio,
-           btn_1m_disabled, btn_3m_disabled, btn_6m_disabled, btn_ytd_disabled,
-           btn_1y_disabled, btn_3y_disabled, btn_5y_disabled, btn_max_disabled)
 
-# Callback para validar fechas manuales - ANUALIZADA
-@callback(
-    [Output('fecha-inicio-grafico-anualizada', 'date', allow_duplicate=True),
-     Output('fecha-fin-grafico-anualizada', 'date', allow_duplicate=True)],
-    [Input('fecha-inicio-grafico-anualizada', 'date'),
-     Input('fecha-fin-grafico-anualizada', 'date')],
-    [State('selecciones-store-anualizada', 'data'),
-     State('moneda-selector-anualizada', 'value')],
-    prevent_initial_call=True
-)
-def validar_fechas_manuales_anualizada(fecha_inicio_input, fecha_fin_input, selecciones_data, moneda):
-    """
-    Valida que las fechas manuales no excedan los límites del fondo más nuevo
-    """
-    if pesos_df is None or not fecha_inicio_input or not fecha_fin_input:
-        return dash.no_update, dash.no_update
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
-    
-    # Obtener códigos seleccionados
-    codigos_seleccionados = []
-    if selecciones_data:
-        codigos_seleccionados, _ = procesar_selecciones_multiples(selecciones_data)
-    
-    # Obtener fecha límite
-    fecha_limite_inicio = obtener_fecha_inicio_mas_reciente(df_actual, codigos_seleccionados)
-    
-    fecha_inicio_dt = pd.to_datetime(fecha_inicio_input)
-    fecha_fin_dt = pd.to_datetime(fecha_fin_input)
-    
-    # Ajustar fecha de inicio si está antes del límite
-    if fecha_limite_inicio and fecha_inicio_dt < fecha_limite_inicio:
-        fecha_inicio_ajustada = fecha_limite_inicio
-        return fecha_inicio_ajustada, fecha_fin_dt
-    
-    return dash.no_update, dash.no_update
 
-# Callback para actualizar gráfico - ANUALIZADA
-@callback(
-    Output('grafico-retornos-anualizados', 'figure'),
-    [Input('moneda-selector-anualizada', 'value'),
-     Input('selecciones-store-anualizada', 'data'),
-     Input('fecha-inicio-grafico-anualizada', 'date'),
-     Input('fecha-fin-grafico-anualizada', 'date')]
-)
-def actualizar_grafico_retornos_anualizados(moneda, selecciones_data, fecha_inicio, fecha_fin):
-    if pesos_df is None:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="No se pudieron cargar los datos",
-            x=0.5, y=0.5, showarrow=False
-        )
-        return fig_vacio
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
-    
-    if not selecciones_data:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="Usa el botón 'Agregar Fondo Personalizado' para ver fondos en el gráfico",
-            x=0.5, 
-            y=0.5, 
-            showarrow=False,
-            font={'family': 'SuraSans-Regular', 'size': 16, 'color': '#666666'},
-            xanchor='center',  
-            yanchor='middle',
-            xref='paper',
-            yref='paper',
-        )
-        fig_vacio.update_layout(
-            plot_bgcolor='#f8f9fa',
-            paper_bgcolor='#f8f9fa',
-            xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            margin=dict(t=20, b=20, l=20, r=20),
-            height=500
-        )
-        return fig_vacio
-    
-    codigos_personalizados, nombres_personalizados = procesar_selecciones_multiples(selecciones_data)
-    
-    if not codigos_personalizados:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="No se encontraron datos para las selecciones personalizadas",
-            x=0.5, 
-            y=0.5, 
-            showarrow=False,
-            font={'family': 'SuraSans-Regular', 'size': 16, 'color': '#666666'},
-            xanchor='center',  
-            yanchor='middle',
-            xref='paper',
-            yref='paper',
-        )
-        fig_vacio.update_layout(
-            plot_bgcolor='#f8f9fa',
-            paper_bgcolor='#f8f9fa',
-            xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            margin=dict(t=20, b=20, l=20, r=20),
-            height=500
-        )
-        return fig_vacio
-    
-    # USAR LA MISMA FUNCIÓN QUE RENTABILIDAD ACUMULADA
-    df_retornos = calcular_retornos_acumulados_con_limite(
-        df_actual, codigos_personalizados, 
-        fecha_inicio, fecha_fin
-    )
-    
-    return crear_grafico_retornos_anualizados(df_retornos, codigos_personalizados, nombres_personalizados)
-
-
-
-
-# Callbacks para periodo activo y estilos de botones - ANUALIZADA
-@callback(
-    Output("periodo-activo-anualizada", "data"),
-    Input("btn-1m-anualizada", "n_clicks"),
-    Input("btn-3m-anualizada", "n_clicks"),
-    Input("btn-6m-anualizada", "n_clicks"),
-    Input("btn-ytd-anualizada", "n_clicks"),
-    Input("btn-1y-anualizada", "n_clicks"),
-    Input("btn-3y-anualizada", "n_clicks"),
-    Input("btn-5y-anualizada", "n_clicks"),
-    Input("btn-max-anualizada", "n_clicks"),
-    prevent_initial_call=True
-)
-def actualizar_periodo_anualizada(*_):
-    from dash import ctx
-    return ctx.triggered_id
-
-@callback(
-    [
-        Output("btn-1m-anualizada", "style"),
-        Output("btn-3m-anualizada", "style"),
-        Output("btn-6m-anualizada", "style"),
-        Output("btn-ytd-anualizada", "style"),
-        Output("btn-1y-anualizada", "style"),
-        Output("btn-3y-anualizada", "style"),
-        Output("btn-5y-anualizada", "style"),
-        Output("btn-max-anualizada", "style"),
-    ],
-    [Input("periodo-activo-anualizada", "data"),
-     Input('btn-1m-anualizada', 'disabled'),
-     Input('btn-3m-anualizada', 'disabled'),
-     Input('btn-6m-anualizada', 'disabled'),
-     Input('btn-ytd-anualizada', 'disabled'),
-     Input('btn-1y-anualizada', 'disabled'),
-     Input('btn-3y-anualizada', 'disabled'),
-     Input('btn-5y-anualizada', 'disabled'),
-     Input('btn-max-anualizada', 'disabled')]
-)
-def resaltar_boton_activo_anualizada(periodo_activo, disabled_1m, disabled_3m, disabled_6m, 
-                                   disabled_ytd, disabled_1y, disabled_3y, disabled_5y, disabled_max):
-    def estilo(activo, deshabilitado, ancho="45px"):
-        if deshabilitado:
-            # Estilo para botones deshabilitados
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': '#f8f9fa', 'color': '#6c757d',
-                'border': '1px solid #dee2e6',
-                'cursor': 'not-allowed',
-                'opacity': 0.5
-            }
-        elif activo:
-            # Estilo para botón activo
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': 'black', 'color': 'white',
-                'border': '1px solid black'
-            }
-        else:
-            # Estilo para botones normales
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': 'white', 'color': 'black',
-                'border': '1px solid black'
-            }
-
-    return [
-        estilo(periodo_activo == "btn-1m-anualizada", disabled_1m),
-        estilo(periodo_activo == "btn-3m-anualizada", disabled_3m),
-        estilo(periodo_activo == "btn-6m-anualizada", disabled_6m),
-        estilo(periodo_activo == "btn-ytd-anualizada", disabled_ytd, ancho="50px"),
-        estilo(periodo_activo == "btn-1y-anualizada", disabled_1y),
-        estilo(periodo_activo == "btn-3y-anualizada", disabled_3y),
-        estilo(periodo_activo == "btn-5y-anualizada", disabled_5y),
-        estilo(periodo_activo == "btn-max-anualizada", disabled_max, ancho="50px"),
-    ]
 
 
 # =============================================================================
@@ -3568,103 +2929,21 @@ def resaltar_boton_activo_anualizada(periodo_activo, disabled_1m, disabled_3m, d
 # =============================================================================
 
 # Callback para abrir/cerrar modal de gráfico anualizada
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='alternar_modal'),
     Output("modal-grafico-anualizada", "is_open"),
     [Input("btn-pantalla-completa-anualizada", "n_clicks")],
     [State("modal-grafico-anualizada", "is_open")],
     prevent_initial_call=True
 )
-def toggle_modal_grafico_anualizada(btn_open, is_open): 
-    if btn_open:
-        return not is_open
-    return is_open
 
 # Callback para sincronizar gráfico del modal anualizada
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='sincronizar_modal_anualizada'),
     Output('grafico-retornos-anualizados-modal', 'figure'),
     [Input('grafico-retornos-anualizados', 'figure')],
     prevent_initial_call=True
 )
-def sincronizar_grafico_modal_anualizada(figure):
-    if figure and 'data' in figure and len(figure['data']) > 0:
-        figure_modal = figure.copy()
-        
-        figure_modal['layout'].update({
-            'height': 750,
-            'margin': dict(t=100, b=80, l=20, r=20),
-            'title': {
-                'text': 'Rentabilidades Acumulados',
-                'x': 0.5,
-                'y': 0.95,
-                'font': {'family': 'SuraSans-SemiBold', 'size': 26, 'color': '#24272A'}
-            },
-            'legend': {
-                'orientation': 'h',
-                'x': 0.5,
-                'y': -0.15,
-                'xanchor': 'center',
-                'yanchor': 'top',
-                'font': {'family': 'SuraSans-Regular', 'size': 14},
-                'bgcolor': 'rgba(255,255,255,0.9)',
-                'bordercolor': 'rgba(0,0,0,0.1)',
-                'borderwidth': 1
-            },
-            'xaxis': {
-                'showgrid': False,
-                'showspikes': True,
-                'spikecolor': 'rgba(36, 39, 42, 0.3)',
-                'spikesnap': 'cursor',
-                'spikemode': 'across',
-                'spikethickness': 1,
-                'spikedash': 'dot',
-                'tickformat': '%d/%m/%Y'
-            },
-            'yaxis': {
-                'title': {'text': 'Retorno Acumulado (%)', 'font': {'size': 18}},
-                'tickfont': {'size': 14},
-                'tickformat': '.1f',
-                'ticksuffix': '%',
-                'showgrid': True,
-                'gridcolor': 'rgba(128,128,128,0.2)'
-            },
-            'plot_bgcolor': 'white',
-            'paper_bgcolor': 'white',
-            
-            # AGREGAR LOGO TAMBIÉN EN EL MODAL
-            'images': [
-                dict(
-                    source="/assets/investments_logo.png",
-                    xref="paper", 
-                    yref="paper",
-                    x=1.02,
-                    y=-0.30,
-                    sizex=0.23,
-                    sizey=0.17,
-                    xanchor="right",
-                    yanchor="bottom",
-                    opacity=0.9,
-                    layer="above"
-                )
-            ]
-        })
-        
-        return figure_modal
-    
-    # Si no hay datos, mostrar mensaje
-    fig_vacio = go.Figure()
-    fig_vacio.add_annotation(
-        text="Cargando datos...",
-        x=0.5, y=0.5, showarrow=False,
-        font={'family': 'SuraSans-Regular', 'size': 20, 'color': '#666666'}
-    )
-    fig_vacio.update_layout(
-        plot_bgcolor='#f8f9fa', paper_bgcolor='#f8f9fa',
-        xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-        yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-        margin=dict(t=20, b=20, l=20, r=20), height=750
-    )
-    return fig_vacio
-
 
 @callback(
     Output({'type': 'series-dropdown', 'index': MATCH}, 'options'),
@@ -3672,7 +2951,7 @@ def sincronizar_grafico_modal_anualizada(figure):
     Output({'type': 'series-dropdown', 'index': MATCH}, 'placeholder'),
     Output({'type': 'series-dropdown', 'index': MATCH}, 'value'),
     [Input({'type': 'fondo-dropdown', 'index': MATCH}, 'value'),
-     Input('moneda-selector-acumulada', 'value')],  # AGREGAR moneda
+     Input({'type': 'moneda-selector', 'tab': 'acumulada'}, 'value')],  # AGREGAR moneda
     State({'type': 'series-dropdown', 'index': MATCH}, 'value'),
     prevent_initial_call=True
 )
@@ -3701,37 +2980,28 @@ def actualizar_series_dinamico(fondo_seleccionado, moneda, valor_series_actual):
 
 # Callback para actualizar el store con las selecciones
 @callback(
-    Output('selecciones-store', 'data'),
+    Output({'type': 'selecciones-store', 'tab': 'acumulada'}, 'data'),
     [Input({'type': 'fondo-dropdown', 'index': ALL}, 'value'),
-     Input({'type': 'series-dropdown', 'index': ALL}, 'value')],
-    [State('selectores-container', 'children')]
+     Input({'type': 'series-dropdown', 'index': ALL}, 'value')]
 )
-def actualizar_selecciones_store(fondos_valores, series_valores, children):
-    if not children or not fondos_valores or not series_valores:
-        return []
-    
-    selecciones = []
-    
-    for i, child in enumerate(children):
-        if i < len(fondos_valores) and i < len(series_valores):
-            fondo = fondos_valores[i]
-            series = series_valores[i]
-            
-            if fondo and series:  # Solo agregar si ambos tienen valores
-                selecciones.append({
-                    'fondo': fondo,
-                    'series': series
-                })
-    
-    return selecciones
+def actualizar_selecciones_store(fondos_valores, series_valores):
+    return [
+        {'fondo': fondo, 'series': series}
+        for fondo, series in zip(fondos_valores or [], series_valores or [])
+        if fondo and series  # Solo agregar si ambos tienen valores
+    ]
+
+# Fechas del gráfico de las tres secciones. Los componentes llevan la
+# pestaña en su id ({'type': ..., 'tab': 'acumulada' | 'anualizada' |
+# 'por_ano'}) y MATCH hace que cada sección use solo los suyos.
 
 # Callback para inicializar fechas por defecto
 @callback(
-    [Output('fecha-inicio-grafico', 'date'),
-     Output('fecha-fin-grafico', 'date')],
-    [Input('moneda-selector-acumulada', 'value')]
+    [Output({'type': 'fecha-inicio', 'tab': MATCH}, 'date'),
+     Output({'type': 'fecha-fin', 'tab': MATCH}, 'date')],
+    [Input({'type': 'moneda-selector', 'tab': MATCH}, 'value')]
 )
-def inicializar_fechas_grafico(active_tab):
+def inicializar_fechas_grafico(moneda):
     if pesos_df is not None:
         fecha_fin = pesos_df['Dates'].max()
         fecha_inicio = fecha_fin - timedelta(days=365)
@@ -3742,14 +3012,131 @@ def inicializar_fechas_grafico(active_tab):
         return fecha_inicio, fecha_fin
 
 
+# Callback para botones de período
+@callback(
+    [Output({'type': 'fecha-inicio', 'tab': MATCH}, 'date', allow_duplicate=True),
+     Output({'type': 'fecha-fin', 'tab': MATCH}, 'date', allow_duplicate=True),
+     Output({'type': 'fecha-inicio', 'tab': MATCH}, 'min_date_allowed'),
+     Output({'type': 'btn-periodo', 'tab': MATCH, 'periodo': ALL}, 'disabled')],
+    [Input({'type': 'btn-periodo', 'tab': MATCH, 'periodo': ALL}, 'n_clicks'),
+     Input({'type': 'selecciones-store', 'tab': MATCH}, 'data'),
+     Input({'type': 'moneda-selector', 'tab': MATCH}, 'value')],
+    prevent_initial_call=True
+)
+def actualizar_fechas_grafico_con_limites(clicks_periodos, selecciones_data, moneda):
+    ctx = dash.callback_context
+    
+    if pesos_df is None:
+        return dash.no_update, dash.no_update, None, [False] * len(clicks_periodos)
+    
+    df_actual = pesos_df if moneda == 'CLP' else dolares_df
+    fecha_fin = df_actual['Dates'].max()
+    
+    # Obtener códigos seleccionados
+    codigos_seleccionados = []
+    if selecciones_data:
+        codigos_seleccionados, _ = procesar_selecciones_multiples(selecciones_data)
+    
+    # Obtener fecha límite (fondo más nuevo)
+    fecha_limite_inicio = obtener_fecha_inicio_mas_reciente(df_actual, codigos_seleccionados)
+    
+    # Calcular años disponibles para deshabilitar botones
+    anos_disponibles = 0
+    if fecha_limite_inicio:
+        anos_disponibles = calcular_anos_disponibles(fecha_limite_inicio, fecha_fin)
+    
+    # Determinar qué botones deshabilitar, en el orden en que están en la sección
+    deshabilitados = {
+        '1m': False, '3m': False, '6m': False, 'ytd': False,
+        '1y': anos_disponibles < 1,
+        '3y': anos_disponibles < 3,
+        '5y': anos_disponibles < 5,
+        'max': not fecha_limite_inicio,
+    }
+    botones_deshabilitados = [deshabilitados[salida['id']['periodo']] for salida in ctx.outputs_list[3]]
+    
+    # Si se presionó un botón, calcular nueva fecha de inicio
+    boton = ctx.triggered_id
+    if isinstance(boton, dict) and boton.get('type') == 'btn-periodo':
+        fecha_inicio = ajustar_fecha_segun_periodo_y_limite(fecha_fin, boton['periodo'], fecha_limite_inicio)
+        return fecha_inicio, fecha_fin, fecha_limite_inicio, botones_deshabilitados
+    
+    # Si solo cambiaron las selecciones o la moneda, ajustar fecha de inicio a los datos disponibles
+    if fecha_limite_inicio:
+        fecha_inicio_actual = max(fecha_limite_inicio, fecha_fin - timedelta(days=365))
+    else:
+        fecha_inicio_actual = fecha_fin - timedelta(days=365)
+    
+    return fecha_inicio_actual, fecha_fin, fecha_limite_inicio, botones_deshabilitados
+
+
+# Callback para validar cuando el usuario cambia las fechas manualmente
+@callback(
+    [Output({'type': 'fecha-inicio', 'tab': MATCH}, 'date', allow_duplicate=True),
+     Output({'type': 'fecha-fin', 'tab': MATCH}, 'date', allow_duplicate=True)],
+    [Input({'type': 'fecha-inicio', 'tab': MATCH}, 'date'),
+     Input({'type': 'fecha-fin', 'tab': MATCH}, 'date')],
+    [State({'type': 'selecciones-store', 'tab': MATCH}, 'data'),
+     State({'type': 'moneda-selector', 'tab': MATCH}, 'value')],
+    prevent_initial_call=True
+)
+def validar_fechas_manuales(fecha_inicio_input, fecha_fin_input, selecciones_data, moneda):
+    """
+    Valida que las fechas manuales no excedan los límites del fondo más nuevo
+    """
+    if pesos_df is None or not fecha_inicio_input or not fecha_fin_input:
+        return dash.no_update, dash.no_update
+    
+    df_actual = pesos_df if moneda == 'CLP' else dolares_df
+    
+    # Obtener códigos seleccionados
+    codigos_seleccionados = []
+    if selecciones_data:
+        codigos_seleccionados, _ = procesar_selecciones_multiples(selecciones_data)
+    
+    # Obtener fecha límite
+    fecha_limite_inicio = obtener_fecha_inicio_mas_reciente(df_actual, codigos_seleccionados)
+    
+    fecha_inicio_dt = pd.to_datetime(fecha_inicio_input)
+    fecha_fin_dt = pd.to_datetime(fecha_fin_input)
+    
+    # Ajustar fecha de inicio si está antes del límite
+    if fecha_limite_inicio and fecha_inicio_dt < fecha_limite_inicio:
+        fecha_inicio_ajustada = fecha_limite_inicio
+        return fecha_inicio_ajustada, fecha_fin_dt
+    
+    return dash.no_update, dash.no_update
+
+
+# Período activo y estilos de los botones de período
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='periodo_activo'),
+    Output({'type': 'periodo-activo', 'tab': MATCH}, 'data'),
+    Input({'type': 'btn-periodo', 'tab': MATCH, 'periodo': ALL}, 'n_clicks'),
+    prevent_initial_call=True
+)
+
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='estilos_periodo'),
+    Output({'type': 'btn-periodo', 'tab': MATCH, 'periodo': ALL}, 'style'),
+    [Input({'type': 'periodo-activo', 'tab': MATCH}, 'data'),
+     Input({'type': 'btn-periodo', 'tab': MATCH, 'periodo': ALL}, 'disabled')]
+)
+
+
 
 
 # Callback para tabla de índices en pestaña anualizada 
 @callback(
    Output('tabla-indices-anualizada', 'children'),
-   [Input('moneda-selector-anualizada', 'value')]
+   [Input({'type': 'moneda-selector', 'tab': 'anualizada'}, 'value')]
 )
 def actualizar_tabla_indices_anualizada(moneda):
+    return tabla_indices_compartida(
+        'tabla_indices_anualizada', (moneda,), lambda: construir_tabla_indices_anualizada(moneda)
+    )
+
+def construir_tabla_indices_anualizada(moneda):
     if pesos_df is None:
         return html.P("No se pudieron cargar los datos", 
                      style={'fontFamily': 'SuraSans-Regular', 'color': 'red', 'textAlign': 'center'})
@@ -3808,9 +3195,14 @@ def actualizar_tabla_indices_anualizada(moneda):
 # Callback para tabla de índices en pestaña por año
 @callback(
    Output('tabla-indices-por-ano', 'children'),
-   [Input('moneda-selector-por-año', 'value')]
+   [Input({'type': 'moneda-selector', 'tab': 'por_ano'}, 'value')]
 )
 def actualizar_tabla_indices_por_ano(moneda):
+    return tabla_indices_compartida(
+        'tabla_indices_por_ano', (moneda,), lambda: construir_tabla_indices_por_ano(moneda)
+    )
+
+def construir_tabla_indices_por_ano(moneda):
     if pesos_df is None:
         return html.P("No se pudieron cargar los datos", 
                      style={'fontFamily': 'SuraSans-Regular', 'color': 'red', 'textAlign': 'center'})
@@ -3870,304 +3262,139 @@ def actualizar_tabla_indices_por_ano(moneda):
     ])
 
 
-# Callback para botones de período
-@callback(
-    [Output('fecha-inicio-grafico', 'date', allow_duplicate=True),
-     Output('fecha-fin-grafico', 'date', allow_duplicate=True),
-     Output('fecha-inicio-grafico', 'min_date_allowed'),  # NUEVO: límite mínimo
-     Output('btn-1m', 'disabled'),   # NUEVO: deshabilitar botones si no hay suficiente historial
-     Output('btn-3m', 'disabled'),
-     Output('btn-6m', 'disabled'),
-     Output('btn-ytd', 'disabled'),
-     Output('btn-1y', 'disabled'),
-     Output('btn-3y', 'disabled'),
-     Output('btn-5y', 'disabled'),
-     Output('btn-max', 'disabled')],
-    [Input('btn-1m', 'n_clicks'),
-     Input('btn-3m', 'n_clicks'),
-     Input('btn-6m', 'n_clicks'),
-     Input('btn-ytd', 'n_clicks'),
-     Input('btn-1y', 'n_clicks'),
-     Input('btn-3y', 'n_clicks'),
-     Input('btn-5y', 'n_clicks'),
-     Input('btn-max', 'n_clicks'),
-     Input('selecciones-store', 'data'),  # NUEVO: escuchar cambios en selecciones
-     Input('moneda-selector-acumulada', 'value')],  # NUEVO: escuchar cambios en moneda
-    prevent_initial_call=True
-)
-def actualizar_fechas_grafico_con_limites(btn1m, btn3m, btn6m, btnytd, btn1y, btn3y, btn5y, btnmax, selecciones_data, moneda):
-    ctx = dash.callback_context
-    
-    if pesos_df is None:
-        return dash.no_update, dash.no_update, None, False, False, False, False, False, False, False, False
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
-    fecha_fin = df_actual['Dates'].max()
-    
-    # Obtener códigos seleccionados
-    codigos_seleccionados = []
-    if selecciones_data:
-        codigos_seleccionados, _ = procesar_selecciones_multiples(selecciones_data)
-    
-    # Obtener fecha límite (fondo más nuevo)
-    fecha_limite_inicio = obtener_fecha_inicio_mas_reciente(df_actual, codigos_seleccionados)
-    
-    # Calcular años disponibles para deshabilitar botones
-    anos_disponibles = 0
-    if fecha_limite_inicio:
-        anos_disponibles = calcular_anos_disponibles(fecha_limite_inicio, fecha_fin)
+# =============================================================================
+# ACTUALIZACIONES INCREMENTALES DEL GRÁFICO (Patch)
+# =============================================================================
+
+# Estado de las trazas que tiene cada navegador, indexado por el token que
+# guarda 'grafico-trazas-token'. Cada respuesta genera un token nuevo y
+# descarta el anterior, así el caché queda en ~1 entrada por sesión activa.
+# Vive en la caché 'estados_grafico' de cache_servidor (LRU con lock,
+# MAX_ESTADOS_GRAFICO), porque los hilos del worker la modifican a la vez.
+
+
+def guardar_estado_grafico(token_anterior, estado):
+    """
+    Registra el conjunto de trazas enviado al navegador y devuelve su token
+    """
+    if token_anterior:
+        descartar_cache('estados_grafico', token_anterior)
     
-    # Determinar qué botones deshabilitar
-    btn_1m_disabled = False
-    btn_3m_disabled = False
-    btn_6m_disabled = False
-    btn_ytd_disabled = False
-    btn_1y_disabled = anos_disponibles < 1
-    btn_3y_disabled = anos_disponibles < 3
-    btn_5y_disabled = anos_disponibles < 5
-    btn_max_disabled = not fecha_limite_inicio
+    token = uuid.uuid4().hex
+    guardar_cache('estados_grafico', token, estado)
+    return token
+
+
+def diferencia_simple_trazas(codigos_previos, codigos_nuevos):
+    """
+    Detecta si la nueva lista de trazas difiere de la anterior en exactamente
+    un fondo agregado o eliminado (manteniendo el orden del resto).
     
-    # Si se presionó un botón, calcular nueva fecha de inicio
-    if ctx.triggered:
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        
-        if button_id in ['btn-1m', 'btn-3m', 'btn-6m', 'btn-ytd', 'btn-1y', 'btn-3y', 'btn-5y', 'btn-max']:
-            periodo = button_id.replace('btn-', '')
-            fecha_inicio = ajustar_fecha_segun_periodo_y_limite(fecha_fin, periodo, fecha_limite_inicio)
-            
-            return (fecha_inicio, fecha_fin, fecha_limite_inicio,
-                   btn_1m_disabled, btn_3m_disabled, btn_6m_disabled, btn_ytd_disabled,
-                   btn_1y_disabled, btn_3y_disabled, btn_5y_disabled, btn_max_disabled)
+    Returns:
+        ('agregar', indice) | ('eliminar', indice) | None
+    """
+    diferencia = len(codigos_nuevos) - len(codigos_previos)
     
-    # Si solo cambiaron las selecciones, ajustar fecha de inicio a los datos disponibles
-    if fecha_limite_inicio:
-        # Mantener la fecha fin, pero ajustar fecha inicio si está fuera del rango
-        fecha_inicio_actual = pd.to_datetime('2023-01-01')  # valor por defecto
-        if ctx.triggered:
-            # Usar fecha de inicio actual si no se presionó botón
-            fecha_inicio_actual = max(fecha_limite_inicio, fecha_fin - timedelta(days=365))
-        else:
-            fecha_inicio_actual = fecha_limite_inicio
+    if diferencia == 1:
+        mas_larga, mas_corta, operacion = codigos_nuevos, codigos_previos, 'agregar'
+    elif diferencia == -1:
+        mas_larga, mas_corta, operacion = codigos_previos, codigos_nuevos, 'eliminar'
     else:
-        fecha_inicio_actual = fecha_fin - timedelta(days=365)
+        return None
     
-    return (fecha_inicio_actual, fecha_fin, fecha_limite_inicio,
-           btn_1m_disabled, btn_3m_disabled, btn_6m_disabled, btn_ytd_disabled,
-           btn_1y_disabled, btn_3y_disabled, btn_5y_disabled, btn_max_disabled)
-
+    for indice in range(len(mas_larga)):
+        if mas_larga[:indice] + mas_larga[indice + 1:] == mas_corta:
+            return operacion, indice
+    
+    return None
 
 
-# NUEVO CALLBACK para validar cuando el usuario cambia las fechas manualmente
-@callback(
-    [Output('fecha-inicio-grafico', 'date', allow_duplicate=True),
-     Output('fecha-fin-grafico', 'date', allow_duplicate=True)],
-    [Input('fecha-inicio-grafico', 'date'),
-     Input('fecha-fin-grafico', 'date')],
-    [State('selecciones-store', 'data'),
-     State('moneda-selector-acumulada', 'value')],
-    prevent_initial_call=True
-)
-def validar_fechas_manuales(fecha_inicio_input, fecha_fin_input, selecciones_data, moneda):
+def crear_patch_trazas(figura_nueva, operacion, indice, colores_previos):
     """
-    Valida que las fechas manuales no excedan los límites del fondo más nuevo
+    Construye un Patch que inserta o elimina solo la traza afectada. El resto
+    de las trazas queda igual en el navegador (el hover 'x unified' no
+    depende de los demás fondos); solo se reenvía el color de las pocas que
+    lo cambien (ver asignar_colores_fondos).
     """
-    if pesos_df is None or not fecha_inicio_input or not fecha_fin_input:
-        return dash.no_update, dash.no_update
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
+    patch_figura = Patch()
+    colores_restantes = list(colores_previos)
     
-    # Obtener códigos seleccionados
-    codigos_seleccionados = []
-    if selecciones_data:
-        codigos_seleccionados, _ = procesar_selecciones_multiples(selecciones_data)
-    
-    # Obtener fecha límite
-    fecha_limite_inicio = obtener_fecha_inicio_mas_reciente(df_actual, codigos_seleccionados)
-    
-    fecha_inicio_dt = pd.to_datetime(fecha_inicio_input)
-    fecha_fin_dt = pd.to_datetime(fecha_fin_input)
+    if operacion == 'agregar':
+        patch_figura['data'].insert(indice, figura_nueva.data[indice].to_plotly_json())
+        colores_restantes.insert(indice, figura_nueva.data[indice].line.color)
+    else:
+        del patch_figura['data'][indice]
+        del colores_restantes[indice]
     
-    # Ajustar fecha de inicio si está antes del límite
-    if fecha_limite_inicio and fecha_inicio_dt < fecha_limite_inicio:
-        fecha_inicio_ajustada = fecha_limite_inicio
-        return fecha_inicio_ajustada, fecha_fin_dt
+    for i, (traza, color_previo) in enumerate(zip(figura_nueva.data, colores_restantes)):
+        if traza.line.color != color_previo:
+            patch_figura['data'][i]['line']['color'] = traza.line.color
     
-    return dash.no_update, dash.no_update
+    return patch_figura
 
 
 # Callback para actualizar gráfico (SOLO FONDOS PERSONALIZADOS - SIN ÍNDICES)
 @callback(
-    Output('grafico-retornos-acumulados', 'figure'),
-    [Input('moneda-selector-acumulada', 'value'),
-     Input('selecciones-store', 'data'),
-     Input('fecha-inicio-grafico', 'date'),
-     Input('fecha-fin-grafico', 'date')]
+    [Output('grafico-retornos-acumulados', 'figure'),
+     Output('grafico-trazas-token', 'data')],
+    [Input({'type': 'moneda-selector', 'tab': 'acumulada'}, 'value'),
+     Input({'type': 'selecciones-store', 'tab': 'acumulada'}, 'data'),
+     Input({'type': 'fecha-inicio', 'tab': 'acumulada'}, 'date'),
+     Input({'type': 'fecha-fin', 'tab': 'acumulada'}, 'date')],
+    [State('grafico-trazas-token', 'data')]
 )
-def actualizar_grafico_retornos_con_limite(moneda, selecciones_data, fecha_inicio, fecha_fin):
-    if pesos_df is None:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="No se pudieron cargar los datos",
-            x=0.5, y=0.5, showarrow=False
-        )
-        return fig_vacio
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
-    
-    if not selecciones_data:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="Usa el botón 'Agregar Fondo Personalizado' para ver fondos en el gráfico",
-            x=0.5, 
-            y=0.5, 
-            showarrow=False,
-            font={'family': 'SuraSans-Regular', 'size': 16, 'color': '#666666'},
-            xanchor='center',  
-            yanchor='middle',
-            xref='paper',
-            yref='paper',
-        )
-        fig_vacio.update_layout(
-            plot_bgcolor='#f8f9fa',
-            paper_bgcolor='#f8f9fa',
-            xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            margin=dict(t=20, b=20, l=20, r=20),
-            height=500
-        )
-        return fig_vacio
-    
-    codigos_personalizados, nombres_personalizados = procesar_selecciones_multiples(selecciones_data)
-    
-    if not codigos_personalizados:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="No se encontraron datos para las selecciones personalizadas",
-            x=0.5, 
-            y=0.5, 
-            showarrow=False,
-            font={'family': 'SuraSans-Regular', 'size': 16, 'color': '#666666'},
-            xanchor='center',  
-            yanchor='middle',
-            xref='paper',
-            yref='paper',
-        )
-        fig_vacio.update_layout(
-            plot_bgcolor='#f8f9fa',
-            paper_bgcolor='#f8f9fa',
-            xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            margin=dict(t=20, b=20, l=20, r=20),
-            height=500
-        )
-        return fig_vacio
+def actualizar_grafico_retornos_con_limite(moneda, selecciones_data, fecha_inicio, fecha_fin, token_trazas):
+    resultado = obtener_grafico_retornos(moneda, selecciones_data, fecha_inicio, fecha_fin)
+    figura, df_retornos = resultado['figura'], resultado['df_retornos']
+    
+    if df_retornos is None or df_retornos.empty:
+        return figura, None
+    
+    # Estado de lo que quedará dibujado: moneda, ventana efectiva y trazas
+    estado_nuevo = {
+        'moneda': moneda,
+        'ventana': (df_retornos['Dates'].iloc[0], df_retornos['Dates'].iloc[-1], len(df_retornos)),
+        'codigos': resultado['codigos'],
+        'colores': [traza.line.color for traza in figura.data],
+    }
+    estado_previo = obtener_cache('estados_grafico', token_trazas) if token_trazas else None
+    
+    # Si cambia la moneda o la ventana de fechas se reconstruye la figura completa
+    if (estado_previo is None
+            or estado_previo['moneda'] != estado_nuevo['moneda']
+            or estado_previo['ventana'] != estado_nuevo['ventana']
+            or len(figura.data) != len(estado_nuevo['codigos'])):
+        return figura, guardar_estado_grafico(token_trazas, estado_nuevo)
+    
+    if estado_previo['codigos'] == estado_nuevo['codigos']:
+        return dash.no_update, dash.no_update
     
-    # USAR LA NUEVA FUNCIÓN CON LÍMITE
-    df_retornos = calcular_retornos_acumulados_con_limite(
-        df_actual, codigos_personalizados, 
-        fecha_inicio, fecha_fin
-    )
+    diferencia = diferencia_simple_trazas(estado_previo['codigos'], estado_nuevo['codigos'])
+    if diferencia is None:
+        return figura, guardar_estado_grafico(token_trazas, estado_nuevo)
     
-    return crear_grafico_retornos(df_retornos, codigos_personalizados, nombres_personalizados)
+    operacion, indice = diferencia
+    print(f"🧩 Patch de gráfico: {operacion} traza {indice} ({len(estado_nuevo['codigos'])} trazas)")
+    patch_figura = crear_patch_trazas(figura, operacion, indice, estado_previo['colores'])
+    return patch_figura, guardar_estado_grafico(token_trazas, estado_nuevo)
 
 
 # Callback para abrir/cerrar modal de gráfico
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='alternar_modal'),
     Output("modal-grafico", "is_open"),
     [Input("btn-pantalla-completa", "n_clicks")],
     [State("modal-grafico", "is_open")],
     prevent_initial_call=True
 )
-def toggle_modal_grafico(btn_open, is_open):
-    if btn_open:
-        return not is_open
-    return is_open
 
 # Callback para sincronizar gráfico del modal
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='sincronizar_modal_acumulada'),
     Output('grafico-retornos-modal', 'figure'),
     [Input('grafico-retornos-acumulados', 'figure')],
     prevent_initial_call=True
 )
-def sincronizar_grafico_modal(figure):
-    if figure and 'data' in figure and len(figure['data']) > 0:
-        figure_modal = figure.copy()
-        
-        figure_modal['layout'].update({
-            'height': 750,
-            'margin': dict(t=100, b=80, l=20, r=20),
-            'title': {
-                'text': 'Retornos Acumulados',
-                'x': 0.5,
-                'y': 0.95,
-                'font': {'family': 'SuraSans-SemiBold', 'size': 26, 'color': '#24272A'}
-            },
-            'legend': {
-                'orientation': 'h',
-                'x': 0.5,
-                'y': -0.15,
-                'xanchor': 'center',
-                'yanchor': 'top',
-                'font': {'family': 'SuraSans-Regular', 'size': 14},
-                'bgcolor': 'rgba(255,255,255,0.9)',
-                'bordercolor': 'rgba(0,0,0,0.1)',
-                'borderwidth': 1
-            },
-            'xaxis': {
-                'showgrid': False,
-                'showspikes': True,
-                'spikecolor': 'rgba(36, 39, 42, 0.3)',
-                'spikesnap': 'cursor',
-                'spikemode': 'across',
-                'spikethickness': 1,
-                'spikedash': 'dot',
-                'tickformat': '%d/%m/%Y'
-            },
-            'yaxis': {
-                'title': {'text': 'Retorno Acumulado (%)', 'font': {'size': 18}},
-                'tickfont': {'size': 14},
-                'tickformat': '.1f',
-                'ticksuffix': '%',
-                'showgrid': True,
-                'gridcolor': 'rgba(128,128,128,0.2)'
-            },
-            'plot_bgcolor': 'white',
-            'paper_bgcolor': 'white',
-            
-            # AGREGAR LOGO TAMBIÉN EN EL MODAL (más abajo y más grande)
-            'images': [
-                dict(
-                    source="/assets/investments_logo.png",
-                    xref="paper", 
-                    yref="paper",
-                    x=1.02,
-                    y=-0.30,  # Más abajo que la leyenda
-                    sizex=0.23,  # Más grande en pantalla completa
-                    sizey=0.17,  # Más grande en pantalla completa
-                    xanchor="right",
-                    yanchor="bottom",
-                    opacity=0.9,
-                    layer="above"
-                )
-            ]
-        })
-        
-        return figure_modal
-    
-    # Si no hay datos, mostrar mensaje
-    fig_vacio = go.Figure()
-    fig_vacio.add_annotation(
-        text="Cargando datos...",
-        x=0.5, y=0.5, showarrow=False,
-        font={'family': 'SuraSans-Regular', 'size': 20, 'color': '#666666'}
-    )
-    fig_vacio.update_layout(
-        plot_bgcolor='#f8f9fa', paper_bgcolor='#f8f9fa',
-        xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-        yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-        margin=dict(t=20, b=20, l=20, r=20), height=750
-    )
-    return fig_vacio
 
 informe_module.registrar_callbacks_informe(
     app=app,
@@ -4176,7 +3403,8 @@ informe_module.registrar_callbacks_informe(
     fondos_unicos=fondos_unicos,
     fondos_a_series=fondos_a_series,
     fondo_serie_a_codigo=fondo_serie_a_codigo,
-    calcular_rentabilidades_func=calcular_rentabilidades
+    calcular_rentabilidades_func=calcular_rentabilidades,
+    registro_fondos=registro_fondos
 )
 
 # AGREGAR ESTAS LÍNEAS:
@@ -4186,86 +3414,11 @@ anexo_mensual_module.registrar_callbacks_anexo_mensual(
     dolares_df=dolares_df,
     fondos_unicos=fondos_unicos,
     fondos_a_series=fondos_a_series,
-    fondo_serie_a_codigo=fondo_serie_a_codigo
-)
-
-
-from dash import ctx   
-
-@app.callback(
-    Output("periodo-activo", "data"),
-    Input("btn-1m", "n_clicks"),
-    Input("btn-3m", "n_clicks"),
-    Input("btn-6m", "n_clicks"),
-    Input("btn-ytd", "n_clicks"),
-    Input("btn-1y", "n_clicks"),
-    Input("btn-3y", "n_clicks"),
-    Input("btn-5y", "n_clicks"),
-    Input("btn-max", "n_clicks"),
-    prevent_initial_call=True
-)
-def actualizar_periodo(*_):
-    return ctx.triggered_id
-
-@app.callback(
-    [
-        Output("btn-1m", "style"),
-        Output("btn-3m", "style"),
-        Output("btn-6m", "style"),
-        Output("btn-ytd", "style"),
-        Output("btn-1y", "style"),
-        Output("btn-3y", "style"),
-        Output("btn-5y", "style"),
-        Output("btn-max", "style"),
-    ],
-    [Input("periodo-activo", "data"),
-     Input('btn-1m', 'disabled'),   # NUEVO: considerar estado disabled
-     Input('btn-3m', 'disabled'),
-     Input('btn-6m', 'disabled'),
-     Input('btn-ytd', 'disabled'),
-     Input('btn-1y', 'disabled'),
-     Input('btn-3y', 'disabled'),
-     Input('btn-5y', 'disabled'),
-     Input('btn-max', 'disabled')]
-)
-
-def resaltar_boton_activo(periodo_activo, disabled_1m, disabled_3m, disabled_6m, 
-                         disabled_ytd, disabled_1y, disabled_3y, disabled_5y, disabled_max):
-    def estilo(activo, deshabilitado, ancho="45px"):
-        if deshabilitado:
-            # Estilo para botones deshabilitados
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': '#f8f9fa', 'color': '#6c757d',
-                'border': '1px solid #dee2e6',
-                'cursor': 'not-allowed',
-                'opacity': 0.5
-            }
-        elif activo:
-            # Estilo para botón activo
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': 'black', 'color': 'white',
-                'border': '1px solid black'
-            }
-        else:
-            # Estilo para botones normales
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': 'white', 'color': 'black',
-                'border': '1px solid black'
-            }
+    fondo_serie_a_codigo=fondo_serie_a_codigo,
+    registro_fondos=registro_fondos
+)
+
 
-    return [
-        estilo(periodo_activo == "btn-1m", disabled_1m),
-        estilo(periodo_activo == "btn-3m", disabled_3m),
-        estilo(periodo_activo == "btn-6m", disabled_6m),
-        estilo(periodo_activo == "btn-ytd", disabled_ytd, ancho="50px"),
-        estilo(periodo_activo == "btn-1y", disabled_1y),
-        estilo(periodo_activo == "btn-3y", disabled_3y),
-        estilo(periodo_activo == "btn-5y", disabled_5y),
-        estilo(periodo_activo == "btn-max", disabled_max, ancho="50px"),
-    ]
 
 def crear_selector_fondo_anualizada(id_selector):
     """
@@ -4278,9 +3431,9 @@ def crear_selector_fondo_anualizada(id_selector):
                     html.Label("Fondo:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
                     dcc.Dropdown(
                         id={'type': 'fondo-dropdown-anualizada', 'index': id_selector},
-                        options=[{'label': fondo, 'value': fondo} for fondo in fondos_unicos],
+                        options=[],
                         value=None,
-                        placeholder="Selecciona un fondo...",
+                        placeholder="Escribe para buscar un fondo...",
                         style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
                     )
                 ], width=5),
@@ -4312,130 +3465,6 @@ def crear_selector_fondo_anualizada(id_selector):
         ])
     ], style={'marginBottom': '10px'})
 
-def crear_selector_fondo_con_valores_anualizada(id_selector, fondo_valor=None, series_valor=None):
-    """
-    Crea un componente selector de fondo + series con valores pre-establecidos para ANUALIZADA
-    """
-    if fondo_valor and fondo_valor in fondos_a_series:
-        series_opciones = [{'label': serie, 'value': serie} for serie in fondos_a_series[fondo_valor]]
-        series_disabled = False
-        series_placeholder = f"Selecciona series para {fondo_valor[:30]}..."
-        if series_valor is None:
-            series_valor = []
-        elif not isinstance(series_valor, list):
-            series_valor = [series_valor] if series_valor else []
-    else:
-        series_opciones = []
-        series_disabled = True
-        series_placeholder = "Primero selecciona un fondo"
-        series_valor = []
-    
-    return dbc.Card([
-        dbc.CardBody([
-            dbc.Row([
-                dbc.Col([
-                    html.Label("Fondo:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
-                    dcc.Dropdown(
-                        id={'type': 'fondo-dropdown-anualizada', 'index': id_selector},
-                        options=[{'label': fondo, 'value': fondo} for fondo in fondos_unicos],
-                        value=fondo_valor,
-                        placeholder="Selecciona un fondo...",
-                        style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
-                    )
-                ], width=5),
-                
-                dbc.Col([
-                    html.Label("Series:", style={'fontFamily': 'SuraSans-SemiBold', 'fontSize': '14px'}),
-                    dcc.Dropdown(
-                        id={'type': 'series-dropdown-anualizada', 'index': id_selector},
-                        options=series_opciones,
-                        value=series_valor,
-                        multi=True,
-                        placeholder=series_placeholder,
-                        disabled=series_disabled,
-                        style={'fontFamily': 'SuraSans-Regular', 'fontSize': '14px'}
-                    )
-                ], width=6),
-                
-                dbc.Col([
-                    html.Br(),
-                    dbc.Button(
-                        "❌", 
-                        id={'type': 'eliminar-selector-anualizada', 'index': id_selector},
-                        color="danger", 
-                        size="sm",
-                        style={'marginTop': '5px'}
-                    )
-                ], width=1)
-            ])
-        ])
-    ], style={'marginBottom': '10px'})
-
-def extraer_id_del_child_anualizada(child):
-    """
-    Extrae el ID de un componente hijo para ANUALIZADA
-    """
-    try:
-        if isinstance(child, dict) and 'props' in child:
-            card_body = child['props']['children']
-            if isinstance(card_body, dict) and 'props' in card_body:
-                row = card_body['props']['children']
-                if isinstance(row, dict) and 'props' in row:
-                    cols = row['props']['children']
-                    if isinstance(cols, list) and len(cols) > 0:
-                        first_col = cols[0]
-                        if isinstance(first_col, dict) and 'props' in first_col:
-                            col_children = first_col['props']['children']
-                            if isinstance(col_children, list) and len(col_children) > 1:
-                                fondo_dropdown = col_children[1]
-                                if isinstance(fondo_dropdown, dict) and 'props' in fondo_dropdown:
-                                    dropdown_id = fondo_dropdown['props'].get('id')
-                                    if isinstance(dropdown_id, dict) and 'index' in dropdown_id:
-                                        return dropdown_id['index']
-        
-        return buscar_id_recursivo_anualizada(child)
-        
-    except (KeyError, IndexError, TypeError, AttributeError):
-        return None
-
-def buscar_id_recursivo_anualizada(componente, profundidad=0):
-    """
-    Busca recursivamente un ID de tipo 'fondo-dropdown-anualizada'
-    """
-    if profundidad > 10:
-        return None
-        
-    try:
-        if isinstance(componente, dict):
-            if 'props' in componente:
-                props = componente['props']
-                if 'id' in props:
-                    component_id = props['id']
-                    if isinstance(component_id, dict) and component_id.get('type') == 'fondo-dropdown-anualizada':
-                        return component_id.get('index')
-                
-                if 'children' in props:
-                    children = props['children']
-                    if isinstance(children, list):
-                        for child in children:
-                            resultado = buscar_id_recursivo_anualizada(child, profundidad + 1)
-                            if resultado:
-                                return resultado
-                    elif children:
-                        resultado = buscar_id_recursivo_anualizada(children, profundidad + 1)
-                        if resultado:
-                            return resultado
-        
-        elif isinstance(componente, list):
-            for item in componente:
-                resultado = buscar_id_recursivo_anualizada(item, profundidad + 1)
-                if resultado:
-                    return resultado
-                    
-    except (KeyError, TypeError, AttributeError):
-        pass
-    
-    return None
 
     # =============================================================================
 # 4. CALLBACKS PARA POR AÑO (AGREGAR AL FINAL DEL ARCHIVO):
@@ -4446,65 +3475,10 @@ def buscar_id_recursivo_anualizada(componente, profundidad=0):
     Output('selectores-container-por-ano', 'children'),
     [Input('btn-agregar-fondo-por-ano', 'n_clicks'),
      Input({'type': 'eliminar-selector-por-ano', 'index': ALL}, 'n_clicks')],
-    [State('selectores-container-por-ano', 'children'),
-     State({'type': 'fondo-dropdown-por-ano', 'index': ALL}, 'value'),
-     State({'type': 'series-dropdown-por-ano', 'index': ALL}, 'value')],
     prevent_initial_call=True
 )
-def actualizar_selectores_por_ano(n_clicks_agregar, n_clicks_eliminar, children_actuales, fondos_valores, series_valores):
-    ctx = dash.callback_context
-    
-    if not ctx.triggered:
-        return children_actuales or []
-    
-    trigger = ctx.triggered[0]
-    
-    # Si se presionó agregar fondo
-    if trigger['prop_id'] == 'btn-agregar-fondo-por-ano.n_clicks' and n_clicks_agregar:
-        children_actuales = children_actuales or []
-        nuevo_id = str(uuid.uuid4())
-        nuevo_selector = crear_selector_fondo_por_ano(nuevo_id)
-        return children_actuales + [nuevo_selector]
-    
-    # Si se presionó eliminar algún selector
-    elif 'eliminar-selector-por-ano' in trigger['prop_id']:
-        if not children_actuales:
-            return []
-            
-        # Extraer el ID del selector a eliminar
-        import json
-        prop_id_dict = json.loads(trigger['prop_id'].replace('.n_clicks', ''))
-        id_a_eliminar = prop_id_dict['index']
-        
-        # Crear mapeo de IDs actuales con sus valores
-        valores_por_id = {}
-        for i, child in enumerate(children_actuales):
-            child_id = extraer_id_del_child_por_ano(child)
-            if child_id and i < len(fondos_valores or []) and i < len(series_valores or []):
-                valores_por_id[child_id] = {
-                    'fondo': fondos_valores[i],
-                    'series': series_valores[i] or []
-                }
-        
-        # Filtrar solo los elementos que NO sean el ID a eliminar
-        children_preservados = []
-        for child in children_actuales:
-            child_id = extraer_id_del_child_por_ano(child)
-            if child_id and child_id != id_a_eliminar:
-                # Preservar este child con sus valores
-                if child_id in valores_por_id:
-                    child_preservado = crear_selector_fondo_con_valores_por_ano(
-                        child_id,
-                        valores_por_id[child_id]['fondo'],
-                        valores_por_id[child_id]['series']
-                    )
-                    children_preservados.append(child_preservado)
-                else:
-                    children_preservados.append(child)
-        
-        return children_preservados
-    
-    return children_actuales or []
+def actualizar_selectores_por_ano(n_clicks_agregar, n_clicks_eliminar):
+    return patch_selectores('btn-agregar-fondo-por-ano', crear_selector_fondo_por_ano)
 
 # Callback para actualizar series según fondo seleccionado - POR AÑO
 @callback(
@@ -4533,35 +3507,22 @@ def actualizar_series_dinamico_por_ano(fondo_seleccionado, valor_series_actual):
 
 # Callback para actualizar el store con las selecciones - POR AÑO
 @callback(
-    Output('selecciones-store-por-ano', 'data'),
+    Output({'type': 'selecciones-store', 'tab': 'por_ano'}, 'data'),
     [Input({'type': 'fondo-dropdown-por-ano', 'index': ALL}, 'value'),
-     Input({'type': 'series-dropdown-por-ano', 'index': ALL}, 'value')],
-    [State('selectores-container-por-ano', 'children')]
+     Input({'type': 'series-dropdown-por-ano', 'index': ALL}, 'value')]
 )
-def actualizar_selecciones_store_por_ano(fondos_valores, series_valores, children):
-    if not children or not fondos_valores or not series_valores:
-        return []
-    
-    selecciones = []
-    
-    for i, child in enumerate(children):
-        if i < len(fondos_valores) and i < len(series_valores):
-            fondo = fondos_valores[i]
-            series = series_valores[i]
-            
-            if fondo and series:
-                selecciones.append({
-                    'fondo': fondo,
-                    'series': series
-                })
-    
-    return selecciones
+def actualizar_selecciones_store_por_ano(fondos_valores, series_valores):
+    return [
+        {'fondo': fondo, 'series': series}
+        for fondo, series in zip(fondos_valores or [], series_valores or [])
+        if fondo and series
+    ]
 
 # Callback para tabla de rentabilidades personalizadas - POR AÑO
 @callback(
    Output('tabla-rentabilidades-por-ano', 'children'),
-   [Input('moneda-selector-por-año', 'value'),
-    Input('selecciones-store-por-ano', 'data')]
+   [Input({'type': 'moneda-selector', 'tab': 'por_ano'}, 'value'),
+    Input({'type': 'selecciones-store', 'tab': 'por_ano'}, 'data')]
 )
 def actualizar_tabla_rentabilidades_por_ano(moneda, selecciones_data):
     if not selecciones_data:
@@ -4631,379 +3592,35 @@ def actualizar_tabla_rentabilidades_por_ano(moneda, selecciones_data):
         crear_disclaimer_por_año()
     ])
 
-# Callback para inicializar fechas por defecto - POR AÑO
-@callback(
-    [Output('fecha-inicio-grafico-por-ano', 'date'),
-     Output('fecha-fin-grafico-por-ano', 'date')],
-    [Input('tabs-por-ano', 'active_tab')]
-)
-def inicializar_fechas_grafico_por_ano(active_tab):
-    if pesos_df is not None:
-        fecha_fin = pesos_df['Dates'].max()
-        fecha_inicio = fecha_fin - timedelta(days=365)
-        return fecha_inicio, fecha_fin
-    else:
-        fecha_fin = datetime.now()
-        fecha_inicio = fecha_fin - timedelta(days=365)
-        return fecha_inicio, fecha_fin
-
-# Callback para botones de período - POR AÑO
-@callback(
-    [Output('fecha-inicio-grafico-por-ano', 'date', allow_duplicate=True),
-     Output('fecha-fin-grafico-por-ano', 'date', allow_duplicate=True),
-     Output('fecha-inicio-grafico-por-ano', 'min_date_allowed'),
-     Output('btn-1m-por-ano', 'disabled'),
-     Output('btn-3m-por-ano', 'disabled'),
-     Output('btn-6m-por-ano', 'disabled'),
-     Output('btn-ytd-por-ano', 'disabled'),
-     Output('btn-1y-por-ano', 'disabled'),
-     Output('btn-3y-por-ano', 'disabled'),
-     Output('btn-5y-por-ano', 'disabled'),
-     Output('btn-max-por-ano', 'disabled')],
-    [Input('btn-1m-por-ano', 'n_clicks'),
-     Input('btn-3m-por-ano', 'n_clicks'),
-     Input('btn-6m-por-ano', 'n_clicks'),
-     Input('btn-ytd-por-ano', 'n_clicks'),
-     Input('btn-1y-por-ano', 'n_clicks'),
-     Input('btn-3y-por-ano', 'n_clicks'),
-     Input('btn-5y-por-ano', 'n_clicks'),
-     Input('btn-max-por-ano', 'n_clicks'),
-     Input('selecciones-store-por-ano', 'data'),
-     Input('moneda-selector-por-año', 'value')],
-    prevent_initial_call=True
-)
-def actualizar_fechas_grafico_por_ano(btn1m, btn3m, btn6m, btnytd, btn1y, btn3y, btn5y, btnmax, selecciones_data, moneda):
-    ctx = dash.callback_context
-    
-    if pesos_df is None:
-        return dash.no_update, dash.no_update, None, False, False, False, False, False, False, False, False
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
-    fecha_fin = df_actual['Dates'].max()
-    
-    # Obtener códigos seleccionados
-    codigos_seleccionados = []
-    if selecciones_data:
-        codigos_seleccionados, _ = procesar_selecciones_multiples(selecciones_data)
-    
-    # Obtener fecha límite (fondo más nuevo)
-    fecha_limite_inicio = obtener_fecha_inicio_mas_reciente(df_actual, codigos_seleccionados)
-    
-    # Calcular años disponibles para deshabilitar botones
-    anos_disponibles = 0
-    if fecha_limite_inicio:
-        anos_disponibles = calcular_anos_disponibles(fecha_limite_inicio, fecha_fin)
-    
-    # Determinar qué botones deshabilitar
-    btn_1m_disabled = False
-    btn_3m_disabled = False
-    btn_6m_disabled = False
-    btn_ytd_disabled = False
-    btn_1y_disabled = anos_disponibles < 1
-    btn_3y_disabled = anos_disponibles < 3
-    btn_5y_disabled = anos_disponibles < 5
-    btn_max_disabled = not fecha_limite_inicio
-    
-    # Si se presionó un botón, calcular nueva fecha de inicio
-    if ctx.triggered:
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        
-        if button_id in ['btn-1m-por-ano', 'btn-3m-por-ano', 'btn-6m-por-ano', 'btn-ytd-por-ano', 'btn-1y-por-ano', 'btn-3y-por-ano', 'btn-5y-por-ano', 'btn-max-por-ano']:
-            periodo = button_id.replace('btn-', '').replace('-por-ano', '')
-            fecha_inicio = ajustar_fecha_segun_periodo_y_limite(fecha_fin, periodo, fecha_limite_inicio)
-            
-            return (fecha_inicio, fecha_fin, fecha_limite_inicio,
-                   btn_1m_disabled, btn_3m_disabled, btn_6m_disabled, btn_ytd_disabled,
-                   btn_1y_disabled, btn_3y_disabled, btn_5y_disabled, btn_max_disabled)
-    
-    # Si solo cambiaron las selecciones, ajustar fecha de inicio a los datos disponibles
-    if fecha_limite_inicio:
-        fecha_inicio_actual = max(fecha_limite_inicio, fecha_fin - timedelta(days=365))
-    else:
-        fecha_inicio_actual = fecha_fin - timedelta(days=365)
-    
-    return (fecha_inicio_actual, fecha_fin, fecha_limite_inicio,
-           btn_1m_disabled, btn_3m_disabled, btn_6m_disabled, btn_ytd_disabled,
-           btn_1y_disabled, btn_3y_disabled, btn_5y_disabled, btn_max_disabled)
-
-# Callback para validar fechas manuales - POR AÑO
-@callback(
-    [Output('fecha-inicio-grafico-por-ano', 'date', allow_duplicate=True),
-     Output('fecha-fin-grafico-por-ano', 'date', allow_duplicate=True)],
-    [Input('fecha-inicio-grafico-por-ano', 'date'),
-     Input('fecha-fin-grafico-por-ano', 'date')],
-    [State('selecciones-store-por-ano', 'data'),
-     State('moneda-selector-por-año', 'value')],
-    prevent_initial_call=True
-)
-def validar_fechas_manuales_por_ano(fecha_inicio_input, fecha_fin_input, selecciones_data, moneda):
-    if pesos_df is None or not fecha_inicio_input or not fecha_fin_input:
-        return dash.no_update, dash.no_update
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
-    
-    # Obtener códigos seleccionados
-    codigos_seleccionados = []
-    if selecciones_data:
-        codigos_seleccionados, _ = procesar_selecciones_multiples(selecciones_data)
-    
-    # Obtener fecha límite
-    fecha_limite_inicio = obtener_fecha_inicio_mas_reciente(df_actual, codigos_seleccionados)
-    
-    fecha_inicio_dt = pd.to_datetime(fecha_inicio_input)
-    fecha_fin_dt = pd.to_datetime(fecha_fin_input)
-    
-    # Ajustar fecha de inicio si está antes del límite
-    if fecha_limite_inicio and fecha_inicio_dt < fecha_limite_inicio:
-        fecha_inicio_ajustada = fecha_limite_inicio
-        return fecha_inicio_ajustada, fecha_fin_dt
-    
-    return dash.no_update, dash.no_update
-
 # Callback para actualizar gráfico - POR AÑO
 @callback(
     Output('grafico-retornos-por-ano', 'figure'),
-    [Input('moneda-selector-por-año', 'value'),
-     Input('selecciones-store-por-ano', 'data'),
-     Input('fecha-inicio-grafico-por-ano', 'date'),
-     Input('fecha-fin-grafico-por-ano', 'date')]
+    [Input({'type': 'moneda-selector', 'tab': 'por_ano'}, 'value'),
+     Input({'type': 'selecciones-store', 'tab': 'por_ano'}, 'data'),
+     Input({'type': 'fecha-inicio', 'tab': 'por_ano'}, 'date'),
+     Input({'type': 'fecha-fin', 'tab': 'por_ano'}, 'date')]
 )
 def actualizar_grafico_retornos_por_ano(moneda, selecciones_data, fecha_inicio, fecha_fin):
-    if pesos_df is None:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="No se pudieron cargar los datos",
-            x=0.5, y=0.5, showarrow=False
-        )
-        return fig_vacio
-    
-    df_actual = pesos_df if moneda == 'CLP' else dolares_df
-    
-    if not selecciones_data:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="Usa el botón 'Agregar Fondo Personalizado' para ver fondos en el gráfico",
-            x=0.5, 
-            y=0.5, 
-            showarrow=False,
-            font={'family': 'SuraSans-Regular', 'size': 16, 'color': '#666666'},
-            xanchor='center',  
-            yanchor='middle',
-            xref='paper',
-            yref='paper',
-        )
-        fig_vacio.update_layout(
-            plot_bgcolor='#f8f9fa',
-            paper_bgcolor='#f8f9fa',
-            xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            margin=dict(t=20, b=20, l=20, r=20),
-            height=500
-        )
-        return fig_vacio
-    
-    codigos_personalizados, nombres_personalizados = procesar_selecciones_multiples(selecciones_data)
-    
-    if not codigos_personalizados:
-        fig_vacio = go.Figure()
-        fig_vacio.add_annotation(
-            text="No se encontraron datos para las selecciones personalizadas",
-            x=0.5, 
-            y=0.5, 
-            showarrow=False,
-            font={'family': 'SuraSans-Regular', 'size': 16, 'color': '#666666'},
-            xanchor='center',  
-            yanchor='middle',
-            xref='paper',
-            yref='paper',
-        )
-        fig_vacio.update_layout(
-            plot_bgcolor='#f8f9fa',
-            paper_bgcolor='#f8f9fa',
-            xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-            margin=dict(t=20, b=20, l=20, r=20),
-            height=500
-        )
-        return fig_vacio
-    
-    # USAR LA MISMA FUNCIÓN QUE RENTABILIDAD ACUMULADA
-    df_retornos = calcular_retornos_acumulados_con_limite(
-        df_actual, codigos_personalizados, 
-        fecha_inicio, fecha_fin
-    )
-    
-    return crear_grafico_retornos(df_retornos, codigos_personalizados, nombres_personalizados)
-
-# Callbacks para periodo activo y estilos de botones - POR AÑO
-@callback(
-    Output("periodo-activo-por-ano", "data"),
-    Input("btn-1m-por-ano", "n_clicks"),
-    Input("btn-3m-por-ano", "n_clicks"),
-    Input("btn-6m-por-ano", "n_clicks"),
-    Input("btn-ytd-por-ano", "n_clicks"),
-    Input("btn-1y-por-ano", "n_clicks"),
-    Input("btn-3y-por-ano", "n_clicks"),
-    Input("btn-5y-por-ano", "n_clicks"),
-    Input("btn-max-por-ano", "n_clicks"),
-    prevent_initial_call=True
-)
-def actualizar_periodo_por_ano(*_):
-    from dash import ctx
-    return ctx.triggered_id
+    return obtener_grafico_retornos(moneda, selecciones_data, fecha_inicio, fecha_fin)['figura']
 
-@callback(
-    [
-        Output("btn-1m-por-ano", "style"),
-        Output("btn-3m-por-ano", "style"),
-        Output("btn-6m-por-ano", "style"),
-        Output("btn-ytd-por-ano", "style"),
-        Output("btn-1y-por-ano", "style"),
-        Output("btn-3y-por-ano", "style"),
-        Output("btn-5y-por-ano", "style"),
-        Output("btn-max-por-ano", "style"),
-    ],
-    [Input("periodo-activo-por-ano", "data"),
-     Input('btn-1m-por-ano', 'disabled'),
-     Input('btn-3m-por-ano', 'disabled'),
-     Input('btn-6m-por-ano', 'disabled'),
-     Input('btn-ytd-por-ano', 'disabled'),
-     Input('btn-1y-por-ano', 'disabled'),
-     Input('btn-3y-por-ano', 'disabled'),
-     Input('btn-5y-por-ano', 'disabled'),
-     Input('btn-max-por-ano', 'disabled')]
-)
-def resaltar_boton_activo_por_ano(periodo_activo, disabled_1m, disabled_3m, disabled_6m, 
-                                 disabled_ytd, disabled_1y, disabled_3y, disabled_5y, disabled_max):
-    def estilo(activo, deshabilitado, ancho="45px"):
-        if deshabilitado:
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': '#f8f9fa', 'color': '#6c757d',
-                'border': '1px solid #dee2e6',
-                'cursor': 'not-allowed',
-                'opacity': 0.5
-            }
-        elif activo:
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': 'black', 'color': 'white',
-                'border': '1px solid black'
-            }
-        else:
-            return {
-                'margin': '2px', 'width': ancho,
-                'backgroundColor': 'white', 'color': 'black',
-                'border': '1px solid black'
-            }
 
-    return [
-        estilo(periodo_activo == "btn-1m-por-ano", disabled_1m),
-        estilo(periodo_activo == "btn-3m-por-ano", disabled_3m),
-        estilo(periodo_activo == "btn-6m-por-ano", disabled_6m),
-        estilo(periodo_activo == "btn-ytd-por-ano", disabled_ytd, ancho="50px"),
-        estilo(periodo_activo == "btn-1y-por-ano", disabled_1y),
-        estilo(periodo_activo == "btn-3y-por-ano", disabled_3y),
-        estilo(periodo_activo == "btn-5y-por-ano", disabled_5y),
-        estilo(periodo_activo == "btn-max-por-ano", disabled_max, ancho="50px"),
-    ]
 
 # Callback para abrir/cerrar modal de gráfico por año
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='alternar_modal'),
     Output("modal-grafico-por-ano", "is_open"),
     [Input("btn-pantalla-completa-por-ano", "n_clicks")],
     [State("modal-grafico-por-ano", "is_open")],
     prevent_initial_call=True
 )
-def toggle_modal_grafico_por_ano(btn_open, is_open): 
-    if btn_open:
-        return not is_open
-    return is_open
 
 # Callback para sincronizar gráfico del modal por año
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace='ui', function_name='sincronizar_modal_por_ano'),
     Output('grafico-retornos-por-ano-modal', 'figure'),
     [Input('grafico-retornos-por-ano', 'figure')],
     prevent_initial_call=True
 )
-def sincronizar_grafico_modal_por_ano(figure):
-    if figure and 'data' in figure and len(figure['data']) > 0:
-        figure_modal = figure.copy()
-        
-        figure_modal['layout'].update({
-            'height': 750,
-            'margin': dict(t=100, b=80, l=20, r=20),
-            'title': {
-                'text': 'Retornos Acumulados',
-                'x': 0.5,
-                'y': 0.95,
-                'font': {'family': 'SuraSans-SemiBold', 'size': 26, 'color': '#24272A'}
-            },
-            'legend': {
-                'orientation': 'h',
-                'x': 0.5,
-                'y': -0.15,
-                'xanchor': 'center',
-                'yanchor': 'top',
-                'font': {'family': 'SuraSans-Regular', 'size': 14},
-                'bgcolor': 'rgba(255,255,255,0.9)',
-                'bordercolor': 'rgba(0,0,0,0.1)',
-                'borderwidth': 1
-            },
-            'xaxis': {
-                'showgrid': False,
-                'showspikes': True,
-                'spikecolor': 'rgba(36, 39, 42, 0.3)',
-                'spikesnap': 'cursor',
-                'spikemode': 'across',
-                'spikethickness': 1,
-                'spikedash': 'dot',
-                'tickformat': '%d/%m/%Y'
-            },
-            'yaxis': {
-                'title': {'text': 'Retorno Acumulado (%)', 'font': {'size': 18}},
-                'tickfont': {'size': 14},
-                'tickformat': '.1f',
-                'ticksuffix': '%',
-                'showgrid': True,
-                'gridcolor': 'rgba(128,128,128,0.2)'
-            },
-            'plot_bgcolor': 'white',
-            'paper_bgcolor': 'white',
-            
-            'images': [
-                dict(
-                    source="/assets/investments_logo.png",
-                    xref="paper", 
-                    yref="paper",
-                    x=1.02,
-                    y=-0.30,
-                    sizex=0.23,
-                    sizey=0.17,
-                    xanchor="right",
-                    yanchor="bottom",
-                    opacity=0.9,
-                    layer="above"
-                )
-            ]
-        })
-        
-        return figure_modal
-    
-    # Si no hay datos, mostrar mensaje
-    fig_vacio = go.Figure()
-    fig_vacio.add_annotation(
-        text="Cargando datos...",
-        x=0.5, y=0.5, showarrow=False,
-        font={'family': 'SuraSans-Regular', 'size': 20, 'color': '#666666'}
-    )
-    fig_vacio.update_layout(
-        plot_bgcolor='#f8f9fa', paper_bgcolor='#f8f9fa',
-        xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-        yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, visible=False),
-        margin=dict(t=20, b=20, l=20, r=20), height=750
-    )
-    return fig_vacio
 
 # CALLBACK NUEVO - AGREGAR AL FINAL DE Pagina.py
 @callback(
@@ -5042,9 +3659,25 @@ def inicializar_cache_datos(pathname, datos_cache, timestamp_cache):
     # Si ya hay caché del mismo día, no hacer nada
     return datos_cache, timestamp_cache
 
+marcar_fase('callbacks')
+mostrar_resumen_arranque()
+
 # if __name__ == '__main__':
 #     app.run(debug=True, use_reloader=False)
 if __name__ == '__main__':
+    # Los procesos del pool solo usan funciones de informe_module y
+    # anexo_mensual_module. Sin __file__ en __main__, multiprocessing no
+    # vuelve a ejecutar este script (datos y app completos) en cada hijo.
+    del sys.modules['__main__'].__file__
+
+    # Pool de descargas antes de que el servidor abra sus hilos
+    from trabajos_reportes import iniciar_pool_reportes
+    iniciar_pool_reportes()
+
+    # Artefactos de reportes del día (se regeneran si faltan)
+    from artefactos_reportes import iniciar_regeneracion
+    iniciar_regeneracion(pesos_df, dolares_df, registro_fondos)
+
     # Configuración para Render.com
     port = int(os.environ.get('PORT', 8050))
     app.run_server(
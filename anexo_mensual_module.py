@@ -6,45 +6,39 @@ Soporta descarga en Excel y PDF
 
 import pandas as pd
 import numpy as np
-from dash import html, dcc, dash_table, callback, Input, Output, State
+from dash import html, dcc, dash_table, callback, clientside_callback, ClientsideFunction, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 import io
-import base64
+import time
 from datetime import datetime, timedelta
 import logging
+import importlib.util
 import calendar
-import os
 from pathlib import Path
 
+from recursos_pdf import obtener_recursos_pdf, dibujar_barra_superior
+from exportar_excel import generar_libro_excel
+from cache_servidor import obtener_cache, guardar_cache, version_datos, clave_reporte, calcular_una_vez
+from trabajos_reportes import enviar_trabajo, buscar_trabajo, consultar_trabajo
+from perfilado import debe_perfilar, ejecutar_perfilado
+from artefactos_reportes import obtener_artefacto, version_artefactos
+from registro_fondos import crear_registro_fondos, ORDEN_CATEGORIAS
 from precalculos_optimizado import (
     obtener_retornos_mensuales_precalculados,
-    verificar_precalculos_vigentes
+    precalculos_validados
 )
 
-# Importaciones para PDF
-try:
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import letter, A4, landscape
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch, mm
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    mm = 1
+# ReportLab se importa en generar_pdf_anexo_mensual (ver informe_module)
+PDF_AVAILABLE = importlib.util.find_spec('reportlab') is not None
+if not PDF_AVAILABLE:
     logging.warning("ReportLab no está instalado. La funcionalidad PDF no estará disponible.")
 
+# reportlab.lib.units.mm
+mm = 72.0 / 2.54 * 0.1
+
 # Configuración del módulo
 CONFIG = {
-    'ORDEN_CATEGORIAS': [
-        'Renta Fija Nacional',
-        'Renta Fija Internacional', 
-        'Multifondos',
-        'Equity (Acciones)',
-        'Estrategias Alternativas',
-        'Otros'
-    ]
+    'ORDEN_CATEGORIAS': ORDEN_CATEGORIAS
 }
 
 # =============================================================================
@@ -240,8 +234,8 @@ def calcular_retornos_mensuales_completos(df, codigos_seleccionados, nombres_mos
         # Si hay cualquier error en la importación o comparación
         moneda = 'CLP'  # Fallback seguro
     
-    # Intentar usar pre-cálculos primero
-    if verificar_precalculos_vigentes():
+    # Intentar usar pre-cálculos primero (solo si pasaron la verificación de paridad)
+    if precalculos_validados('anexo'):
         try:
             print(f"⚡ Usando pre-cálculos para retornos mensuales ({moneda})...")
             resultado = obtener_retornos_mensuales_precalculados(
@@ -308,49 +302,6 @@ def loading_content():
         })
         ])
 
-def categorizar_fondos(fondos_unicos):
-    """
-    Categoriza los fondos según su tipo (misma función que informe_module)
-    """
-    categorias = {
-        'Renta Fija Nacional': [],
-        'Renta Fija Internacional': [],
-        'Multifondos': [],
-        'Equity (Acciones)': [],
-        'Estrategias Alternativas': [],
-        'Otros': []
-    }
-    
-    for fondo in fondos_unicos:
-        fondo_lower = fondo.lower()
-        
-        # Renta Fija Nacional
-        if any(palabra in fondo_lower for palabra in ['renta', 'bonos', 'deuda']) and \
-           any(palabra in fondo_lower for palabra in ['chile', 'chileno', 'nacional']):
-            categorias['Renta Fija Nacional'].append(fondo)
-            
-        # Renta Fija Internacional
-        elif any(palabra in fondo_lower for palabra in ['renta', 'bonos', 'deuda', 'fixed income']):
-            categorias['Renta Fija Internacional'].append(fondo)
-            
-        # Multifondos
-        elif any(palabra in fondo_lower for palabra in ['multiactivo', 'cartera', 'patrimonial']):
-            categorias['Multifondos'].append(fondo)
-            
-        # Equity
-        elif any(palabra in fondo_lower for palabra in ['equity', 'acciones', 'accionario']):
-            categorias['Equity (Acciones)'].append(fondo)
-            
-        # Estrategias Alternativas
-        elif any(palabra in fondo_lower for palabra in ['dynamic', 'estrategia', 'alternativa', 'hedge']):
-            categorias['Estrategias Alternativas'].append(fondo)
-            
-        # Otros
-        else:
-            categorias['Otros'].append(fondo)
-    
-    return categorias
-
 def crear_tabla_categoria_mensual(categoria, fondos_categoria, df_actual, fondos_a_series, fondo_serie_a_codigo, moneda='CLP'):
     """
     Crea una tabla para una categoría específica con retornos mensuales
@@ -482,74 +433,39 @@ def generar_excel_anexo_mensual(datos_por_categoria, moneda):
     Genera un archivo Excel con el anexo de retornos mensuales
     """
     try:
-        output = io.BytesIO()
+        hojas = []
         
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            
-            # Hoja resumen
-            resumen_data = []
-            for categoria, tabla_data in datos_por_categoria.items():
-                if not tabla_data.empty:
-                    # Obtener columnas de meses (excluyendo Fondo, Serie, 12 M)
-                    columnas_meses = [col for col in tabla_data.columns 
-                                    if col not in ['Fondo', 'Serie', '12 M']]
-                    
-                    if columnas_meses:
-                        promedio_meses = tabla_data[columnas_meses].mean(axis=1).mean()
-                    else:
-                        promedio_meses = 0
-                    
-                    resumen_data.append({
-                        'Categoría': categoria,
-                        'Número de Fondos': len(tabla_data),
-                        'Promedio Mensual (%)': round(promedio_meses, 2),
-                        'Promedio 12M (%)': round(tabla_data['12 M'].mean(), 2) if '12 M' in tabla_data.columns else 0
-                    })
-            
-            if resumen_data:
-                df_resumen = pd.DataFrame(resumen_data)
-                df_resumen.to_excel(writer, sheet_name='Resumen', index=False)
+        # Hoja resumen
+        resumen_data = []
+        for categoria, tabla_data in datos_por_categoria.items():
+            if not tabla_data.empty:
+                # Obtener columnas de meses (excluyendo Fondo, Serie, 12 M)
+                columnas_meses = [col for col in tabla_data.columns 
+                                if col not in ['Fondo', 'Serie', '12 M']]
                 
-                # Formatear hoja resumen
-                workbook = writer.book
-                worksheet = writer.sheets['Resumen']
+                if columnas_meses:
+                    promedio_meses = tabla_data[columnas_meses].mean(axis=1).mean()
+                else:
+                    promedio_meses = 0
                 
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # Hoja por cada categoría
-            for categoria, tabla_data in datos_por_categoria.items():
-                if not tabla_data.empty:
-                    sheet_name = categoria.replace('(', '').replace(')', '')[:31]
-                    tabla_data.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Formatear hoja
-                    worksheet = writer.sheets[sheet_name]
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
+                resumen_data.append({
+                    'Categoría': categoria,
+                    'Número de Fondos': len(tabla_data),
+                    'Promedio Mensual (%)': round(promedio_meses, 2),
+                    'Promedio 12M (%)': round(tabla_data['12 M'].mean(), 2) if '12 M' in tabla_data.columns else 0
+                })
         
-        excel_data = output.getvalue()
-        excel_b64 = base64.b64encode(excel_data).decode()
+        if resumen_data:
+            hojas.append(('Resumen', pd.DataFrame(resumen_data)))
         
-        return excel_b64
+        # Hoja por cada categoría
+        for categoria, tabla_data in datos_por_categoria.items():
+            if not tabla_data.empty:
+                sheet_name = categoria.replace('(', '').replace(')', '')[:31]
+                hojas.append((sheet_name, tabla_data))
+        
+        # Anchos de columna calculados sobre los DataFrames y escritura en streaming
+        return generar_libro_excel(hojas)
         
     except Exception as e:
         logging.error(f"Error generando Excel anexo mensual: {e}")
@@ -567,46 +483,17 @@ def generar_pdf_anexo_mensual(datos_por_categoria, moneda):
     if not PDF_AVAILABLE:
         return None
         
+    inicio = time.perf_counter()
+    
     try:
         from reportlab.lib.pagesizes import A4, landscape
         from reportlab.lib.units import mm
-        from reportlab.platypus import PageBreak, PageTemplate, BaseDocTemplate, Frame
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.platypus import PageBreak, PageTemplate, BaseDocTemplate, Frame, Table, TableStyle, Paragraph, Spacer
         
-        # CAMBIO: Registrar fuentes con rutas múltiples (igual que en informe_module)
-        try:
-            font_paths = [
-                './assets/',
-                'assets/',
-                './static/',
-                'static/',
-                './'
-            ]
-            
-            fuentes_disponibles = False
-            for path in font_paths:
-                try:
-                    regular_path = os.path.join(path, 'SuraSans-Regular.ttf')
-                    semibold_path = os.path.join(path, 'SuraSans-SemiBold.ttf')
-                    bold_path = os.path.join(path, 'SuraSans-Bold.ttf')
-                    
-                    if all(os.path.exists(f) for f in [regular_path, semibold_path, bold_path]):
-                        pdfmetrics.registerFont(TTFont('SuraSans-Regular', regular_path))
-                        pdfmetrics.registerFont(TTFont('SuraSans-SemiBold', semibold_path))
-                        pdfmetrics.registerFont(TTFont('SuraSans-Bold', bold_path))
-                        fuentes_disponibles = True
-                        print(f"✅ Fuentes SuraSans cargadas desde: {path}")
-                        break
-                except Exception as e:
-                    continue
-            
-            if not fuentes_disponibles:
-                print("⚠️ No se pudieron cargar las fuentes SuraSans, usando fuentes del sistema")
-                
-        except Exception as e:
-            print(f"⚠️ Error cargando fuentes: {e}")
-            fuentes_disponibles = False
+        # Fuentes, logos, colores y estilos se resuelven una vez por proceso
+        recursos = obtener_recursos_pdf()
+        fuentes_disponibles = recursos['fuentes_disponibles']
+        estilos = recursos['estilos']
         
         buffer = io.BytesIO()
         page_size = landscape(A4)
@@ -616,125 +503,24 @@ def generar_pdf_anexo_mensual(datos_por_categoria, moneda):
                               topMargin=30*mm, bottomMargin=10*mm)
         
         # COLORES EXACTOS DEL INFORME OFICIAL SURA
-        COLOR_SURA_BLACK = colors.HexColor('#24272A')
-        COLOR_SURA_WHITE = colors.white
-        COLOR_SURA_GRAY = colors.HexColor('#D4D8D8')
-        COLOR_SUBTITLE_GRAY = colors.HexColor('#5A646E')
-        COLOR_POSITIVE = colors.HexColor('#008000')
-        COLOR_NEGATIVE = colors.HexColor('#FF0000')
-        COLOR_BG_ALTERNATING = colors.HexColor('#F8F9FA')
-        
-        # Función para crear la barra superior con logos
-        def crear_barra_superior_header(canvas, doc):
-            canvas.saveState()
-            
-            page_width = page_size[0]
-            page_height = page_size[1]
-            
-            canvas.setFillColor(COLOR_SURA_BLACK)
-            canvas.rect(0, page_height - 25*mm, page_width, 25*mm, fill=1, stroke=0)
-            
-            # CAMBIO: Logos con rutas múltiples
-            logo_loaded = False
-            logo_paths = ['./assets/', 'assets/', './static/', 'static/', './']
-            
-            for path in logo_paths:
-                try:
-                    logo_path = os.path.join(path, 'sura_logo_blanco.png')
-                    if os.path.exists(logo_path):
-                        canvas.drawImage(logo_path, 
-                                       15*mm, page_height - 22*mm, 
-                                       width=60*mm, height=12*mm, 
-                                       preserveAspectRatio=True,
-                                       mask='auto')
-                        logo_loaded = True
-                        break
-                except Exception as e:
-                    continue
-            
-            if not logo_loaded:
-                canvas.setFillColor(COLOR_SURA_WHITE)
-                canvas.setFont("Helvetica-Bold", 12)
-                canvas.drawString(15*mm, page_height - 15*mm, "SURA")
-            
-            # Logo INVESTMENTS
-            investments_loaded = False
-            for path in logo_paths:
-                try:
-                    investments_path = os.path.join(path, 'investments_blanco.png')
-                    if os.path.exists(investments_path):
-                        canvas.drawImage(investments_path, 
-                                       page_width - 45*mm, page_height - 18*mm, 
-                                       width=35*mm, height=6*mm,
-                                       preserveAspectRatio=True,
-                                       mask='auto')
-                        investments_loaded = True
-                        break
-                except Exception as e:
-                    continue
-            
-            if not investments_loaded:
-                canvas.setFillColor(COLOR_SURA_WHITE)
-                canvas.setFont("Helvetica-Bold", 12)
-                canvas.drawString(page_width - 80*mm, page_height - 15*mm, "INVESTMENTS")
-            
-            canvas.restoreState()
-
+        COLOR_SURA_BLACK = recursos['colores']['sura_black']
+        COLOR_SURA_WHITE = recursos['colores']['sura_white']
+        COLOR_SURA_GRAY = recursos['colores']['sura_gray']
+        COLOR_POSITIVE = recursos['colores']['positive']
+        COLOR_NEGATIVE = recursos['colores']['negative']
+        COLOR_BG_ALTERNATING = recursos['colores']['bg_alternating']
         
         frame = Frame(10*mm, 10*mm, page_size[0] - 20*mm, page_size[1] - 40*mm,
                      leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
         
         template = PageTemplate(id='todas_paginas', frames=[frame], 
-                               onPage=crear_barra_superior_header)
+                               onPage=dibujar_barra_superior)
         doc.addPageTemplates([template])
         
-        # Obtener estilos
-        styles = getSampleStyleSheet()
-        
-        header_style = ParagraphStyle(
-            'HeaderStyle',
-            parent=styles['Normal'],
-            fontSize=16,
-            spaceAfter=5,
-            alignment=TA_LEFT,
-            textColor=COLOR_SURA_BLACK,
-            fontName='SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold'
-        )
-        
-        info_style = ParagraphStyle(
-            'InfoStyle',
-            parent=styles['Normal'],
-            fontSize=8,
-            spaceAfter=15,
-            alignment=TA_LEFT,
-            textColor=COLOR_SUBTITLE_GRAY,
-            fontName='SuraSans-Regular' if fuentes_disponibles else 'Helvetica'
-        )
-        
-        category_style = ParagraphStyle(
-            'CategoryStyle',
-            parent=styles['Normal'],
-            fontSize=12,
-            leading=14,
-            spaceBefore=12,
-            spaceAfter=12,
-            textColor=COLOR_SURA_WHITE,
-            fontName='SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold',
-            backColor="#9BA4AE",
-            leftIndent=0,  # Para que ocupe todo el ancho
-            rightIndent=0,
-            alignment=0
-        )
-        
-        footer_style_notas = ParagraphStyle(
-            'FooterStyleNotas',
-            parent=styles['Normal'],
-            fontSize=7,
-            alignment=TA_LEFT,
-            textColor=COLOR_SUBTITLE_GRAY,
-            fontName='SuraSans-Regular' if fuentes_disponibles else 'Helvetica',
-            spaceAfter=3
-        )
+        header_style = estilos['header']
+        info_style = estilos['info']
+        category_style = estilos['categoria_ancho_completo']
+        footer_style_notas = estilos['footer_notas']
         
         # Contenido del PDF
         story = []
@@ -896,25 +682,8 @@ def generar_pdf_anexo_mensual(datos_por_categoria, moneda):
                 story.append(Spacer(1, 15))
         
         # FOOTER con notas explicativas
-        footer_style_principal = ParagraphStyle(
-            'FooterStylePrincipal',
-            parent=styles['Normal'],
-            fontSize=9,
-            alignment=TA_CENTER,
-            textColor=COLOR_SURA_BLACK,
-            fontName='SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold',
-            spaceAfter=8
-        )
-
-        footer_style_secundario = ParagraphStyle(
-            'FooterStyleSecundario',
-            parent=styles['Normal'],
-            fontSize=8,
-            alignment=TA_CENTER,
-            textColor=COLOR_SUBTITLE_GRAY,
-            fontName='SuraSans-Regular' if fuentes_disponibles else 'Helvetica',
-            spaceAfter=5
-        )
+        footer_style_principal = estilos['footer_principal']
+        footer_style_secundario = estilos['footer_secundario']
         
         # Agregar footer con explicaciones
         story.append(Spacer(1, 20))
@@ -944,13 +713,12 @@ def generar_pdf_anexo_mensual(datos_por_categoria, moneda):
         
         # Construir PDF
         doc.build(story)
+        print(f"⏱️ PDF anexo renderizado en {time.perf_counter() - inicio:.3f}s")
         
         pdf_data = buffer.getvalue()
         buffer.close()
         
-        pdf_b64 = base64.b64encode(pdf_data).decode()
-        
-        return pdf_b64
+        return pdf_data
         
     except Exception as e:
         logging.error(f"Error generando PDF anexo mensual: {e}")
@@ -960,8 +728,8 @@ def calcular_retornos_mensuales_completos_con_moneda(df, codigos_seleccionados,
     """
     Versión que recibe la moneda explícitamente para usar pre-cálculos
     """
-    # Intentar usar pre-cálculos primero
-    if verificar_precalculos_vigentes():
+    # Intentar usar pre-cálculos primero (solo si pasaron la verificación de paridad)
+    if precalculos_validados('anexo'):
         try:
             print(f"⚡ Usando pre-cálculos para retornos mensuales ({moneda})...")
             resultado = obtener_retornos_mensuales_precalculados(
@@ -1118,6 +886,8 @@ def crear_modal_anexo_mensual():
             
             # Componente oculto para descargas
             dcc.Download(id="download-anexo"),
+            dcc.Store(id="trabajo-descarga-anexo"),
+            dcc.Interval(id="intervalo-descarga-anexo", interval=1000, disabled=True),
             
             # Contenedor para las tablas del anexo
             html.Div(id='contenido-anexo-mensual')
@@ -1131,26 +901,82 @@ def crear_modal_anexo_mensual():
         
     ], id="modal-anexo", is_open=False, size="xl", centered=True)
 
+# Colores (fondo, borde, texto) del recuadro de estado de descarga
+ESTILOS_ESTADO_DESCARGA = {
+    'exito': ('#d4edda', '#c3e6cb', '#155724'),
+    'error': ('#f8d7da', '#f5c6cb', '#721c24'),
+    'aviso': ('#fff3cd', '#ffeaa7', '#856404'),
+    'progreso': ('#d1ecf1', '#bee5eb', '#0c5460'),
+}
+
+
+def mensaje_estado_descarga(texto, tipo='exito'):
+    """
+    Mensaje del recuadro "Estado" del modal de descarga
+    """
+    fondo, borde, color = ESTILOS_ESTADO_DESCARGA[tipo]
+    return html.P(texto, style={
+        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
+        'backgroundColor': fondo, 'border': f'1px solid {borde}',
+        'borderRadius': '4px', 'fontSize': '12px', 'color': color
+    })
+
+
+def preparar_datos_descarga_anexo(moneda, pesos_df, dolares_df, registro_fondos):
+    """
+    Datos por categoría para las descargas Excel/PDF (los mismos para ambos formatos).
+    También los usa artefactos_reportes para generar los archivos nocturnos.
+    """
+    df_actual = pesos_df if moneda == 'CLP' else dolares_df
+
+    # Códigos y nombres de fondos SURA por categoría (registro_fondos)
+    fondos_por_categoria = registro_fondos['por_moneda'][moneda]['por_categoria']
+
+    # Generar datos por categoría
+    datos_por_categoria = {}
+    for categoria in CONFIG['ORDEN_CATEGORIAS']:
+        if categoria in fondos_por_categoria:
+            grupo = fondos_por_categoria[categoria]
+            datos_por_categoria[categoria] = calcular_retornos_mensuales_completos(
+                df_actual, grupo['codigos'], grupo['nombres']
+            )
+    
+    return datos_por_categoria
+
+
+def renderizar_descarga_anexo(formato, datos_por_categoria, moneda):
+    """
+    Genera el archivo de descarga. Se ejecuta en el pool de procesos de
+    trabajos_reportes, por lo que debe quedar a nivel de módulo.
+
+    Returns:
+        bytes del archivo, o None si no se pudo generar
+    """
+    if formato == 'excel':
+        return generar_excel_anexo_mensual(datos_por_categoria, moneda)
+    return generar_pdf_anexo_mensual(datos_por_categoria, moneda)
+
+
 # =============================================================================
 # CALLBACKS
 # =============================================================================
 
-def registrar_callbacks_anexo_mensual(app, pesos_df, dolares_df, fondos_unicos, fondos_a_series, fondo_serie_a_codigo):
+def registrar_callbacks_anexo_mensual(app, pesos_df, dolares_df, fondos_unicos, fondos_a_series, fondo_serie_a_codigo, registro_fondos=None):
     """
     Registra los callbacks necesarios para el módulo de anexo mensual
     """
+    if registro_fondos is None:
+        registro_fondos = crear_registro_fondos(fondos_unicos, fondos_a_series, fondo_serie_a_codigo)
     
     # Callback para abrir/cerrar modal de anexo
-    @callback(
+    # (se resuelve en el navegador: assets/callbacks_ui.js)
+    clientside_callback(
+        ClientsideFunction(namespace='ui', function_name='alternar_modal'),
         Output("modal-anexo", "is_open"),
         [Input("anexo-button", "n_clicks")],
         [State("modal-anexo", "is_open")],
         prevent_initial_call=True
     )
-    def toggle_modal_anexo(btn_open, is_open):
-        if btn_open:
-            return not is_open
-        return is_open
 
     # Callback para generar el contenido del anexo
     @callback(
@@ -1158,97 +984,97 @@ def registrar_callbacks_anexo_mensual(app, pesos_df, dolares_df, fondos_unicos,
          Output('anexo-cache', 'data')],
         [Input('moneda-selector-anexo', 'value'),
          Input("modal-anexo", "is_open")],
-        [State('anexo-cache', 'data'),
-         State('timestamp-cache', 'data')],
         prevent_initial_call=True
     )
-    def generar_anexo_mensual(moneda, modal_abierto, anexo_cache, timestamp_cache):
+    def generar_anexo_mensual(moneda, modal_abierto):
         from datetime import datetime
         
         if not modal_abierto:
-            return loading_content(), anexo_cache or {}
+            return loading_content(), no_update
         
-        hoy = datetime.now().strftime('%Y-%m-%d')
-        cache_key = f"anexo_{moneda}_{hoy}"
+        # El contenido renderizado vive en el servidor; el navegador solo guarda la clave
+        cache_key = clave_reporte('anexo', moneda, version_datos(pesos_df, dolares_df))
         
         # Verificar si ya tenemos este cálculo en caché
-        if anexo_cache and cache_key in anexo_cache:
-            return anexo_cache[cache_key], anexo_cache
-        
-        # Si no hay caché, calcular normalmente
-        if pesos_df is None:
-            resultado = loading_content()
-        else:
-            # CAMBIO: Usar solo fondos SURA filtrados para el anexo
-            from Pagina import filtrar_solo_fondos_sura, FONDOS_SURA_PDF
-            
-            fondos_sura, fondos_a_series_sura, fondo_serie_codigo_sura = filtrar_solo_fondos_sura(
-                fondos_unicos, fondos_a_series, fondo_serie_a_codigo
-            )
+        resultado_cache = obtener_cache('reportes', cache_key)
+        if resultado_cache is not None:
+            return resultado_cache, cache_key
+        
+        # Si no hay caché, calcular una sola vez aunque lleguen varias
+        # aperturas del modal al mismo tiempo
+        def construir_contenido():
+            if pesos_df is None:
+                return loading_content()
+            else:
+                # CAMBIO: Usar solo fondos SURA filtrados para el anexo (registro_fondos)
+                fondos_a_series_sura = registro_fondos['fondos_a_series_sura']
+                fondo_serie_codigo_sura = registro_fondos['fondo_serie_codigo_sura']
             
-            df_actual = pesos_df if moneda == 'CLP' else dolares_df
-            categorias = categorizar_fondos(fondos_sura)  # Solo fondos SURA
+                df_actual = pesos_df if moneda == 'CLP' else dolares_df
+                categorias = registro_fondos['categorias_sura']  # Solo fondos SURA
             
-            # Crear tablas para cada categoría
-            tablas_categorias = []
+                # Crear tablas para cada categoría
+                tablas_categorias = []
             
-            # Crear encabezado del anexo
-            encabezado = html.Div([
-                html.H3([
-                    html.I(className="fas fa-building", style={'marginRight': '10px', 'color': '#0B2DCE'}),
-                    "SURA Investments - Anexo de Retornos Mensuales"
-                ], style={
-                    'fontFamily': 'SuraSans-SemiBold',
-                    'textAlign': 'center',
-                    'color': '#24272A',
-                    'marginBottom': '10px'
-                }),
-                html.P(f"Moneda: {moneda} | Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M')}", 
-                       style={
-                           'fontFamily': 'SuraSans-Regular', 
-                           'textAlign': 'center',
-                           'color': '#666',
-                           'marginBottom': '30px',
-                           'fontSize': '14px'
-                       })
-            ])
+                # Crear encabezado del anexo
+                encabezado = html.Div([
+                    html.H3([
+                        html.I(className="fas fa-building", style={'marginRight': '10px', 'color': '#0B2DCE'}),
+                        "SURA Investments - Anexo de Retornos Mensuales"
+                    ], style={
+                        'fontFamily': 'SuraSans-SemiBold',
+                        'textAlign': 'center',
+                        'color': '#24272A',
+                        'marginBottom': '10px'
+                    }),
+                    html.P(f"Moneda: {moneda} | Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M')}", 
+                           style={
+                               'fontFamily': 'SuraSans-Regular', 
+                               'textAlign': 'center',
+                               'color': '#666',
+                               'marginBottom': '30px',
+                               'fontSize': '14px'
+                           })
+                ])
             
-            tablas_categorias.append(encabezado)
+                tablas_categorias.append(encabezado)
             
-            for categoria in CONFIG['ORDEN_CATEGORIAS']:
-                if categoria in categorias and categorias[categoria]:
-                    tabla = crear_tabla_categoria_mensual(
-                        categoria, 
-                        categorias[categoria], 
-                        df_actual,
-                        fondos_a_series_sura,     # ✅ CORRECTO
-                        fondo_serie_codigo_sura,  # ✅ CORRECTO
-                        moneda  
-                    )
-                    if tabla.children:
-                        tablas_categorias.append(tabla)
+                for categoria in CONFIG['ORDEN_CATEGORIAS']:
+                    if categoria in categorias and categorias[categoria]:
+                        tabla = crear_tabla_categoria_mensual(
+                            categoria, 
+                            categorias[categoria], 
+                            df_actual,
+                            fondos_a_series_sura,     # ✅ CORRECTO
+                            fondo_serie_codigo_sura,  # ✅ CORRECTO
+                            moneda  
+                        )
+                        if tabla.children:
+                            tablas_categorias.append(tabla)
             
-            if len(tablas_categorias) <= 1:
-                resultado = html.Div([
-                    encabezado,
-                    dbc.Alert([
-                        html.I(className="fas fa-exclamation-triangle", style={'marginRight': '10px'}),
-                        "No se encontraron datos para mostrar en el anexo."
-                    ], color="warning", style={'marginTop': '20px'})
-                ])
-            else:
-                resultado = html.Div(tablas_categorias)
+                if len(tablas_categorias) <= 1:
+                    return html.Div([
+                        encabezado,
+                        dbc.Alert([
+                            html.I(className="fas fa-exclamation-triangle", style={'marginRight': '10px'}),
+                            "No se encontraron datos para mostrar en el anexo."
+                        ], color="warning", style={'marginTop': '20px'})
+                    ])
+                else:
+                    return html.Div(tablas_categorias)
+
+        resultado = calcular_una_vez('reportes', cache_key, construir_contenido)
         
         # Guardar en caché
-        if not anexo_cache:
-            anexo_cache = {}
-        anexo_cache[cache_key] = resultado
+        guardar_cache('reportes', cache_key, resultado)
         
-        return resultado, anexo_cache
+        return resultado, cache_key
 
     # Callback para descarga Excel y PDF
     @callback(
-        [Output("download-anexo", "data"),
+        [Output("download-anexo", "data", allow_duplicate=True),
+         Output("trabajo-descarga-anexo", "data"),
+         Output("intervalo-descarga-anexo", "disabled"),
          Output("estado-descarga-anexo", "children")],
         [Input("btn-descargar-excel-anexo", "n_clicks"),
          Input("btn-descargar-pdf-anexo", "n_clicks")],
@@ -1266,104 +1092,89 @@ def registrar_callbacks_anexo_mensual(app, pesos_df, dolares_df, fondos_unicos,
         button_id = ctx.triggered[0]['prop_id'].split('.')[0]
         
         if pesos_df is None:
-            estado = html.P("Error: No hay datos disponibles", style={
-                'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                'backgroundColor': '#f8d7da', 'border': '1px solid #f5c6cb',
-                'borderRadius': '4px', 'fontSize': '12px', 'color': '#721c24'
-            })
-            return None, estado
+            return no_update, None, True, mensaje_estado_descarga("Error: No hay datos disponibles", 'error')
+        
+        if button_id == "btn-descargar-excel-anexo":
+            formato, extension, etiqueta = 'excel', 'xlsx', 'Excel'
+        elif not PDF_AVAILABLE:
+            return no_update, None, True, mensaje_estado_descarga("❌ PDF no disponible - Instalar ReportLab", 'aviso')
+        else:
+            formato, extension, etiqueta = 'pdf', 'pdf', 'PDF'
+        
+        filename = f"anexo_retornos_mensuales_{moneda}_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+        
+        def trabajo_descarga(id_trabajo):
+            return {
+                'id': id_trabajo,
+                'formato': formato,
+                'etiqueta': etiqueta,
+                'filename': filename
+            }
+        
+        # Archivo pre-generado por el paso nocturno (artefactos_reportes)
+        archivo = obtener_artefacto('anexo', moneda, formato, version_artefactos(pesos_df, dolares_df))
+        if archivo is not None:
+            return dcc.send_bytes(archivo, filename=filename), None, True, \
+                mensaje_estado_descarga(f"✅ {etiqueta} generado exitosamente")
+        
+        # Si el mismo archivo ya se está generando (u otro usuario lo acaba de
+        # pedir) nos adjuntamos a ese trabajo sin preparar los datos otra vez
+        clave = (clave_reporte('anexo', moneda, version_datos(pesos_df, dolares_df)), formato)
+        id_trabajo = buscar_trabajo(clave)
+        if id_trabajo is not None:
+            return no_update, trabajo_descarga(id_trabajo), False, mensaje_estado_descarga(
+                f"⏳ Generando {etiqueta}...", 'progreso'
+            )
         
         try:
-            df_actual = pesos_df if moneda == 'CLP' else dolares_df
-            
-            # CAMBIO: Usar solo fondos SURA filtrados
-            from Pagina import filtrar_solo_fondos_sura, FONDOS_SURA_PDF
-            
-            fondos_sura, fondos_a_series_sura, fondo_serie_codigo_sura = filtrar_solo_fondos_sura(
-                fondos_unicos, fondos_a_series, fondo_serie_a_codigo
+            # Los datos son los mismos para Excel y PDF: descargas simultáneas
+            # del mismo reporte comparten una sola preparación
+            def preparar_datos():
+                return preparar_datos_descarga_anexo(moneda, pesos_df, dolares_df, registro_fondos)
+
+            datos_por_categoria = calcular_una_vez('datos_descarga', clave[0], preparar_datos)
+
+            # Generar el archivo en segundo plano; el intervalo consulta su estado
+            trabajo = (renderizar_descarga_anexo, formato, datos_por_categoria, moneda)
+            if debe_perfilar():
+                trabajo = (ejecutar_perfilado, f"generar_{formato}_anexo") + trabajo
+            id_trabajo = enviar_trabajo(clave, *trabajo)
+            return no_update, trabajo_descarga(id_trabajo), False, mensaje_estado_descarga(
+                f"⏳ Generando {etiqueta}...", 'progreso'
             )
-            
-            categorias = categorizar_fondos(fondos_sura)  # Solo fondos SURA
-            
-            # Generar datos por categoría
-            datos_por_categoria = {}
-            for categoria in CONFIG['ORDEN_CATEGORIAS']:
-                if categoria in categorias and categorias[categoria]:
-                    codigos_categoria = []
-                    nombres_categoria = []
-                    
-                    for fondo in categorias[categoria]:
-                        if fondo in fondos_a_series_sura:
-                            if moneda in fondos_a_series_sura[fondo]:
-                                for serie in fondos_a_series_sura[fondo][moneda]:
-                                    if (fondo, serie, moneda) in fondo_serie_codigo_sura:
-                                        codigo = fondo_serie_codigo_sura[(fondo, serie, moneda)]
-                                        nombre_completo = f"{fondo} - {serie}"
-                                        codigos_categoria.append(codigo)
-                                        nombres_categoria.append(nombre_completo)
-                    
-                    if codigos_categoria:
-                        tabla_data = calcular_retornos_mensuales_completos(df_actual, codigos_categoria, nombres_categoria)
-                        datos_por_categoria[categoria] = tabla_data
-            
-            # Generar archivo según el botón presionado
-            if button_id == "btn-descargar-excel-anexo":
-                excel_b64 = generar_excel_anexo_mensual(datos_por_categoria, moneda)
-                if excel_b64:
-                    filename = f"anexo_retornos_mensuales_{moneda}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-                    estado = html.P("✅ Excel generado exitosamente", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#d4edda', 'border': '1px solid #c3e6cb',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#155724'
-                    })
-                    return dcc.send_bytes(
-                        base64.b64decode(excel_b64),
-                        filename=filename
-                    ), estado
-                else:
-                    estado = html.P("❌ Error generando Excel", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#f8d7da', 'border': '1px solid #f5c6cb',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#721c24'
-                    })
-                    return None, estado
-            
-            elif button_id == "btn-descargar-pdf-anexo":
-                if not PDF_AVAILABLE:
-                    estado = html.P("❌ PDF no disponible - Instalar ReportLab", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#fff3cd', 'border': '1px solid #ffeaa7',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#856404'
-                    })
-                    return None, estado
-                
-                pdf_b64 = generar_pdf_anexo_mensual(datos_por_categoria, moneda)
-                if pdf_b64:
-                    filename = f"anexo_retornos_mensuales_{moneda}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-                    estado = html.P("✅ PDF generado exitosamente", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#d4edda', 'border': '1px solid #c3e6cb',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#155724'
-                    })
-                    return dcc.send_bytes(
-                        base64.b64decode(pdf_b64),
-                        filename=filename
-                    ), estado
-                else:
-                    estado = html.P("❌ Error generando PDF", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#f8d7da', 'border': '1px solid #f5c6cb',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#721c24'
-                    })
-                    return None, estado
         
         except Exception as e:
             logging.error(f"Error en descarga anexo: {e}")
-            estado = html.P(f"❌ Error: {str(e)}", style={
-                'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                'backgroundColor': '#f8d7da', 'border': '1px solid #f5c6cb',
-                'borderRadius': '4px', 'fontSize': '12px', 'color': '#721c24'
-            })
-            return None, estado
+            return no_update, None, True, mensaje_estado_descarga(f"❌ Error: {str(e)}", 'error')
+    
+    # Consulta periódica del trabajo de descarga
+    @callback(
+        [Output("download-anexo", "data"),
+         Output("estado-descarga-anexo", "children", allow_duplicate=True),
+         Output("intervalo-descarga-anexo", "disabled", allow_duplicate=True)],
+        Input("intervalo-descarga-anexo", "n_intervals"),
+        State("trabajo-descarga-anexo", "data"),
+        prevent_initial_call=True
+    )
+    def revisar_descarga_anexo(n_intervals, trabajo):
+        if not trabajo:
+            return no_update, no_update, True
+        
+        estado_trabajo = consultar_trabajo(trabajo['id'])
+        etiqueta = trabajo['etiqueta']
+        
+        if estado_trabajo['estado'] == 'pendiente':
+            return no_update, mensaje_estado_descarga(
+                f"⏳ Generando {etiqueta}... ({estado_trabajo['segundos']:.0f}s)", 'progreso'
+            ), False
+        
+        if estado_trabajo['estado'] == 'listo' and estado_trabajo['resultado']:
+            return dcc.send_bytes(
+                estado_trabajo['resultado'],
+                filename=trabajo['filename']
+            ), mensaje_estado_descarga(f"✅ {etiqueta} generado exitosamente"), True
+        
+        if estado_trabajo['estado'] == 'desconocido':
+            return None, mensaje_estado_descarga("❌ La descarga expiró, intente nuevamente", 'error'), True
         
-        raise PreventUpdate
+        return None, mensaje_estado_descarga(f"❌ Error generando {etiqueta}", 'error'), True
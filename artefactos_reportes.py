@@ -0,0 +1,344 @@
+"""
+Artefactos de reportes pre-generados (informe y anexo, CLP/USD, Excel/PDF)
+Se renderizan todas las variantes en disco; las descargas entregan el archivo
+listo y solo generan bajo demanda si falta el artefacto de la versión de
+datos y día actuales
+
+La versión incluye el día, así que los artefactos del build dejan de servir
+al día siguiente. En gunicorn, un solo worker (el que toma el lock de
+regenerador; si muere, lo toma otro) revisa periódicamente si falta la
+versión actual y la genera: prepara los datos en su hilo, como las descargas,
+y renderiza los archivos en el pool de procesos de trabajos_reportes, fuera
+del proceso web.
+
+Estructura:
+    DIR_ARTEFACTOS/<día>-<versión de datos>/manifiesto.json
+    DIR_ARTEFACTOS/<día>-<versión de datos>/<reporte>_<moneda>_<sha256>.<ext>
+
+Uso:
+    python artefactos_reportes.py     (build; sin datos no genera nada y
+                                       termina con 0; si algo falla, con 1)
+
+Variables de entorno:
+    DIR_ARTEFACTOS                      carpeta de los artefactos (./data/artefactos)
+    SEGUNDOS_REVISION_ARTEFACTOS=600    cada cuánto se revisa si falta la versión
+                                        actual (0 desactiva la regeneración)
+"""
+
+import os
+import json
+import time
+import shutil
+import sys
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import Future
+
+try:
+    import fcntl
+    LOCK_ARCHIVO_DISPONIBLE = True
+except ImportError:
+    LOCK_ARCHIVO_DISPONIBLE = False
+
+from cache_servidor import version_datos
+from metricas_callbacks import registrar_evento
+
+DIR_ARTEFACTOS = os.environ.get('DIR_ARTEFACTOS', './data/artefactos')
+
+# Versiones anteriores que se conservan en disco (además de la actual)
+VERSIONES_ARTEFACTOS_CONSERVADAS = int(os.environ.get('VERSIONES_ARTEFACTOS_CONSERVADAS', 2))
+
+REPORTES = ('informe', 'anexo')
+MONEDAS = ('CLP', 'USD')
+EXTENSIONES = {'excel': 'xlsx', 'pdf': 'pdf'}
+
+SEGUNDOS_REVISION_ARTEFACTOS = int(os.environ.get('SEGUNDOS_REVISION_ARTEFACTOS', 600))
+
+NOMBRE_MANIFIESTO = 'manifiesto.json'
+NOMBRE_LOCK_REGENERADOR = '.regenerador.lock'
+
+_manifiestos = {}           # versión -> (mtime del manifiesto, contenido)
+_lock = threading.Lock()
+
+
+def version_artefactos(pesos_df, dolares_df):
+    """
+    Carpeta de los artefactos vigentes. Incluye el día porque el encabezado y
+    los períodos (MTD, YTD, años) dependen de la fecha actual.
+    """
+    hoy = datetime.now().strftime('%Y%m%d')
+    return f"{hoy}-{version_datos(pesos_df, dolares_df)}"
+
+
+def _clave_artefacto(reporte, moneda, formato):
+    return f"{reporte}|{moneda}|{formato}"
+
+
+def _leer_manifiesto(version):
+    """
+    Manifiesto de una versión (se relee solo si cambió en disco), o None
+    """
+    ruta = os.path.join(DIR_ARTEFACTOS, version, NOMBRE_MANIFIESTO)
+    try:
+        mtime = os.path.getmtime(ruta)
+    except OSError:
+        return None
+
+    with _lock:
+        guardado = _manifiestos.get(version)
+        if guardado is not None and guardado[0] == mtime:
+            return guardado[1]
+
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            manifiesto = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Manifiesto de artefactos ilegible ({ruta}): {e}")
+        return None
+
+    with _lock:
+        _manifiestos[version] = (mtime, manifiesto)
+    return manifiesto
+
+
+def _leer_artefacto(reporte, moneda, formato, version):
+    """
+    Lee el archivo que nombra el manifiesto y verifica su tamaño
+    """
+    manifiesto = _leer_manifiesto(version)
+    if not manifiesto:
+        return None
+
+    entrada = manifiesto.get('archivos', {}).get(_clave_artefacto(reporte, moneda, formato))
+    if entrada is None:
+        return None
+
+    try:
+        with open(os.path.join(DIR_ARTEFACTOS, version, entrada['archivo']), 'rb') as f:
+            contenido = f.read()
+    except OSError:
+        return None
+
+    if len(contenido) != entrada['bytes']:
+        print(f"⚠️ Artefacto incompleto: {entrada['archivo']}")
+        return None
+
+    return contenido
+
+
+def obtener_artefacto(reporte, moneda, formato, version):
+    """
+    Bytes del archivo pre-generado, o None si no existe para esta versión
+    (la descarga debe generarse bajo demanda)
+    """
+    contenido = _leer_artefacto(reporte, moneda, formato, version)
+    registrar_evento(f"artefacto:{'acierto' if contenido is not None else 'fallo'}")
+    return contenido
+
+
+def _escribir_atomico(ruta, contenido):
+    """
+    Escribe en un temporal y lo renombra, para que un worker nunca lea un
+    archivo a medio escribir
+    """
+    ruta_temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(ruta_temporal, 'wb') as f:
+        f.write(contenido)
+    os.replace(ruta_temporal, ruta)
+
+
+def _limpiar_versiones_antiguas(version_actual):
+    """
+    Elimina las carpetas de versiones anteriores, salvo las más recientes
+    """
+    try:
+        versiones = sorted(
+            (nombre for nombre in os.listdir(DIR_ARTEFACTOS)
+             if nombre != version_actual and os.path.isdir(os.path.join(DIR_ARTEFACTOS, nombre))),
+            key=lambda nombre: os.path.getmtime(os.path.join(DIR_ARTEFACTOS, nombre)),
+            reverse=True
+        )
+    except OSError:
+        return
+
+    for nombre in versiones[VERSIONES_ARTEFACTOS_CONSERVADAS:]:
+        shutil.rmtree(os.path.join(DIR_ARTEFACTOS, nombre), ignore_errors=True)
+        print(f"🗑️ Artefactos antiguos eliminados: {nombre}")
+
+
+def generar_artefactos(pesos_df, dolares_df, registro_fondos, pool=None):
+    """
+    Renderiza todas las variantes de informe y anexo y las deja en la carpeta
+    de la versión actual con su manifiesto. Con `pool` (ProcessPoolExecutor)
+    el renderizado corre en sus procesos; sin él, en este proceso (build).
+
+    Returns:
+        dict: manifiesto escrito ('archivos' vacío si no se generó ninguno;
+        'fallidos' con las variantes que no se pudieron generar)
+    """
+    import informe_module
+    import anexo_mensual_module
+
+    modulos = {
+        'informe': (informe_module.preparar_datos_descarga_informe, informe_module.renderizar_descarga_informe),
+        'anexo': (anexo_mensual_module.preparar_datos_descarga_anexo, anexo_mensual_module.renderizar_descarga_anexo),
+    }
+    formatos = ['excel'] + (['pdf'] if informe_module.PDF_AVAILABLE else [])
+
+    version = version_artefactos(pesos_df, dolares_df)
+    directorio = os.path.join(DIR_ARTEFACTOS, version)
+    os.makedirs(directorio, exist_ok=True)
+    print(f"🏭 Generando artefactos de reportes en {directorio}")
+
+    inicio = time.perf_counter()
+    fallidos = []
+    pendientes = {}         # (reporte, moneda, formato) -> bytes, o future del pool
+    for reporte in REPORTES:
+        preparar, renderizar = modulos[reporte]
+        for moneda in MONEDAS:
+            try:
+                datos_por_categoria = preparar(moneda, pesos_df, dolares_df, registro_fondos)
+            except Exception as e:
+                logging.error(f"❌ Artefactos {reporte} {moneda}: error preparando datos: {e}")
+                fallidos.extend(_clave_artefacto(reporte, moneda, formato) for formato in formatos)
+                continue
+
+            for formato in formatos:
+                variante = (reporte, moneda, formato)
+                try:
+                    if pool is not None:
+                        pendientes[variante] = pool.submit(renderizar, formato, datos_por_categoria, moneda)
+                    else:
+                        pendientes[variante] = renderizar(formato, datos_por_categoria, moneda)
+                except Exception as e:
+                    logging.error(f"❌ Artefactos {reporte} {moneda} {formato}: {e}")
+                    pendientes[variante] = None
+
+    archivos = {}
+    for (reporte, moneda, formato), contenido in pendientes.items():
+        if isinstance(contenido, Future):
+            try:
+                contenido = contenido.result()
+            except Exception as e:
+                logging.error(f"❌ Artefactos {reporte} {moneda} {formato}: {e}")
+                contenido = None
+        if not contenido:
+            logging.error(f"❌ Artefactos {reporte} {moneda} {formato}: no se pudo generar")
+            fallidos.append(_clave_artefacto(reporte, moneda, formato))
+            continue
+
+        huella = hashlib.sha256(contenido).hexdigest()
+        nombre_archivo = f"{reporte}_{moneda}_{huella[:16]}.{EXTENSIONES[formato]}"
+        ruta = os.path.join(directorio, nombre_archivo)
+        if not os.path.exists(ruta):
+            _escribir_atomico(ruta, contenido)
+
+        archivos[_clave_artefacto(reporte, moneda, formato)] = {
+            'archivo': nombre_archivo,
+            'sha256': huella,
+            'bytes': len(contenido),
+        }
+        print(f"   ✅ {nombre_archivo} ({len(contenido)/1024:.0f}KB)")
+
+    manifiesto = {
+        'version': version,
+        'fecha_generacion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'archivos': archivos,
+        'fallidos': fallidos,
+    }
+    if archivos:
+        # El manifiesto se escribe al final: los archivos que nombra ya existen
+        _escribir_atomico(
+            os.path.join(directorio, NOMBRE_MANIFIESTO),
+            json.dumps(manifiesto, ensure_ascii=False, indent=2).encode('utf-8')
+        )
+        _limpiar_versiones_antiguas(version)
+
+    print(f"📦 {len(archivos)} artefactos listos para la versión {version} "
+          f"({time.perf_counter() - inicio:.2f}s)")
+    return manifiesto
+
+
+def asegurar_artefactos(pesos_df, dolares_df, registro_fondos, pool=None):
+    """
+    Genera los artefactos de la versión actual si faltan.
+
+    Returns:
+        bool: True si la versión actual quedó (o ya estaba) generada
+    """
+    if _leer_manifiesto(version_artefactos(pesos_df, dolares_df)):
+        return True
+    return bool(generar_artefactos(pesos_df, dolares_df, registro_fondos, pool)['archivos'])
+
+
+def _tomar_rol_regenerador(archivo_lock):
+    """
+    Lock de archivo que el worker regenerador conserva mientras vive. Sin
+    fcntl cada proceso regenera por su cuenta.
+    """
+    if not LOCK_ARCHIVO_DISPONIBLE:
+        return True
+    try:
+        fcntl.flock(archivo_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def iniciar_regeneracion(pesos_df, dolares_df, registro_fondos):
+    """
+    Hilo que cada SEGUNDOS_REVISION_ARTEFACTOS intenta ser el regenerador del
+    host y, si lo es, revisa que existan los artefactos de la versión actual
+    (cambio de día o de datos) y los genera si faltan, renderizando en el
+    pool de procesos de reportes. Se llama al iniciar cada worker; los que no
+    tienen el lock solo vuelven a intentarlo en la siguiente revisión.
+    """
+    if SEGUNDOS_REVISION_ARTEFACTOS <= 0 or pesos_df is None:
+        return None
+
+    from trabajos_reportes import iniciar_pool_reportes
+
+    def revisar():
+        os.makedirs(DIR_ARTEFACTOS, exist_ok=True)
+        # Abierto mientras viva el hilo: el lock se libera al morir el proceso
+        archivo_lock = open(os.path.join(DIR_ARTEFACTOS, NOMBRE_LOCK_REGENERADOR), 'w')
+        regenerador = False
+        while True:
+            try:
+                if not regenerador:
+                    regenerador = _tomar_rol_regenerador(archivo_lock)
+                    if regenerador:
+                        print(f"🏭 Worker {os.getpid()} a cargo de regenerar artefactos de reportes")
+                if regenerador:
+                    asegurar_artefactos(pesos_df, dolares_df, registro_fondos, iniciar_pool_reportes())
+            except Exception as e:
+                logging.error(f"❌ Error regenerando artefactos de reportes: {e}")
+            time.sleep(SEGUNDOS_REVISION_ARTEFACTOS)
+
+    hilo = threading.Thread(target=revisar, name='regeneracion-artefactos', daemon=True)
+    hilo.start()
+    return hilo
+
+
+if __name__ == "__main__":
+    print("🚀 GENERANDO ARTEFACTOS DE REPORTES")
+    print("="*60)
+
+    # Pagina carga los datos y el registro de fondos al importarse
+    from Pagina import pesos_df, dolares_df, registro_fondos
+
+    if pesos_df is None:
+        # En el build de Render los Feather todavía no están: los artefactos
+        # se generan al arrancar (iniciar_regeneracion)
+        print("⚠️ No hay datos cargados: no se generan artefactos en este paso "
+              "(se generarán al arrancar el servidor)")
+        sys.exit(0)
+
+    manifiesto = generar_artefactos(pesos_df, dolares_df, registro_fondos)
+    print("="*60)
+
+    if manifiesto['fallidos'] or not manifiesto['archivos']:
+        print(f"❌ Artefactos sin generar: {', '.join(manifiesto['fallidos']) or 'todos'}")
+        sys.exit(1)
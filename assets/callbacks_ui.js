@@ -0,0 +1,177 @@
+// =============================================================================
+// CALLBACKS DE INTERFAZ (clientside)
+// Callbacks que no tocan datos: resaltado de botones, modales y copia del
+// gráfico al modal de pantalla completa. Se ejecutan en el navegador para no
+// ocupar un request ni un worker de gunicorn.
+// =============================================================================
+
+(function () {
+    // Copia la figura del gráfico principal al modal con layout ampliado
+    // (el eje x conserva sus categorías: ahí viajan las fechas)
+    function figura_modal(figure, titulo) {
+        if (figure && figure.data && figure.data.length > 0) {
+            var layout = Object.assign({}, figure.layout, {
+                'height': 750,
+                'margin': {t: 100, b: 80, l: 20, r: 20},
+                'title': {
+                    'text': titulo,
+                    'x': 0.5,
+                    'y': 0.95,
+                    'font': {'family': 'SuraSans-SemiBold', 'size': 26, 'color': '#24272A'}
+                },
+                'legend': {
+                    'orientation': 'h',
+                    'x': 0.5,
+                    'y': -0.15,
+                    'xanchor': 'center',
+                    'yanchor': 'top',
+                    'font': {'family': 'SuraSans-Regular', 'size': 14},
+                    'bgcolor': 'rgba(255,255,255,0.9)',
+                    'bordercolor': 'rgba(0,0,0,0.1)',
+                    'borderwidth': 1
+                },
+                'xaxis': Object.assign({}, figure.layout.xaxis, {
+                    'showgrid': false,
+                    'showspikes': true,
+                    'spikecolor': 'rgba(36, 39, 42, 0.3)',
+                    'spikesnap': 'cursor',
+                    'spikemode': 'across',
+                    'spikethickness': 1,
+                    'spikedash': 'dot',
+                    'tickformat': '%d/%m/%Y'
+                }),
+                'yaxis': {
+                    'title': {'text': 'Retorno Acumulado (%)', 'font': {'size': 18}},
+                    'tickfont': {'size': 14},
+                    'tickformat': '.1f',
+                    'ticksuffix': '%',
+                    'showgrid': true,
+                    'gridcolor': 'rgba(128,128,128,0.2)'
+                },
+                'plot_bgcolor': 'white',
+                'paper_bgcolor': 'white',
+                'images': [{
+                    'source': '/assets/investments_logo.png',
+                    'xref': 'paper',
+                    'yref': 'paper',
+                    'x': 1.02,
+                    'y': -0.30,
+                    'sizex': 0.23,
+                    'sizey': 0.17,
+                    'xanchor': 'right',
+                    'yanchor': 'bottom',
+                    'opacity': 0.9,
+                    'layer': 'above'
+                }]
+            });
+            return Object.assign({}, figure, {'layout': layout});
+        }
+
+        // Si no hay datos, mostrar mensaje
+        return {
+            'data': [],
+            'layout': {
+                'annotations': [{
+                    'text': 'Cargando datos...',
+                    'x': 0.5, 'y': 0.5, 'showarrow': false,
+                    'font': {'family': 'SuraSans-Regular', 'size': 20, 'color': '#666666'}
+                }],
+                'plot_bgcolor': '#f8f9fa', 'paper_bgcolor': '#f8f9fa',
+                'xaxis': {'showgrid': false, 'showticklabels': false, 'zeroline': false, 'visible': false},
+                'yaxis': {'showgrid': false, 'showticklabels': false, 'zeroline': false, 'visible': false},
+                'margin': {t: 20, b: 20, l: 20, r: 20}, 'height': 750
+            }
+        };
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        ui: {
+            // Abre/cierra un modal con uno o más botones (equivale a "if n1 or n2: not is_open")
+            alternar_modal: function () {
+                var args = Array.prototype.slice.call(arguments);
+                var is_open = args.pop();
+                var algun_click = args.some(function (n) { return !!n; });
+                return algun_click ? !is_open : is_open;
+            },
+
+            // Guarda la clave del botón de período presionado
+            periodo_activo: function () {
+                var ctx = window.dash_clientside.callback_context;
+                if (!ctx.triggered || !ctx.triggered.length) {
+                    return window.dash_clientside.no_update;
+                }
+                // prop_id: '{"periodo":"1y","tab":"acumulada","type":"btn-periodo"}.n_clicks'
+                var prop_id = ctx.triggered[0].prop_id;
+                return JSON.parse(prop_id.slice(0, prop_id.lastIndexOf('.'))).periodo;
+            },
+
+            // Estilos de los 8 botones de período de una sección según
+            // activo/deshabilitado (en el orden de PERIODOS_GRAFICO).
+            // periodo es la clave del botón activo ('ytd', '1y', ...)
+            estilos_periodo: function (periodo, deshabilitados) {
+                var periodos = ['1m', '3m', '6m', 'ytd', '1y', '3y', '5y', 'max'];
+                var anchos = ['45px', '45px', '45px', '50px', '45px', '45px', '45px', '50px'];
+
+                return periodos.map(function (clave, i) {
+                    var ancho = anchos[i];
+                    if (deshabilitados[i]) {
+                        return {
+                            'margin': '2px', 'width': ancho,
+                            'backgroundColor': '#f8f9fa', 'color': '#6c757d',
+                            'border': '1px solid #dee2e6',
+                            'cursor': 'not-allowed',
+                            'opacity': 0.5
+                        };
+                    } else if (periodo === clave) {
+                        return {
+                            'margin': '2px', 'width': ancho,
+                            'backgroundColor': 'black', 'color': 'white',
+                            'border': '1px solid black'
+                        };
+                    }
+                    return {
+                        'margin': '2px', 'width': ancho,
+                        'backgroundColor': 'white', 'color': 'black',
+                        'border': '1px solid black'
+                    };
+                });
+            },
+
+            // Botones acumulada / anualizada / por año de índices y personalizados.
+            // Devuelve [tipo, color1, outline1, color2, outline2, color3, outline3]
+            botones_tipo: function () {
+                var ctx = window.dash_clientside.callback_context;
+                var tipos = ['acumulada', 'anualizada', 'por_ano'];
+                var activo = 0;
+
+                if (ctx.triggered && ctx.triggered.length) {
+                    var boton = ctx.triggered[0].prop_id.split('.')[0];
+                    if (boton.endsWith('-anualizada')) {
+                        activo = 1;
+                    } else if (boton.endsWith('-por-ano')) {
+                        activo = 2;
+                    }
+                }
+
+                var salida = [tipos[activo]];
+                for (var i = 0; i < 3; i++) {
+                    salida.push(i === activo ? 'dark' : 'secondary');
+                    salida.push(i !== activo);
+                }
+                return salida;
+            },
+
+            sincronizar_modal_acumulada: function (figure) {
+                return figura_modal(figure, 'Retornos Acumulados');
+            },
+
+            sincronizar_modal_anualizada: function (figure) {
+                return figura_modal(figure, 'Rentabilidades Acumulados');
+            },
+
+            sincronizar_modal_por_ano: function (figure) {
+                return figura_modal(figure, 'Retornos Acumulados');
+            }
+        }
+    });
+})();
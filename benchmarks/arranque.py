@@ -0,0 +1,103 @@
+"""
+Arranque en frío de Pagina: tiempo de importación, fases (tiempos_arranque)
+y tiempo hasta la primera página completa (/, /_dash-layout y
+/_dash-dependencies), cada medición en un proceso nuevo.
+
+Termina con código 1 si la mediana de la primera página supera el objetivo.
+
+Uso:
+    python benchmarks/arranque.py                         # panel sintético pequeño
+    python benchmarks/arranque.py --directorio /ruta/con/data --objetivo 2.5
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIR_PROYECTO = os.path.abspath(os.path.join(DIR_BENCHMARKS, '..'))
+
+# Objetivo de la primera página completa en segundos (medido con el panel
+# sintético pequeño: ~0.7s tras diferir ReportLab, openpyxl y plotly.express)
+OBJETIVO_PRIMERA_PAGINA = float(os.environ.get('OBJETIVO_PRIMERA_PAGINA', 1.5))
+
+RUTAS_PRIMERA_PAGINA = ('/', '/_dash-layout', '/_dash-dependencies')
+
+# Corre en el proceso hijo: el reloj parte antes de importar Pagina
+CODIGO_MEDICION = """
+import sys, time, json
+inicio = time.perf_counter()
+sys.path.insert(0, {proyecto!r})
+import Pagina
+importado = time.perf_counter()
+cliente = Pagina.server.test_client()
+for ruta in {rutas!r}:
+    assert cliente.get(ruta).status_code == 200, ruta
+listo = time.perf_counter()
+from tiempos_arranque import fases_arranque
+print(json.dumps({{
+    'importar': importado - inicio,
+    'primera_pagina': listo - inicio,
+    'fases': [[fase, segundos] for fase, segundos, _ in fases_arranque()],
+    'modulos_diferidos': [m for m in ('reportlab', 'openpyxl', 'plotly.express') if m not in sys.modules],
+}}))
+"""
+
+
+def medir_arranque(directorio):
+    codigo = CODIGO_MEDICION.format(proyecto=DIR_PROYECTO, rutas=RUTAS_PRIMERA_PAGINA)
+    entorno = dict(os.environ, TIEMPOS_ARRANQUE='0', METRICAS_CALLBACKS='1', PERFILADO='0')
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=directorio, env=entorno,
+                            capture_output=True, text=True, check=True).stdout
+    # La última línea es el JSON; lo anterior son los prints de la carga
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío de Pagina")
+    parser.add_argument('--directorio', help="carpeta con data/series_*.feather (por defecto, panel sintético pequeño)")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--objetivo', type=float, default=OBJETIVO_PRIMERA_PAGINA,
+                        help="segundos máximos hasta la primera página completa (mediana)")
+    args = parser.parse_args()
+
+    directorio = args.directorio
+    temporal = None
+    if not directorio:
+        sys.path.insert(0, DIR_BENCHMARKS)
+        from datos_sinteticos import generar_panel, escribir_panel
+        from suite import ESCALAS_SUITE, SEMILLA
+
+        temporal = directorio = tempfile.mkdtemp(prefix='arranque_')
+        escribir_panel(*generar_panel(**ESCALAS_SUITE['pequeña'], semilla=SEMILLA), directorio)
+
+    try:
+        mediciones = [medir_arranque(directorio) for _ in range(args.repeticiones)]
+    finally:
+        if temporal:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+    print(f"⏱️ Arranque en frío ({args.repeticiones} procesos, mediana):")
+    for i, (fase, _) in enumerate(mediciones[0]['fases']):
+        segundos = statistics.median(m['fases'][i][1] for m in mediciones)
+        print(f"   {fase:<32} {segundos * 1000:8.0f} ms")
+
+    importar = statistics.median(m['importar'] for m in mediciones)
+    primera_pagina = statistics.median(m['primera_pagina'] for m in mediciones)
+    print(f"   {'importar Pagina':<32} {importar * 1000:8.0f} ms")
+    print(f"   {'primera página completa':<32} {primera_pagina * 1000:8.0f} ms (objetivo {args.objetivo * 1000:.0f} ms)")
+    print(f"   módulos diferidos: {', '.join(mediciones[0]['modulos_diferidos']) or 'ninguno'}")
+
+    if primera_pagina > args.objetivo:
+        print("❌ Primera página sobre el objetivo")
+        sys.exit(1)
+    print("✅ Primera página dentro del objetivo")
+
+
+if __name__ == "__main__":
+    main()
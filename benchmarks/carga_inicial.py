@@ -0,0 +1,141 @@
+"""
+Benchmark de la primera visita: qué callbacks de servidor dispara el
+navegador al cargar la página (o al abrir cada pestaña) y cuánto tardan.
+
+Se recorre el layout montado, se eligen los callbacks sin prevent_initial_call
+cuyas entradas están todas presentes (los clientside no llegan al servidor) y
+se ejecutan con el cliente de pruebas de Flask con los valores iniciales.
+Los callbacks con MATCH/ALL (p. ej. la inicialización de fechas de cada
+sección) no se simulan.
+
+Con CONTENIDO_TABS (pestañas montadas bajo demanda) también mide el montaje
+de cada pestaña. Cada medición se repite: la segunda visita usa las cachés.
+
+Uso (desde la carpeta con ./data):
+    python benchmarks/carga_inicial.py [pestaña ...]
+"""
+
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dash._utils import stringify_id
+
+COMODINES = ('["MATCH"]', '["ALL"]', '["ALLSMALLER"]')
+
+
+def _recorrer(componente, valores):
+    """
+    Guarda {(id, prop): valor} de todos los componentes con id del árbol
+    """
+    if isinstance(componente, (list, tuple)):
+        for hijo in componente:
+            _recorrer(hijo, valores)
+        return
+    if not hasattr(componente, 'to_plotly_json'):
+        return
+
+    props = componente.to_plotly_json()['props']
+    id_componente = props.get('id')
+    if isinstance(id_componente, dict):
+        id_componente = stringify_id(id_componente)   # como en app._callback_list
+    if isinstance(id_componente, str):
+        for prop in getattr(componente, '_prop_names', []):
+            valores[(id_componente, prop)] = props.get(prop)
+    _recorrer(props.get('children'), valores)
+
+
+def _dependencias(lista):
+    dependencias = []
+    for dependencia in lista:
+        id_componente = dependencia['id']
+        if any(comodin in id_componente for comodin in COMODINES):
+            return None  # MATCH/ALL: no se simula
+        dependencias.append((id_componente, dependencia['property']))
+    return dependencias
+
+
+def callbacks_iniciales(app, arbol, montado=None):
+    """
+    Callbacks de servidor que el navegador dispara al montar `arbol` (dentro
+    de `montado`, el layout ya presente): todas sus entradas existen y al
+    menos una es del árbol nuevo
+    """
+    valores = {}
+    _recorrer(arbol, valores)
+    nuevos = set(valores)
+    if montado is not None:
+        _recorrer(montado, valores)
+
+    iniciales = []
+    for definicion in app._callback_list:
+        if definicion.get('clientside_function') or definicion.get('prevent_initial_call'):
+            continue
+        entradas = _dependencias(definicion['inputs'])
+        estados = _dependencias(definicion['state'])
+        if entradas is None or estados is None:
+            continue
+        if (entradas and all(entrada in valores for entrada in entradas)
+                and any(entrada in nuevos for entrada in entradas)):
+            iniciales.append((definicion['output'], entradas, estados))
+    return iniciales, valores
+
+
+def _id(texto):
+    """
+    Id tal como lo envía el navegador: los ids dict viajan como objeto
+    """
+    return json.loads(texto) if texto.startswith('{') else texto
+
+
+def ejecutar(cliente, salida, entradas, estados, valores):
+    salidas = salida.strip('.').split('...') if salida.startswith('..') else [salida]
+    cuerpo = {
+        'output': salida,
+        'outputs': [
+            {'id': _id(s.rsplit('.', 1)[0]), 'property': s.rsplit('.', 1)[1]} for s in salidas
+        ] if salida.startswith('..') else {'id': _id(salida.rsplit('.', 1)[0]), 'property': salida.rsplit('.', 1)[1]},
+        'inputs': [{'id': _id(i), 'property': p, 'value': valores.get((i, p))} for i, p in entradas],
+        'state': [{'id': _id(i), 'property': p, 'value': valores.get((i, p))} for i, p in estados],
+        'changedPropIds': [],
+    }
+    inicio = time.perf_counter()
+    respuesta = cliente.post('/_dash-update-component', json=cuerpo)
+    return respuesta.status_code, (time.perf_counter() - inicio) * 1000
+
+
+def medir(app, nombre, arbol, montado=None, visitas=2):
+    """
+    Ejecuta los callbacks iniciales de `arbol` `visitas` veces (la segunda
+    muestra el efecto de las cachés del servidor)
+    """
+    cliente = app.server.test_client()
+    cliente.get('/')
+    iniciales, valores = callbacks_iniciales(app, arbol, montado)
+
+    tiempos = []
+    for _ in range(visitas):
+        total_ms = 0.0
+        for salida, entradas, estados in iniciales:
+            codigo, ms = ejecutar(cliente, salida, entradas, estados, valores)
+            if codigo not in (200, 204):
+                print(f"⚠️ {salida}: HTTP {codigo}")
+            total_ms += ms
+        tiempos.append(total_ms)
+
+    detalle = ', '.join(f"{ms:.0f} ms" for ms in tiempos)
+    print(f"📊 {nombre}: {len(iniciales)} callbacks | servidor por visita: {detalle}")
+    return len(iniciales), tiempos
+
+
+if __name__ == "__main__":
+    import Pagina
+
+    medir(Pagina.app, 'Carga de página', Pagina.app.layout)
+
+    contenidos = getattr(Pagina, 'CONTENIDO_TABS', {})
+    for pestaña in sys.argv[1:] or list(contenidos):
+        medir(Pagina.app, f"Pestaña {pestaña}", contenidos[pestaña], montado=Pagina.app.layout)
@@ -0,0 +1,108 @@
+"""
+Compara resultados de suite.py contra una línea base y falla (código de
+salida 1) si alguna métrica empeora más que el umbral.
+
+Tiempos: regresión si la mediana crece más de --umbral (fracción) y además
+más de --piso-ms (ruido de mediciones muy cortas).
+Bytes: regresión si el tamaño crece más de --umbral-bytes.
+Una escala o métrica de la línea base que falta en los resultados nuevos, o
+una escala medida con otros parámetros (fondos, años, semilla, fecha final),
+también es un fallo: sin ella la comparación no cubre lo que dice cubrir.
+
+Uso:
+    python benchmarks/comparar.py benchmarks/linea_base.json resultados_benchmarks.json [--umbral 0.25]
+
+La línea base depende de la máquina: regenerarla (suite.py --salida
+benchmarks/linea_base.json) al cambiar el equipo donde corre la comparación.
+"""
+
+import sys
+import json
+import argparse
+
+
+def comparar(base, nuevo, umbral, umbral_bytes, piso_ms):
+    """
+    Returns:
+        tuple: (regresiones, faltantes)
+            regresiones: (escala, métrica, tipo, valor base, valor nuevo, razón)
+            faltantes: descripción de cada escala o métrica que no se pudo comparar
+    """
+    regresiones = []
+    faltantes = []
+
+    for escala, datos_base in base['escalas'].items():
+        datos_nuevos = nuevo['escalas'].get(escala)
+        if datos_nuevos is None:
+            print(f"❌ Escala {escala} sin resultados nuevos")
+            faltantes.append(f"escala {escala} sin resultados nuevos")
+            continue
+        if datos_nuevos.get('parametros') != datos_base.get('parametros'):
+            print(f"❌ Escala {escala}: parámetros {datos_nuevos.get('parametros')} "
+                  f"distintos a la línea base {datos_base.get('parametros')}")
+            faltantes.append(f"escala {escala} con parámetros distintos")
+            continue
+
+        print(f"\n📊 Escala {escala}")
+        print(f"   {'métrica':<50} {'base':>10} {'nuevo':>10} {'razón':>7}")
+
+        for metrica, valores_base in datos_base['metricas'].items():
+            valores_nuevos = datos_nuevos['metricas'].get(metrica)
+            if valores_nuevos is None:
+                print(f" ❌{metrica:<50} {'(falta en resultados nuevos)':>29}")
+                faltantes.append(f"{escala} / {metrica} sin resultado nuevo")
+                continue
+
+            base_ms = valores_base['segundos'] * 1000
+            nuevo_ms = valores_nuevos['segundos'] * 1000
+            razon = nuevo_ms / base_ms if base_ms else float('inf')
+            empeora = razon > 1 + umbral and nuevo_ms - base_ms > piso_ms
+            marca = '❌' if empeora else '  '
+            print(f" {marca}{metrica:<50} {base_ms:8.1f}ms {nuevo_ms:8.1f}ms {razon:6.2f}x")
+            if empeora:
+                regresiones.append((escala, metrica, 'ms', base_ms, nuevo_ms, razon))
+
+            if 'bytes' in valores_base and 'bytes' in valores_nuevos:
+                razon_bytes = valores_nuevos['bytes'] / valores_base['bytes'] if valores_base['bytes'] else float('inf')
+                if razon_bytes > 1 + umbral_bytes:
+                    print(f" ❌{metrica + ' (bytes)':<50} {valores_base['bytes']:10d} {valores_nuevos['bytes']:10d} {razon_bytes:6.2f}x")
+                    regresiones.append((escala, metrica, 'bytes', valores_base['bytes'],
+                                        valores_nuevos['bytes'], razon_bytes))
+
+    return regresiones, faltantes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara benchmarks contra la línea base")
+    parser.add_argument('base')
+    parser.add_argument('nuevo')
+    parser.add_argument('--umbral', type=float, default=0.25, help="aumento de tiempo tolerado (fracción)")
+    parser.add_argument('--umbral-bytes', type=float, default=0.02, help="aumento de bytes tolerado (fracción)")
+    parser.add_argument('--piso-ms', type=float, default=5.0, help="diferencias menores se consideran ruido")
+    args = parser.parse_args()
+
+    with open(args.base, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.nuevo, 'r', encoding='utf-8') as f:
+        nuevo = json.load(f)
+
+    regresiones, faltantes = comparar(base, nuevo, args.umbral, args.umbral_bytes, args.piso_ms)
+
+    if faltantes:
+        print(f"\n❌ {len(faltantes)} comparaciones incompletas:")
+        for descripcion in faltantes:
+            print(f"   {descripcion}")
+
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones sobre el umbral:")
+        for escala, metrica, tipo, valor_base, valor_nuevo, razon in regresiones:
+            print(f"   {escala} / {metrica} ({tipo}): {valor_base:.1f} -> {valor_nuevo:.1f} ({razon:.2f}x)")
+
+    if faltantes or regresiones:
+        sys.exit(1)
+
+    print("\n✅ Sin regresiones sobre el umbral")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Generador de paneles de precios sintéticos para pruebas de escala
+
+Escribe series_clp.feather y series_usd.feather con el mismo formato que lee
+cargar_datos_optimizado: columna 'Date' (días hábiles) y una columna float por
+"Fondo - Serie", incluidos los fondos SURA de FONDOS_SURA_PDF (con serie F
+para los fondos índice). Controla cantidad de fondos, años de historia,
+densidad de NaN, inicios tardíos, huecos de varios días y fondos liquidados.
+
+Uso:
+    python benchmarks/datos_sinteticos.py --escala mediana --salida ./sintetico
+    python benchmarks/datos_sinteticos.py --fondos 10000 --años 30 --nan 0.02 --semilla 7
+
+Con la carpeta generada:
+    cd sintetico && python ../Pagina.py
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from registro_fondos import FONDOS_SURA_PDF, REGLAS_CATEGORIAS
+
+# Escalas predefinidas: (fondos, años de historia, series por fondo)
+ESCALAS = {
+    'pequeña': (50, 10, 3),
+    'mediana': (1000, 20, 3),
+    'grande': (10000, 30, 3),
+}
+
+SERIES_SURA = ['A', 'B', 'F']
+SERIES_POSIBLES = ['A', 'B', 'C', 'D', 'E', 'F', 'I', 'APV']
+
+GESTORAS = ['BCI', 'Santander', 'Itaú', 'LarrainVial', 'Security', 'BICE', 'Principal',
+            'Credicorp', 'Zurich', 'Banchile', 'Scotia', 'Compass', 'Toesca', 'Fintual']
+
+# Palabras de cada categoría de registro_fondos para que la clasificación
+# reparta los fondos sintéticos entre todas las categorías
+PALABRAS_CATEGORIAS = [
+    [grupo[0] for grupo in grupos] for _, grupos in REGLAS_CATEGORIAS
+] + [['Money Market'], ['Ahorro'], ['Corto Plazo']]
+
+COMPLEMENTOS = ['Global', 'Latam', 'USA', 'Emergentes', 'Europa', 'Asia', 'Plus',
+                'Largo Plazo', 'UF', 'Dólar', 'Sustentable', 'Dinámico', 'Estable']
+
+# Fracción de fondos con ' - ' dentro del nombre (separar_nombre_y_serie
+# toma como serie solo la última parte)
+FRACCION_NOMBRES_CON_GUION = 0.03
+
+
+def nombres_fondos(n_fondos, rng, incluir_sura=True):
+    """
+    Nombres únicos de fondos: primero los de FONDOS_SURA_PDF, luego sintéticos
+    """
+    nombres = list(FONDOS_SURA_PDF[:n_fondos]) if incluir_sura else []
+    usados = set(nombres)
+
+    while len(nombres) < n_fondos:
+        palabras = PALABRAS_CATEGORIAS[rng.integers(len(PALABRAS_CATEGORIAS))]
+        base = (f"Fondo Mutuo {GESTORAS[rng.integers(len(GESTORAS))]} "
+                f"{' '.join(palabras).title()} {COMPLEMENTOS[rng.integers(len(COMPLEMENTOS))]}")
+        if rng.random() < FRACCION_NOMBRES_CON_GUION:
+            base += " - Clase Institucional"
+
+        nombre = base
+        sufijo = 2
+        while nombre in usados:
+            nombre = f"{base} {sufijo}"
+            sufijo += 1
+        usados.add(nombre)
+        nombres.append(nombre)
+
+    return nombres
+
+
+def columnas_panel(fondos, rng, series_por_fondo):
+    """
+    Columnas "Fondo - Serie"; los fondos SURA siempre tienen A, B y F
+    """
+    columnas = []
+    for fondo in fondos:
+        if fondo in FONDOS_SURA_PDF:
+            series = SERIES_SURA
+        else:
+            cantidad = max(1, min(len(SERIES_POSIBLES), rng.poisson(series_por_fondo - 1) + 1))
+            series = sorted(rng.choice(SERIES_POSIBLES, size=cantidad, replace=False),
+                            key=SERIES_POSIBLES.index)
+        columnas.extend(f"{fondo} - {serie}" for serie in series)
+    return columnas
+
+
+def _bloque_precios(n_filas, n_columnas, rng, densidad_nan, fraccion_inicio_tardio,
+                    huecos_por_serie, fraccion_liquidados):
+    """
+    Precios de un bloque de columnas: camino aleatorio geométrico con NaN
+    antes del inicio, después de la liquidación, en huecos y sueltos
+    """
+    volatilidad = rng.uniform(0.0005, 0.015, n_columnas)
+    deriva = rng.uniform(-0.0001, 0.0004, n_columnas)
+    retornos = rng.standard_normal((n_filas, n_columnas)) * volatilidad + deriva
+    precios = np.exp(np.cumsum(retornos, axis=0, out=retornos) + np.log(rng.uniform(900, 50000, n_columnas)))
+
+    filas = np.arange(n_filas)[:, None]
+
+    # Inicio tardío: NaN antes del primer precio (al menos 20 días de historia)
+    inicio = np.where(rng.random(n_columnas) < fraccion_inicio_tardio,
+                      rng.integers(0, max(1, n_filas - 20), n_columnas), 0)
+    nulos = filas < inicio
+
+    # Fondos liquidados: sin precios desde una fecha
+    fin = np.where(rng.random(n_columnas) < fraccion_liquidados,
+                   rng.integers(inicio + 10, n_filas + 10), n_filas)
+    nulos |= filas >= fin
+
+    # Huecos de 5 a 30 días hábiles
+    cantidad_huecos = rng.poisson(huecos_por_serie, n_columnas)
+    for columna in np.flatnonzero(cantidad_huecos):
+        for _ in range(cantidad_huecos[columna]):
+            desde = rng.integers(0, n_filas)
+            nulos[desde:desde + rng.integers(5, 31), columna] = True
+
+    if densidad_nan:
+        nulos |= rng.random((n_filas, n_columnas)) < densidad_nan
+
+    precios[nulos] = np.nan
+    return precios.round(4)
+
+
+def generar_panel(n_fondos=50, años=10, series_por_fondo=3, densidad_nan=0.01,
+                  fraccion_inicio_tardio=0.5, huecos_por_serie=0.3, fraccion_liquidados=0.02,
+                  semilla=0, fecha_fin=None, bloque_columnas=512):
+    """
+    Panel CLP y USD sintético (mismas columnas; USD = CLP / tipo de cambio).
+
+    Returns:
+        tuple: (pesos_df, dolares_df) con columna 'Date', como los archivos Feather
+    """
+    rng = np.random.default_rng(semilla)
+
+    fecha_fin = pd.Timestamp(fecha_fin or datetime.now()).normalize()
+    fechas = pd.bdate_range(end=fecha_fin, periods=int(años * 261))
+    n_filas = len(fechas)
+
+    columnas = columnas_panel(nombres_fondos(n_fondos, rng), rng, series_por_fondo)
+    n_columnas = len(columnas)
+
+    tipo_cambio = 850 * np.exp(np.cumsum(rng.normal(0, 0.006, n_filas)))
+
+    pesos = np.empty((n_filas, n_columnas))
+    dolares = np.empty((n_filas, n_columnas))
+    for desde in range(0, n_columnas, bloque_columnas):
+        hasta = min(desde + bloque_columnas, n_columnas)
+        pesos[:, desde:hasta] = _bloque_precios(
+            n_filas, hasta - desde, rng, densidad_nan,
+            fraccion_inicio_tardio, huecos_por_serie, fraccion_liquidados
+        )
+        dolares[:, desde:hasta] = (pesos[:, desde:hasta] / tipo_cambio[:, None]).round(4)
+
+    paneles = []
+    for valores in (pesos, dolares):
+        df = pd.DataFrame(valores, columns=columnas, copy=False)
+        df.insert(0, 'Date', fechas)
+        paneles.append(df)
+
+    return paneles[0], paneles[1]
+
+
+def escribir_panel(pesos_df, dolares_df, directorio):
+    """
+    Escribe los Feather en `directorio`/data (donde los busca la app)
+    """
+    carpeta_datos = os.path.join(directorio, 'data')
+    os.makedirs(carpeta_datos, exist_ok=True)
+    rutas = []
+    for nombre, df in (('series_clp.feather', pesos_df), ('series_usd.feather', dolares_df)):
+        ruta = os.path.join(carpeta_datos, nombre)
+        df.to_feather(ruta)
+        rutas.append(ruta)
+    return rutas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera paneles de precios sintéticos")
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequeña')
+    parser.add_argument('--fondos', type=int, help="cantidad de fondos (reemplaza la escala)")
+    parser.add_argument('--años', type=float, help="años de historia (reemplaza la escala)")
+    parser.add_argument('--series', type=float, help="series promedio por fondo no SURA")
+    parser.add_argument('--nan', type=float, default=0.01, help="fracción de NaN sueltos")
+    parser.add_argument('--inicio-tardio', type=float, default=0.5, help="fracción de series con inicio posterior")
+    parser.add_argument('--huecos', type=float, default=0.3, help="huecos de varios días por serie (promedio)")
+    parser.add_argument('--liquidados', type=float, default=0.02, help="fracción de series liquidadas")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--fecha-fin', help="última fecha (YYYY-MM-DD, por defecto hoy)")
+    parser.add_argument('--salida', default='./sintetico', help="carpeta de salida (se escribe en <salida>/data)")
+    args = parser.parse_args()
+
+    n_fondos, años, series = ESCALAS[args.escala]
+    n_fondos = args.fondos or n_fondos
+    años = args.años or años
+    series = args.series or series
+
+    inicio = time.perf_counter()
+    pesos_df, dolares_df = generar_panel(
+        n_fondos, años, series, args.nan, args.inicio_tardio, args.huecos,
+        args.liquidados, args.semilla, args.fecha_fin
+    )
+    rutas = escribir_panel(pesos_df, dolares_df, args.salida)
+
+    mb = sum(os.path.getsize(ruta) for ruta in rutas) / (1024 * 1024)
+    nulos = pesos_df.iloc[:, 1:].isna().to_numpy().mean()
+    print(f"🧪 Panel sintético: {n_fondos} fondos, {pesos_df.shape[1] - 1} series, "
+          f"{len(pesos_df)} fechas, {nulos:.1%} NaN")
+    print(f"📁 {', '.join(rutas)} ({mb:.1f}MB, {time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
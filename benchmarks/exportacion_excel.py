@@ -0,0 +1,102 @@
+"""
+Benchmark de exportación Excel: ajuste de anchos celda a celda con
+pd.ExcelWriter (implementación anterior) vs generar_libro_excel
+(anchos vectorizados + openpyxl write-only)
+
+Uso:
+    python benchmarks/exportacion_excel.py [filas] [hojas] [repeticiones]
+"""
+
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from exportar_excel import generar_libro_excel, anchos_columnas, FORMATO_DECIMALES
+
+COLUMNAS_RENTABILIDAD = ['Diaria', '1 Mes', '3 Meses', '12 Meses', 'MTD', 'YTD',
+                         'Año 2025', 'Año 2024', '3 Años*', '5 Años**']
+
+
+def crear_tabla_sintetica(filas, semilla=0):
+    """
+    Tabla con las columnas del informe; ~5% de NaN en rentabilidades
+    """
+    rng = np.random.default_rng(semilla)
+    tabla = pd.DataFrame({
+        'Fondo': [f"FONDO MUTUO SURA RENTA {i % 97}" for i in range(filas)],
+        'Serie': rng.choice(['A', 'B', 'C', 'F', 'I'], filas),
+        'Valor Cuota': rng.uniform(900, 5000, filas).round(4),
+        'TAC': rng.uniform(0, 3, filas).round(2),
+    })
+    for columna in COLUMNAS_RENTABILIDAD:
+        valores = rng.normal(0, 8, filas).round(2)
+        valores[rng.random(filas) < 0.05] = np.nan
+        tabla[columna] = valores
+    return tabla
+
+
+def exportar_anterior(hojas):
+    """
+    Implementación anterior: to_excel + len(str(cell.value)) por celda
+    """
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for nombre_hoja, df in hojas:
+            df.to_excel(writer, sheet_name=nombre_hoja, index=False)
+            worksheet = writer.sheets[nombre_hoja]
+            for column in worksheet.columns:
+                max_length = 0
+                column_letter = column[0].column_letter
+                for cell in column:
+                    try:
+                        if len(str(cell.value)) > max_length:
+                            max_length = len(str(cell.value))
+                    except:
+                        pass
+                worksheet.column_dimensions[column_letter].width = min(max_length + 2, 50)
+    return output.getvalue()
+
+
+def medir(funcion, hojas, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.process_time()
+        contenido = funcion(hojas)
+        tiempos.append(time.process_time() - inicio)
+    return min(tiempos), len(contenido)
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    num_hojas = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    repeticiones = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    hojas = [(f"Categoria {i}", crear_tabla_sintetica(filas, semilla=i)) for i in range(num_hojas)]
+
+    # Los anchos deben coincidir con los del recorrido celda a celda
+    from openpyxl import load_workbook
+    libro = load_workbook(io.BytesIO(exportar_anterior(hojas[:1])))
+    anchos_anteriores = [d.width for d in libro.worksheets[0].column_dimensions.values()]
+    assert anchos_anteriores == anchos_columnas(hojas[0][1]), "los anchos no coinciden"
+
+    t_anterior, bytes_anterior = medir(exportar_anterior, hojas, repeticiones)
+    t_nuevo, bytes_nuevo = medir(generar_libro_excel, hojas, repeticiones)
+    t_formato, bytes_formato = medir(
+        lambda h: generar_libro_excel(h, formato_decimales=FORMATO_DECIMALES), hojas, repeticiones
+    )
+
+    print(f"📊 {num_hojas} hojas x {filas} filas ({len(hojas[0][1].columns)} columnas), mejor de {repeticiones}")
+    print(f"   anterior (ExcelWriter + ancho por celda): {t_anterior:.3f}s  {bytes_anterior / 1024:.0f} KB")
+    print(f"   write-only + anchos vectorizados:         {t_nuevo:.3f}s  {bytes_nuevo / 1024:.0f} KB")
+    print(f"   ... + formato '{FORMATO_DECIMALES}' por celda:          {t_formato:.3f}s  {bytes_formato / 1024:.0f} KB")
+    print(f"   ⚡ {t_anterior / t_nuevo:.1f}x más rápido")
+
+
+if __name__ == '__main__':
+    main()
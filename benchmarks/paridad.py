@@ -0,0 +1,410 @@
+"""
+Paridad numérica entre las implementaciones de referencia (cálculo por fondo
+en tiempo real) y los motores rápidos que las reemplazan (pre-cálculos, y
+cualquier motor vectorizado que se agregue a TABLAS).
+
+Para cada tabla y moneda corre la referencia y cada motor sobre TODAS las
+series del panel y compara celda a celda:
+    - números: diferencia absoluta, tolerancia --tolerancia (redondeo de float)
+    - "-" / NaN: deben coincidir exactamente (un motor que devuelve NaN donde
+      la referencia pone "-", o un número donde no hay historial, es distinto)
+    - filas o columnas que solo existen en uno de los dos: distintas
+
+Reglas que un motor debe respetar para pasar (las tiene la referencia):
+    - YTD desde el último precio del año anterior
+    - años calendario solo con más de 1 observación en el año
+    - anualizadas de Pagina con los días reales entre fechas, no dias/365.25
+    - validación de períodos, meses del anexo, MTD/YTD y años del informe
+      contra la última fecha del panel, no la del fondo
+    - una fila por cada serie con datos, y "-" en los años del panel
+      anteriores al inicio del fondo
+    - mismos nombres de columna ('12 M') y mismo redondeo (numpy) que la referencia
+
+Informa la diferencia máxima por métrica y las series con diferencias, y
+termina con código 1 si algún motor no coincide.
+
+Con --instalado verifica los pre-cálculos ya instalados en el directorio
+actual (./data/precalculos_optimizado.pkl contra ./data/series_*.feather) y
+escribe el resultado por tabla en RUTA_PARIDAD. La app solo usa los
+pre-cálculos de una tabla si ese registro dice que coincide para ese mismo
+archivo (precalculos_validados); las demás se calculan en tiempo real. Es un
+paso del build (render.yaml) y no falla por diferencias: solo las informa.
+
+Uso:
+    python benchmarks/paridad.py                          # panel sintético pequeño, fecha de hoy
+    python benchmarks/paridad.py --escala mediana --fecha-fin 2025-01-02
+    python benchmarks/paridad.py --datos ./data --salida paridad.json
+    python benchmarks/paridad.py --instalado              # build: habilita las tablas con paridad
+"""
+
+import os
+import io
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+from contextlib import redirect_stdout
+
+import pandas as pd
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIR_BENCHMARKS, '..'))
+
+from suite import ESCALAS_SUITE
+
+# TAC es simulado (aleatorio en cada cálculo); Fondo/Serie son la clave
+COLUMNAS_IGNORADAS = {'Fondo', 'Serie', 'TAC'}
+
+
+def _pagina_tiempo_real(nombre_funcion):
+    """
+    Referencia de Pagina forzando el cálculo en tiempo real
+    """
+    def calcular(df, moneda, codigos, nombres):
+        import Pagina
+        validados_original = Pagina.precalculos_validados
+        Pagina.precalculos_validados = lambda tabla: False
+        try:
+            return getattr(Pagina, nombre_funcion)(df, codigos, nombres)
+        finally:
+            Pagina.precalculos_validados = validados_original
+    return calcular
+
+
+def _modulo(nombre_modulo, nombre_funcion):
+    def calcular(df, moneda, codigos, nombres):
+        modulo = __import__(nombre_modulo)
+        return getattr(modulo, nombre_funcion)(df, codigos, nombres)
+    return calcular
+
+
+def _precalculado(nombre_funcion):
+    def calcular(df, moneda, codigos, nombres):
+        import precalculos_optimizado
+        return getattr(precalculos_optimizado, nombre_funcion)(moneda, codigos, nombres)
+    return calcular
+
+
+# tabla -> referencia y motores a validar, todos con firma (df, moneda, codigos, nombres).
+# Un motor nuevo se agrega en 'motores' de cada tabla que reemplaza.
+TABLAS = {
+    'acumuladas': {
+        'referencia': _pagina_tiempo_real('calcular_rentabilidades'),
+        'motores': {'precalculos': _precalculado('obtener_rentabilidades_acumuladas_precalculadas')},
+    },
+    'anualizadas': {
+        'referencia': _pagina_tiempo_real('calcular_rentabilidades_anualizadas'),
+        'motores': {'precalculos': _precalculado('obtener_rentabilidades_anualizadas_precalculadas')},
+    },
+    'por_año': {
+        'referencia': _pagina_tiempo_real('calcular_rentabilidades_por_año'),
+        'motores': {'precalculos': _precalculado('obtener_rentabilidades_por_año_precalculadas')},
+    },
+    'informe': {
+        'referencia': _modulo('informe_module', 'calcular_rentabilidades_completas_pdf'),
+        'motores': {'precalculos': _precalculado('obtener_informe_pdf_completo_precalculado')},
+    },
+    'anexo': {
+        'referencia': _modulo('anexo_mensual_module', 'calcular_retornos_mensuales_tiempo_real'),
+        'motores': {'precalculos': _precalculado('obtener_retornos_mensuales_precalculados')},
+    },
+}
+
+
+def _clase(valor):
+    """
+    'número', 'vacío' (None/NaN) o el texto mismo ("-")
+    """
+    if isinstance(valor, str):
+        return valor
+    if valor is None or pd.isna(valor):
+        return 'vacío'
+    return 'número'
+
+
+def _a_json(valor):
+    if isinstance(valor, str) or valor is None:
+        return valor
+    if pd.isna(valor):
+        return None
+    return float(valor)
+
+
+def comparar_tablas(referencia, motor, tolerancia):
+    """
+    Compara dos tablas indexadas por 'Fondo' (una fila por serie).
+
+    Las columnas que faltan en una de las dos tablas se informan aparte
+    (no celda a celda) y también cuentan como diferencia.
+
+    Returns:
+        tuple: (métricas, fondos, columnas distintas)
+            métricas: columna -> {'comparadas', 'distintas', 'max_dif'}
+            fondos: fondo -> lista de (columna, valor referencia, valor motor, diferencia)
+            columnas distintas: {'solo_referencia': [...], 'solo_motor': [...]}
+    """
+    referencia = referencia.set_index('Fondo') if not referencia.empty else referencia
+    motor = motor.set_index('Fondo') if motor is not None and not motor.empty else pd.DataFrame()
+
+    columnas_referencia = [c for c in referencia.columns if c not in COLUMNAS_IGNORADAS]
+    columnas_motor = [c for c in motor.columns if c not in COLUMNAS_IGNORADAS]
+    columnas = [c for c in columnas_referencia if c in columnas_motor]
+    columnas_distintas = {
+        'solo_referencia': [str(c) for c in columnas_referencia if c not in columnas_motor],
+        'solo_motor': [str(c) for c in columnas_motor if c not in columnas_referencia],
+    }
+
+    metricas = {columna: {'comparadas': 0, 'distintas': 0, 'max_dif': 0.0} for columna in columnas}
+    metricas['(fila)'] = {'comparadas': 0, 'distintas': 0, 'max_dif': 0.0}
+    fondos = {}
+
+    for fondo in referencia.index.union(motor.index):
+        metricas['(fila)']['comparadas'] += 1
+        if fondo not in referencia.index or fondo not in motor.index:
+            metricas['(fila)']['distintas'] += 1
+            fondos.setdefault(fondo, []).append(
+                ('(fila)', 'presente' if fondo in referencia.index else 'ausente',
+                 'presente' if fondo in motor.index else 'ausente', None)
+            )
+            continue
+
+        fila_referencia = referencia.loc[fondo]
+        fila_motor = motor.loc[fondo]
+        for columna in columnas:
+            valor_referencia = fila_referencia[columna]
+            valor_motor = fila_motor[columna]
+            metrica = metricas[columna]
+            metrica['comparadas'] += 1
+
+            clase_referencia, clase_motor = _clase(valor_referencia), _clase(valor_motor)
+            if clase_referencia != clase_motor:
+                diferencia = None
+            elif clase_referencia == 'número':
+                diferencia = abs(float(valor_referencia) - float(valor_motor))
+                metrica['max_dif'] = max(metrica['max_dif'], diferencia)
+                if diferencia <= tolerancia:
+                    continue
+            else:
+                continue
+
+            metrica['distintas'] += 1
+            fondos.setdefault(fondo, []).append((columna, valor_referencia, valor_motor, diferencia))
+
+    return metricas, fondos, columnas_distintas
+
+
+def _formato(valor):
+    return repr(valor) if isinstance(valor, str) else f"{float(valor):.10g}"
+
+
+def _clave_orden(diferencias):
+    # Primero las series con distinto tipo de valor, luego por diferencia
+    return max(float('inf') if d is None else d for _, _, _, d in diferencias)
+
+
+def imprimir_resultado(tabla, motor, moneda, metricas, fondos, columnas_distintas, codigos, max_fondos):
+    marca = '❌' if fondos or any(columnas_distintas.values()) else '✅'
+    print(f"\n{marca} {tabla} / {motor} ({moneda}): {len(fondos)} series con diferencias")
+    if columnas_distintas['solo_referencia']:
+        print(f"   columnas solo en la referencia: {', '.join(columnas_distintas['solo_referencia'])}")
+    if columnas_distintas['solo_motor']:
+        print(f"   columnas solo en el motor: {', '.join(columnas_distintas['solo_motor'])}")
+    print(f"   {'métrica':<20} {'comparadas':>10} {'distintas':>10} {'máx. dif.':>12}")
+    for columna, metrica in metricas.items():
+        print(f"   {str(columna):<20} {metrica['comparadas']:>10} {metrica['distintas']:>10} "
+              f"{metrica['max_dif']:>12.3g}")
+
+    peores = sorted(fondos.items(), key=lambda item: _clave_orden(item[1]), reverse=True)
+    for fondo, diferencias in peores[:max_fondos]:
+        detalle = '; '.join(
+            f"{columna}: {_formato(valor_referencia)} vs {_formato(valor_motor)}"
+            + (f" ({diferencia:.3g})" if diferencia is not None else '')
+            for columna, valor_referencia, valor_motor, diferencia in diferencias[:4]
+        )
+        extra = f" (+{len(diferencias) - 4})" if len(diferencias) > 4 else ''
+        print(f"   • {codigos[int(fondo)]}: {detalle}{extra}")
+    if len(peores) > max_fondos:
+        print(f"   ... y {len(peores) - max_fondos} series más")
+
+
+def verificar_paridad(tablas, tolerancia, max_fondos):
+    """
+    Corre referencia y motores sobre el panel cargado por Pagina (directorio
+    actual) para CLP y USD.
+
+    Returns:
+        dict: tabla -> motor -> moneda -> {'metricas', 'fondos'}
+    """
+    with redirect_stdout(io.StringIO()):
+        import Pagina
+
+    resultados = {}
+    for moneda, df in (('CLP', Pagina.pesos_df), ('USD', Pagina.dolares_df)):
+        codigos = [columna for columna in df.columns if columna != 'Dates']
+        # Nombre = posición: sin ' - ', cada serie queda como un 'Fondo' único
+        # (con los nombres reales, varias series de un fondo comparten 'Fondo')
+        nombres = [str(i) for i in range(len(codigos))]
+
+        for tabla in tablas:
+            with redirect_stdout(io.StringIO()):
+                referencia = TABLAS[tabla]['referencia'](df, moneda, codigos, nombres)
+
+            for motor, calcular in TABLAS[tabla]['motores'].items():
+                with redirect_stdout(io.StringIO()):
+                    resultado_motor = calcular(df, moneda, codigos, nombres)
+                metricas, fondos, columnas_distintas = comparar_tablas(referencia, resultado_motor, tolerancia)
+                imprimir_resultado(tabla, motor, moneda, metricas, fondos, columnas_distintas,
+                                   codigos, max_fondos)
+
+                resultados.setdefault(tabla, {}).setdefault(motor, {})[moneda] = {
+                    'metricas': metricas,
+                    'columnas_distintas': columnas_distintas,
+                    'fondos': {
+                        codigos[int(fondo)]: [
+                            {'metrica': str(columna), 'referencia': _a_json(valor_referencia),
+                             'motor': _a_json(valor_motor), 'diferencia': diferencia}
+                            for columna, valor_referencia, valor_motor, diferencia in diferencias
+                        ]
+                        for fondo, diferencias in fondos.items()
+                    },
+                }
+
+    return resultados
+
+
+def tablas_con_paridad(resultados, motor='precalculos'):
+    """
+    tabla -> True si `motor` coincide con la referencia en ambas monedas
+    """
+    return {
+        tabla: all(
+            not resultado['fondos'] and not any(resultado['columnas_distintas'].values())
+            for resultado in motores.get(motor, {}).values()
+        ) and bool(motores.get(motor))
+        for tabla, motores in resultados.items()
+    }
+
+
+def verificar_instalado(tablas, tolerancia, max_fondos):
+    """
+    Verifica los pre-cálculos del directorio actual y deja el registro que
+    lee precalculos_validados. Sin datos o sin pre-cálculos no habilita nada.
+    """
+    import precalculos_optimizado
+
+    if os.path.exists(precalculos_optimizado.RUTA_PARIDAD):
+        os.remove(precalculos_optimizado.RUTA_PARIDAD)
+
+    precalculos = precalculos_optimizado.cargar_precalculos()
+    if not precalculos:
+        print("⚠️ Sin pre-cálculos instalados: todas las tablas se calculan en tiempo real")
+        return
+
+    with redirect_stdout(io.StringIO()):
+        import Pagina
+    if Pagina.pesos_df is None or Pagina.dolares_df is None:
+        print("⚠️ Sin datos en ./data: todas las tablas se calculan en tiempo real")
+        return
+
+    resultados = verificar_paridad(tablas, tolerancia, max_fondos)
+    paridad = tablas_con_paridad(resultados)
+
+    registro = {
+        'timestamp_precalculos': precalculos['timestamp'],
+        'fecha_verificacion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'tolerancia': tolerancia,
+        'tablas': {tabla: paridad.get(tabla, False) for tabla in TABLAS},
+    }
+    with open(precalculos_optimizado.RUTA_PARIDAD, 'w', encoding='utf-8') as f:
+        json.dump(registro, f, ensure_ascii=False, indent=2)
+
+    habilitadas = [tabla for tabla, ok in registro['tablas'].items() if ok]
+    tiempo_real = [tabla for tabla, ok in registro['tablas'].items() if not ok]
+    print(f"\n📁 Registro de paridad en {precalculos_optimizado.RUTA_PARIDAD}")
+    print(f"⚡ Pre-cálculos habilitados: {', '.join(habilitadas) or 'ninguno'}")
+    if tiempo_real:
+        print(f"❌ En tiempo real por falta de paridad: {', '.join(tiempo_real)}")
+
+
+def preparar_directorio(directorio, datos, escala, semilla, fecha_fin):
+    """
+    Deja los Feather en `directorio`/data (para Pagina) y en la raíz (para
+    generar_precalculos_completos): copiados de `datos` o generados
+    """
+    from datos_sinteticos import generar_panel, escribir_panel
+
+    if datos:
+        carpeta_datos = os.path.join(directorio, 'data')
+        os.makedirs(carpeta_datos, exist_ok=True)
+        for nombre in ('series_clp.feather', 'series_usd.feather'):
+            shutil.copyfile(os.path.join(datos, nombre), os.path.join(carpeta_datos, nombre))
+        print(f"📂 Panel real: {datos}")
+    else:
+        parametros = dict(ESCALAS_SUITE[escala], semilla=semilla, fecha_fin=fecha_fin)
+        pesos_df, dolares_df = generar_panel(**parametros)
+        escribir_panel(pesos_df, dolares_df, directorio)
+        print(f"🧪 Panel sintético {escala}: {pesos_df.shape[1] - 1} series, "
+              f"{len(pesos_df)} fechas hasta {pesos_df['Date'].max():%Y-%m-%d} (semilla {semilla})")
+
+    for nombre in ('series_clp.feather', 'series_usd.feather'):
+        shutil.copyfile(os.path.join(directorio, 'data', nombre), os.path.join(directorio, nombre))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad numérica de motores rápidos contra la referencia")
+    parser.add_argument('--datos', help="carpeta con series_clp.feather y series_usd.feather reales")
+    parser.add_argument('--escala', choices=list(ESCALAS_SUITE), default='pequeña')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--fecha-fin', help="última fecha del panel sintético (YYYY-MM-DD, por defecto hoy)")
+    parser.add_argument('--tablas', nargs='+', choices=list(TABLAS), default=list(TABLAS))
+    parser.add_argument('--tolerancia', type=float, default=1e-9, help="diferencia absoluta tolerada")
+    parser.add_argument('--max-fondos', type=int, default=10, help="series con diferencias a mostrar")
+    parser.add_argument('--salida', help="JSON con el detalle por métrica y por serie")
+    parser.add_argument('--instalado', action='store_true',
+                        help="verificar los pre-cálculos del directorio actual y escribir el registro de paridad")
+    args = parser.parse_args()
+
+    if args.instalado:
+        verificar_instalado(args.tablas, args.tolerancia, args.max_fondos)
+        return
+
+    datos = os.path.abspath(args.datos) if args.datos else None
+    salida = os.path.abspath(args.salida) if args.salida else None
+
+    directorio = tempfile.mkdtemp(prefix='paridad_')
+    try:
+        preparar_directorio(directorio, datos, args.escala, args.semilla, args.fecha_fin)
+        os.chdir(directorio)
+
+        import precalculos_optimizado
+        with redirect_stdout(io.StringIO()):
+            precalculos_optimizado.generar_precalculos_completos()
+
+        resultados = verificar_paridad(args.tablas, args.tolerancia, args.max_fondos)
+    finally:
+        os.chdir(DIR_BENCHMARKS)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\n📁 Detalle en {salida}")
+
+    motores_distintos = sorted({
+        f"{tabla}/{motor}"
+        for tabla, motores in resultados.items()
+        for motor, por_moneda in motores.items()
+        if any(resultado['fondos'] or any(resultado['columnas_distintas'].values())
+               for resultado in por_moneda.values())
+    })
+    if motores_distintos:
+        print(f"\n❌ Sin paridad: {', '.join(motores_distintos)}")
+        sys.exit(1)
+
+    print("\n✅ Todos los motores coinciden con la referencia")
+
+
+if __name__ == "__main__":
+    main()
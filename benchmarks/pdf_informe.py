@@ -0,0 +1,108 @@
+"""
+Benchmark del PDF de informe: construcción de las tablas por categoría en
+secuencia vs en paralelo (HILOS_TABLAS_PDF), para un universo pequeño y uno grande.
+Verifica que el PDF sea idéntico byte a byte (ReportLab en modo invariant).
+
+Uso:
+    python benchmarks/pdf_informe.py [filas_grande] [repeticiones] [hilos]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from reportlab import rl_config
+
+import informe_module
+from informe_module import generar_pdf_informe, construir_tabla_categoria_pdf, CONFIG
+
+# Sin fecha de creación ni id aleatorio: dos renders iguales dan los mismos bytes
+rl_config.invariant = 1
+
+
+def crear_datos_sinteticos(categorias, filas_por_categoria, semilla=0):
+    """
+    datos_por_categoria con las columnas de obtener_informe_pdf_completo_precalculado;
+    ~5% de NaN en rentabilidades y 4 series por fondo
+    """
+    rng = np.random.default_rng(semilla)
+    año_actual = datetime.now().year
+    columnas_rentabilidad = ['Diaria', '1 Mes', '3 Meses', '12 Meses', 'MTD', 'YTD',
+                             f'Año {año_actual - 1}', f'Año {año_actual - 2}', '3 Años*', '5 Años**']
+
+    datos = {}
+    for indice_categoria, categoria in enumerate(CONFIG['ORDEN_CATEGORIAS'][:categorias]):
+        n = filas_por_categoria
+        tabla = pd.DataFrame({
+            'Fondo': [f"Fondo Mutuo SURA {categoria} {i // 4}" for i in range(n)],
+            'Serie': [['A', 'B', 'F', 'I'][i % 4] for i in range(n)],
+            'Valor Cuota': rng.uniform(900, 5000, n).round(2),
+            'TAC': rng.uniform(0, 3, n).round(2),
+        })
+        for columna in columnas_rentabilidad:
+            valores = rng.normal(0, 8, n).round(2)
+            valores[rng.random(n) < 0.05] = np.nan
+            tabla[columna] = valores
+        datos[categoria] = tabla
+    return datos
+
+
+def construir_tablas(datos, moneda):
+    """
+    Solo la construcción de flowables de todas las categorías (en secuencia)
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import mm
+    año_actual = datetime.now().year
+    ancho = landscape(A4)[0] - 20*mm
+    for categoria, tabla in datos.items():
+        construir_tabla_categoria_pdf(categoria, tabla, moneda, ancho, año_actual - 1, año_actual - 2)
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def comparar(nombre, datos, repeticiones, hilos):
+    filas = sum(len(tabla) for tabla in datos.values())
+    print(f"\n📊 {nombre}: {len(datos)} categorías, {filas} filas")
+
+    t_tablas, _ = medir(lambda: construir_tablas(datos, 'CLP'), repeticiones)
+    print(f"   Tablas (secuencial):   {t_tablas*1000:8.1f} ms")
+
+    resultados = {}
+    for etiqueta, n_hilos in (('secuencial', 1), (f'{hilos} hilos', hilos)):
+        informe_module.HILOS_TABLAS_PDF = n_hilos
+        t_pdf, pdf = medir(lambda: generar_pdf_informe(datos, 'CLP'), repeticiones)
+        resultados[etiqueta] = (t_pdf, pdf)
+        print(f"   PDF completo ({etiqueta:>10}): {t_pdf*1000:8.1f} ms  ({len(pdf)/1024:.0f}KB)")
+
+    (t_sec, pdf_sec), (t_par, pdf_par) = resultados.values()
+    assert pdf_sec == pdf_par, "El PDF en paralelo difiere del secuencial"
+    print(f"   ✅ PDF idéntico | paralelo/secuencial: {t_par / t_sec:.2f}x")
+
+
+if __name__ == "__main__":
+    filas_grande = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    hilos = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    # Silenciar los prints de cada render
+    informe_module.print = lambda *args, **kwargs: None
+
+    generar_pdf_informe(crear_datos_sinteticos(1, 4), 'CLP')  # recursos del proceso
+
+    comparar("Universo pequeño", crear_datos_sinteticos(4, 5), repeticiones, hilos)
+    comparar("Universo grande", crear_datos_sinteticos(6, filas_grande), repeticiones, hilos)
@@ -0,0 +1,243 @@
+"""
+Suite de benchmarks de los caminos críticos sobre paneles sintéticos
+
+Para cada escala genera un panel con datos_sinteticos (semilla fija) y, en un
+proceso aparte con esa carpeta como directorio de trabajo (Pagina carga ./data
+al importarse), mide:
+    generar_precalculos_completos, importación de Pagina,
+    obtener_*_precalculad*, calcular_rentabilidades* en tiempo real,
+    calcular_retornos_acumulados_con_limite, crear_grafico_retornos y
+    construir_figura_en_presupuesto (+ bytes JSON),
+    preparación y generación de informe y anexo (PDF y Excel, + bytes)
+
+El resultado es un JSON que comparar.py contrasta con la línea base
+(benchmarks/linea_base.json).
+
+Uso:
+    python benchmarks/suite.py [--escalas pequeña mediana] [--repeticiones 5] [--salida resultados.json]
+    python benchmarks/comparar.py benchmarks/linea_base.json resultados.json
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIR_BENCHMARKS, '..'))
+
+# Escalas de la suite: parámetros de generar_panel. La fecha final queda fija
+# para que el panel (y por lo tanto la línea base) no cambie con el día en que
+# se corre; se guarda en 'parametros' junto con la semilla.
+FECHA_FIN_SUITE = '2025-12-31'
+ESCALAS_SUITE = {
+    'pequeña': {'n_fondos': 50, 'años': 10, 'fecha_fin': FECHA_FIN_SUITE},
+    'mediana': {'n_fondos': 300, 'años': 20, 'fecha_fin': FECHA_FIN_SUITE},
+    'grande': {'n_fondos': 1000, 'años': 30, 'fecha_fin': FECHA_FIN_SUITE},
+}
+SEMILLA = 0
+
+# Series elegidas para tablas y gráfico (como una selección típica)
+SERIES_SELECCIONADAS = 10
+
+
+def medir(resultados, nombre, funcion, repeticiones, tamaño=None):
+    """
+    Ejecuta funcion() `repeticiones` veces (sin sus prints) y guarda la
+    mediana y el mínimo en segundos; `tamaño(resultado)` agrega 'bytes'
+    """
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        with redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+
+    metrica = {'segundos': statistics.median(tiempos), 'min_segundos': min(tiempos)}
+    if tamaño is not None:
+        metrica['bytes'] = tamaño(resultado)
+    resultados[nombre] = metrica
+    print(f"   {nombre:<50} {metrica['segundos'] * 1000:10.1f} ms"
+          + (f"  {metrica['bytes'] / 1024:8.0f} KB" if 'bytes' in metrica else ''))
+    return resultado
+
+
+def medir_escala(repeticiones):
+    """
+    Mide todos los caminos en el directorio actual (con ./data del panel).
+    Corre en un proceso propio: Pagina se importa una sola vez por proceso.
+    """
+    import plotly
+    import precalculos_optimizado as pre
+
+    resultados = {}
+
+    # generar_precalculos_completos lee los Feather de la raíz y escribe en ./data
+    for nombre in ('series_clp.feather', 'series_usd.feather'):
+        if not os.path.exists(nombre):
+            shutil.copyfile(os.path.join('data', nombre), nombre)
+    medir(resultados, 'generar_precalculos_completos', pre.generar_precalculos_completos, 1)
+
+    # La paridad la verifica benchmarks/paridad.py: aquí todas las tablas se
+    # habilitan para medir el camino con pre-cálculos (precalculos_validados)
+    with open(pre.RUTA_PARIDAD, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp_precalculos': pre.cargar_precalculos()['timestamp'],
+                   'tablas': dict.fromkeys(('acumuladas', 'anualizadas', 'por_año', 'informe', 'anexo'), True)}, f)
+
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        import Pagina
+    resultados['importar_pagina'] = {'segundos': time.perf_counter() - inicio}
+
+    import informe_module
+    import anexo_mensual_module
+
+    moneda = 'CLP'
+    pesos_df, dolares_df = Pagina.pesos_df, Pagina.dolares_df
+    registro = Pagina.registro_fondos
+    codigos = registro['por_moneda'][moneda]['codigos'][:SERIES_SELECCIONADAS]
+    nombres = registro['por_moneda'][moneda]['nombres'][:SERIES_SELECCIONADAS]
+
+    # Pre-cálculos
+    for funcion in (pre.obtener_rentabilidades_acumuladas_precalculadas,
+                    pre.obtener_rentabilidades_anualizadas_precalculadas,
+                    pre.obtener_rentabilidades_por_año_precalculadas,
+                    pre.obtener_retornos_mensuales_precalculados,
+                    pre.obtener_informe_pdf_completo_precalculado):
+        medir(resultados, funcion.__name__, lambda: funcion(moneda, codigos, nombres), repeticiones)
+    medir(resultados, 'obtener_valor_cuota_actual_precalculado',
+          lambda: [pre.obtener_valor_cuota_actual_precalculado(moneda, codigo) for codigo in codigos],
+          repeticiones)
+
+    # Cálculo en tiempo real (sin pre-cálculos vigentes)
+    validados_original = Pagina.precalculos_validados
+    Pagina.precalculos_validados = lambda tabla: False
+    try:
+        for funcion in (Pagina.calcular_rentabilidades,
+                        Pagina.calcular_rentabilidades_anualizadas,
+                        Pagina.calcular_rentabilidades_por_año):
+            medir(resultados, f"{funcion.__name__}_tiempo_real",
+                  lambda: funcion(pesos_df, codigos, nombres), repeticiones)
+    finally:
+        Pagina.precalculos_validados = validados_original
+
+    # Gráfico de retornos acumulados (período máximo)
+    df_retornos = medir(
+        resultados, 'calcular_retornos_acumulados_con_limite',
+        lambda: Pagina.calcular_retornos_acumulados_con_limite(
+            pesos_df, codigos, pesos_df['Dates'].min(), pesos_df['Dates'].max()
+        ),
+        repeticiones
+    )
+    medir(resultados, 'crear_grafico_retornos',
+          lambda: Pagina.crear_grafico_retornos(df_retornos, codigos, nombres, moneda),
+          repeticiones,
+          tamaño=lambda figura: len(json.dumps(figura, cls=plotly.utils.PlotlyJSONEncoder)))
+    # La figura que se envía: dentro de PRESUPUESTO_FIGURA_KB
+    medir(resultados, 'construir_figura_en_presupuesto',
+          lambda: Pagina.construir_figura_en_presupuesto(df_retornos, codigos, nombres, moneda)[0],
+          repeticiones,
+          tamaño=lambda figura: len(json.dumps(figura, cls=plotly.utils.PlotlyJSONEncoder)))
+
+    # Reportes
+    datos_informe = medir(
+        resultados, 'preparar_datos_descarga_informe',
+        lambda: informe_module.preparar_datos_descarga_informe(moneda, pesos_df, dolares_df, registro),
+        repeticiones
+    )
+    medir(resultados, 'generar_excel_informe',
+          lambda: informe_module.generar_excel_informe(datos_informe, moneda), repeticiones, tamaño=len)
+    if informe_module.PDF_AVAILABLE:
+        medir(resultados, 'generar_pdf_informe',
+              lambda: informe_module.generar_pdf_informe(datos_informe, moneda), repeticiones, tamaño=len)
+
+    datos_anexo = medir(
+        resultados, 'preparar_datos_descarga_anexo',
+        lambda: anexo_mensual_module.preparar_datos_descarga_anexo(moneda, pesos_df, dolares_df, registro),
+        repeticiones
+    )
+    medir(resultados, 'generar_excel_anexo_mensual',
+          lambda: anexo_mensual_module.generar_excel_anexo_mensual(datos_anexo, moneda), repeticiones, tamaño=len)
+    if informe_module.PDF_AVAILABLE:
+        medir(resultados, 'generar_pdf_anexo_mensual',
+              lambda: anexo_mensual_module.generar_pdf_anexo_mensual(datos_anexo, moneda), repeticiones, tamaño=len)
+
+    return resultados
+
+
+def ejecutar_escala(escala, repeticiones, directorio_base):
+    """
+    Genera el panel de la escala y mide en un subproceso con ese directorio
+    """
+    from datos_sinteticos import generar_panel, escribir_panel
+
+    directorio = os.path.join(directorio_base, escala)
+    shutil.rmtree(directorio, ignore_errors=True)
+    parametros = dict(ESCALAS_SUITE[escala], semilla=SEMILLA)
+
+    pesos_df, dolares_df = generar_panel(**parametros)
+    escribir_panel(pesos_df, dolares_df, directorio)
+    print(f"\n📊 Escala {escala}: {parametros['n_fondos']} fondos, {pesos_df.shape[1] - 1} series, "
+          f"{len(pesos_df)} fechas")
+    del pesos_df, dolares_df
+
+    ruta_resultado = os.path.join(directorio, 'resultado.json')
+    entorno = dict(os.environ, METRICAS_CALLBACKS='0', PERFILADO='0')
+    subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--medir-aqui', ruta_resultado,
+         '--repeticiones', str(repeticiones)],
+        cwd=directorio, env=entorno, check=True
+    )
+    with open(ruta_resultado, 'r', encoding='utf-8') as f:
+        metricas = json.load(f)
+
+    return {'parametros': parametros, 'metricas': metricas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de caminos críticos")
+    parser.add_argument('--escalas', nargs='+', choices=list(ESCALAS_SUITE), default=['pequeña', 'mediana'])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--salida', default='resultados_benchmarks.json')
+    parser.add_argument('--directorio', help="carpeta para los paneles (por defecto, temporal)")
+    parser.add_argument('--medir-aqui', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_aqui:
+        resultados = medir_escala(args.repeticiones)
+        with open(args.medir_aqui, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        return
+
+    directorio_base = args.directorio or tempfile.mkdtemp(prefix='benchmarks_')
+    resultado = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'repeticiones': args.repeticiones,
+        'escalas': {},
+    }
+    try:
+        for escala in args.escalas:
+            resultado['escalas'][escala] = ejecutar_escala(escala, args.repeticiones, directorio_base)
+    finally:
+        if not args.directorio:
+            shutil.rmtree(directorio_base, ignore_errors=True)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\n📁 Resultados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Búsqueda de fondos para los dropdowns de selección
+Las tarjetas de selección ya no llevan la lista completa de fondos: el
+dropdown pide al servidor las opciones que coinciden con lo que se escribe
+(search_value) y recibe como máximo LIMITE_OPCIONES_FONDOS.
+
+Se tokeniza igual que el filtro del Dropdown en el navegador (js-search:
+minúsculas y cortes en todo lo que no sea letra ASCII, número, '-' o '\''),
+así ninguna opción enviada queda oculta en el cliente.
+"""
+
+import os
+import re
+
+# Máximo de opciones por respuesta (y para la búsqueda vacía)
+LIMITE_OPCIONES_FONDOS = int(os.environ.get('LIMITE_OPCIONES_FONDOS', 50))
+
+# Largo máximo de los prefijos indexados; las búsquedas más largas filtran
+# los candidatos del prefijo
+LARGO_MAXIMO_PREFIJO = 8
+
+_SEPARADOR_TOKENS = re.compile(r"[^a-zа-яё0-9\-']+", re.IGNORECASE)
+
+
+def tokenizar(texto):
+    """
+    Tokens en minúsculas de un nombre o una búsqueda
+    """
+    return [token for token in _SEPARADOR_TOKENS.split((texto or '').lower()) if token]
+
+
+def crear_indice_fondos(fondos):
+    """
+    Índice de búsqueda sobre los nombres de fondos (una vez por carga de datos).
+
+    Returns:
+        dict con:
+            'fondos': nombres en el orden original (el de los resultados)
+            'tokens': token -> posiciones de los fondos que lo contienen
+            'prefijos': prefijo (hasta LARGO_MAXIMO_PREFIJO) -> posiciones
+    """
+    tokens = {}
+    for posicion, fondo in enumerate(fondos):
+        for token in set(tokenizar(fondo)):
+            tokens.setdefault(token, set()).add(posicion)
+
+    prefijos = {}
+    for token, posiciones in tokens.items():
+        for largo in range(1, min(len(token), LARGO_MAXIMO_PREFIJO) + 1):
+            prefijos.setdefault(token[:largo], set()).update(posiciones)
+
+    print(f"🔎 Índice de búsqueda: {len(fondos)} fondos, {len(tokens)} tokens, {len(prefijos)} prefijos")
+
+    return {
+        'fondos': list(fondos),
+        'tokens': tokens,
+        'prefijos': prefijos,
+    }
+
+
+def _posiciones_por_prefijo(indice, token_busqueda):
+    posiciones = indice['prefijos'].get(token_busqueda[:LARGO_MAXIMO_PREFIJO], set())
+    if len(token_busqueda) <= LARGO_MAXIMO_PREFIJO:
+        return posiciones
+
+    # Búsqueda más larga que los prefijos indexados: confirmar con los tokens
+    tokens_fondos = indice['tokens']
+    return {
+        posicion for token, grupo in tokens_fondos.items()
+        if token.startswith(token_busqueda) for posicion in grupo
+    } & posiciones
+
+
+def _posiciones_por_subcadena(indice, token_busqueda):
+    return {
+        posicion for token, grupo in indice['tokens'].items()
+        if token_busqueda in token for posicion in grupo
+    }
+
+
+def buscar_fondos(indice, texto, limite=LIMITE_OPCIONES_FONDOS):
+    """
+    Fondos cuyo nombre contiene todos los tokens de `texto`: primero los que
+    los contienen como inicio de palabra (índice de prefijos) y, si faltan
+    para completar `limite`, los que los contienen en medio de una palabra
+    (como el filtro del navegador). Sin texto devuelve los primeros fondos.
+    """
+    fondos = indice['fondos']
+    tokens_busqueda = tokenizar(texto)
+    if not tokens_busqueda:
+        return fondos[:limite]
+
+    por_prefijo = None
+    for token_busqueda in tokens_busqueda:
+        posiciones = _posiciones_por_prefijo(indice, token_busqueda)
+        por_prefijo = posiciones if por_prefijo is None else por_prefijo & posiciones
+        if not por_prefijo:
+            break
+
+    resultados = sorted(por_prefijo)[:limite]
+    if len(resultados) < limite:
+        por_subcadena = None
+        for token_busqueda in tokens_busqueda:
+            posiciones = _posiciones_por_subcadena(indice, token_busqueda)
+            por_subcadena = posiciones if por_subcadena is None else por_subcadena & posiciones
+            if not por_subcadena:
+                break
+        resultados += sorted(por_subcadena - por_prefijo)[:limite - len(resultados)]
+
+    return [fondos[posicion] for posicion in resultados]
+
+
+def opciones_fondo(fondo):
+    """
+    Opciones iniciales de una tarjeta: solo el fondo elegido (para que el
+    dropdown muestre su etiqueta) o ninguna
+    """
+    return [{'label': fondo, 'value': fondo}] if fondo else []
+
+
+def opciones_busqueda(indice, texto, valor_actual=None, limite=LIMITE_OPCIONES_FONDOS):
+    """
+    Opciones del dropdown para lo escrito en él; el valor elegido se mantiene
+    siempre entre las opciones
+    """
+    encontrados = buscar_fondos(indice, texto, limite)
+    opciones = [{'label': fondo, 'value': fondo} for fondo in encontrados]
+    if valor_actual and valor_actual not in encontrados:
+        opciones = opciones_fondo(valor_actual) + opciones
+    return opciones
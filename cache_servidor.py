@@ -0,0 +1,275 @@
+"""
+Caché en memoria del servidor para contenido ya calculado o renderizado
+Reemplaza los dcc.Store de sesión que obligaban al navegador a guardar y
+reenviar árboles de componentes completos en cada request
+
+También coalesce cómputos concurrentes idénticos (single-flight): si varios
+usuarios piden lo mismo a la vez, se calcula una vez y todos comparten el resultado
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from metricas_callbacks import registrar_evento
+
+RUTA_PRECALCULOS = './data/precalculos_optimizado.pkl'
+
+# Máximo de entradas por caché (LRU). Cada entrada de reportes es el árbol de
+# componentes de un informe/anexo para una moneda, versión de datos y día;
+# cada entrada de figuras_retornos, el gráfico de una selección y ventana;
+# cada entrada de estados_grafico, las trazas que tiene dibujadas un navegador.
+LIMITES_CACHE = {
+    'reportes': int(os.environ.get('MAX_REPORTES_CACHE', 16)),
+    'figuras_retornos': int(os.environ.get('MAX_FIGURAS_CACHE', 32)),
+    'estados_grafico': int(os.environ.get('MAX_ESTADOS_GRAFICO', 512)),
+}
+LIMITE_POR_DEFECTO = 32
+
+# Coalescencia entre procesos del mismo host (workers de gunicorn): si se define
+# un directorio, el primer proceso toma un lock de archivo, calcula y deja el
+# resultado ahí; los demás esperan el lock y lo leen. Los resultados (.pkl) y
+# temporales de más de SEGUNDOS_RESULTADO_COMPARTIDO se eliminan; los .lock
+# (vacíos) nunca: borrar uno que otro proceso ya abrió y espera dejaría dos
+# locks distintos para la misma clave.
+DIR_COMPUTO_COMPARTIDO = os.environ.get('DIR_COMPUTO_COMPARTIDO')
+SEGUNDOS_RESULTADO_COMPARTIDO = int(os.environ.get('SEGUNDOS_RESULTADO_COMPARTIDO', 120))
+
+try:
+    import fcntl
+    LOCK_ARCHIVO_DISPONIBLE = True
+except ImportError:
+    LOCK_ARCHIVO_DISPONIBLE = False
+
+_caches = {}
+_estadisticas = {}
+_lock = threading.Lock()
+
+_en_curso = {}                  # (nombre, clave) -> cómputo en curso
+_estadisticas_coalescencia = {}
+_ultima_limpieza_compartida = {'instante': 0.0}
+
+
+def obtener_cache(nombre, clave):
+    """
+    Devuelve el valor guardado bajo `clave` en la caché `nombre`, o None.
+    Un acierto mueve la entrada al final (la más reciente).
+    """
+    with _lock:
+        cache = _caches.get(nombre)
+        estadisticas = _estadisticas.setdefault(nombre, {'aciertos': 0, 'fallos': 0})
+
+        if cache is None or clave not in cache:
+            estadisticas['fallos'] += 1
+            registrar_evento(f"cache:{nombre}:fallo")
+            return None
+
+        cache.move_to_end(clave)
+        estadisticas['aciertos'] += 1
+        registrar_evento(f"cache:{nombre}:acierto")
+        return cache[clave]
+
+
+def guardar_cache(nombre, clave, valor):
+    """
+    Guarda `valor` en la caché `nombre` y expulsa las entradas más antiguas
+    si se supera el límite configurado
+    """
+    limite = LIMITES_CACHE.get(nombre, LIMITE_POR_DEFECTO)
+
+    with _lock:
+        cache = _caches.setdefault(nombre, OrderedDict())
+        cache[clave] = valor
+        cache.move_to_end(clave)
+
+        while len(cache) > limite:
+            cache.popitem(last=False)
+
+    return valor
+
+
+def descartar_cache(nombre, clave):
+    """
+    Elimina `clave` de la caché `nombre` si está
+    """
+    with _lock:
+        cache = _caches.get(nombre)
+        if cache is not None:
+            cache.pop(clave, None)
+
+
+def estadisticas_cache():
+    """
+    Resumen por caché: entradas, aciertos y fallos
+    """
+    with _lock:
+        return {
+            nombre: {
+                'entradas': len(_caches.get(nombre, {})),
+                **_estadisticas.get(nombre, {'aciertos': 0, 'fallos': 0})
+            }
+            for nombre in set(_caches) | set(_estadisticas)
+        }
+
+
+def version_datos(pesos_df, dolares_df):
+    """
+    Identificador corto de la versión de los datos: forma y última fecha de
+    cada DataFrame más la fecha de modificación del archivo de pre-cálculos
+    """
+    partes = []
+
+    for df in (pesos_df, dolares_df):
+        if df is not None and len(df) > 0 and 'Dates' in df.columns:
+            partes.append(f"{df.shape[0]}x{df.shape[1]}@{df['Dates'].iloc[-1]}")
+        else:
+            partes.append('sin-datos')
+
+    if os.path.exists(RUTA_PRECALCULOS):
+        partes.append(str(int(os.path.getmtime(RUTA_PRECALCULOS))))
+
+    return hashlib.sha1('|'.join(partes).encode()).hexdigest()[:12]
+
+
+def clave_reporte(reporte, moneda, version):
+    """
+    Clave de un reporte renderizado. Incluye el día porque el encabezado y los
+    períodos (MTD, YTD, años) dependen de la fecha actual.
+    """
+    hoy = datetime.now().strftime('%Y-%m-%d')
+    return f"{reporte}|{moneda}|{version}|{hoy}"
+
+
+# =============================================================================
+# COALESCENCIA DE CÓMPUTOS (single-flight)
+# =============================================================================
+
+def calcular_una_vez(nombre, clave, funcion):
+    """
+    Ejecuta funcion() una sola vez para llamadas concurrentes con la misma
+    (nombre, clave). Las llamadas que llegan mientras el cálculo está en curso
+    esperan y reciben el mismo resultado (o la misma excepción).
+
+    No guarda nada al terminar: para reutilizar el resultado después usar
+    guardar_cache.
+    """
+    with _lock:
+        estadisticas = _estadisticas_coalescencia.setdefault(
+            nombre, {'ejecutadas': 0, 'coalescidas': 0, 'coalescidas_host': 0}
+        )
+        computo = _en_curso.get((nombre, clave))
+        lider = computo is None
+
+        if lider:
+            computo = {'evento': threading.Event(), 'resultado': None, 'error': None}
+            _en_curso[(nombre, clave)] = computo
+            estadisticas['ejecutadas'] += 1
+        else:
+            estadisticas['coalescidas'] += 1
+
+    if not lider:
+        print(f"🤝 Esperando cómputo en curso: {nombre} {clave}")
+        registrar_evento(f"coalescido:{nombre}")
+        computo['evento'].wait()
+        if computo['error'] is not None:
+            raise computo['error']
+        return computo['resultado']
+
+    try:
+        if DIR_COMPUTO_COMPARTIDO and LOCK_ARCHIVO_DISPONIBLE:
+            computo['resultado'] = _calcular_entre_procesos(nombre, clave, funcion)
+        else:
+            computo['resultado'] = funcion()
+    except Exception as e:
+        computo['error'] = e
+        raise
+    finally:
+        with _lock:
+            _en_curso.pop((nombre, clave), None)
+        computo['evento'].set()
+
+    return computo['resultado']
+
+
+def _limpiar_computos_vencidos():
+    """
+    Elimina de DIR_COMPUTO_COMPARTIDO los resultados y temporales vencidos
+    (los archivos .lock se conservan). Corre a lo más una vez por
+    SEGUNDOS_RESULTADO_COMPARTIDO en cada proceso.
+    """
+    ahora = time.time()
+    with _lock:
+        if ahora - _ultima_limpieza_compartida['instante'] < SEGUNDOS_RESULTADO_COMPARTIDO:
+            return
+        _ultima_limpieza_compartida['instante'] = ahora
+
+    eliminados = 0
+    for nombre_archivo in os.listdir(DIR_COMPUTO_COMPARTIDO):
+        if not nombre_archivo.endswith(('.pkl', '.tmp')):
+            continue
+        ruta = os.path.join(DIR_COMPUTO_COMPARTIDO, nombre_archivo)
+        try:
+            if ahora - os.path.getmtime(ruta) < SEGUNDOS_RESULTADO_COMPARTIDO:
+                continue
+            os.remove(ruta)
+            eliminados += 1
+        except OSError:
+            continue  # otro proceso lo eliminó o lo reemplazó
+
+    if eliminados:
+        print(f"🗑️ {eliminados} archivos de cómputos compartidos vencidos eliminados")
+
+
+def _calcular_entre_procesos(nombre, clave, funcion):
+    """
+    Variante de calcular_una_vez entre procesos: lock de archivo por clave y
+    resultado serializado en DIR_COMPUTO_COMPARTIDO
+    """
+    os.makedirs(DIR_COMPUTO_COMPARTIDO, exist_ok=True)
+    _limpiar_computos_vencidos()
+    base = os.path.join(
+        DIR_COMPUTO_COMPARTIDO,
+        f"{nombre}-{hashlib.sha1(repr(clave).encode()).hexdigest()[:16]}"
+    )
+    ruta_resultado = base + '.pkl'
+
+    with open(base + '.lock', 'w') as archivo_lock:
+        fcntl.flock(archivo_lock, fcntl.LOCK_EX)
+        try:
+            if (os.path.exists(ruta_resultado) and
+                    time.time() - os.path.getmtime(ruta_resultado) < SEGUNDOS_RESULTADO_COMPARTIDO):
+                try:
+                    with open(ruta_resultado, 'rb') as f:
+                        resultado = pickle.load(f)
+                    with _lock:
+                        _estadisticas_coalescencia[nombre]['coalescidas_host'] += 1
+                    return resultado
+                except Exception:
+                    pass  # archivo corrupto o incompatible: recalcular
+
+            resultado = funcion()
+
+            try:
+                ruta_temporal = f"{base}.{os.getpid()}.tmp"
+                with open(ruta_temporal, 'wb') as f:
+                    pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(ruta_temporal, ruta_resultado)
+            except Exception as e:
+                print(f"⚠️ No se pudo compartir el resultado de {nombre}: {e}")
+
+            return resultado
+        finally:
+            fcntl.flock(archivo_lock, fcntl.LOCK_UN)
+
+
+def estadisticas_coalescencia():
+    """
+    Por tipo de cómputo: ejecutadas, coalescidas en el proceso y
+    coalescidas entre procesos del host
+    """
+    with _lock:
+        return {nombre: dict(valores) for nombre, valores in _estadisticas_coalescencia.items()}
@@ -0,0 +1,129 @@
+"""
+Escritura rápida de libros Excel para las descargas de informe y anexo
+Los anchos de columna se calculan sobre el DataFrame (vectorizado) antes de
+escribir, y el libro se genera en modo write-only (streaming) de openpyxl
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+# Límite de ancho de columna (caracteres), igual que el ajuste anterior celda a celda
+ANCHO_MAXIMO_COLUMNA = 50
+
+# Formato opcional para columnas con decimales. Las tablas de informe y anexo ya
+# vienen redondeadas a 2 decimales, así que por defecto no se aplica: en
+# openpyxl un formato por celda cuesta más que todo el ahorro del modo write-only
+FORMATO_DECIMALES = '0.00'
+
+
+def anchos_columnas(df):
+    """
+    Ancho de cada columna: largo del texto más largo (encabezado incluido) + 2,
+    con tope ANCHO_MAXIMO_COLUMNA. Las celdas vacías cuentan como 'None',
+    igual que el recorrido anterior con len(str(cell.value)).
+    """
+    anchos = []
+    for columna in df.columns:
+        serie = df[columna]
+        largos = serie.astype(str).str.len().to_numpy()
+        if serie.hasnans:
+            largos = np.where(serie.isna().to_numpy(), len('None'), largos)
+        largo_maximo = max(len(str(columna)), int(largos.max()) if len(largos) else 0)
+        anchos.append(min(largo_maximo + 2, ANCHO_MAXIMO_COLUMNA))
+    return anchos
+
+
+def _estilos_libro():
+    """
+    Estilos del encabezado (los mismos objetos para todas las hojas)
+    """
+    from openpyxl.styles import Font, Border, Side, Alignment
+
+    borde = Side(style='thin')
+    return {
+        # Mismo formato de encabezado que DataFrame.to_excel
+        'font_encabezado': Font(bold=True),
+        'borde_encabezado': Border(left=borde, right=borde, top=borde, bottom=borde),
+        'alineacion_encabezado': Alignment(horizontal='center', vertical='top'),
+    }
+
+
+def _escribir_hoja(libro, nombre_hoja, df, estilos, formato_decimales=None):
+    """
+    Agrega una hoja write-only con encabezado, anchos y (opcional) formato
+    numérico en las columnas con decimales
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    hoja = libro.create_sheet(title=nombre_hoja)
+
+    # En modo write-only los anchos deben definirse antes de escribir filas
+    for indice, ancho in enumerate(anchos_columnas(df), start=1):
+        hoja.column_dimensions[get_column_letter(indice)].width = ancho
+
+    encabezado = []
+    for columna in df.columns:
+        celda = WriteOnlyCell(hoja, value=str(columna))
+        celda.font = estilos['font_encabezado']
+        celda.border = estilos['borde_encabezado']
+        celda.alignment = estilos['alineacion_encabezado']
+        encabezado.append(celda)
+    hoja.append(encabezado)
+
+    # Columnas con decimales: una celda con formato por columna que se reutiliza
+    # en cada fila (write-only serializa la fila al agregarla), en vez de crear
+    # y formatear una celda nueva por valor
+    celdas_decimales = []
+    for columna in df.columns:
+        if formato_decimales and pd.api.types.is_float_dtype(df[columna]):
+            celda = WriteOnlyCell(hoja)
+            celda.number_format = formato_decimales
+            celdas_decimales.append(celda)
+        else:
+            celdas_decimales.append(None)
+
+    # NaN -> None (celda vacía) y tipos numpy -> tipos de Python
+    valores = df.astype(object).where(df.notna(), None).values.tolist()
+
+    if not any(celda is not None for celda in celdas_decimales):
+        for fila in valores:
+            hoja.append(fila)
+        return
+
+    for fila in valores:
+        for indice, celda in enumerate(celdas_decimales):
+            if celda is not None and fila[indice] is not None:
+                celda.value = fila[indice]
+                fila[indice] = celda
+        hoja.append(fila)
+
+
+def generar_libro_excel(hojas, formato_decimales=None):
+    """
+    Genera un libro Excel en memoria.
+
+    Args:
+        hojas (list): pares (nombre_hoja, DataFrame) en el orden en que se escriben
+        formato_decimales (str): formato numérico para columnas float
+            (p. ej. FORMATO_DECIMALES); None escribe los valores tal cual
+
+    Returns:
+        bytes: Contenido del archivo Excel
+    """
+    from openpyxl import Workbook
+
+    if not hojas:
+        raise ValueError("No hay datos para generar el Excel")
+
+    libro = Workbook(write_only=True)
+    estilos = _estilos_libro()
+
+    for nombre_hoja, df in hojas:
+        _escribir_hoja(libro, nombre_hoja, df, estilos, formato_decimales)
+
+    output = io.BytesIO()
+    libro.save(output)
+    return output.getvalue()
@@ -0,0 +1,65 @@
+"""
+Configuración de gunicorn para producción (render.yaml):
+    gunicorn Pagina:server -c gunicorn.conf.py
+
+preload_app: el maestro importa Pagina una vez (lectura de los Feather,
+registro de fondos, layout) y los workers nacen con fork compartiendo esa
+memoria copy-on-write, en vez de que cada uno lea y guarde su propia copia.
+Ver memoria_procesos para lo que mantiene compartidas esas páginas.
+
+Cada worker responde /metrics con sus propios acumulados, con la etiqueta
+pid en cada serie (ver metricas_callbacks). Su RSS y PSS se informan al iniciar
+y en /metrics; para ver todos:
+    python memoria_procesos.py <pid del maestro>
+
+Los trabajos de descarga (trabajos_reportes) guardan estado y archivo en
+disco, así que la consulta de estado puede llegar a cualquier worker; por eso
+el valor por defecto es de 2 workers (un callback pesado en uno no detiene los
+del otro). Con la memoria compartida, cada worker extra suma su PSS y no una
+copia completa de los datos.
+
+Los artefactos de reportes del día (artefactos_reportes.iniciar_regeneracion)
+los regenera un solo worker, el que tiene el lock de regenerador, y el
+renderizado corre en el pool de descargas, fuera de los hilos web; si ese
+worker muere, el lock pasa a otro en la siguiente revisión.
+
+Variables de entorno:
+    PORT                puerto (8050)
+    WEB_CONCURRENCY     workers (2)
+    GUNICORN_THREADS    hilos por worker (4)
+    GUNICORN_TIMEOUT    segundos antes de reiniciar un worker colgado (120)
+"""
+
+import os
+
+from memoria_procesos import congelar_objetos_compartidos, memoria_proceso, texto_memoria
+from trabajos_reportes import iniciar_pool_reportes
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8050)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+preload_app = True
+
+
+def when_ready(server):
+    server.log.info(f"🧠 Maestro {os.getpid()} con la app cargada: {texto_memoria(memoria_proceso())}")
+
+
+def pre_fork(server, worker):
+    # En el maestro, justo antes de cada fork
+    congelar_objetos_compartidos()
+
+
+def post_worker_init(worker):
+    # Todavía sin los hilos de gthread: el forkserver del pool de descargas
+    # arranca desde un proceso de un solo hilo
+    iniciar_pool_reportes()
+
+    from Pagina import pesos_df, dolares_df, registro_fondos
+    from artefactos_reportes import iniciar_regeneracion
+    iniciar_regeneracion(pesos_df, dolares_df, registro_fondos)
+
+    worker.log.info(f"🧠 Worker {worker.pid} listo: {texto_memoria(memoria_proceso())}")
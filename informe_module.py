@@ -6,46 +6,48 @@ Soporta descarga en Excel y PDF
 
 import pandas as pd
 import numpy as np
-from dash import html, dcc, dash_table, callback, Input, Output, State
+from dash import html, dcc, dash_table, callback, clientside_callback, ClientsideFunction, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 import io
-import base64
+import time
 from datetime import datetime
 import logging
+import importlib.util
 import os
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-# Importaciones para PDF
-try:
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch, mm  # AGREGADO: importar mm aquí
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    # AGREGADO: Definir mm como fallback si ReportLab no está disponible
-    mm = 1  # valor por defecto
+# ReportLab se importa dentro de las funciones que generan PDF: cargarlo aquí
+# suma ~120 ms al arranque de cada worker y la primera página no lo usa
+PDF_AVAILABLE = importlib.util.find_spec('reportlab') is not None
+if not PDF_AVAILABLE:
     logging.warning("ReportLab no está instalado. La funcionalidad PDF no estará disponible.")
 
-from precalculos_optimizado import obtener_informe_pdf_completo_precalculado
+# Milímetro en puntos, igual que reportlab.lib.units.mm (se usa en valores por defecto)
+mm = 72.0 / 2.54 * 0.1
+
+from recursos_pdf import obtener_recursos_pdf, dibujar_barra_superior
+from exportar_excel import generar_libro_excel
+from cache_servidor import obtener_cache, guardar_cache, version_datos, clave_reporte, calcular_una_vez
+from metricas_callbacks import registrar_evento
+from trabajos_reportes import enviar_trabajo, buscar_trabajo, consultar_trabajo
+from perfilado import debe_perfilar, ejecutar_perfilado
+from artefactos_reportes import obtener_artefacto, version_artefactos
+from registro_fondos import crear_registro_fondos, ORDEN_CATEGORIAS
+from precalculos_optimizado import obtener_informe_pdf_completo_precalculado, precalculos_validados
 
 
 # Configuración del módulo
 CONFIG = {
     'COLUMNAS_INFORME': ['Fondo', 'Serie', 'Valor Cuota', 'TAC', 'Diaria', '1 Mes', '3 Meses', '12 Meses', 'MTD', 'YTD', 'Año 2024', 'Año 2023', '3 Años*', '5 Años**'],
-    'ORDEN_CATEGORIAS': [
-        'Renta Fija Nacional',
-        'Renta Fija Internacional', 
-        'Multifondos',
-        'Equity (Acciones)',
-        'Estrategias Alternativas',
-        'Otros'
-    ]
+    'ORDEN_CATEGORIAS': ORDEN_CATEGORIAS
 }
 
+# Hilos para construir en paralelo las tablas de categoría del PDF. Por defecto
+# secuencial: con el GIL la construcción (Python puro) no gana con hilos; sirve
+# en intérpretes sin GIL o si ReportLab libera el GIL en el futuro
+HILOS_TABLAS_PDF = int(os.environ.get('HILOS_TABLAS_PDF', 1))
+
 def loading_content():
     """
     Función para mostrar contenido de carga
@@ -250,11 +252,13 @@ def calcular_rentabilidad_periodo(precios, dias, precio_actual):
         return ((precio_actual / precio_inicial) - 1) * 100
     return np.nan
 
-def calcular_rentabilidades_completas_pdf(df, codigos_seleccionados, nombres_mostrar):
+def calcular_rentabilidades_completas_pdf(df, codigos_seleccionados, nombres_mostrar, indice_codigos=False):
     """
     Función completa para calcular todas las rentabilidades para el PDF mejorado
+    (indice_codigos como en obtener_informe_pdf_completo_precalculado)
     """
     resultados = []
+    codigos_resultado = []
     fecha_actual = df['Dates'].max()
     año_1, año_2 = obtener_años_automaticos(fecha_actual)
     
@@ -302,57 +306,28 @@ def calcular_rentabilidades_completas_pdf(df, codigos_seleccionados, nombres_mos
                     '3 Años*': rent_3a_anual,
                     '5 Años**': rent_5a_anual
                 })
+                codigos_resultado.append(codigo)
     
-    return pd.DataFrame(resultados).round(2)
+    return pd.DataFrame(resultados, index=codigos_resultado if indice_codigos else None).round(2)
 
-def categorizar_fondos(fondos_unicos):
+def calcular_informe_completo(df, moneda, codigos_seleccionados, nombres_mostrar, indice_codigos=False):
     """
-    Categoriza los fondos según su tipo
-    
-    Args:
-        fondos_unicos (list): Lista de nombres únicos de fondos
-        
-    Returns:
-        dict: Diccionario con categorías y sus fondos correspondientes
+    Tabla del informe desde los pre-cálculos si pasaron la verificación de
+    paridad; si no, en tiempo real con calcular_rentabilidades_completas_pdf
     """
-    categorias = {
-        'Renta Fija Nacional': [],
-        'Renta Fija Internacional': [],
-        'Multifondos': [],
-        'Equity (Acciones)': [],
-        'Estrategias Alternativas': [],
-        'Otros': []
-    }
-    
-    for fondo in fondos_unicos:
-        fondo_lower = fondo.lower()
-        
-        # Renta Fija Nacional
-        if any(palabra in fondo_lower for palabra in ['renta', 'bonos', 'deuda']) and \
-           any(palabra in fondo_lower for palabra in ['chile', 'chileno', 'nacional']):
-            categorias['Renta Fija Nacional'].append(fondo)
-            
-        # Renta Fija Internacional
-        elif any(palabra in fondo_lower for palabra in ['renta', 'bonos', 'deuda', 'fixed income']):
-            categorias['Renta Fija Internacional'].append(fondo)
-            
-        # Multifondos
-        elif any(palabra in fondo_lower for palabra in ['multiactivo', 'cartera', 'patrimonial']):
-            categorias['Multifondos'].append(fondo)
-            
-        # Equity
-        elif any(palabra in fondo_lower for palabra in ['equity', 'acciones', 'accionario']):
-            categorias['Equity (Acciones)'].append(fondo)
-            
-        # Estrategias Alternativas
-        elif any(palabra in fondo_lower for palabra in ['dynamic', 'estrategia', 'alternativa', 'hedge']):
-            categorias['Estrategias Alternativas'].append(fondo)
-            
-        # Otros
-        else:
-            categorias['Otros'].append(fondo)
-    
-    return categorias
+    if precalculos_validados('informe'):
+        try:
+            resultado = obtener_informe_pdf_completo_precalculado(
+                moneda, codigos_seleccionados, nombres_mostrar, indice_codigos=indice_codigos
+            )
+            if resultado is not None and not resultado.empty:
+                registrar_evento('precalculo:informe')
+                return resultado
+        except Exception as e:
+            print(f"⚠️ Error en pre-cálculos: {e}, usando cálculo en tiempo real...")
+
+    registrar_evento('tiempo_real:informe')
+    return calcular_rentabilidades_completas_pdf(df, codigos_seleccionados, nombres_mostrar, indice_codigos)
 
 def crear_tabla_categoria(categoria, fondos_categoria, df_actual, fondos_a_series, fondo_serie_a_codigo, calcular_rentabilidades_func, moneda='CLP'):
     """
@@ -380,11 +355,7 @@ def crear_tabla_categoria(categoria, fondos_categoria, df_actual, fondos_a_serie
         return html.Div()
     
     # Calcular rentabilidades usando la función pasada como parámetro
-    tabla_data = obtener_informe_pdf_completo_precalculado(
-        moneda, 
-        codigos_categoria, 
-        nombres_categoria
-    )    
+    tabla_data = calcular_informe_completo(df_actual, moneda, codigos_categoria, nombres_categoria)
     # Seleccionar columnas para el informe
     columnas_disponibles = [col for col in CONFIG['COLUMNAS_INFORME'] if col in tabla_data.columns]
     tabla_data = tabla_data[columnas_disponibles]
@@ -577,6 +548,8 @@ def crear_modal_informe():
             
             # Componente oculto para descargas
             dcc.Download(id="download-informe"),
+            dcc.Store(id="trabajo-descarga-informe"),
+            dcc.Interval(id="intervalo-descarga-informe", interval=1000, disabled=True),
             
             # Contenedor para las tablas del informe
             html.Div(id='contenido-informe-rentabilidad')
@@ -599,77 +572,36 @@ def generar_excel_informe(datos_por_categoria, moneda):
         moneda (str): Moneda seleccionada (CLP/USD)
         
     Returns:
-        str: String base64 del archivo Excel
+        bytes: Contenido del archivo Excel
     """
     try:
-        # Crear un buffer en memoria
-        output = io.BytesIO()
+        hojas = []
+        
+        # Hoja resumen
+        resumen_data = []
+        for categoria, tabla_data in datos_por_categoria.items():
+            if not tabla_data.empty:
+                resumen_data.append({
+                    'Categoría': categoria,
+                    'Número de Fondos': len(tabla_data),
+                    'Rentabilidad Promedio 1M (%)': round(tabla_data['1 Mes'].mean(), 2),
+                    'Rentabilidad Promedio 3M (%)': round(tabla_data['3 Meses'].mean(), 2),
+                    'Rentabilidad Promedio 12M (%)': round(tabla_data['12 Meses'].mean(), 2),
+                    'Rentabilidad Promedio YTD (%)': round(tabla_data['YTD'].mean(), 2)
+                })
         
-        # Crear el archivo Excel
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            
-            # Hoja resumen
-            resumen_data = []
-            for categoria, tabla_data in datos_por_categoria.items():
-                if not tabla_data.empty:
-                    resumen_data.append({
-                        'Categoría': categoria,
-                        'Número de Fondos': len(tabla_data),
-                        'Rentabilidad Promedio 1M (%)': round(tabla_data['1 Mes'].mean(), 2),
-                        'Rentabilidad Promedio 3M (%)': round(tabla_data['3 Meses'].mean(), 2),
-                        'Rentabilidad Promedio 12M (%)': round(tabla_data['12 Meses'].mean(), 2),
-                        'Rentabilidad Promedio YTD (%)': round(tabla_data['YTD'].mean(), 2)
-                    })
-            
-            if resumen_data:
-                df_resumen = pd.DataFrame(resumen_data)
-                df_resumen.to_excel(writer, sheet_name='Resumen', index=False)
-                
-                # Formatear hoja resumen
-                workbook = writer.book
-                worksheet = writer.sheets['Resumen']
-                
-                # Ajustar ancho de columnas
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # Hoja por cada categoría
-            for categoria, tabla_data in datos_por_categoria.items():
-                if not tabla_data.empty:
-                    # Limpiar nombre para usar como nombre de hoja
-                    sheet_name = categoria.replace('(', '').replace(')', '')[:31]
-                    tabla_data.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Formatear hoja
-                    worksheet = writer.sheets[sheet_name]
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        # Obtener el contenido del buffer
-        excel_data = output.getvalue()
-        
-        # Codificar en base64
-        excel_b64 = base64.b64encode(excel_data).decode()
-        
-        return excel_b64
+        if resumen_data:
+            hojas.append(('Resumen', pd.DataFrame(resumen_data)))
+        
+        # Hoja por cada categoría
+        for categoria, tabla_data in datos_por_categoria.items():
+            if not tabla_data.empty:
+                # Limpiar nombre para usar como nombre de hoja
+                sheet_name = categoria.replace('(', '').replace(')', '')[:31]
+                hojas.append((sheet_name, tabla_data))
+        
+        # Anchos de columna calculados sobre los DataFrames y escritura en streaming
+        return generar_libro_excel(hojas)
         
     except Exception as e:
         logging.error(f"Error generando Excel: {e}")
@@ -1114,6 +1046,198 @@ def calcular_ancho_columna_dinamico(datos_tabla, indice_columna, ancho_minimo=20
 #         logging.error(f"Error generando PDF mejorado: {e}")
 #         return None
 
+def construir_tabla_categoria_pdf(categoria, tabla_data, moneda, ancho_total_disponible, año_1, año_2):
+    """
+    Flowables de una categoría del informe PDF (título, tabla con estilos y
+    espaciador). No depende de las demás categorías, por lo que generar_pdf_informe
+    puede construir varias en paralelo y luego agregarlas en orden.
+    """
+    from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
+
+    recursos = obtener_recursos_pdf()
+    fuentes_disponibles = recursos['fuentes_disponibles']
+    category_style = recursos['estilos']['categoria']
+    
+    COLOR_SURA_BLACK = recursos['colores']['sura_black']
+    COLOR_SURA_WHITE = recursos['colores']['sura_white']
+    COLOR_SURA_GRAY = recursos['colores']['sura_gray']
+    COLOR_POSITIVE = recursos['colores']['positive']
+    COLOR_NEGATIVE = recursos['colores']['negative']
+    COLOR_BG_ALTERNATING = recursos['colores']['bg_alternating']
+    
+    # TÍTULO DE CATEGORÍA
+    texto_con_espacios = f"<br/>{categoria.upper()}<br/>&nbsp;<br/>"
+    category_header = Paragraph(texto_con_espacios, category_style)
+    
+    # HEADERS DE TABLA MEJORADOS - CON NUEVAS COLUMNAS
+    headers = [
+        'Fondo', 'Serie', 'Valor Cuota', 'Moneda', 'TAC', 'Diaria', 
+        '1 MES', '3 MESES', '12 M', 'MTD', 'YTD', 
+        f'Año {año_1}', f'Año {año_2}', '3 Años*', '5 Años**'
+    ]
+    
+    table_data = [headers]
+    
+    def formatear_valor(valor):
+        """Formatea valores con manejo de NaN"""
+        if pd.isna(valor):
+            return "---"
+        elif isinstance(valor, (int, float)):
+            return f"{valor:.2f}%"
+        else:
+            return str(valor)
+    
+    # DATOS DE LA TABLA CON SEPARADORES
+    # (filas como diccionarios: iterrows crea una Series por fila)
+    fondos_agrupados = {}
+    for row in tabla_data.to_dict('records'):
+        nombre_fondo = row['Fondo'].replace('FONDO MUTUO SURA ', '').replace('SURA ', '')
+        if nombre_fondo not in fondos_agrupados:
+            fondos_agrupados[nombre_fondo] = []
+        fondos_agrupados[nombre_fondo].append(row)
+    
+    primer_fondo = True
+    for nombre_fondo, filas_fondo in fondos_agrupados.items():
+        # Agregar fila separadora antes de cada fondo (excepto el primero)
+        if not primer_fondo:
+            fila_separadora = [''] * len(headers)
+            table_data.append(fila_separadora)
+        
+        # Agregar todas las filas de este fondo
+        for row in filas_fondo:
+            table_row = [
+                nombre_fondo,                                    # Fondo
+                str(row['Serie']),                              # Serie
+                f"{row['Valor Cuota']:.2f}",                   # Valor Cuota
+                moneda,                                         # Moneda
+                f"{row['TAC']:.2f}%",                         # TAC
+                formatear_valor(row['Diaria']),               # Diaria
+                formatear_valor(row['1 Mes']),                # 1 MES
+                formatear_valor(row['3 Meses']),              # 3 MESES
+                formatear_valor(row['12 Meses']),             # 12 M
+                formatear_valor(row['MTD']),                  # MTD
+                formatear_valor(row['YTD']),                  # YTD
+                formatear_valor(row[f'Año {año_1}']),         # Año anterior
+                formatear_valor(row[f'Año {año_2}']),         # Dos años atrás
+                formatear_valor(row['3 Años*']),              # 3 Años anualizada
+                formatear_valor(row['5 Años**'])              # 5 Años anualizada
+            ]
+            table_data.append(table_row)
+        
+        primer_fondo = False
+    
+    # CALCULAR ANCHOS DE COLUMNAS PARA PÁGINA HORIZONTAL
+    
+    # Nuevos anchos optimizados para 15 columnas
+    anchos_columnas = [
+        46*mm,  # Fondo (más ancho)
+        12*mm,  # Serie
+        18*mm,  # Valor Cuota
+        14*mm,  # Moneda
+        15*mm,  # TAC
+        15*mm,  # Diaria
+        15*mm,  # 1 MES
+        15*mm,  # 3 MESES
+        15*mm,  # 12 M
+        15*mm,  # MTD
+        15*mm,  # YTD
+        18*mm,  # Año anterior
+        18*mm,  # Dos años atrás
+        18*mm,  # 3 Años*
+        18*mm   # 5 Años**
+    ]
+    
+    # Verificar que no exceda el ancho disponible
+    ancho_total_calculado = sum(anchos_columnas)
+    factor_expansion = ancho_total_disponible / ancho_total_calculado
+    anchos_columnas = [ancho * factor_expansion for ancho in anchos_columnas]
+    
+    # Crear tabla
+    table = Table(table_data, colWidths=anchos_columnas, repeatRows=1)
+    
+    # ESTILOS DE TABLA MEJORADOS
+    table_style = [
+        # HEADER - Fondo negro, texto blanco, centrado
+        ('BACKGROUND', (0, 0), (-1, 0), COLOR_SURA_BLACK),
+        ('TEXTCOLOR', (0, 0), (-1, 0), COLOR_SURA_WHITE),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 8),  # Fuente más pequeña por más columnas
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 4),
+        ('TOPPADDING', (0, 0), (-1, 0), 4),
+        
+        # DATOS - Estilo general
+        ('FONTNAME', (0, 1), (-1, -1), 'SuraSans-Regular' if fuentes_disponibles else 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 6.5),  # Fuente más pequeña
+        ('TOPPADDING', (0, 1), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 2),
+        ('LEFTPADDING', (0, 0), (-1, -1), 1),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 1),
+        
+        # BORDES
+        ('GRID', (0, 0), (-1, -1), 0.5, COLOR_SURA_GRAY),
+        ('LINEBELOW', (0, 0), (-1, 0), 1, COLOR_SURA_BLACK),
+        
+        # ALINEACIÓN POR COLUMNAS
+        ('ALIGN', (0, 1), (0, -1), 'LEFT'),     # Fondo
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),  # Resto centrado
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        
+        # PERMITIR WRAP DE TEXTO EN COLUMNA FONDO
+        ('WORDWRAP', (0, 1), (0, -1), True),
+    ]
+    
+    # APLICAR COLORES CONDICIONALES A TODAS LAS COLUMNAS DE RENTABILIDAD
+    columnas_rentabilidad = [5, 6, 7, 8, 9, 10, 11, 12, 13, 14]  # Índices de columnas de rentabilidad
+    
+    for row_idx in range(1, len(table_data)):
+        # Verificar si es una fila separadora
+        es_fila_separadora = all(cell == '' for cell in table_data[row_idx])
+        
+        if es_fila_separadora:
+            # Aplicar estilo de fila separadora gris
+            table_style.append(('BACKGROUND', (0, row_idx), (-1, row_idx), COLOR_SURA_GRAY))
+            table_style.append(('TOPPADDING', (0, row_idx), (-1, row_idx), 1))
+            table_style.append(('BOTTOMPADDING', (0, row_idx), (-1, row_idx), 1))
+        else:
+            # Aplicar colores a columnas de rentabilidad: un comando por tramo
+            # de columnas contiguas con el mismo signo (el mismo estilo por
+            # celda que un comando por celda, con muchos menos comandos)
+            signos = []
+            for col_idx in columnas_rentabilidad:
+                signo = 0
+                try:
+                    valor_str = table_data[row_idx][col_idx]
+                    if valor_str != "---":
+                        valor_numerico = float(valor_str.replace('%', ''))
+                        signo = (valor_numerico > 0) - (valor_numerico < 0)
+                except (ValueError, IndexError):
+                    pass
+                signos.append(signo)
+            
+            inicio_tramo = 0
+            for posicion in range(1, len(signos) + 1):
+                if posicion < len(signos) and signos[posicion] == signos[inicio_tramo]:
+                    continue
+                signo = signos[inicio_tramo]
+                if signo != 0:
+                    desde = (columnas_rentabilidad[inicio_tramo], row_idx)
+                    hasta = (columnas_rentabilidad[posicion - 1], row_idx)
+                    table_style.append(('TEXTCOLOR', desde, hasta, COLOR_POSITIVE if signo > 0 else COLOR_NEGATIVE))
+                    table_style.append(('FONTNAME', desde, hasta, 'SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold'))
+                inicio_tramo = posicion
+            
+            # FILAS ALTERNADAS
+            if row_idx % 2 == 0:
+                table_style.append(('BACKGROUND', (0, row_idx), (-1, row_idx), COLOR_BG_ALTERNATING))
+    
+    # Aplicar estilos
+    table.setStyle(TableStyle(table_style))
+    
+    return [category_header, table, Spacer(1, 15)]
+
+
 def generar_pdf_informe(datos_por_categoria, moneda):
     """
     Genera un archivo PDF con el informe de rentabilidad MEJORADO
@@ -1122,47 +1246,16 @@ def generar_pdf_informe(datos_por_categoria, moneda):
     if not PDF_AVAILABLE:
         return None
         
+    inicio = time.perf_counter()
+    
     try:
         from reportlab.lib.pagesizes import A4, landscape
         from reportlab.lib.units import mm
-        from reportlab.platypus import PageBreak, PageTemplate, BaseDocTemplate, Frame
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.platypus import PageBreak, PageTemplate, BaseDocTemplate, Frame, Paragraph, Spacer
         
-        # CAMBIO: Registrar las fuentes SuraSans con rutas relativas
-        try:
-            # Buscar fuentes en múltiples ubicaciones
-            font_paths = [
-                './assets/',
-                'assets/',
-                './static/',
-                'static/',
-                './'
-            ]
-            
-            fuentes_disponibles = False
-            for path in font_paths:
-                try:
-                    regular_path = os.path.join(path, 'SuraSans-Regular.ttf')
-                    semibold_path = os.path.join(path, 'SuraSans-SemiBold.ttf')
-                    bold_path = os.path.join(path, 'SuraSans-Bold.ttf')
-                    
-                    if all(os.path.exists(f) for f in [regular_path, semibold_path, bold_path]):
-                        pdfmetrics.registerFont(TTFont('SuraSans-Regular', regular_path))
-                        pdfmetrics.registerFont(TTFont('SuraSans-SemiBold', semibold_path))
-                        pdfmetrics.registerFont(TTFont('SuraSans-Bold', bold_path))
-                        fuentes_disponibles = True
-                        print(f"✅ Fuentes SuraSans cargadas desde: {path}")
-                        break
-                except Exception as e:
-                    continue
-            
-            if not fuentes_disponibles:
-                print("⚠️ No se pudieron cargar las fuentes SuraSans, usando fuentes del sistema")
-                
-        except Exception as e:
-            print(f"⚠️ Error cargando fuentes: {e}")
-            fuentes_disponibles = False
+        # Fuentes, logos, colores y estilos se resuelven una vez por proceso
+        recursos = obtener_recursos_pdf()
+        estilos = recursos['estilos']
         
         # Crear un buffer en memoria
         buffer = io.BytesIO()
@@ -1174,122 +1267,17 @@ def generar_pdf_informe(datos_por_categoria, moneda):
                               rightMargin=10*mm, leftMargin=10*mm,
                               topMargin=30*mm, bottomMargin=10*mm)
         
-        # COLORES EXACTOS DEL INFORME OFICIAL SURA
-        COLOR_SURA_BLACK = colors.HexColor('#24272A')
-        COLOR_SURA_WHITE = colors.white
-        COLOR_SURA_GRAY = colors.HexColor('#D4D8D8')
-        COLOR_SUBTITLE_GRAY = colors.HexColor('#5A646E')
-        COLOR_POSITIVE = colors.HexColor('#008000')
-        COLOR_NEGATIVE = colors.HexColor('#FF0000')
-        COLOR_NEUTRAL = colors.black
-        COLOR_BG_ALTERNATING = colors.HexColor('#F8F9FA')
-        
-        # Función para crear la barra superior con logos
-        def crear_barra_superior_header(canvas, doc):
-            canvas.saveState()
-            
-            page_width = page_size[0]
-            page_height = page_size[1]
-            
-            # Crear rectángulo negro para la barra
-            canvas.setFillColor(COLOR_SURA_BLACK)
-            canvas.rect(0, page_height - 25*mm, page_width, 25*mm, fill=1, stroke=0)
-            
-            # CAMBIO: Intentar agregar logo SURA con rutas múltiples
-            logo_loaded = False
-            logo_paths = ['./assets/', 'assets/', './static/', 'static/', './']
-            
-            for path in logo_paths:
-                try:
-                    logo_path = os.path.join(path, 'sura_logo_blanco.png')
-                    if os.path.exists(logo_path):
-                        canvas.drawImage(logo_path, 
-                                       15*mm, page_height - 22*mm, 
-                                       width=60*mm, height=12*mm, 
-                                       preserveAspectRatio=True,
-                                       mask='auto')
-                        logo_loaded = True
-                        break
-                except Exception as e:
-                    continue
-            
-            if not logo_loaded:
-                # Fallback a texto si no se encuentra la imagen
-                canvas.setFillColor(COLOR_SURA_WHITE)
-                canvas.setFont("Helvetica-Bold", 12)
-                canvas.drawString(15*mm, page_height - 15*mm, "SURA")
-            
-            # CAMBIO: Mismo tratamiento para logo INVESTMENTS
-            investments_loaded = False
-            for path in logo_paths:
-                try:
-                    investments_path = os.path.join(path, 'investments_blanco.png')
-                    if os.path.exists(investments_path):
-                        canvas.drawImage(investments_path, 
-                                       page_width - 45*mm, page_height - 18*mm, 
-                                       width=35*mm, height=6*mm,
-                                       preserveAspectRatio=True,
-                                       mask='auto')
-                        investments_loaded = True
-                        break
-                except Exception as e:
-                    continue
-            
-            if not investments_loaded:
-                canvas.setFillColor(COLOR_SURA_WHITE)
-                canvas.setFont("Helvetica-Bold", 12)
-                canvas.drawString(page_width - 80*mm, page_height - 15*mm, "INVESTMENTS")
-            
-            canvas.restoreState()
-        
         # Crear frame para el contenido
         frame = Frame(10*mm, 10*mm, page_size[0] - 20*mm, page_size[1] - 40*mm,
                      leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
         
         # Crear template de página con header
         template = PageTemplate(id='todas_paginas', frames=[frame], 
-                               onPage=crear_barra_superior_header)
+                               onPage=dibujar_barra_superior)
         doc.addPageTemplates([template])
         
-        # Obtener estilos
-        styles = getSampleStyleSheet()
-        
-        # Crear header principal
-        header_style = ParagraphStyle(
-            'HeaderStyle',
-            parent=styles['Normal'],
-            fontSize=16,
-            spaceAfter=5,
-            alignment=TA_LEFT,
-            textColor=COLOR_SURA_BLACK,
-            fontName='SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold'
-        )
-        
-        # Subtítulo
-        info_style = ParagraphStyle(
-            'InfoStyle',
-            parent=styles['Normal'],
-            fontSize=8,
-            spaceAfter=15,
-            alignment=TA_LEFT,
-            textColor=COLOR_SUBTITLE_GRAY,
-            fontName='SuraSans-Regular' if fuentes_disponibles else 'Helvetica'
-        )
-        
-        category_style = ParagraphStyle(
-            'CategoryStyle',
-            parent=styles['Normal'],
-            fontSize=12,
-            leading=14,
-            spaceBefore=12,
-            spaceAfter=12,
-            textColor=COLOR_SURA_WHITE,
-            fontName='SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold',
-            backColor="#9BA4AE",
-            leftIndent=1,
-            rightIndent=0,
-            alignment=0
-        )
+        header_style = estilos['header']
+        info_style = estilos['info']
         
         # Contenido del PDF
         story = []
@@ -1306,208 +1294,47 @@ def generar_pdf_informe(datos_por_categoria, moneda):
         story.append(Spacer(1, 15))
         
         # Procesar cada categoría con el formato MEJORADO
-        for categoria in CONFIG['ORDEN_CATEGORIAS']:
-            if categoria in datos_por_categoria and not datos_por_categoria[categoria].empty:
-                tabla_data = datos_por_categoria[categoria]
-                
-                # TÍTULO DE CATEGORÍA
-                texto_con_espacios = f"<br/>{categoria.upper()}<br/>&nbsp;<br/>"
-                category_header = Paragraph(texto_con_espacios, category_style)
-                story.append(category_header)
-                
-                # HEADERS DE TABLA MEJORADOS - CON NUEVAS COLUMNAS
-                # Obtener años automáticos para los headers
-                año_actual = datetime.now().year
-                año_1 = año_actual - 1
-                año_2 = año_actual - 2
-                
-                headers = [
-                    'Fondo', 'Serie', 'Valor Cuota', 'Moneda', 'TAC', 'Diaria', 
-                    '1 MES', '3 MESES', '12 M', 'MTD', 'YTD', 
-                    f'Año {año_1}', f'Año {año_2}', '3 Años*', '5 Años**'
-                ]
-                
-                table_data = [headers]
-                
-                # DATOS DE LA TABLA CON SEPARADORES
-                fondos_agrupados = {}
-                for _, row in tabla_data.iterrows():
-                    nombre_fondo = row['Fondo'].replace('FONDO MUTUO SURA ', '').replace('SURA ', '')
-                    if nombre_fondo not in fondos_agrupados:
-                        fondos_agrupados[nombre_fondo] = []
-                    fondos_agrupados[nombre_fondo].append(row)
-                
-                primer_fondo = True
-                for nombre_fondo, filas_fondo in fondos_agrupados.items():
-                    # Agregar fila separadora antes de cada fondo (excepto el primero)
-                    if not primer_fondo:
-                        fila_separadora = [''] * len(headers)
-                        table_data.append(fila_separadora)
-                    
-                    # Agregar todas las filas de este fondo
-                    for row in filas_fondo:
-                        def formatear_valor(valor):
-                            """Formatea valores con manejo de NaN"""
-                            if pd.isna(valor):
-                                return "---"
-                            elif isinstance(valor, (int, float)):
-                                return f"{valor:.2f}%"
-                            else:
-                                return str(valor)
-                        
-                        table_row = [
-                            nombre_fondo,                                    # Fondo
-                            str(row['Serie']),                              # Serie
-                            f"{row['Valor Cuota']:.2f}",                   # Valor Cuota
-                            moneda,                                         # Moneda
-                            f"{row['TAC']:.2f}%",                         # TAC
-                            formatear_valor(row['Diaria']),               # Diaria
-                            formatear_valor(row['1 Mes']),                # 1 MES
-                            formatear_valor(row['3 Meses']),              # 3 MESES
-                            formatear_valor(row['12 Meses']),             # 12 M
-                            formatear_valor(row['MTD']),                  # MTD
-                            formatear_valor(row['YTD']),                  # YTD
-                            formatear_valor(row[f'Año {año_1}']),         # Año anterior
-                            formatear_valor(row[f'Año {año_2}']),         # Dos años atrás
-                            formatear_valor(row['3 Años*']),              # 3 Años anualizada
-                            formatear_valor(row['5 Años**'])              # 5 Años anualizada
-                        ]
-                        table_data.append(table_row)
-                    
-                    primer_fondo = False
-                
-                # CALCULAR ANCHOS DE COLUMNAS PARA PÁGINA HORIZONTAL
-                ancho_total_disponible = page_size[0] - 20*mm
-                
-                # Nuevos anchos optimizados para 15 columnas
-                anchos_columnas = [
-                    46*mm,  # Fondo (más ancho)
-                    12*mm,  # Serie
-                    18*mm,  # Valor Cuota
-                    14*mm,  # Moneda
-                    15*mm,  # TAC
-                    15*mm,  # Diaria
-                    15*mm,  # 1 MES
-                    15*mm,  # 3 MESES
-                    15*mm,  # 12 M
-                    15*mm,  # MTD
-                    15*mm,  # YTD
-                    18*mm,  # Año anterior
-                    18*mm,  # Dos años atrás
-                    18*mm,  # 3 Años*
-                    18*mm   # 5 Años**
-                ]
-                
-                # Verificar que no exceda el ancho disponible
-                ancho_total_calculado = sum(anchos_columnas)
-                factor_expansion = ancho_total_disponible / ancho_total_calculado
-                anchos_columnas = [ancho * factor_expansion for ancho in anchos_columnas]
-                
-                # Crear tabla
-                table = Table(table_data, colWidths=anchos_columnas, repeatRows=1)
-                
-                # ESTILOS DE TABLA MEJORADOS
-                table_style = [
-                    # HEADER - Fondo negro, texto blanco, centrado
-                    ('BACKGROUND', (0, 0), (-1, 0), COLOR_SURA_BLACK),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), COLOR_SURA_WHITE),
-                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 8),  # Fuente más pequeña por más columnas
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 4),
-                    ('TOPPADDING', (0, 0), (-1, 0), 4),
-                    
-                    # DATOS - Estilo general
-                    ('FONTNAME', (0, 1), (-1, -1), 'SuraSans-Regular' if fuentes_disponibles else 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 6.5),  # Fuente más pequeña
-                    ('TOPPADDING', (0, 1), (-1, -1), 2),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 2),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 1),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 1),
-                    
-                    # BORDES
-                    ('GRID', (0, 0), (-1, -1), 0.5, COLOR_SURA_GRAY),
-                    ('LINEBELOW', (0, 0), (-1, 0), 1, COLOR_SURA_BLACK),
-                    
-                    # ALINEACIÓN POR COLUMNAS
-                    ('ALIGN', (0, 1), (0, -1), 'LEFT'),     # Fondo
-                    ('ALIGN', (1, 1), (-1, -1), 'CENTER'),  # Resto centrado
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    
-                    # PERMITIR WRAP DE TEXTO EN COLUMNA FONDO
-                    ('WORDWRAP', (0, 1), (0, -1), True),
-                ]
-                
-                # APLICAR COLORES CONDICIONALES A TODAS LAS COLUMNAS DE RENTABILIDAD
-                columnas_rentabilidad = [5, 6, 7, 8, 9, 10, 11, 12, 13, 14]  # Índices de columnas de rentabilidad
-                
-                for row_idx in range(1, len(table_data)):
-                    # Verificar si es una fila separadora
-                    es_fila_separadora = all(cell == '' for cell in table_data[row_idx])
-                    
-                    if es_fila_separadora:
-                        # Aplicar estilo de fila separadora gris
-                        table_style.append(('BACKGROUND', (0, row_idx), (-1, row_idx), COLOR_SURA_GRAY))
-                        table_style.append(('TOPPADDING', (0, row_idx), (-1, row_idx), 1))
-                        table_style.append(('BOTTOMPADDING', (0, row_idx), (-1, row_idx), 1))
-                    else:
-                        # Aplicar colores a columnas de rentabilidad
-                        for col_idx in columnas_rentabilidad:
-                            try:
-                                valor_str = table_data[row_idx][col_idx]
-                                if valor_str != "---":
-                                    valor_numerico = float(valor_str.replace('%', ''))
-                                    
-                                    if valor_numerico > 0:
-                                        table_style.append(('TEXTCOLOR', (col_idx, row_idx), (col_idx, row_idx), COLOR_POSITIVE))
-                                        table_style.append(('FONTNAME', (col_idx, row_idx), (col_idx, row_idx), 'SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold'))
-                                    elif valor_numerico < 0:
-                                        table_style.append(('TEXTCOLOR', (col_idx, row_idx), (col_idx, row_idx), COLOR_NEGATIVE))
-                                        table_style.append(('FONTNAME', (col_idx, row_idx), (col_idx, row_idx), 'SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold'))
-                            except (ValueError, IndexError):
-                                pass
-                        
-                        # FILAS ALTERNADAS
-                        if row_idx % 2 == 0:
-                            table_style.append(('BACKGROUND', (0, row_idx), (-1, row_idx), COLOR_BG_ALTERNATING))
-                
-                # Aplicar estilos
-                table.setStyle(TableStyle(table_style))
-                
-                story.append(table)
-                story.append(Spacer(1, 15))
+        # Años de los headers: los de las columnas calculadas (salen de la
+        # última fecha de los datos, que puede ser de un año anterior al actual)
+        años_datos = sorted({
+            int(columna[len('Año '):])
+            for tabla in datos_por_categoria.values()
+            for columna in tabla.columns
+            if columna.startswith('Año ') and columna[len('Año '):].isdigit()
+        }, reverse=True)
+        if len(años_datos) >= 2:
+            año_1, año_2 = años_datos[:2]
+        else:
+            año_1, año_2 = datetime.now().year - 1, datetime.now().year - 2
+        
+        categorias_pdf = [
+            (categoria, datos_por_categoria[categoria])
+            for categoria in CONFIG['ORDEN_CATEGORIAS']
+            if categoria in datos_por_categoria and not datos_por_categoria[categoria].empty
+        ]
+        
+        def construir_categoria(item):
+            categoria, tabla_data = item
+            return construir_tabla_categoria_pdf(
+                categoria, tabla_data, moneda, page_size[0] - 20*mm, año_1, año_2
+            )
+        
+        # Las tablas de cada categoría se construyen en paralelo y se agregan
+        # en el orden del informe (el PDF resultante es el mismo)
+        hilos = min(HILOS_TABLAS_PDF, len(categorias_pdf))
+        if hilos > 1:
+            with ThreadPoolExecutor(max_workers=hilos) as pool:
+                bloques = list(pool.map(construir_categoria, categorias_pdf))
+        else:
+            bloques = [construir_categoria(item) for item in categorias_pdf]
+        
+        for bloque in bloques:
+            story.extend(bloque)
         
         # FOOTER con notas explicativas
-        footer_style_principal = ParagraphStyle(
-            'FooterStylePrincipal',
-            parent=styles['Normal'],
-            fontSize=9,
-            alignment=TA_CENTER,
-            textColor=COLOR_SURA_BLACK,
-            fontName='SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold',
-            spaceAfter=8
-        )
-
-        footer_style_notas = ParagraphStyle(
-            'FooterStyleNotas',
-            parent=styles['Normal'],
-            fontSize=7,
-            alignment=TA_LEFT,
-            textColor=COLOR_SUBTITLE_GRAY,
-            fontName='SuraSans-Regular' if fuentes_disponibles else 'Helvetica',
-            spaceAfter=3
-        )
-
-        footer_style_secundario = ParagraphStyle(
-            'FooterStyleSecundario',
-            parent=styles['Normal'],
-            fontSize=8,
-            alignment=TA_CENTER,
-            textColor=COLOR_SUBTITLE_GRAY,
-            fontName='SuraSans-Regular' if fuentes_disponibles else 'Helvetica',
-            spaceAfter=5
-        )
+        footer_style_principal = estilos['footer_principal']
+        footer_style_notas = estilos['footer_notas']
+        footer_style_secundario = estilos['footer_secundario']
         
         # Definir hora de generación
         hora_generacion = datetime.now().strftime("%d/%m/%Y")
@@ -1548,36 +1375,96 @@ def generar_pdf_informe(datos_por_categoria, moneda):
         
         # Construir PDF
         doc.build(story)
+        print(f"⏱️ PDF informe renderizado en {time.perf_counter() - inicio:.3f}s")
         
         # Obtener contenido
         pdf_data = buffer.getvalue()
         buffer.close()
         
-        # Codificar en base64
-        pdf_b64 = base64.b64encode(pdf_data).decode()
-        
-        return pdf_b64
+        return pdf_data
         
     except Exception as e:
         logging.error(f"Error generando PDF mejorado: {e}")
         return None
     
-def registrar_callbacks_informe(app, pesos_df, dolares_df, fondos_unicos, fondos_a_series, fondo_serie_a_codigo, calcular_rentabilidades_func):
+# Colores (fondo, borde, texto) del recuadro de estado de descarga
+ESTILOS_ESTADO_DESCARGA = {
+    'exito': ('#d4edda', '#c3e6cb', '#155724'),
+    'error': ('#f8d7da', '#f5c6cb', '#721c24'),
+    'aviso': ('#fff3cd', '#ffeaa7', '#856404'),
+    'progreso': ('#d1ecf1', '#bee5eb', '#0c5460'),
+}
+
+
+def mensaje_estado_descarga(texto, tipo='exito'):
+    """
+    Mensaje del recuadro "Estado" del modal de descarga
+    """
+    fondo, borde, color = ESTILOS_ESTADO_DESCARGA[tipo]
+    return html.P(texto, style={
+        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
+        'backgroundColor': fondo, 'border': f'1px solid {borde}',
+        'borderRadius': '4px', 'fontSize': '12px', 'color': color
+    })
+
+
+def preparar_datos_descarga_informe(moneda, pesos_df, dolares_df, registro_fondos):
+    """
+    Datos por categoría para las descargas Excel/PDF (los mismos para ambos formatos).
+    También los usa artefactos_reportes para generar los archivos nocturnos.
+    """
+    # Fondos SURA de la moneda en orden de informe, con su categoría (registro_fondos)
+    fondos_moneda = registro_fondos['por_moneda'][moneda]
+
+    # Un solo cálculo para todos los fondos SURA, repartido después por categoría
+    df = pesos_df if moneda == 'CLP' else dolares_df
+    tabla_completa = calcular_informe_completo(
+        df, moneda, fondos_moneda['codigos'], fondos_moneda['nombres'], indice_codigos=True
+    )
+    if tabla_completa is None or tabla_completa.empty:
+        return {}
+
+    categoria_por_fila = tabla_completa.index.map(fondos_moneda['codigo_a_categoria'])
+
+    # Generar datos por categoría
+    datos_por_categoria = {}
+    for categoria in CONFIG['ORDEN_CATEGORIAS']:
+        filas = categoria_por_fila == categoria
+        if filas.any():
+            datos_por_categoria[categoria] = tabla_completa[filas].reset_index(drop=True)
+    
+    return datos_por_categoria
+
+
+def renderizar_descarga_informe(formato, datos_por_categoria, moneda):
+    """
+    Genera el archivo de descarga. Se ejecuta en el pool de procesos de
+    trabajos_reportes, por lo que debe quedar a nivel de módulo.
+
+    Returns:
+        bytes del archivo, o None si no se pudo generar
+    """
+    if formato == 'excel':
+        return generar_excel_informe(datos_por_categoria, moneda)
+    return generar_pdf_informe(datos_por_categoria, moneda)
+
+
+def registrar_callbacks_informe(app, pesos_df, dolares_df, fondos_unicos, fondos_a_series, fondo_serie_a_codigo, calcular_rentabilidades_func, registro_fondos=None):
     """
     Registra los callbacks necesarios para el módulo de informe
     """
+    if registro_fondos is None:
+        registro_fondos = crear_registro_fondos(fondos_unicos, fondos_a_series, fondo_serie_a_codigo)
     
     # Callback para abrir/cerrar modal de informe
-    @callback(
+    # (se resuelve en el navegador: assets/callbacks_ui.js)
+    clientside_callback(
+        ClientsideFunction(namespace='ui', function_name='alternar_modal'),
         Output("modal-informe", "is_open"),
         [Input("informe-button", "n_clicks")],
         [State("modal-informe", "is_open")],
         prevent_initial_call=True
     )
-    def toggle_modal_informe(btn_open, is_open):
-        if btn_open:
-            return not is_open
-        return is_open
 
     # Callback para generar el contenido del informe
     @callback(
@@ -1585,98 +1472,98 @@ def registrar_callbacks_informe(app, pesos_df, dolares_df, fondos_unicos, fondos
          Output('informe-cache', 'data')],
         [Input('moneda-selector-informe', 'value'),
          Input("modal-informe", "is_open")],
-        [State('informe-cache', 'data'),
-         State('timestamp-cache', 'data')],
         prevent_initial_call=True
     )
-    def generar_informe_rentabilidad(moneda, modal_abierto, informe_cache, timestamp_cache):
+    def generar_informe_rentabilidad(moneda, modal_abierto):
         from datetime import datetime
         
         if not modal_abierto:
-            return loading_content(), informe_cache or {}
+            return loading_content(), no_update
         
-        hoy = datetime.now().strftime('%Y-%m-%d')
-        cache_key = f"informe_{moneda}_{hoy}"
+        # El contenido renderizado vive en el servidor; el navegador solo guarda la clave
+        cache_key = clave_reporte('informe', moneda, version_datos(pesos_df, dolares_df))
         
         # Verificar si ya tenemos este cálculo en caché
-        if informe_cache and cache_key in informe_cache:
-            return informe_cache[cache_key], informe_cache
-        
-        # Si no hay caché, calcular normalmente
-        if pesos_df is None:
-            resultado = loading_content()
-        else:
-            # CAMBIO: Usar solo fondos SURA filtrados para el PDF
-            from Pagina import filtrar_solo_fondos_sura, FONDOS_SURA_PDF
-            
-            fondos_sura, fondos_a_series_sura, fondo_serie_codigo_sura = filtrar_solo_fondos_sura(
-                fondos_unicos, fondos_a_series, fondo_serie_a_codigo
-            )
+        resultado_cache = obtener_cache('reportes', cache_key)
+        if resultado_cache is not None:
+            return resultado_cache, cache_key
+        
+        # Si no hay caché, calcular una sola vez aunque lleguen varias
+        # aperturas del modal al mismo tiempo
+        def construir_contenido():
+            if pesos_df is None:
+                return loading_content()
+            else:
+                # CAMBIO: Usar solo fondos SURA filtrados para el PDF (registro_fondos)
+                fondos_a_series_sura = registro_fondos['fondos_a_series_sura']
+                fondo_serie_codigo_sura = registro_fondos['fondo_serie_codigo_sura']
             
-            df_actual = pesos_df if moneda == 'CLP' else dolares_df
-            categorias = categorizar_fondos(fondos_sura)  # Solo fondos SURA
+                df_actual = pesos_df if moneda == 'CLP' else dolares_df
+                categorias = registro_fondos['categorias_sura']  # Solo fondos SURA
             
-            # Crear tablas para cada categoría
-            tablas_categorias = []
+                # Crear tablas para cada categoría
+                tablas_categorias = []
             
-            # Crear encabezado del informe
-            encabezado = html.Div([
-                html.H3([
-                    html.I(className="fas fa-building", style={'marginRight': '10px', 'color': '#0B2DCE'}),
-                    "SURA Investments - Informe de Rentabilidades"
-                ], style={
-                    'fontFamily': 'SuraSans-SemiBold',
-                    'textAlign': 'center',
-                    'color': '#24272A',
-                    'marginBottom': '10px'
-                }),
-                html.P(f"Moneda: {moneda} | Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M')}", 
-                       style={
-                           'fontFamily': 'SuraSans-Regular', 
-                           'textAlign': 'center',
-                           'color': '#666',
-                           'marginBottom': '30px',
-                           'fontSize': '14px'
-                       })
-            ])
+                # Crear encabezado del informe
+                encabezado = html.Div([
+                    html.H3([
+                        html.I(className="fas fa-building", style={'marginRight': '10px', 'color': '#0B2DCE'}),
+                        "SURA Investments - Informe de Rentabilidades"
+                    ], style={
+                        'fontFamily': 'SuraSans-SemiBold',
+                        'textAlign': 'center',
+                        'color': '#24272A',
+                        'marginBottom': '10px'
+                    }),
+                    html.P(f"Moneda: {moneda} | Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M')}", 
+                           style={
+                               'fontFamily': 'SuraSans-Regular', 
+                               'textAlign': 'center',
+                               'color': '#666',
+                               'marginBottom': '30px',
+                               'fontSize': '14px'
+                           })
+                ])
             
-            tablas_categorias.append(encabezado)
+                tablas_categorias.append(encabezado)
             
-            for categoria in CONFIG['ORDEN_CATEGORIAS']:
-                if categoria in categorias and categorias[categoria]:
-                    tabla = crear_tabla_categoria(
-                        categoria, 
-                        categorias[categoria], 
-                        df_actual,
-                        fondos_a_series_sura,     
-                        fondo_serie_codigo_sura, 
-                        calcular_rentabilidades_func,
-                        moneda
-                    )
-                    if tabla.children:
-                        tablas_categorias.append(tabla)
+                for categoria in CONFIG['ORDEN_CATEGORIAS']:
+                    if categoria in categorias and categorias[categoria]:
+                        tabla = crear_tabla_categoria(
+                            categoria, 
+                            categorias[categoria], 
+                            df_actual,
+                            fondos_a_series_sura,     
+                            fondo_serie_codigo_sura, 
+                            calcular_rentabilidades_func,
+                            moneda
+                        )
+                        if tabla.children:
+                            tablas_categorias.append(tabla)
             
-            if len(tablas_categorias) <= 1:
-                resultado = html.Div([
-                    encabezado,
-                    dbc.Alert([
-                        html.I(className="fas fa-exclamation-triangle", style={'marginRight': '10px'}),
-                        "No se encontraron datos para mostrar en el informe."
-                    ], color="warning", style={'marginTop': '20px'})
-                ])
-            else:
-                resultado = html.Div(tablas_categorias)
+                if len(tablas_categorias) <= 1:
+                    return html.Div([
+                        encabezado,
+                        dbc.Alert([
+                            html.I(className="fas fa-exclamation-triangle", style={'marginRight': '10px'}),
+                            "No se encontraron datos para mostrar en el informe."
+                        ], color="warning", style={'marginTop': '20px'})
+                    ])
+                else:
+                    return html.Div(tablas_categorias)
+
+        resultado = calcular_una_vez('reportes', cache_key, construir_contenido)
         
         # Guardar en caché
-        if not informe_cache:
-            informe_cache = {}
-        informe_cache[cache_key] = resultado
+        guardar_cache('reportes', cache_key, resultado)
         
-        return resultado, informe_cache
+        return resultado, cache_key
     
     # Callback para descarga Excel / PDF
     @callback(
-        [Output("download-informe", "data"),
+        [Output("download-informe", "data", allow_duplicate=True),
+         Output("trabajo-descarga-informe", "data"),
+         Output("intervalo-descarga-informe", "disabled"),
          Output("estado-descarga", "children")],
         [Input("btn-descargar-excel", "n_clicks"),
          Input("btn-descargar-pdf", "n_clicks")],
@@ -1694,107 +1581,89 @@ def registrar_callbacks_informe(app, pesos_df, dolares_df, fondos_unicos, fondos
         button_id = ctx.triggered[0]['prop_id'].split('.')[0]
         
         if pesos_df is None:
-            estado = html.P("Error: No hay datos disponibles", style={
-                'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                'backgroundColor': '#f8d7da', 'border': '1px solid #f5c6cb',
-                'borderRadius': '4px', 'fontSize': '12px', 'color': '#721c24'
-            })
-            return None, estado
+            return no_update, None, True, mensaje_estado_descarga("Error: No hay datos disponibles", 'error')
         
-        try:
-            df_actual = pesos_df if moneda == 'CLP' else dolares_df
-            
-            # CAMBIO: Usar solo fondos SURA filtrados para el PDF/Excel
-            from Pagina import filtrar_solo_fondos_sura, FONDOS_SURA_PDF
-            
-            fondos_sura, fondos_a_series_sura, fondo_serie_codigo_sura = filtrar_solo_fondos_sura(
-                fondos_unicos, fondos_a_series, fondo_serie_a_codigo
+        if button_id == "btn-descargar-excel":
+            formato, extension, etiqueta = 'excel', 'xlsx', 'Excel'
+        elif not PDF_AVAILABLE:
+            return no_update, None, True, mensaje_estado_descarga("❌ PDF no disponible - Instalar ReportLab", 'aviso')
+        else:
+            formato, extension, etiqueta = 'pdf', 'pdf', 'PDF'
+        
+        filename = f"informe_rentabilidad_{moneda}_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+        
+        def trabajo_descarga(id_trabajo):
+            return {
+                'id': id_trabajo,
+                'formato': formato,
+                'etiqueta': etiqueta,
+                'filename': filename
+            }
+        
+        # Archivo pre-generado por el paso nocturno (artefactos_reportes)
+        archivo = obtener_artefacto('informe', moneda, formato, version_artefactos(pesos_df, dolares_df))
+        if archivo is not None:
+            return dcc.send_bytes(archivo, filename=filename), None, True, \
+                mensaje_estado_descarga(f"✅ {etiqueta} generado exitosamente")
+        
+        # Si el mismo archivo ya se está generando (u otro usuario lo acaba de
+        # pedir) nos adjuntamos a ese trabajo sin preparar los datos otra vez
+        clave = (clave_reporte('informe', moneda, version_datos(pesos_df, dolares_df)), formato)
+        id_trabajo = buscar_trabajo(clave)
+        if id_trabajo is not None:
+            return no_update, trabajo_descarga(id_trabajo), False, mensaje_estado_descarga(
+                f"⏳ Generando {etiqueta}...", 'progreso'
             )
-            
-            categorias = categorizar_fondos(fondos_sura)  # Solo fondos SURA
-            
-            # Generar datos por categoría
-            datos_por_categoria = {}
-            for categoria in CONFIG['ORDEN_CATEGORIAS']:
-                if categoria in categorias and categorias[categoria]:
-                    codigos_categoria = []
-                    nombres_categoria = []
-                    
-                    for fondo in categorias[categoria]:
-                        if fondo in fondos_a_series_sura:
-                            # Verificar series disponibles por moneda
-                            if moneda in fondos_a_series_sura[fondo]:
-                                for serie in fondos_a_series_sura[fondo][moneda]:
-                                    if (fondo, serie, moneda) in fondo_serie_codigo_sura:
-                                        codigo = fondo_serie_codigo_sura[(fondo, serie, moneda)]
-                                        nombre_completo = f"{fondo} - {serie}"
-                                        codigos_categoria.append(codigo)
-                                        nombres_categoria.append(nombre_completo)
-                    
-                    if codigos_categoria:
-                        # USAR PRECÁLCULOS EN LUGAR DE CÁLCULO TRADICIONAL
-                        tabla_data = obtener_informe_pdf_completo_precalculado(moneda, list(fondo_serie_codigo_sura.values()), list(fondos_sura))
-                        datos_por_categoria[categoria] = tabla_data
+        
+        try:
+            # Los datos son los mismos para Excel y PDF: descargas simultáneas
+            # del mismo reporte comparten una sola preparación
+            def preparar_datos():
+                return preparar_datos_descarga_informe(moneda, pesos_df, dolares_df, registro_fondos)
 
-            
-            # Generar archivo según el botón presionado
-            if button_id == "btn-descargar-excel":
-                excel_b64 = generar_excel_informe(datos_por_categoria, moneda)
-                if excel_b64:
-                    filename = f"informe_rentabilidad_{moneda}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-                    estado = html.P("✅ Excel generado exitosamente", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#d4edda', 'border': '1px solid #c3e6cb',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#155724'
-                    })
-                    return dcc.send_bytes(
-                        base64.b64decode(excel_b64),
-                        filename=filename
-                    ), estado
-                else:
-                    estado = html.P("❌ Error generando Excel", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#f8d7da', 'border': '1px solid #f5c6cb',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#721c24'
-                    })
-                    return None, estado
-            
-            elif button_id == "btn-descargar-pdf":
-                if not PDF_AVAILABLE:
-                    estado = html.P("❌ PDF no disponible - Instalar ReportLab", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#fff3cd', 'border': '1px solid #ffeaa7',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#856404'
-                    })
-                    return None, estado
-                
-                pdf_b64 = generar_pdf_informe(datos_por_categoria, moneda)
-                if pdf_b64:
-                    filename = f"informe_rentabilidad_{moneda}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-                    estado = html.P("✅ PDF generado exitosamente", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#d4edda', 'border': '1px solid #c3e6cb',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#155724'
-                    })
-                    return dcc.send_bytes(
-                        base64.b64decode(pdf_b64),
-                        filename=filename
-                    ), estado
-                else:
-                    estado = html.P("❌ Error generando PDF", style={
-                        'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                        'backgroundColor': '#f8d7da', 'border': '1px solid #f5c6cb',
-                        'borderRadius': '4px', 'fontSize': '12px', 'color': '#721c24'
-                    })
-                    return None, estado
+            datos_por_categoria = calcular_una_vez('datos_descarga', clave[0], preparar_datos)
+
+            # Generar el archivo en segundo plano; el intervalo consulta su estado
+            trabajo = (renderizar_descarga_informe, formato, datos_por_categoria, moneda)
+            if debe_perfilar():
+                trabajo = (ejecutar_perfilado, f"generar_{formato}_informe") + trabajo
+            id_trabajo = enviar_trabajo(clave, *trabajo)
+            return no_update, trabajo_descarga(id_trabajo), False, mensaje_estado_descarga(
+                f"⏳ Generando {etiqueta}...", 'progreso'
+            )
         
         except Exception as e:
             logging.error(f"Error en descarga: {e}")
-            estado = html.P(f"❌ Error: {str(e)}", style={
-                'fontFamily': 'SuraSans-Regular', 'margin': '0', 'padding': '8px 12px',
-                'backgroundColor': '#f8d7da', 'border': '1px solid #f5c6cb',
-                'borderRadius': '4px', 'fontSize': '12px', 'color': '#721c24'
-            })
-            return None, estado
-        
-        raise PreventUpdate
+            return no_update, None, True, mensaje_estado_descarga(f"❌ Error: {str(e)}", 'error')
+    
+    # Consulta periódica del trabajo de descarga
+    @callback(
+        [Output("download-informe", "data"),
+         Output("estado-descarga", "children", allow_duplicate=True),
+         Output("intervalo-descarga-informe", "disabled", allow_duplicate=True)],
+        Input("intervalo-descarga-informe", "n_intervals"),
+        State("trabajo-descarga-informe", "data"),
+        prevent_initial_call=True
+    )
+    def revisar_descarga_informe(n_intervals, trabajo):
+        if not trabajo:
+            return no_update, no_update, True
+        
+        estado_trabajo = consultar_trabajo(trabajo['id'])
+        etiqueta = trabajo['etiqueta']
+        
+        if estado_trabajo['estado'] == 'pendiente':
+            return no_update, mensaje_estado_descarga(
+                f"⏳ Generando {etiqueta}... ({estado_trabajo['segundos']:.0f}s)", 'progreso'
+            ), False
+        
+        if estado_trabajo['estado'] == 'listo' and estado_trabajo['resultado']:
+            return dcc.send_bytes(
+                estado_trabajo['resultado'],
+                filename=trabajo['filename']
+            ), mensaje_estado_descarga(f"✅ {etiqueta} generado exitosamente"), True
+        
+        if estado_trabajo['estado'] == 'desconocido':
+            return None, mensaje_estado_descarga("❌ La descarga expiró, intente nuevamente", 'error'), True
+        
+        return None, mensaje_estado_descarga(f"❌ Error generando {etiqueta}", 'error'), True
@@ -0,0 +1,150 @@
+"""
+Memoria compartida entre los workers de gunicorn (preload_app + fork)
+
+Con preload_app el maestro importa Pagina una sola vez y los workers heredan
+sus páginas de memoria copy-on-write. Una página deja de compartirse apenas
+un worker escribe en ella, y eso incluye el contador de referencias de los
+objetos Python que contiene. Por eso:
+    - los precios de cada moneda quedan en un único bloque numpy float64
+      (los datos de un arreglo no llevan contador, solo su encabezado) y
+      pandas no necesita consolidar bloques después, en cada worker
+    - antes de cada fork se congela el recolector de basura (gc.freeze) para
+      que sus pasadas no escriban en los objetos heredados
+
+RSS cuenta en cada proceso las páginas compartidas; PSS las reparte entre los
+procesos que las comparten, así la suma de PSS es la memoria real del grupo.
+
+Uso (RSS y PSS del maestro de gunicorn y sus workers):
+    python memoria_procesos.py <pid del maestro>
+"""
+
+import os
+import gc
+import sys
+
+import numpy as np
+import pandas as pd
+
+MB = 1024 * 1024
+
+
+def compactar_precios(df):
+    """
+    Mismo DataFrame con todas las series en un único bloque float64 contiguo
+    (y 'Dates' aparte), en el mismo orden de columnas
+    """
+    columnas = [columna for columna in df.columns if columna != 'Dates']
+
+    # pandas guarda cada bloque como (columnas, filas): se arma así y se pasa
+    # traspuesto para que el DataFrame lo use sin copiarlo
+    valores = np.empty((len(columnas), len(df)), dtype=np.float64)
+    for i, columna in enumerate(columnas):
+        valores[i] = df[columna].to_numpy(dtype=np.float64)
+
+    compacto = pd.DataFrame(valores.T, columns=columnas, index=df.index, copy=False)
+    if 'Dates' in df.columns:
+        compacto.insert(df.columns.get_loc('Dates'), 'Dates', df['Dates'])
+    return compacto
+
+
+def congelar_objetos_compartidos():
+    """
+    Recolecta la basura de la carga y mueve los objetos sobrevivientes a la
+    generación permanente del GC (se llama en el maestro antes de cada fork)
+    """
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+
+def memoria_proceso(pid='self'):
+    """
+    Memoria de un proceso según /proc (Linux).
+
+    Returns:
+        dict: 'rss', 'pss', 'compartida' y 'privada' en bytes (None si no se
+        puede leer; sin smaps_rollup solo hay 'rss')
+    """
+    memoria = {'rss': None, 'pss': None, 'compartida': None, 'privada': None}
+    campos = {'Rss': 'rss', 'Pss': 'pss', 'Shared_Clean': 'compartida', 'Shared_Dirty': 'compartida',
+              'Private_Clean': 'privada', 'Private_Dirty': 'privada'}
+
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for linea in f:
+                partes = linea.split()
+                campo = campos.get(partes[0].rstrip(':'))
+                if campo is not None:
+                    memoria[campo] = (memoria[campo] or 0) + int(partes[1]) * 1024
+        return memoria
+    except (OSError, IndexError, ValueError):
+        pass
+
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    memoria['rss'] = int(linea.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return memoria
+
+
+def texto_memoria(memoria):
+    return ', '.join(
+        f"{etiqueta} {memoria[campo] / MB:.0f}MB"
+        for campo, etiqueta in (('rss', 'RSS'), ('pss', 'PSS'), ('compartida', 'compartida'))
+        if memoria[campo] is not None
+    ) or 'sin datos de /proc'
+
+
+def procesos_hijos(pid):
+    """
+    pids de los hijos directos de `pid` (workers de gunicorn)
+    """
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children', 'r') as f:
+            return [int(hijo) for hijo in f.read().split()]
+    except OSError:
+        pass
+
+    hijos = []
+    for nombre in os.listdir('/proc'):
+        if not nombre.isdigit():
+            continue
+        try:
+            with open(f'/proc/{nombre}/stat', 'r') as f:
+                # El nombre del proceso va entre paréntesis y puede tener espacios
+                padre = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if padre == pid:
+            hijos.append(int(nombre))
+    return sorted(hijos)
+
+
+def main():
+    if len(sys.argv) != 2 or not sys.argv[1].isdigit():
+        print("Uso: python memoria_procesos.py <pid del maestro de gunicorn>")
+        sys.exit(2)
+
+    maestro = int(sys.argv[1])
+    procesos = [('maestro', maestro)] + [('worker', hijo) for hijo in procesos_hijos(maestro)]
+
+    total_rss = total_pss = 0
+    print(f"   {'proceso':<8} {'pid':>8} {'RSS':>10} {'PSS':>10} {'compartida':>12}")
+    for rol, pid in procesos:
+        memoria = memoria_proceso(pid)
+        total_rss += memoria['rss'] or 0
+        total_pss += memoria['pss'] or 0
+        columnas = [f"{memoria[campo] / MB:8.0f}MB" if memoria[campo] is not None else f"{'-':>10}"
+                    for campo in ('rss', 'pss', 'compartida')]
+        print(f"   {rol:<8} {pid:>8} {columnas[0]:>10} {columnas[1]:>10} {columnas[2]:>12}")
+
+    print(f"   {'total':<8} {'':>8} {total_rss / MB:8.0f}MB {total_pss / MB:8.0f}MB")
+    print("🧠 La suma de PSS es la memoria física que usa el grupo; la de RSS cuenta "
+          "varias veces lo compartido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Métricas de los callbacks de Dash: latencia, CPU, tamaño de request/response
+y eventos del camino seguido (pre-cálculo o tiempo real, aciertos de caché)
+
+Se instala sobre el servidor Flask y mide cada POST a /_dash-update-component,
+sin tocar las definiciones de callbacks. Expone:
+    /metrics          texto en formato Prometheus
+    /metrics/resumen  JSON con p50/p95/p99 de las últimas VENTANA_METRICAS llamadas
+
+Las rutas exigen "Authorization: Bearer <TOKEN_METRICAS>". Sin TOKEN_METRICAS
+solo responden con DEBUG=True (desarrollo); en producción quedan cerradas.
+Solo las salidas registradas en app.callback_map tienen serie propia; el resto
+(un POST con 'output' inventado) se agrupa en '?' para acotar las etiquetas.
+
+Los acumulados son de cada proceso y con varios workers de gunicorn cada
+scrape lo responde uno de ellos. Toda serie lleva la etiqueta pid="<pid del
+worker>", así los contadores de dos workers no se alternan bajo un mismo nombre
+(Prometheus lo tomaría como reinicios) y cada uno crece por su lado, con huecos
+en los scrapes que atendió el otro. El total del servicio es la suma sobre pid,
+p. ej. sum without (pid) (rate(panel_callback_segundos_count[5m])).
+/metrics/resumen también indica el pid en cada callback.
+
+Con METRICAS_CALLBACKS=0 no se instala nada y registrar_evento retorna de inmediato.
+"""
+
+import os
+import hmac
+import json
+import time
+import threading
+from collections import deque, Counter
+
+from flask import g, request, has_request_context, Response
+
+METRICAS_HABILITADAS = os.environ.get('METRICAS_CALLBACKS', '1').lower() not in ('0', 'false', 'no')
+
+# Llamadas por callback que se usan para los percentiles
+VENTANA_METRICAS = int(os.environ.get('VENTANA_METRICAS', 1024))
+
+# Token que exige /metrics (solo en el encabezado Authorization)
+TOKEN_METRICAS = os.environ.get('TOKEN_METRICAS')
+
+# Sin token, /metrics solo queda abierto en desarrollo
+MODO_DESARROLLO = os.environ.get('DEBUG', 'False').lower() in ('1', 'true', 'yes')
+
+RUTA_CALLBACKS = '/_dash-update-component'
+CUANTILES = (0.5, 0.95, 0.99)
+
+_metricas = {}      # salida del callback -> acumulados y ventana de duraciones
+_lock = threading.Lock()
+_app = None         # app de Dash instalada (para validar las salidas)
+
+
+def registrar_evento(evento):
+    """
+    Anota un evento en el callback en curso (p. ej. 'precalculo',
+    'tiempo_real', 'cache:reportes:acierto'). Fuera de un request no hace nada.
+    """
+    if not METRICAS_HABILITADAS or not has_request_context():
+        return
+    eventos = getattr(g, 'eventos_metricas', None)
+    if eventos is not None:
+        eventos.append(evento)
+
+
+def _iniciar_medicion():
+    if request.path != RUTA_CALLBACKS:
+        return
+    g.eventos_metricas = []
+    g.inicio_metricas = (time.perf_counter(), time.thread_time())
+
+
+def _terminar_medicion(respuesta):
+    inicio = getattr(g, 'inicio_metricas', None)
+    if inicio is None:
+        return respuesta
+
+    segundos = time.perf_counter() - inicio[0]
+    segundos_cpu = time.thread_time() - inicio[1]
+
+    cuerpo = request.get_json(silent=True) or {}
+    salida = cuerpo.get('output') if isinstance(cuerpo, dict) else None
+    # El cuerpo lo arma el cliente: una salida desconocida no crea una serie nueva
+    if not isinstance(salida, str) or _app is None or salida not in _app.callback_map:
+        salida = '?'
+    bytes_entrada = request.content_length or 0
+    # Antes de la compresión: flask-compress corre después (se registró antes)
+    bytes_salida = respuesta.calculate_content_length() or 0
+    error = respuesta.status_code >= 400
+
+    with _lock:
+        metrica = _metricas.get(salida)
+        if metrica is None:
+            metrica = _metricas[salida] = {
+                'llamadas': 0, 'errores': 0,
+                'segundos': 0.0, 'segundos_cpu': 0.0,
+                'bytes_entrada': 0, 'bytes_salida': 0,
+                'duraciones': deque(maxlen=VENTANA_METRICAS),
+                'eventos': Counter(),
+            }
+        metrica['llamadas'] += 1
+        metrica['errores'] += error
+        metrica['segundos'] += segundos
+        metrica['segundos_cpu'] += segundos_cpu
+        metrica['bytes_entrada'] += bytes_entrada
+        metrica['bytes_salida'] += bytes_salida
+        metrica['duraciones'].append(segundos)
+        metrica['eventos'].update(g.eventos_metricas)
+
+    return respuesta
+
+
+def _copiar_metricas():
+    """
+    Copia de las métricas con las duraciones ordenadas (fuera del lock)
+    """
+    with _lock:
+        copia = {
+            salida: {**metrica, 'duraciones': list(metrica['duraciones']), 'eventos': dict(metrica['eventos'])}
+            for salida, metrica in _metricas.items()
+        }
+    for metrica in copia.values():
+        metrica['duraciones'].sort()
+    return copia
+
+
+def _cuantil(valores_ordenados, q):
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(q * len(valores_ordenados)))
+    return valores_ordenados[indice]
+
+
+def resumen_metricas(app=None):
+    """
+    Por callback: llamadas, errores, p50/p95/p99 (ms) de la ventana reciente,
+    CPU y bytes promedio, y conteo de eventos
+    """
+    copia = _copiar_metricas()
+    pid = os.getpid()
+
+    resumen = {}
+    for salida, metrica in copia.items():
+        llamadas = metrica['llamadas'] or 1
+        resumen[salida] = {
+            'funcion': _nombre_funcion(app, salida),
+            'pid': pid,
+            'llamadas': metrica['llamadas'],
+            'errores': metrica['errores'],
+            **{f"p{int(q * 100)}_ms": round(_cuantil(metrica['duraciones'], q) * 1000, 2) for q in CUANTILES},
+            'cpu_ms_promedio': round(metrica['segundos_cpu'] / llamadas * 1000, 2),
+            'bytes_entrada_promedio': metrica['bytes_entrada'] // llamadas,
+            'bytes_salida_promedio': metrica['bytes_salida'] // llamadas,
+            'eventos': metrica['eventos'],
+        }
+    return resumen
+
+
+def _nombre_funcion(app, salida):
+    definicion = app.callback_map.get(salida) if app is not None else None
+    funcion = definicion.get('callback') if definicion else None
+    return getattr(funcion, '__name__', '?')
+
+
+def _etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def texto_prometheus(app=None):
+    """
+    Métricas de callbacks, cachés, coalescencia, arranque y memoria en formato de texto Prometheus,
+    todas con la etiqueta pid del worker que responde
+    """
+    from cache_servidor import estadisticas_cache, estadisticas_coalescencia
+    from tiempos_arranque import fases_arranque, segundos_primera_respuesta
+    from memoria_procesos import memoria_proceso
+
+    copia = _copiar_metricas()
+    pid = f'pid="{os.getpid()}"'
+
+    lineas = [
+        '# HELP panel_callback_segundos Duración de los callbacks (cuantiles de la ventana reciente)',
+        '# TYPE panel_callback_segundos summary',
+    ]
+    contadores = {
+        'panel_callback_segundos_cpu_total': ('segundos_cpu', 'Tiempo de CPU del hilo del request'),
+        'panel_callback_bytes_entrada_total': ('bytes_entrada', 'Bytes del cuerpo del request'),
+        'panel_callback_bytes_salida_total': ('bytes_salida', 'Bytes de la respuesta sin comprimir'),
+        'panel_callback_errores_total': ('errores', 'Respuestas con estado >= 400'),
+    }
+
+    for salida, metrica in copia.items():
+        etiquetas = f'{pid},callback="{_etiqueta(salida)}",funcion="{_etiqueta(_nombre_funcion(app, salida))}"'
+        for q in CUANTILES:
+            lineas.append(f'panel_callback_segundos{{{etiquetas},quantile="{q}"}} {_cuantil(metrica["duraciones"], q):.6f}')
+        lineas.append(f'panel_callback_segundos_sum{{{etiquetas}}} {metrica["segundos"]:.6f}')
+        lineas.append(f'panel_callback_segundos_count{{{etiquetas}}} {metrica["llamadas"]}')
+
+    for nombre, (campo, descripcion) in contadores.items():
+        lineas += [f'# HELP {nombre} {descripcion}', f'# TYPE {nombre} counter']
+        for salida, metrica in copia.items():
+            lineas.append(f'{nombre}{{{pid},callback="{_etiqueta(salida)}"}} {metrica[campo]}')
+
+    lineas += ['# HELP panel_callback_eventos_total Camino seguido por los callbacks (pre-cálculo, tiempo real, caché)',
+               '# TYPE panel_callback_eventos_total counter']
+    for salida, metrica in copia.items():
+        for evento, cantidad in sorted(metrica['eventos'].items()):
+            lineas.append(f'panel_callback_eventos_total{{{pid},callback="{_etiqueta(salida)}",evento="{_etiqueta(evento)}"}} {cantidad}')
+
+    caches = estadisticas_cache()
+    for nombre, campo, tipo in (('panel_cache_aciertos_total', 'aciertos', 'counter'),
+                                ('panel_cache_fallos_total', 'fallos', 'counter'),
+                                ('panel_cache_entradas', 'entradas', 'gauge')):
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        for cache, valores in sorted(caches.items()):
+            lineas.append(f'{nombre}{{{pid},cache="{_etiqueta(cache)}"}} {valores[campo]}')
+
+    coalescencia = estadisticas_coalescencia()
+    for nombre, campo in (('panel_computos_ejecutados_total', 'ejecutadas'),
+                          ('panel_computos_coalescidos_total', 'coalescidas'),
+                          ('panel_computos_coalescidos_host_total', 'coalescidas_host')):
+        lineas.append(f'# TYPE {nombre} counter')
+        for computo, valores in sorted(coalescencia.items()):
+            lineas.append(f'{nombre}{{{pid},computo="{_etiqueta(computo)}"}} {valores[campo]}')
+
+    lineas += ['# HELP panel_arranque_segundos Duración de cada fase del arranque del proceso',
+               '# TYPE panel_arranque_segundos gauge']
+    for fase, segundos, _ in fases_arranque():
+        lineas.append(f'panel_arranque_segundos{{{pid},fase="{_etiqueta(fase)}"}} {segundos:.6f}')
+    primera_respuesta = segundos_primera_respuesta()
+    if primera_respuesta is not None:
+        lineas += ['# HELP panel_primera_respuesta_segundos Duración de la primera request atendida por este proceso',
+                   '# TYPE panel_primera_respuesta_segundos gauge',
+                   f'panel_primera_respuesta_segundos{{{pid}}} {primera_respuesta:.6f}']
+
+    # Memoria de este proceso (cada worker responde por sí mismo)
+    memoria = memoria_proceso()
+    for campo in ('rss', 'pss', 'compartida'):
+        if memoria[campo] is not None:
+            lineas += [f'# TYPE panel_memoria_{campo}_bytes gauge',
+                       f'panel_memoria_{campo}_bytes{{{pid}}} {memoria[campo]}']
+
+    return '\n'.join(lineas) + '\n'
+
+
+def _autorizado():
+    if not TOKEN_METRICAS:
+        return MODO_DESARROLLO
+    esperado = f"Bearer {TOKEN_METRICAS}"
+    return hmac.compare_digest(request.headers.get('Authorization', ''), esperado)
+
+
+def instalar_metricas(app):
+    """
+    Registra la medición de callbacks y las rutas /metrics en el servidor
+    Flask de `app`. No hace nada si METRICAS_CALLBACKS está desactivado.
+    """
+    if not METRICAS_HABILITADAS:
+        print("📉 Métricas de callbacks desactivadas")
+        return False
+
+    global _app
+    _app = app
+
+    server = app.server
+    server.before_request(_iniciar_medicion)
+    server.after_request(_terminar_medicion)
+
+    def metricas():
+        if not _autorizado():
+            return Response('No autorizado\n', status=401)
+        return Response(texto_prometheus(app), mimetype='text/plain; version=0.0.4')
+
+    def metricas_resumen():
+        if not _autorizado():
+            return Response('No autorizado\n', status=401)
+        return Response(json.dumps(resumen_metricas(app), ensure_ascii=False, indent=2),
+                        mimetype='application/json')
+
+    server.add_url_rule('/metrics', 'metricas', metricas)
+    server.add_url_rule('/metrics/resumen', 'metricas_resumen', metricas_resumen)
+    if TOKEN_METRICAS:
+        print("📈 Métricas de callbacks en /metrics (con token)")
+    elif MODO_DESARROLLO:
+        print("📈 Métricas de callbacks en /metrics (sin token, DEBUG=True)")
+    else:
+        print("⚠️ Métricas de callbacks sin TOKEN_METRICAS: /metrics responde 401")
+    return True
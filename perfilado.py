@@ -0,0 +1,168 @@
+"""
+Perfilado opcional (cProfile) de callbacks de Dash y de la generación de reportes
+Pensado para dejarlo activo en producción: solo perfila cuando se pide con la
+cabecera CABECERA_PERFILADO o por muestreo, con un máximo de perfiles por hora
+y un solo perfil a la vez por proceso.
+
+Cada perfil se guarda en DIR_PERFILES como <fecha>-<pid>-<nombre>.prof y se
+puede abrir con pstats o snakeviz:
+    python -m pstats perfiles/20250101-120000-1234-actualizar_grafico.prof
+
+Variables de entorno:
+    PERFILADO=1                 activa el hook (por defecto desactivado)
+    MUESTREO_PERFILADO=0.01     fracción de callbacks perfilados sin cabecera
+    MAX_PERFILES_POR_HORA=30    tope por proceso
+    TOKEN_PERFILADO             si se define, la cabecera debe traer este valor
+    DIR_PERFILES                carpeta de salida (./perfiles)
+"""
+
+import os
+import re
+import time
+import random
+import cProfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, request, has_request_context
+
+PERFILADO_HABILITADO = os.environ.get('PERFILADO', '0').lower() in ('1', 'true', 'si', 'sí')
+MUESTREO_PERFILADO = float(os.environ.get('MUESTREO_PERFILADO', 0))
+MAX_PERFILES_POR_HORA = int(os.environ.get('MAX_PERFILES_POR_HORA', 30))
+TOKEN_PERFILADO = os.environ.get('TOKEN_PERFILADO')
+DIR_PERFILES = os.environ.get('DIR_PERFILES', './perfiles')
+
+CABECERA_PERFILADO = 'X-Perfilar'
+RUTA_CALLBACKS = '/_dash-update-component'
+
+_perfiles_recientes = deque()       # instantes de los perfiles de la última hora
+_lock_cupo = threading.Lock()
+# cProfile no admite dos perfiles activos a la vez en el mismo proceso
+_lock_perfil = threading.Lock()
+
+
+def _cabecera_valida():
+    if not has_request_context():
+        return False
+    valor = request.headers.get(CABECERA_PERFILADO)
+    if not valor:
+        return False
+    return valor == TOKEN_PERFILADO if TOKEN_PERFILADO else True
+
+
+def _tomar_cupo():
+    """
+    Cuenta un perfil contra MAX_PERFILES_POR_HORA; False si ya no hay cupo
+    """
+    ahora = time.monotonic()
+    with _lock_cupo:
+        while _perfiles_recientes and ahora - _perfiles_recientes[0] > 3600:
+            _perfiles_recientes.popleft()
+        if len(_perfiles_recientes) >= MAX_PERFILES_POR_HORA:
+            return False
+        _perfiles_recientes.append(ahora)
+        return True
+
+
+def debe_perfilar():
+    """
+    True si esta ejecución debe perfilarse: hook activo, pedido con la
+    cabecera (o elegido por muestreo) y con cupo disponible
+    """
+    if not PERFILADO_HABILITADO:
+        return False
+    if not (_cabecera_valida() or (MUESTREO_PERFILADO and random.random() < MUESTREO_PERFILADO)):
+        return False
+    return _tomar_cupo()
+
+
+def _ruta_perfil(nombre):
+    nombre_archivo = re.sub(r'[^A-Za-z0-9_.-]+', '_', nombre).strip('_')[:80] or 'perfil'
+    return os.path.join(DIR_PERFILES, f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{nombre_archivo}.prof")
+
+
+def _iniciar_perfil():
+    """
+    Crea y activa un perfil, o None si ya hay uno activo en el proceso
+    """
+    if not _lock_perfil.acquire(blocking=False):
+        return None
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        # Otra herramienta de perfilado ya está activa
+        _lock_perfil.release()
+        return None
+    return perfil, time.perf_counter()
+
+
+def _terminar_perfil(iniciado, nombre):
+    perfil, inicio = iniciado
+    try:
+        perfil.disable()
+    finally:
+        _lock_perfil.release()
+
+    try:
+        os.makedirs(DIR_PERFILES, exist_ok=True)
+        ruta = _ruta_perfil(nombre)
+        perfil.dump_stats(ruta)
+        print(f"🔬 Perfil guardado: {ruta} ({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el perfil de {nombre}: {e}")
+
+
+@contextmanager
+def perfilar(nombre):
+    """
+    Perfila el bloque y guarda el resultado (el llamador ya decidió perfilar)
+    """
+    iniciado = _iniciar_perfil()
+    try:
+        yield
+    finally:
+        if iniciado is not None:
+            _terminar_perfil(iniciado, nombre)
+
+
+def ejecutar_perfilado(nombre, funcion, *args):
+    """
+    funcion(*args) dentro de un perfil. Es una función de módulo para poder
+    enviarla al pool de procesos de reportes (trabajos_reportes)
+    """
+    with perfilar(nombre):
+        return funcion(*args)
+
+
+def instalar_perfilado(app):
+    """
+    Perfila los callbacks de Dash elegidos por debe_perfilar. No registra
+    nada si PERFILADO no está activo.
+    """
+    if not PERFILADO_HABILITADO:
+        return False
+
+    server = app.server
+
+    def iniciar():
+        if request.path == RUTA_CALLBACKS and debe_perfilar():
+            g.perfil_callback = _iniciar_perfil()
+
+    def terminar(_error=None):
+        iniciado = g.pop('perfil_callback', None)
+        if iniciado is None:
+            return
+        salida = (request.get_json(silent=True) or {}).get('output', 'callback')
+        definicion = app.callback_map.get(salida) or {}
+        nombre = getattr(definicion.get('callback'), '__name__', salida)
+        _terminar_perfil(iniciado, nombre)
+
+    server.before_request(iniciar)
+    # teardown: corre también si el callback lanzó una excepción
+    server.teardown_request(terminar)
+    print(f"🔬 Perfilado activo (cabecera {CABECERA_PERFILADO}, muestreo {MUESTREO_PERFILADO}, "
+          f"máx. {MAX_PERFILES_POR_HORA}/h) -> {DIR_PERFILES}")
+    return True
@@ -3,9 +3,14 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import pickle
+import json
 import os
 import logging
 
+# Resultado de benchmarks/paridad.py --instalado: tablas cuyos pre-cálculos
+# coinciden con el cálculo en tiempo real
+RUTA_PARIDAD = './data/paridad_precalculos.json'
+
 def generar_precalculos_completos():
     """
     Genera TODOS los cálculos estáticos usando las MISMAS FÓRMULAS del código original
@@ -52,6 +57,11 @@ def generar_precalculos_completos():
         columnas_fondos = [col for col in df.columns if col != 'Dates']
         print(f"   Fondos encontrados: {len(columnas_fondos)}")
         
+        # Las referencias en tiempo real validan períodos, meses y años contra
+        # la última fecha del panel (no la de cada fondo)
+        fecha_panel = df['Dates'].max()
+        años_panel = sorted(df['Dates'].dt.year.unique())
+        
         # ESTRUCTURA PARA DIFERENTES TIPOS DE CÁLCULOS
         precalculos[moneda] = {
             'rentabilidades_acumuladas': {},      # Para tabla de rentabilidades acumuladas
@@ -72,39 +82,39 @@ def generar_precalculos_completos():
                 # Obtener datos del fondo con fechas
                 precios = df[['Dates', codigo_fondo]].dropna()
                 
-                if len(precios) > 30:  # Mínimo 30 días de datos
+                if len(precios) > 0:  # Igual que las referencias: cualquier fondo con datos
                     # =====================================================================
                     # A) RENTABILIDADES ACUMULADAS (misma fórmula que calcular_rentabilidades)
                     # =====================================================================
-                    rentab_acum = calcular_rentabilidades_acumuladas_fondo(precios)
+                    rentab_acum = calcular_rentabilidades_acumuladas_fondo(precios, fecha_panel)
                     if rentab_acum:
                         precalculos[moneda]['rentabilidades_acumuladas'][codigo_fondo] = rentab_acum
                     
                     # =====================================================================
                     # B) RENTABILIDADES ANUALIZADAS (misma fórmula que calcular_rentabilidades_anualizadas)
                     # =====================================================================
-                    rentab_anual = calcular_rentabilidades_anualizadas_fondo(precios)
+                    rentab_anual = calcular_rentabilidades_anualizadas_fondo(precios, fecha_panel)
                     if rentab_anual:
                         precalculos[moneda]['rentabilidades_anualizadas'][codigo_fondo] = rentab_anual
                     
                     # =====================================================================
                     # C) RENTABILIDADES POR AÑO (misma fórmula que calcular_rentabilidades_por_año)
                     # =====================================================================
-                    rentab_por_año = calcular_rentabilidades_por_año_fondo(precios)
+                    rentab_por_año = calcular_rentabilidades_por_año_fondo(precios, años_panel)
                     if rentab_por_año:
                         precalculos[moneda]['rentabilidades_por_año'][codigo_fondo] = rentab_por_año
                     
                     # =====================================================================
                     # D) RETORNOS MENSUALES (misma fórmula que calcular_retornos_mensuales_completos)
                     # =====================================================================
-                    retornos_mens = calcular_retornos_mensuales_fondo(precios)
+                    retornos_mens = calcular_retornos_mensuales_fondo(precios, fecha_panel)
                     if retornos_mens:
                         precalculos[moneda]['retornos_mensuales'][codigo_fondo] = retornos_mens
                     
                     # =====================================================================
                     # E) INFORME PDF COMPLETO (misma fórmula que calcular_rentabilidades_completas_pdf)
                     # =====================================================================
-                    informe_completo = calcular_informe_pdf_completo_fondo(precios)
+                    informe_completo = calcular_informe_pdf_completo_fondo(precios, fecha_panel)
                     if informe_completo:
                         precalculos[moneda]['informe_pdf_completo'][codigo_fondo] = informe_completo
                     
@@ -210,48 +220,36 @@ def calcular_rentabilidad_ytd(precios, precio_actual):
         return np.nan
 
 def calcular_rentabilidad_anualizada_periodo(precios, dias):
-    """Misma función que en Pagina.py"""
-    try:
-        if len(precios) < 2:
-            return np.nan
-            
-        fecha_objetivo = precios['Dates'].max() - timedelta(days=dias)
-        datos_periodo = precios[precios['Dates'] >= fecha_objetivo]
-        
-        if len(datos_periodo) == 0:
-            return np.nan
-            
+    """Misma función que en Pagina.py: años reales entre la primera y la última fecha del período"""
+    fecha_objetivo = precios['Dates'].max() - timedelta(days=dias)
+    datos_periodo = precios[precios['Dates'] >= fecha_objetivo]
+    
+    if len(datos_periodo) > 1:
         precio_inicial = datos_periodo.iloc[0, 1]
-        precio_final = precios.iloc[-1, 1]
-        
-        if pd.isna(precio_inicial) or pd.isna(precio_final) or precio_inicial == 0:
-            return np.nan
-        
-        # Calcular años exactos del período
-        años_periodo = dias / 365.25
+        precio_final = datos_periodo.iloc[-1, 1]
+        fecha_inicial = datos_periodo['Dates'].iloc[0]
+        fecha_final = datos_periodo['Dates'].iloc[-1]
         
-        # Rentabilidad anualizada
-        rentabilidad_anualizada = (((precio_final / precio_inicial) ** (1/años_periodo)) - 1) * 100
-        
-        return rentabilidad_anualizada
-        
-    except Exception as e:
-        return np.nan
+        años = (fecha_final - fecha_inicial).days / 365.25
+        if años > 0:
+            return (((precio_final / precio_inicial) ** (1/años)) - 1) * 100
+    return np.nan
 
-def calcular_rentabilidades_acumuladas_fondo(precios):
+def calcular_rentabilidades_acumuladas_fondo(precios, fecha_panel=None):
     """
     Replica exactamente la lógica de calcular_rentabilidades() en Pagina.py
+    (fecha_panel: última fecha del DataFrame completo, para validar períodos)
     """
     try:
         if len(precios) == 0:
             return None
             
         precio_actual = precios.iloc[-1, 1]
-        fecha_actual = precios['Dates'].max()
+        fecha_actual = fecha_panel if fecha_panel is not None else precios['Dates'].max()
         
         resultado = {
             'precio_actual': float(precio_actual),
-            'fecha_actual': fecha_actual.isoformat(),
+            'fecha_actual': precios['Dates'].max().isoformat(),
             'TAC': np.random.uniform(0.5, 2.5),  # Simulado como en original
         }
         
@@ -296,9 +294,10 @@ def calcular_rentabilidades_acumuladas_fondo(precios):
     except Exception as e:
         return None
 
-def calcular_rentabilidades_anualizadas_fondo(precios):
+def calcular_rentabilidades_anualizadas_fondo(precios, fecha_panel=None):
     """
     Replica exactamente la lógica de calcular_rentabilidades_anualizadas() en Pagina.py
+    (fecha_panel: última fecha del DataFrame completo, para validar períodos)
     """
     try:
         if len(precios) == 0:
@@ -324,7 +323,7 @@ def calcular_rentabilidades_anualizadas_fondo(precios):
         }
         
         # VALIDACIONES PARA RENTABILIDADES ANUALIZADAS
-        fecha_actual = precios['Dates'].max()
+        fecha_actual = fecha_panel if fecha_panel is not None else precios['Dates'].max()
         
         # 1 Año
         if validar_periodo_disponible(precios, 365, fecha_actual):
@@ -349,15 +348,16 @@ def calcular_rentabilidades_anualizadas_fondo(precios):
     except Exception as e:
         return None
 
-def calcular_rentabilidades_por_año_fondo(precios):
+def calcular_rentabilidades_por_año_fondo(precios, años_panel=None):
     """
     Replica exactamente la lógica de calcular_rentabilidades_por_año() en Pagina.py
+    (años_panel: años del DataFrame completo; los anteriores al fondo van con "-")
     """
     try:
         if len(precios) == 0:
             return None
             
-        años = sorted(precios['Dates'].dt.year.unique())
+        años = años_panel if años_panel is not None else sorted(precios['Dates'].dt.year.unique())
         fecha_inicio_fondo = precios['Dates'].min()
         
         resultado = {
@@ -483,22 +483,23 @@ def calcular_rentabilidad_12_meses(precios, fecha_actual):
     except Exception as e:
         return np.nan
 
-def calcular_retornos_mensuales_fondo(precios):
+def calcular_retornos_mensuales_fondo(precios, fecha_panel=None):
     """
     Replica exactamente la lógica de calcular_retornos_mensuales_completos() en anexo_mensual_module.py
+    (fecha_panel: última fecha del DataFrame completo, define los 12 meses)
     """
     try:
         if len(precios) == 0:
             return None
             
-        fecha_actual = precios['Dates'].max()
+        fecha_actual = fecha_panel if fecha_panel is not None else precios['Dates'].max()
         
         # Obtener los meses para calcular
         meses_calculo = obtener_meses_para_calculo(fecha_actual)
         
         resultado = {
             'precio_actual': float(precios.iloc[-1, 1]),
-            'fecha_actual': fecha_actual.isoformat(),
+            'fecha_actual': precios['Dates'].max().isoformat(),
             'meses_disponibles': [mes_texto for mes_texto, _, _ in meses_calculo],
             'retornos_mensuales': {}
         }
@@ -510,7 +511,7 @@ def calcular_retornos_mensuales_fondo(precios):
         
         # Calcular rentabilidad 12 meses
         rent_12m = calcular_rentabilidad_12_meses(precios, fecha_actual)
-        resultado['retornos_mensuales']['12_M'] = rent_12m
+        resultado['retornos_mensuales']['12 M'] = rent_12m
         
         return resultado
         
@@ -667,15 +668,16 @@ def calcular_rentabilidad_anualizada_con_validacion(precios, años_objetivo):
     except Exception as e:
         return np.nan
 
-def calcular_informe_pdf_completo_fondo(precios):
+def calcular_informe_pdf_completo_fondo(precios, fecha_panel=None):
     """
     Replica exactamente la lógica de calcular_rentabilidades_completas_pdf() en informe_module.py
+    (fecha_panel: última fecha del DataFrame completo, define MTD, YTD y años)
     """
     try:
         if len(precios) == 0:
             return None
             
-        fecha_actual = precios['Dates'].max()
+        fecha_actual = fecha_panel if fecha_panel is not None else precios['Dates'].max()
         año_1, año_2 = obtener_años_automaticos(fecha_actual)
         precio_actual = precios.iloc[-1, 1]
         
@@ -697,7 +699,7 @@ def calcular_informe_pdf_completo_fondo(precios):
         
         resultado = {
             'precio_actual': float(precio_actual),
-            'fecha_actual': fecha_actual.isoformat(),
+            'fecha_actual': precios['Dates'].max().isoformat(),
             'TAC': round(np.random.uniform(0.5, 2.5), 2),  # Simulado
             'diaria': rent_diaria,
             '1_mes': rent_1m,
@@ -869,16 +871,20 @@ def obtener_retornos_mensuales_precalculados(moneda, codigos_fondos, nombres_fon
     
     return pd.DataFrame(resultados).round(2) if resultados else pd.DataFrame()
 
-def obtener_informe_pdf_completo_precalculado(moneda, codigos_fondos, nombres_fondos):
+def obtener_informe_pdf_completo_precalculado(moneda, codigos_fondos, nombres_fondos, indice_codigos=False):
     """
     Obtiene datos completos para informe PDF desde pre-cálculos
     Replica el formato exacto de calcular_rentabilidades_completas_pdf() en informe_module.py
+    
+    Con indice_codigos=True el índice del DataFrame es el código de cada fila,
+    para poder repartir un cálculo conjunto (p. ej. por categoría)
     """
     precalculos = cargar_precalculos()
     if not precalculos:
         return None
     
     resultados = []
+    codigos_resultado = []
     
     for i, (codigo, nombre) in enumerate(zip(codigos_fondos, nombres_fondos)):
         if codigo in precalculos[moneda]['informe_pdf_completo']:
@@ -906,7 +912,7 @@ def obtener_informe_pdf_completo_precalculado(moneda, codigos_fondos, nombres_fo
             resultados.append({
                 'Fondo': fondo,
                 'Serie': serie,
-                'Valor Cuota': round(datos['precio_actual'], 2),
+                'Valor Cuota': np.round(datos['precio_actual'], 2),  # redondeo de numpy, como la referencia
                 'TAC': datos['TAC'],
                 'Diaria': datos['diaria'],
                 '1 Mes': datos['1_mes'],
@@ -919,8 +925,12 @@ def obtener_informe_pdf_completo_precalculado(moneda, codigos_fondos, nombres_fo
                 '3 Años*': datos['3_años_anual'],
                 '5 Años**': datos['5_años_anual']
             })
+            codigos_resultado.append(codigo)
     
-    return pd.DataFrame(resultados).round(2) if resultados else pd.DataFrame()
+    if not resultados:
+        return pd.DataFrame()
+    
+    return pd.DataFrame(resultados, index=codigos_resultado if indice_codigos else None).round(2)
 
 def obtener_valor_cuota_actual_precalculado(moneda, codigo_fondo):
     """
@@ -954,6 +964,35 @@ def verificar_precalculos_vigentes():
         print(f"❌ Error verificando vigencia: {e}")
         return False
 
+def precalculos_validados(tabla):
+    """
+    True si los pre-cálculos están vigentes y la tabla ('acumuladas',
+    'anualizadas', 'por_año', 'informe' o 'anexo') pasó la verificación de
+    paridad contra el cálculo en tiempo real (benchmarks/paridad.py --instalado,
+    en el build) para ESTE archivo de pre-cálculos. Si no, se calcula en
+    tiempo real.
+    """
+    try:
+        precalculos = cargar_precalculos()
+        if not precalculos:
+            return False
+        
+        fecha_generacion = datetime.fromisoformat(precalculos['timestamp'])
+        if (datetime.now() - fecha_generacion).total_seconds() >= 24 * 3600:
+            return False
+        
+        if not os.path.exists(RUTA_PARIDAD):
+            return False
+        with open(RUTA_PARIDAD, 'r', encoding='utf-8') as f:
+            paridad = json.load(f)
+        
+        return (paridad.get('timestamp_precalculos') == precalculos['timestamp']
+                and paridad.get('tablas', {}).get(tabla) is True)
+        
+    except Exception as e:
+        print(f"❌ Error verificando paridad de pre-cálculos: {e}")
+        return False
+
 def mostrar_estadisticas_precalculos():
     """Muestra estadísticas de los pre-cálculos generados"""
     precalculos = cargar_precalculos()
@@ -0,0 +1,231 @@
+"""
+Recursos compartidos de los PDF (fuentes, logos, colores y estilos)
+Se resuelven una sola vez por proceso, la primera vez que se genera un PDF,
+en lugar de buscar archivos y registrar fuentes en cada descarga
+"""
+
+import os
+import threading
+
+# Ubicaciones donde buscar fuentes y logos (local y Render.com)
+RUTAS_RECURSOS = ['./assets/', 'assets/', './static/', 'static/', './']
+
+FUENTES_SURA = ('SuraSans-Regular', 'SuraSans-SemiBold', 'SuraSans-Bold')
+
+_recursos = None
+_lock = threading.Lock()
+
+
+def _buscar_archivo(nombre_archivo):
+    """
+    Primera ruta de RUTAS_RECURSOS donde existe el archivo, o None
+    """
+    for ruta in RUTAS_RECURSOS:
+        ruta_archivo = os.path.join(ruta, nombre_archivo)
+        if os.path.exists(ruta_archivo):
+            return ruta_archivo
+    return None
+
+
+def _registrar_fuentes():
+    """
+    Registra las fuentes SuraSans en ReportLab.
+
+    ReportLab solo lee fuentes con contornos TrueType: se prueban primero los
+    .ttf y luego los .otf de assets/ (que solo sirven si no son CFF).
+    Si ninguno sirve se usa Helvetica; el intento se hace una vez por proceso.
+    """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    for extension in ('.ttf', '.otf'):
+        rutas = [_buscar_archivo(nombre + extension) for nombre in FUENTES_SURA]
+        if not all(rutas):
+            continue
+
+        try:
+            fuentes = [TTFont(nombre, ruta) for nombre, ruta in zip(FUENTES_SURA, rutas)]
+        except Exception as e:
+            print(f"⚠️ Fuentes SuraSans {extension} no compatibles con ReportLab: {e}")
+            continue
+
+        for fuente in fuentes:
+            pdfmetrics.registerFont(fuente)
+        print(f"✅ Fuentes SuraSans cargadas desde: {os.path.dirname(rutas[0])}/ ({extension})")
+        return True
+
+    print("⚠️ No se pudieron cargar las fuentes SuraSans, usando fuentes del sistema")
+    return False
+
+
+def _cargar_logo(nombre_archivo):
+    """
+    Logo leído una vez (ImageReader), o None si no existe
+    """
+    from reportlab.lib.utils import ImageReader
+
+    ruta_logo = _buscar_archivo(nombre_archivo)
+    if ruta_logo is None:
+        return None
+
+    try:
+        return ImageReader(ruta_logo)
+    except Exception as e:
+        print(f"⚠️ No se pudo leer el logo {ruta_logo}: {e}")
+        return None
+
+
+def _crear_recursos():
+    """
+    Fuentes, logos, colores y estilos de párrafo comunes a informe y anexo
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER
+
+    fuentes_disponibles = _registrar_fuentes()
+    fuente_regular = 'SuraSans-Regular' if fuentes_disponibles else 'Helvetica'
+    fuente_semibold = 'SuraSans-SemiBold' if fuentes_disponibles else 'Helvetica-Bold'
+
+    # COLORES EXACTOS DEL INFORME OFICIAL SURA
+    colores = {
+        'sura_black': colors.HexColor('#24272A'),
+        'sura_white': colors.white,
+        'sura_gray': colors.HexColor('#D4D8D8'),
+        'subtitle_gray': colors.HexColor('#5A646E'),
+        'positive': colors.HexColor('#008000'),
+        'negative': colors.HexColor('#FF0000'),
+        'neutral': colors.black,
+        'bg_alternating': colors.HexColor('#F8F9FA'),
+    }
+
+    styles = getSampleStyleSheet()
+
+    estilos = {
+        'header': ParagraphStyle(
+            'HeaderStyle',
+            parent=styles['Normal'],
+            fontSize=16,
+            spaceAfter=5,
+            alignment=TA_LEFT,
+            textColor=colores['sura_black'],
+            fontName=fuente_semibold
+        ),
+        'info': ParagraphStyle(
+            'InfoStyle',
+            parent=styles['Normal'],
+            fontSize=8,
+            spaceAfter=15,
+            alignment=TA_LEFT,
+            textColor=colores['subtitle_gray'],
+            fontName=fuente_regular
+        ),
+        'footer_principal': ParagraphStyle(
+            'FooterStylePrincipal',
+            parent=styles['Normal'],
+            fontSize=9,
+            alignment=TA_CENTER,
+            textColor=colores['sura_black'],
+            fontName=fuente_semibold,
+            spaceAfter=8
+        ),
+        'footer_notas': ParagraphStyle(
+            'FooterStyleNotas',
+            parent=styles['Normal'],
+            fontSize=7,
+            alignment=TA_LEFT,
+            textColor=colores['subtitle_gray'],
+            fontName=fuente_regular,
+            spaceAfter=3
+        ),
+        'footer_secundario': ParagraphStyle(
+            'FooterStyleSecundario',
+            parent=styles['Normal'],
+            fontSize=8,
+            alignment=TA_CENTER,
+            textColor=colores['subtitle_gray'],
+            fontName=fuente_regular,
+            spaceAfter=5
+        ),
+    }
+
+    # Título de categoría: el informe lo desplaza 1pt, el anexo ocupa todo el ancho
+    for clave, sangria in (('categoria', 1), ('categoria_ancho_completo', 0)):
+        estilos[clave] = ParagraphStyle(
+            'CategoryStyle',
+            parent=styles['Normal'],
+            fontSize=12,
+            leading=14,
+            spaceBefore=12,
+            spaceAfter=12,
+            textColor=colores['sura_white'],
+            fontName=fuente_semibold,
+            backColor="#9BA4AE",
+            leftIndent=sangria,
+            rightIndent=0,
+            alignment=0
+        )
+
+    return {
+        'fuentes_disponibles': fuentes_disponibles,
+        'fuente_regular': fuente_regular,
+        'fuente_semibold': fuente_semibold,
+        'logo_sura': _cargar_logo('sura_logo_blanco.png'),
+        'logo_investments': _cargar_logo('investments_blanco.png'),
+        'colores': colores,
+        'estilos': estilos,
+    }
+
+
+def obtener_recursos_pdf():
+    """
+    Recursos de PDF del proceso (se crean en la primera llamada)
+    """
+    global _recursos
+    if _recursos is None:
+        with _lock:
+            if _recursos is None:
+                _recursos = _crear_recursos()
+    return _recursos
+
+
+def dibujar_barra_superior(canvas, doc):
+    """
+    Barra negra superior con los logos SURA e INVESTMENTS (onPage de las
+    plantillas de informe y anexo). Si falta un logo se escribe el texto.
+    """
+    from reportlab.lib.units import mm
+
+    recursos = obtener_recursos_pdf()
+    color_negro = recursos['colores']['sura_black']
+    color_blanco = recursos['colores']['sura_white']
+    page_width, page_height = doc.pagesize
+
+    canvas.saveState()
+
+    canvas.setFillColor(color_negro)
+    canvas.rect(0, page_height - 25*mm, page_width, 25*mm, fill=1, stroke=0)
+
+    if recursos['logo_sura'] is not None:
+        canvas.drawImage(recursos['logo_sura'],
+                         15*mm, page_height - 22*mm,
+                         width=60*mm, height=12*mm,
+                         preserveAspectRatio=True,
+                         mask='auto')
+    else:
+        canvas.setFillColor(color_blanco)
+        canvas.setFont("Helvetica-Bold", 12)
+        canvas.drawString(15*mm, page_height - 15*mm, "SURA")
+
+    if recursos['logo_investments'] is not None:
+        canvas.drawImage(recursos['logo_investments'],
+                         page_width - 45*mm, page_height - 18*mm,
+                         width=35*mm, height=6*mm,
+                         preserveAspectRatio=True,
+                         mask='auto')
+    else:
+        canvas.setFillColor(color_blanco)
+        canvas.setFont("Helvetica-Bold", 12)
+        canvas.drawString(page_width - 80*mm, page_height - 15*mm, "INVESTMENTS")
+
+    canvas.restoreState()
@@ -0,0 +1,166 @@
+"""
+Registro de fondos: categoría, pertenencia a SURA y códigos por moneda
+Se calcula una vez por carga de datos; los callbacks de informe y anexo solo
+hacen búsquedas en diccionarios en lugar de recorrer y clasificar los fondos
+en cada apertura del modal o descarga
+"""
+
+MONEDAS = ('CLP', 'USD')
+
+# Reglas de categorización, en orden: gana la primera regla cuyos grupos de
+# palabras coinciden todos (al menos una palabra de cada grupo en el nombre)
+REGLAS_CATEGORIAS = [
+    ('Renta Fija Nacional', (('renta', 'bonos', 'deuda'), ('chile', 'chileno', 'nacional'))),
+    ('Renta Fija Internacional', (('renta', 'bonos', 'deuda', 'fixed income'),)),
+    ('Multifondos', (('multiactivo', 'cartera', 'patrimonial'),)),
+    ('Equity (Acciones)', (('equity', 'acciones', 'accionario'),)),
+    ('Estrategias Alternativas', (('dynamic', 'estrategia', 'alternativa', 'hedge'),)),
+]
+CATEGORIA_POR_DEFECTO = 'Otros'
+
+ORDEN_CATEGORIAS = [categoria for categoria, _ in REGLAS_CATEGORIAS] + [CATEGORIA_POR_DEFECTO]
+
+# =============================================================================
+# FONDOS SURA PARA PDFs - LISTA CONFIGURABLE
+# =============================================================================
+
+FONDOS_SURA_PDF = [
+    "Fondo Mutuo SURA Estrategia Conservadora",
+    "Fondo Mutuo SURA Multiactivo Agresivo",
+    "Fondo Mutuo SURA Multiactivo Moderado",
+    "Fondo Mutuo SURA Renta Bonos Chile",
+    "Fondo Mutuo SURA Renta Corporativa Largo Plazo",
+    "Fondo Mutuo SURA Renta Corto Plazo Chile",
+    "Fondo Mutuo SURA Renta Deposito Chile",
+    "Fondo Mutuo SURA Renta Internacional",
+    "Fondo Mutuo SURA Renta Local UF",
+    "Fondo Mutuo SURA Seleccion Acciones Chile",
+    "Fondo Mutuo SURA Seleccion Acciones Emergentes",
+    "Fondo Mutuo SURA Seleccion Acciones Latam",
+    "Fondo Mutuo SURA Seleccion Acciones USA",
+    "Fondo Mutuo SURA Seleccion Global",
+    "Fondo Mutuo SURA Renta Corto Plazo UF Chile",
+    "Fondo Mutuo SURA Money Market Dólar",
+    "Fondo Mutuo SURA Cartera Patrimonial Conservadora",
+    "Renta Local",
+    "Gestion Activa",
+    "Global Desarrollado",
+    "Global Emergente",
+    "Chile Equities"
+]
+
+
+def categoria_fondo(nombre_fondo):
+    """
+    Categoría de un fondo según REGLAS_CATEGORIAS
+    """
+    nombre_lower = nombre_fondo.lower()
+    for categoria, grupos in REGLAS_CATEGORIAS:
+        if all(any(palabra in nombre_lower for palabra in grupo) for grupo in grupos):
+            return categoria
+    return CATEGORIA_POR_DEFECTO
+
+
+def categorizar_fondos(fondos_unicos):
+    """
+    Categoriza los fondos según su tipo
+
+    Args:
+        fondos_unicos (list): Lista de nombres únicos de fondos
+
+    Returns:
+        dict: Diccionario con categorías y sus fondos correspondientes
+    """
+    categorias = {categoria: [] for categoria in ORDEN_CATEGORIAS}
+    for fondo in fondos_unicos:
+        categorias[categoria_fondo(fondo)].append(fondo)
+    return categorias
+
+
+def filtrar_solo_fondos_sura(fondos_unicos, fondos_a_series, fondo_serie_a_codigo):
+    """
+    Filtra solo los fondos SURA para usar en PDFs
+    """
+    fondos_sura_filtrados = {}
+    fondo_serie_codigo_sura = {}
+
+    for fondo in FONDOS_SURA_PDF:
+        if fondo in fondos_a_series:
+            fondos_sura_filtrados[fondo] = fondos_a_series[fondo]
+
+            # Copiar los códigos correspondientes
+            for moneda in MONEDAS:
+                if moneda in fondos_a_series[fondo]:
+                    for serie in fondos_a_series[fondo][moneda]:
+                        if (fondo, serie, moneda) in fondo_serie_a_codigo:
+                            fondo_serie_codigo_sura[(fondo, serie, moneda)] = fondo_serie_a_codigo[(fondo, serie, moneda)]
+
+    return list(fondos_sura_filtrados.keys()), fondos_sura_filtrados, fondo_serie_codigo_sura
+
+
+def crear_registro_fondos(fondos_unicos, fondos_a_series, fondo_serie_a_codigo):
+    """
+    Registro de fondos para los reportes (informe y anexo).
+
+    Returns:
+        dict con:
+            'categoria_por_fondo': fondo -> categoría (todos los fondos)
+            'fondos_sura', 'fondos_a_series_sura', 'fondo_serie_codigo_sura':
+                lo mismo que filtrar_solo_fondos_sura
+            'categorias_sura': categoría -> fondos SURA (como categorizar_fondos)
+            'por_moneda': moneda -> {'codigos', 'nombres' (en orden de reporte),
+                'codigo_a_categoria', 'por_categoria': categoría -> {'codigos', 'nombres'}}
+    """
+    categoria_por_fondo = {fondo: categoria_fondo(fondo) for fondo in fondos_unicos}
+
+    fondos_sura, fondos_a_series_sura, fondo_serie_codigo_sura = filtrar_solo_fondos_sura(
+        fondos_unicos, fondos_a_series, fondo_serie_a_codigo
+    )
+
+    categorias_sura = {categoria: [] for categoria in ORDEN_CATEGORIAS}
+    for fondo in fondos_sura:
+        categoria = categoria_por_fondo.get(fondo) or categoria_fondo(fondo)
+        categorias_sura[categoria].append(fondo)
+
+    por_moneda = {}
+    for moneda in MONEDAS:
+        codigos = []
+        nombres = []
+        codigo_a_categoria = {}
+        por_categoria = {}
+
+        for categoria in ORDEN_CATEGORIAS:
+            grupo = {'codigos': [], 'nombres': []}
+            for fondo in categorias_sura[categoria]:
+                for serie in fondos_a_series_sura[fondo].get(moneda, []):
+                    codigo = fondo_serie_codigo_sura.get((fondo, serie, moneda))
+                    if codigo is None:
+                        continue
+                    nombre_completo = f"{fondo} - {serie}"
+                    grupo['codigos'].append(codigo)
+                    grupo['nombres'].append(nombre_completo)
+                    codigos.append(codigo)
+                    nombres.append(nombre_completo)
+                    codigo_a_categoria.setdefault(codigo, categoria)
+
+            if grupo['codigos']:
+                por_categoria[categoria] = grupo
+
+        por_moneda[moneda] = {
+            'codigos': codigos,
+            'nombres': nombres,
+            'codigo_a_categoria': codigo_a_categoria,
+            'por_categoria': por_categoria,
+        }
+
+    series_por_moneda = ', '.join(f"{moneda}: {len(por_moneda[moneda]['codigos'])} series" for moneda in MONEDAS)
+    print(f"🗂️ Registro de fondos: {len(categoria_por_fondo)} fondos, {len(fondos_sura)} SURA ({series_por_moneda})")
+
+    return {
+        'categoria_por_fondo': categoria_por_fondo,
+        'fondos_sura': fondos_sura,
+        'fondos_a_series_sura': fondos_a_series_sura,
+        'fondo_serie_codigo_sura': fondo_serie_codigo_sura,
+        'categorias_sura': categorias_sura,
+        'por_moneda': por_moneda,
+    }
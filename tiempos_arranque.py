@@ -0,0 +1,98 @@
+"""
+Tiempos de arranque de Pagina: cada importación pesada y cada fase de la
+carga (datos, registro de fondos, layout, callbacks), más la duración de la
+primera request que atiende cada proceso (en frío: importaciones diferidas,
+cachés vacías). El detalle se imprime al terminar la carga y queda en /metrics.
+
+Pagina importa este módulo antes que cualquier otro para que el reloj de las
+fases parta con el proceso. La primera respuesta no se cuenta desde ese
+reloj: con preload_app la importación ocurre en el maestro, mucho antes de que
+el worker reciba tráfico. El arranque completo hasta la primera página se mide
+en benchmarks/arranque.py.
+
+Variables de entorno:
+    TIEMPOS_ARRANQUE=0    no imprime el detalle (se sigue midiendo)
+"""
+
+import os
+import sys
+import time
+import threading
+
+MOSTRAR_TIEMPOS_ARRANQUE = os.environ.get('TIEMPOS_ARRANQUE', '1').lower() not in ('0', 'false', 'no')
+
+INICIO_ARRANQUE = time.perf_counter()
+
+_fases = []                         # (fase, segundos, módulos nuevos en sys.modules)
+_marca = {'instante': INICIO_ARRANQUE, 'modulos': len(sys.modules)}
+_primera_respuesta = {}            # pid -> segundos de su primera request
+_lock = threading.Lock()
+
+
+def marcar_fase(fase):
+    """
+    Cierra la fase que termina en este punto: tiempo desde la marca anterior
+    y cantidad de módulos que se importaron en ella
+    """
+    ahora = time.perf_counter()
+    modulos = len(sys.modules)
+    _fases.append((fase, ahora - _marca['instante'], modulos - _marca['modulos']))
+    _marca['instante'] = ahora
+    _marca['modulos'] = modulos
+
+
+def fases_arranque():
+    """
+    Returns:
+        list: (fase, segundos, módulos importados) en orden
+    """
+    return list(_fases)
+
+
+def segundos_primera_respuesta():
+    """
+    Duración de la primera request que atendió este proceso, o None
+    """
+    return _primera_respuesta.get(os.getpid())
+
+
+def mostrar_resumen_arranque():
+    total = sum(segundos for _, segundos, _ in _fases)
+    if not MOSTRAR_TIEMPOS_ARRANQUE:
+        return total
+
+    print(f"⏱️ Arranque en {total:.2f}s (pid {os.getpid()}):")
+    for fase, segundos, modulos in _fases:
+        detalle = f", {modulos} módulos" if modulos else ''
+        print(f"   {fase:<32} {segundos * 1000:8.0f} ms{detalle}")
+    return total
+
+
+def instalar_primera_respuesta(app):
+    """
+    Anota (una vez por proceso) la duración de la primera request que
+    atiende el servidor Flask, de su inicio a su respuesta. Se indexa por pid:
+    los workers heredan el diccionario del maestro al hacer fork.
+    """
+    from flask import g
+
+    server = app.server
+
+    def iniciar():
+        if os.getpid() not in _primera_respuesta:
+            g.inicio_primera_respuesta = time.perf_counter()
+
+    def anotar(response):
+        inicio = g.get('inicio_primera_respuesta')
+        pid = os.getpid()
+        if inicio is not None and pid not in _primera_respuesta:
+            with _lock:
+                if pid not in _primera_respuesta:
+                    _primera_respuesta[pid] = time.perf_counter() - inicio
+                    if MOSTRAR_TIEMPOS_ARRANQUE:
+                        print(f"⏱️ Primera respuesta en {_primera_respuesta[pid]:.2f}s "
+                              f"(pid {pid})")
+        return response
+
+    server.before_request(iniciar)
+    server.after_request(anotar)
@@ -0,0 +1,314 @@
+"""
+Ejecución en segundo plano de las descargas de reportes (PDF / Excel)
+Los archivos se generan en un pool de procesos acotado para no bloquear los
+workers web; el navegador consulta el estado con un dcc.Interval
+
+El estado y el resultado de cada trabajo quedan en disco (DIR_TRABAJOS), no
+en la memoria del worker que lo encoló: la consulta puede llegar a cualquier
+worker de gunicorn del host y encontrar el mismo trabajo.
+    DIR_TRABAJOS/trabajo-<id>.json      estado ('pendiente', 'listo', 'error')
+    DIR_TRABAJOS/trabajo-<id>.bin       archivo generado
+    DIR_TRABAJOS/clave-<huella>.json    id del trabajo de esa clave de reporte
+
+Los procesos del pool salen de un forkserver y no de un fork del worker: el
+worker corre varios hilos y un fork copiaría los locks que otro hilo tenga
+tomados en ese momento.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import fcntl
+    LOCK_ARCHIVO_DISPONIBLE = True
+except ImportError:
+    LOCK_ARCHIVO_DISPONIBLE = False
+
+# Procesos dedicados a renderizar reportes (por worker web)
+MAX_PROCESOS_REPORTES = int(os.environ.get('MAX_PROCESOS_REPORTES', 2))
+
+# Tiempo que se conserva un trabajo (para quien se adjunte o consulte tarde).
+# Un trabajo que sigue 'pendiente' después de esto se da por abandonado
+# (su worker se reinició a mitad de camino).
+SEGUNDOS_RETENCION_TRABAJOS = int(os.environ.get('SEGUNDOS_RETENCION_TRABAJOS', 600))
+
+DIR_TRABAJOS = os.environ.get('DIR_TRABAJOS', './data/trabajos')
+
+# Módulos que el forkserver importa una vez para que cada proceso del pool
+# parta con ellos. Solo los de reportes: el script principal no se precarga
+# (con `python Pagina.py` eso llevaría los datos y la app Dash al forkserver).
+MODULOS_PRECARGADOS = ['informe_module', 'anexo_mensual_module']
+
+_pool = None
+_lock = threading.Lock()
+
+_PATRON_ID = re.compile(r'[0-9a-f]{32}')
+
+
+def iniciar_pool_reportes():
+    """
+    Crea el pool y arranca su forkserver. Se llama al iniciar cada worker
+    (gunicorn.conf.py, post_worker_init) o antes de app.run_server, mientras
+    el proceso todavía tiene un solo hilo.
+
+    Los hijos del pool vuelven a ejecutar el script principal si __main__
+    tiene __file__; quien arranca el servidor desde su propio script (Pagina)
+    debe ocultarlo antes (ver su bloque __main__).
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                contexto = multiprocessing.get_context('forkserver')
+                contexto.set_forkserver_preload(MODULOS_PRECARGADOS)
+                from multiprocessing import forkserver
+                forkserver.ensure_running()
+            else:
+                contexto = multiprocessing.get_context()
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROCESOS_REPORTES, mp_context=contexto)
+            print(f"🧵 Pool de reportes iniciado ({MAX_PROCESOS_REPORTES} procesos, "
+                  f"{contexto.get_start_method()}, pid {os.getpid()})")
+    return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _ruta_trabajo(id_trabajo, extension='json'):
+    return os.path.join(DIR_TRABAJOS, f"trabajo-{id_trabajo}.{extension}")
+
+
+def _ruta_clave(huella_clave):
+    return os.path.join(DIR_TRABAJOS, f"clave-{huella_clave}.json")
+
+
+def _huella_clave(clave):
+    return hashlib.sha1(repr(clave).encode()).hexdigest()[:16]
+
+
+def _escribir_atomico(ruta, contenido):
+    """
+    Temporal + rename: quien consulta nunca ve un archivo a medio escribir
+    """
+    ruta_temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(ruta_temporal, 'wb') as f:
+        f.write(contenido)
+    os.replace(ruta_temporal, ruta)
+
+
+def _escribir_estado(id_trabajo, estado):
+    _escribir_atomico(_ruta_trabajo(id_trabajo), json.dumps(estado).encode('utf-8'))
+
+
+def _leer_json(ruta):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _eliminar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+@contextmanager
+def _registro_bloqueado():
+    """
+    Lock del registro de trabajos entre hilos y, con fcntl, entre los
+    workers del host
+    """
+    with _lock:
+        os.makedirs(DIR_TRABAJOS, exist_ok=True)
+        if not LOCK_ARCHIVO_DISPONIBLE:
+            yield
+            return
+        with open(os.path.join(DIR_TRABAJOS, 'registro.lock'), 'w') as archivo_lock:
+            fcntl.flock(archivo_lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(archivo_lock, fcntl.LOCK_UN)
+
+
+def _limpiar_trabajos_vencidos():
+    """
+    Elimina los trabajos iniciados hace más de SEGUNDOS_RETENCION_TRABAJOS
+    (se llama con el registro bloqueado)
+    """
+    ahora = time.time()
+    for nombre in os.listdir(DIR_TRABAJOS):
+        if not (nombre.startswith('trabajo-') and nombre.endswith('.json')):
+            continue
+        id_trabajo = nombre[len('trabajo-'):-len('.json')]
+        estado = _leer_json(_ruta_trabajo(id_trabajo))
+        if estado is not None and ahora - estado['inicio'] <= SEGUNDOS_RETENCION_TRABAJOS:
+            continue
+
+        ruta_clave = _ruta_clave(estado['huella_clave']) if estado else None
+        if ruta_clave and (_leer_json(ruta_clave) or {}).get('id') == id_trabajo:
+            _eliminar(ruta_clave)
+        _eliminar(_ruta_trabajo(id_trabajo, 'bin'))
+        _eliminar(_ruta_trabajo(id_trabajo))
+
+
+def _trabajo_reutilizable(clave):
+    """
+    Id del trabajo con esa clave si sigue en curso o terminó con resultado
+    (se llama con el registro bloqueado)
+    """
+    id_existente = (_leer_json(_ruta_clave(_huella_clave(clave))) or {}).get('id')
+    if id_existente is None:
+        return None
+
+    estado = _leer_json(_ruta_trabajo(id_existente))
+    if estado is None or estado['estado'] == 'error':
+        return None
+
+    return id_existente
+
+
+def buscar_trabajo(clave):
+    """
+    Devuelve el id de un trabajo idéntico ya encolado (o terminado sin error),
+    para no preparar los datos otra vez. None si no hay.
+    """
+    with _registro_bloqueado():
+        _limpiar_trabajos_vencidos()
+        id_existente = _trabajo_reutilizable(clave)
+    if id_existente is not None:
+        print(f"🔗 Trabajo {id_existente[:8]} reutilizado para {clave}")
+    return id_existente
+
+
+def _ejecutar_trabajo(id_trabajo, estado, funcion, *args):
+    """
+    Corre en el proceso del pool: deja el archivo y el estado final en disco
+    """
+    try:
+        resultado = funcion(*args)
+    except Exception as e:
+        logging.error(f"Error en trabajo {estado['clave']}: {e}")
+        _escribir_estado(id_trabajo, {**estado, 'estado': 'error', 'error': str(e)})
+        return
+
+    if not resultado:
+        _escribir_estado(id_trabajo, {**estado, 'estado': 'error', 'error': 'no se generó el archivo'})
+        return
+
+    # El archivo antes que el estado: 'listo' garantiza que ya está completo
+    _escribir_atomico(_ruta_trabajo(id_trabajo, 'bin'), resultado)
+    _escribir_estado(id_trabajo, {**estado, 'estado': 'listo', 'bytes': len(resultado)})
+
+
+def _vigilar_trabajo(id_trabajo, estado):
+    """
+    Callback del future: si el proceso del pool murió sin escribir el estado
+    final, el trabajo queda como error en vez de 'pendiente' para siempre
+    """
+    def revisar(future):
+        error = future.exception()
+        if error is None:
+            return
+        actual = _leer_json(_ruta_trabajo(id_trabajo))
+        if actual is not None and actual['estado'] == 'pendiente':
+            logging.error(f"Error en trabajo {estado['clave']}: {error}")
+            _escribir_estado(id_trabajo, {**estado, 'estado': 'error', 'error': str(error)})
+    return revisar
+
+
+def enviar_trabajo(clave, funcion, *args):
+    """
+    Encola funcion(*args) en el pool de procesos y devuelve el id del trabajo.
+    Si ya hay un trabajo con la misma clave (en curso o terminado con resultado,
+    encolado por este worker u otro), se devuelve ese id en lugar de generar
+    el archivo otra vez.
+
+    `funcion` y sus argumentos deben poder serializarse (función de módulo) y
+    `funcion` debe devolver los bytes del archivo (o None si no se pudo).
+    """
+    with _registro_bloqueado():
+        _limpiar_trabajos_vencidos()
+
+        id_existente = _trabajo_reutilizable(clave)
+        if id_existente is not None:
+            print(f"🔗 Trabajo {id_existente[:8]} reutilizado para {clave}")
+            return id_existente
+
+        id_trabajo = uuid.uuid4().hex
+        huella_clave = _huella_clave(clave)
+        estado = {
+            'clave': repr(clave),
+            'huella_clave': huella_clave,
+            'estado': 'pendiente',
+            'inicio': time.time(),
+            'pid': os.getpid(),
+        }
+        _escribir_estado(id_trabajo, estado)
+        _escribir_atomico(_ruta_clave(huella_clave), json.dumps({'id': id_trabajo}).encode('utf-8'))
+
+    try:
+        future = iniciar_pool_reportes().submit(_ejecutar_trabajo, id_trabajo, estado, funcion, *args)
+    except BrokenProcessPool:
+        # Un proceso del pool murió (p. ej. por memoria): se crea uno nuevo
+        _descartar_pool()
+        future = iniciar_pool_reportes().submit(_ejecutar_trabajo, id_trabajo, estado, funcion, *args)
+    future.add_done_callback(_vigilar_trabajo(id_trabajo, estado))
+    print(f"📨 Trabajo {id_trabajo[:8]} encolado: {clave}")
+    return id_trabajo
+
+
+def consultar_trabajo(id_trabajo):
+    """
+    Estado de un trabajo (de cualquier worker del host).
+
+    Returns:
+        dict con 'estado' ('pendiente', 'listo', 'error' o 'desconocido'),
+        'resultado' (bytes del archivo, si está listo),
+        'error' (mensaje, si falló) y 'segundos' transcurridos
+    """
+    desconocido = {'estado': 'desconocido', 'resultado': None, 'error': None, 'segundos': 0}
+
+    # El id llega desde el navegador: solo se aceptan ids con el formato propio
+    if not isinstance(id_trabajo, str) or not _PATRON_ID.fullmatch(id_trabajo):
+        return desconocido
+
+    estado = _leer_json(_ruta_trabajo(id_trabajo))
+    if estado is None:
+        return desconocido
+
+    segundos = time.time() - estado['inicio']
+
+    if estado['estado'] == 'pendiente':
+        if segundos > SEGUNDOS_RETENCION_TRABAJOS:
+            return desconocido
+        return {'estado': 'pendiente', 'resultado': None, 'error': None, 'segundos': segundos}
+
+    if estado['estado'] == 'error':
+        return {'estado': 'error', 'resultado': None, 'error': estado.get('error'), 'segundos': segundos}
+
+    try:
+        with open(_ruta_trabajo(id_trabajo, 'bin'), 'rb') as f:
+            resultado = f.read()
+    except OSError:
+        return desconocido
+
+    return {'estado': 'listo', 'resultado': resultado, 'error': None, 'segundos': segundos}